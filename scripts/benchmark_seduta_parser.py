@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Benchmark del parser pagine seduta: estrazione multi-pass vs visita singola.
+
+Confronta su pagine seduta salvate in locale il vecchio percorso (funzioni
+extract_* + find_all_previous('h4') per ogni video) con scan_seduta_page,
+verificando che il risultato sia identico.
+
+Usage:
+    python3 benchmark_seduta_parser.py pagine/                 # tutte le *.html
+    python3 benchmark_seduta_parser.py seduta-219.html -n 50   # 50 ripetizioni
+    python3 benchmark_seduta_parser.py --fetch 10 --out pagine/  # salva 10 sedute
+"""
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+
+import argparse
+import re
+import time
+import yaml
+from bs4 import BeautifulSoup
+
+from src import http_client, scraper
+from src.utils import parse_italian_date
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+
+
+def load_config(config_path: str = None) -> dict:
+    """Carica configurazione."""
+    if not config_path:
+        config_path = str(REPO_ROOT / 'config' / 'config.yaml')
+    with open(config_path, 'r', encoding='utf-8') as f:
+        return yaml.safe_load(f)
+
+
+def extract_seduta_info_multipass(html: BeautifulSoup, seduta_url: str) -> dict:
+    """Implementazione precedente di extract_seduta_info (più visite dell'albero)."""
+    seduta_number = scraper.extract_seduta_number(html)
+    seduta_date = scraper.extract_seduta_date(html)
+    documents = scraper.extract_document_urls(html)
+
+    videos = []
+    for video_el in scraper.find_video_elements(html):
+        video_date = None
+        for h4 in video_el.find_all_previous('h4'):
+            h4_text = h4.get_text().strip()
+            if re.match(r'\d{1,2}\s+\w+\s+\d{4}', h4_text):
+                video_date = parse_italian_date(h4_text)
+                break
+        if not video_date:
+            video_date = seduta_date
+
+        video_data = scraper.extract_video_metadata(video_el, video_date)
+        if video_data:
+            video_data['numero_seduta'] = seduta_number
+            video_data['data_seduta'] = seduta_date
+            videos.append(video_data)
+
+    return {
+        'numero_seduta': seduta_number,
+        'data_seduta': seduta_date,
+        'url_pagina': seduta_url,
+        'odg_url': documents['odg_url'],
+        'resoconto_url': documents['resoconto_url'],
+        'resoconto_provvisorio_url': documents['resoconto_provvisorio_url'],
+        'resoconto_stenografico_url': documents['resoconto_stenografico_url'],
+        'allegato_url': documents['allegato_url'],
+        'videos': videos
+    }
+
+
+def fetch_pages(config: dict, count: int, out_dir: Path) -> None:
+    """Scarica count pagine seduta a ritroso da scraping.start_url."""
+    http_client.configure(config['scraping'])
+    out_dir.mkdir(parents=True, exist_ok=True)
+    url = config['scraping']['start_url']
+
+    for _ in range(count):
+        if not url:
+            break
+        response = http_client.get(url)
+        response.raise_for_status()
+        path = out_dir / (url.rstrip('/').rsplit('/', 1)[-1] + '.html')
+        path.write_bytes(response.content)
+        print(f"✓ Salvata: {path}")
+        url = scraper.get_next_seduta_url(BeautifulSoup(response.content, 'html.parser'))
+
+
+def collect_pages(paths: list) -> list:
+    pages = []
+    for raw in paths:
+        path = Path(raw)
+        if path.is_dir():
+            pages.extend(sorted(path.glob('*.html')))
+        elif path.exists():
+            pages.append(path)
+        else:
+            print(f"⚠ Non trovato: {path}")
+    return pages
+
+
+def time_calls(func, html: BeautifulSoup, url: str, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func(html, url)
+    return (time.perf_counter() - start) / repeat
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Benchmark parser pagine seduta')
+    parser.add_argument('paths', nargs='*', help='File .html o directory con pagine seduta salvate')
+    parser.add_argument('-n', '--repeat', type=int, default=20, help='Ripetizioni per pagina (default: 20)')
+    parser.add_argument('--fetch', type=int, metavar='N', help='Scarica N pagine seduta prima del benchmark')
+    parser.add_argument('--out', default='data/cache/sedute_html', help='Directory per --fetch')
+    args = parser.parse_args()
+
+    if args.fetch:
+        fetch_pages(load_config(), args.fetch, Path(args.out))
+        if not args.paths:
+            args.paths = [args.out]
+
+    pages = collect_pages(args.paths)
+    if not pages:
+        print("✗ Nessuna pagina da analizzare")
+        return 1
+
+    total_old = 0.0
+    total_new = 0.0
+    mismatches = 0
+
+    print(f"{'pagina':<45} {'video':>5} {'multi-pass':>11} {'single':>9} {'speedup':>8}")
+    for path in pages:
+        html = BeautifulSoup(path.read_bytes(), 'html.parser')
+        url = f"https://www.ars.sicilia.it/agenda/sedute-aula/{path.stem}"
+
+        expected = extract_seduta_info_multipass(html, url)
+        result = scraper.extract_seduta_info(html, url)
+        if result != expected:
+            mismatches += 1
+            print(f"✗ Risultato diverso: {path.name}")
+
+        old = time_calls(extract_seduta_info_multipass, html, url, args.repeat)
+        new = time_calls(scraper.extract_seduta_info, html, url, args.repeat)
+        total_old += old
+        total_new += new
+        print(
+            f"{path.name[:45]:<45} {len(result['videos']):>5} "
+            f"{old * 1000:>9.2f}ms {new * 1000:>7.2f}ms {old / new:>7.1f}x"
+        )
+
+    print(f"\nTotale: {total_old * 1000:.1f}ms → {total_new * 1000:.1f}ms ({total_old / total_new:.1f}x)")
+    if mismatches:
+        print(f"✗ {mismatches} pagine con risultato diverso")
+        return 1
+    print(f"✓ Risultati identici su {len(pages)} pagine")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
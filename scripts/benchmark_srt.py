@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Benchmark del parser SRT: parsing precedente vs streaming + CueStore vs sidecar mmap.
+
+Sull'intero corpus di trascrizioni confronta il vecchio parse_srt di
+build_rag_corpus.py (read_text().splitlines() + lista di tuple) con
+srt_parser.parse_file e con il caricamento dei sidecar binari via mmap,
+verificando che i cue siano identici. Riporta tempi, throughput e memoria
+trattenuta dai cue.
+
+Usage:
+    python3 benchmark_srt.py                          # data/trascrizioni
+    python3 benchmark_srt.py data/trascrizioni -n 5   # 5 ripetizioni
+    python3 benchmark_srt.py --cache-dir data/cache/srt_cues  # usa/aggiorna i sidecar reali
+"""
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+
+import argparse
+import re
+import tempfile
+import time
+import tracemalloc
+
+from src import srt_parser
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+DEFAULT_TRANSCRIPTS_DIR = REPO_ROOT / 'data' / 'trascrizioni'
+
+TIMESTAMP_RE = re.compile(
+    r"(\d{2}):(\d{2}):(\d{2}),\d{3}\s*-->\s*\d{2}:\d{2}:\d{2},\d{3}"
+)
+
+
+def parse_srt_legacy(path: Path) -> list:
+    """Implementazione precedente di build_rag_corpus.parse_srt (file intero in memoria)."""
+    cues = []
+    start = None
+    text_lines = []
+    for line in path.read_text(encoding="utf-8").splitlines():
+        line = line.strip()
+        m = TIMESTAMP_RE.match(line)
+        if m:
+            start = int(m.group(1)) * 3600 + int(m.group(2)) * 60 + int(m.group(3))
+            text_lines = []
+        elif not line:
+            if start is not None and text_lines:
+                cues.append((start, " ".join(text_lines)))
+            start = None
+            text_lines = []
+        elif not line.isdigit() or start is not None:
+            if start is not None:
+                text_lines.append(line)
+    if start is not None and text_lines:
+        cues.append((start, " ".join(text_lines)))
+    return cues
+
+
+def as_rag_cues(store: srt_parser.CueStore) -> list:
+    """Cue nel formato di build_rag_corpus: (start_seconds, testo su una riga)."""
+    return [(store.start_ms(i) // 1000, store.text(i).replace('\n', ' ')) for i in range(len(store))]
+
+
+def collect_files(paths: list) -> list:
+    files = []
+    for raw in paths:
+        path = Path(raw)
+        if path.is_dir():
+            files.extend(sorted(path.glob('*.srt')))
+        elif path.exists():
+            files.append(path)
+        else:
+            print(f"⚠ Non trovato: {path}")
+    return files
+
+
+def best_of(func, files: list, repeat: int) -> float:
+    """Tempo migliore (secondi) su repeat passate dell'intero corpus."""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for path in files:
+            func(path)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def retained_bytes(func, files: list) -> int:
+    """Memoria Python trattenuta dai risultati di func su tutto il corpus."""
+    tracemalloc.start()
+    results = [func(path) for path in files]
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del results
+    return current
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Benchmark parser SRT')
+    parser.add_argument('paths', nargs='*', help='File .srt o directory (default: data/trascrizioni)')
+    parser.add_argument('-n', '--repeat', type=int, default=3, help='Passate sul corpus (default: 3)')
+    parser.add_argument('--cache-dir', help='Directory sidecar (default: directory temporanea)')
+    args = parser.parse_args()
+
+    files = collect_files(args.paths or [DEFAULT_TRANSCRIPTS_DIR])
+    if not files:
+        print("✗ Nessun file SRT da analizzare")
+        return 1
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cache_dir = Path(args.cache_dir or tmp_dir)
+
+        mismatches = 0
+        cue_count = 0
+        for path in files:
+            store = srt_parser.load_cues(path, cache_dir)
+            loaded = srt_parser.CueStore.load(srt_parser.sidecar_path(path, cache_dir), path.stat())
+            expected = parse_srt_legacy(path)
+            cue_count += len(expected)
+            if loaded is None or as_rag_cues(store) != expected or as_rag_cues(loaded) != expected:
+                mismatches += 1
+                print(f"✗ Cue diversi: {path.name}")
+
+        def load_sidecar(path: Path):
+            return srt_parser.load_cues(path, cache_dir)
+
+        def read_sidecar(path: Path):
+            return as_rag_cues(load_sidecar(path))
+
+        source_bytes = sum(path.stat().st_size for path in files)
+        sidecar_bytes = sum(srt_parser.sidecar_path(path, cache_dir).stat().st_size for path in files)
+        timings = [
+            ('legacy (read_text + tuple)', parse_srt_legacy),
+            ('streaming → CueStore', srt_parser.parse_file),
+            ('sidecar mmap (solo load)', load_sidecar),
+            ('sidecar mmap + lettura cue', read_sidecar),
+        ]
+        memory = [
+            ('legacy (read_text + tuple)', parse_srt_legacy),
+            ('streaming → CueStore', srt_parser.parse_file),
+        ]
+
+        mb = source_bytes / 1024 / 1024
+        print(f"Corpus: {len(files)} file SRT, {mb:.1f} MB, {cue_count} cue")
+        print(f"Sidecar: {sidecar_bytes / 1024 / 1024:.1f} MB in {cache_dir}\n")
+        print(f"{'percorso':<30} {'tempo':>9} {'MB/s':>8} {'speedup':>8}")
+        baseline = None
+        for label, func in timings:
+            elapsed = best_of(func, files, args.repeat)
+            baseline = baseline or elapsed
+            print(f"{label:<30} {elapsed * 1000:>7.0f}ms {mb / elapsed:>8.1f} {baseline / elapsed:>7.1f}x")
+
+        print(f"\n{'memoria trattenuta':<30} {'MB':>9}")
+        for label, func in memory:
+            print(f"{label:<30} {retained_bytes(func, files) / 1024 / 1024:>9.1f}")
+
+    if mismatches:
+        print(f"\n✗ {mismatches} file con cue diversi")
+        return 1
+    print(f"\n✓ Cue identici su {len(files)} file")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
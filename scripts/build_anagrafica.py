@@ -4,22 +4,32 @@ Build anagrafica filmati ARS.
 
 Crawler incrementale che estrae metadati sedute ARS senza scaricare video.
 Aggiorna CSV anagrafica con solo sedute nuove.
+
+Di default riparte dal checkpoint del crawl (ultima seduta salvata e
+frontiera, data/cache/crawl_checkpoint.json) se presente.
+
+Usage:
+  python3 build_anagrafica.py
+  python3 build_anagrafica.py --from-checkpoint
+  python3 build_anagrafica.py --full
 """
 import sys
 from pathlib import Path
 sys.path.append(str(Path(__file__).resolve().parents[1]))
 
 
-import csv
+import argparse
 import sys
 import yaml
 from pathlib import Path
-from datetime import datetime
+from datetime import date, timedelta
 from typing import Optional, Set
 
 REPO_ROOT = Path(__file__).resolve().parents[1]
+REFRESH_DAYS = 14  # Sedute senza impronta ricontrollate sempre per questi giorni
+DEFAULT_CHECKPOINT_EVERY = 20  # Sedute tra due scritture intermedie di anagrafica e checkpoint
 
-from src import scraper
+from src import crawler, duration_probe, http_cache, http_client, seduta_manifest, storage
 
 
 def load_config(config_path: str = None) -> dict:
@@ -30,273 +40,37 @@ def load_config(config_path: str = None) -> dict:
         return yaml.safe_load(f)
 
 
-def init_anagrafica_csv(file_path: str) -> bool:
-    """
-    Crea file CSV anagrafica se non esiste.
-
-    Args:
-        file_path: Path al file CSV
-
-    Returns:
-        True se creato o già esistente
-    """
-    try:
-        path = Path(file_path)
-        path.parent.mkdir(parents=True, exist_ok=True)
-
-        required_fields = [
-            'numero_seduta',
-            'data_seduta',
-            'url_pagina',
-            'odg_url',
-            'resoconto_url',
-            'resoconto_provvisorio_url',
-            'resoconto_stenografico_url',
-            'allegato_url',
-            'id_video',
-            'ora_video',
-            'data_video',
-            'stream_url',
-            'video_page_url',
-            'youtube_id',
-            'last_check',
-            'status',
-            'failure_reason',
-            'duration_minutes',
-            'no_transcript'
-        ]
-
-        if not path.exists():
-            with open(file_path, 'w', newline='', encoding='utf-8') as f:
-                writer = csv.writer(f)
-                writer.writerow(required_fields)
-            print(f"✓ Anagrafica creata: {file_path}")
-            return True
-
-        # File esistente: verifica schema e aggiungi colonne mancanti
-        with open(file_path, 'r', newline='', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            fieldnames = reader.fieldnames or []
-            missing = [f for f in required_fields if f not in fieldnames]
-            if not missing:
-                return True
-
-            rows = []
-            for row in reader:
-                for key in missing:
-                    row.setdefault(key, '')
-                rows.append(row)
-
-        # Riscrivi con header aggiornato
-        new_fieldnames = fieldnames + missing
-        with open(file_path, 'w', newline='', encoding='utf-8') as f:
-            writer = csv.DictWriter(f, fieldnames=new_fieldnames)
-            writer.writeheader()
-            writer.writerows(rows)
-        print(f"✓ Anagrafica aggiornata con nuove colonne: {', '.join(missing)}")
-
-        return True
-
-    except Exception as e:
-        print(f"✗ Errore creazione anagrafica: {e}")
-        return False
-
-
-def load_existing_anagrafica(file_path: str) -> tuple[Set[str], Optional[str], dict]:
-    """
-    Carica anagrafica esistente con count video per seduta.
-
-    Args:
-        file_path: Path al file CSV
-
-    Returns:
-        Tuple (set numeri sedute processate, numero ultima seduta, dict{seduta: video_count})
-    """
-    try:
-        path = Path(file_path)
-        if not path.exists():
-            return set(), None, {}
-
-        sedute_processate = set()
-        ultima_seduta = None
-        seduta_video_count = {}
-
-        with open(file_path, 'r', newline='', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                numero = row['numero_seduta']
-                if numero:
-                    sedute_processate.add(numero)
-                    ultima_seduta = numero
-                    # Conta video per seduta
-                    seduta_video_count[numero] = seduta_video_count.get(numero, 0) + 1
-
-        return sedute_processate, ultima_seduta, seduta_video_count
-
-    except Exception as e:
-        print(f"⚠ Errore lettura anagrafica: {e}")
-        return set(), None, {}
-
-
-def get_existing_youtube_ids(file_path: str, numero_seduta: str) -> dict:
-    """
-    Estrae youtube_id esistenti per una seduta usando chiave (data_video, ora_video).
-
-    Args:
-        file_path: Path al file CSV
-        numero_seduta: Numero seduta
-
-    Returns:
-        Dict con chiave (data_video, ora_video) -> dict con youtube_id, status, failure_reason
-    """
-    existing_ids = {}
-    try:
-        path = Path(file_path)
-        if not path.exists():
-            return existing_ids
-
-        with open(file_path, 'r', newline='', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                if row['numero_seduta'] == numero_seduta:
-                    key = (row['data_video'], row['ora_video'])
-                    existing_ids[key] = {
-                        'youtube_id': row.get('youtube_id', ''),
-                        'last_check': row.get('last_check', ''),
-                        'status': row.get('status', ''),
-                        'failure_reason': row.get('failure_reason', ''),
-                        'duration_minutes': row.get('duration_minutes', ''),
-                        'no_transcript': row.get('no_transcript', '')
-                    }
-
-    except Exception as e:
-        print(f"⚠ Errore lettura youtube_id esistenti: {e}")
-
-    return existing_ids
-
-
-def remove_seduta_from_anagrafica(file_path: str, numero_seduta: str) -> bool:
+def crawl_nuove_sedute(
+    config: dict,
+    sedute_processate: Set[str],
+    seduta_video_count: dict,
+    start_url: str,
+    backend=None,
+    resume: Optional[bool] = None
+) -> dict:
     """
-    Rimuove tutti i video di una seduta dall'anagrafica.
-
-    Args:
-        file_path: Path al file CSV
-        numero_seduta: Numero seduta da rimuovere
-
-    Returns:
-        True se rimosso con successo
-    """
-    try:
-        path = Path(file_path)
-        if not path.exists():
-            return False
-
-        # Leggi tutte le righe tranne quelle della seduta da rimuovere
-        rows_to_keep = []
-        with open(file_path, 'r', newline='', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            fieldnames = reader.fieldnames
-            for row in reader:
-                if row['numero_seduta'] != numero_seduta:
-                    rows_to_keep.append(row)
-
-        # Riscrivi file senza le righe rimosse
-        with open(file_path, 'w', newline='', encoding='utf-8') as f:
-            writer = csv.DictWriter(f, fieldnames=fieldnames)
-            writer.writeheader()
-            writer.writerows(rows_to_keep)
-
-        return True
-
-    except Exception as e:
-        print(f"✗ Errore rimozione seduta: {e}")
-        return False
-
-
-def save_seduta_to_anagrafica(file_path: str, seduta_info: dict, existing_youtube_ids: dict = None) -> int:
-    """
-    Salva seduta in anagrafica CSV preservando youtube_id esistenti.
-
-    Args:
-        file_path: Path al file CSV
-        seduta_info: Dict con info seduta (da scraper)
-        existing_youtube_ids: Dict opzionale con youtube_id esistenti (chiave: (data_video, ora_video))
-
-    Returns:
-        Numero video salvati
-    """
-    try:
-        timestamp = datetime.now().isoformat()
-        video_count = 0
-        if existing_youtube_ids is None:
-            existing_youtube_ids = {}
-
-        with open(file_path, 'a', newline='', encoding='utf-8') as f:
-            writer = csv.writer(f)
-
-            numero_seduta = seduta_info['numero_seduta']
-            data_seduta = seduta_info['data_seduta']
-            url_pagina = seduta_info['url_pagina']
-            odg_url = seduta_info.get('odg_url', '')
-            resoconto_url = seduta_info.get('resoconto_url', '')
-            resoconto_provvisorio_url = seduta_info.get('resoconto_provvisorio_url', '')
-            resoconto_stenografico_url = seduta_info.get('resoconto_stenografico_url', '')
-            allegato_url = seduta_info.get('allegato_url', '')
-
-            # Scrivi una riga per ogni video
-            for video in seduta_info['videos']:
-                data_video = video.get('data_video', data_seduta)
-                ora_video = video['ora_video']
-
-                # Recupera youtube_id esistente se presente (chiave: data_video + ora_video)
-                key = (data_video, ora_video)
-                existing = existing_youtube_ids.get(key, {})
-                youtube_id = existing.get('youtube_id', '')
-                status = existing.get('status', '')
-                failure_reason = existing.get('failure_reason', '')
-                duration_minutes = existing.get('duration_minutes', '')
-                no_transcript = existing.get('no_transcript', '')
-                # Preserva last_check se youtube_id esiste (non aggiornare timestamp per video già uploadati)
-                last_check = existing.get('last_check', '') if youtube_id else timestamp
-
-                writer.writerow([
-                    numero_seduta,
-                    data_seduta,
-                    url_pagina,
-                    odg_url,
-                    resoconto_url,
-                    resoconto_provvisorio_url,
-                    resoconto_stenografico_url,
-                    allegato_url,
-                    video['id_video'],
-                    ora_video,
-                    data_video,
-                    video.get('stream_url', ''),
-                    video.get('video_page_url', ''),
-                    youtube_id,  # Preservato da record esistente
-                    last_check,  # Preservato per video uploadati, nuovo timestamp per video nuovi
-                    status,
-                    failure_reason,
-                    duration_minutes,  # Preservato da record esistente
-                    no_transcript  # Preservato da record esistente
-                ])
-                video_count += 1
-
-        return video_count
-
-    except Exception as e:
-        print(f"✗ Errore salvataggio seduta: {e}")
-        return 0
+    Crawla sedute nuove partendo dal 10 dicembre 2025 e andando verso il futuro.
 
+    Le pagine vengono scaricate in parallelo (crawler.crawl_sedute_frontier)
+    e unite all'anagrafica in memoria una alla volta, in ordine cronologico
+    di seduta, man mano che il crawl le consegna; il file viene scritto a
+    fine run e ogni `checkpoint.every` sedute, registrando ogni volta il
+    checkpoint del crawl con la frontiera ancora da scaricare.
 
-def crawl_nuove_sedute(config: dict, sedute_processate: Set[str], seduta_video_count: dict, start_url: str) -> dict:
-    """
-    Crawla sedute nuove partendo dal 10 dicembre 2025 e andando verso il futuro.
+    Con un checkpoint valido il crawl riparte dall'ultima seduta salvata,
+    dalla sua frontiera e dalle sedute degli ultimi REFRESH_DAYS giorni già
+    in anagrafica, invece che da start_url.
 
     Args:
         config: Configurazione
         sedute_processate: Set numeri sedute già processate
         start_url: URL da cui partire
+        backend: Backend storage (default: da config)
+        resume: True = riparti dal checkpoint (errore se manca), False =
+            crawl completo da start_url, None = checkpoint se disponibile
+
+    Raises:
+        RuntimeError: Se resume è True e non c'è un checkpoint utilizzabile
 
     Returns:
         Dict con statistiche
@@ -309,112 +83,249 @@ def crawl_nuove_sedute(config: dict, sedute_processate: Set[str], seduta_video_c
         'errori': 0
     }
 
-    current_url = start_url
-    anagrafica_file = config['logging']['anagrafica_file']
+    if backend is None:
+        backend = storage.get_backend(config)
+    scraping_cfg = config.get('scraping', {})
+    cache = http_cache.get_cache(scraping_cfg)
+    start_date = scraping_cfg.get('start_date')
+    probe_cfg = scraping_cfg.get('duration_probe') or {}
+    duration_cache = None
+    if probe_cfg.get('enabled', True):
+        duration_cache = duration_probe.DurationCache(
+            probe_cfg.get('cache_file', duration_probe.DEFAULT_CACHE_FILE)
+        )
+    manifest_cfg = scraping_cfg.get('seduta_manifest') or {}
+    manifest = None
+    if manifest_cfg.get('enabled', True):
+        manifest = seduta_manifest.SedutaManifest(
+            manifest_cfg.get('file', seduta_manifest.DEFAULT_MANIFEST_FILE)
+        )
+
+    checkpoint_cfg = scraping_cfg.get('checkpoint') or {}
+    checkpoint = None
+    if checkpoint_cfg.get('enabled', True):
+        checkpoint = crawler.CrawlCheckpoint(
+            checkpoint_cfg.get('file', crawler.DEFAULT_CHECKPOINT_FILE)
+        )
+    checkpoint_every = checkpoint_cfg.get('every', DEFAULT_CHECKPOINT_EVERY)
 
     print(f"\n{'='*70}")
     print(f"Crawler sedute ARS")
     print(f"{'='*70}\n")
 
-    while current_url:
+    # Ripresa dal checkpoint: solo se la sua ultima seduta è davvero in anagrafica
+    link_min_date = start_date
+    seed_urls = []
+    if resume is not False:
+        usable = checkpoint is not None and checkpoint.last_url and checkpoint.last_numero in sedute_processate
+        if usable:
+            cutoff = (date.today() - timedelta(days=REFRESH_DAYS)).isoformat()
+            link_min_date = max(start_date or '', cutoff)
+            recent = sorted({
+                row['url_pagina'] for row in backend.rows()
+                if row.get('url_pagina') and (row.get('data_seduta') or '') >= cutoff
+            })
+            seed_urls = checkpoint.frontier + recent
+            start_url = checkpoint.last_url
+            print(f"↻ Ripresa dal checkpoint: seduta {checkpoint.last_numero} "
+                  f"(frontiera {len(checkpoint.frontier)} URL, {len(recent)} sedute recenti)\n")
+        elif resume:
+            raise RuntimeError("Nessun checkpoint utilizzabile: eseguire con --full")
+        elif checkpoint is not None and checkpoint.last_url:
+            print(f"⚠ Checkpoint non coerente con l'anagrafica (seduta {checkpoint.last_numero} assente), crawl completo\n")
+
+    # URL la cui elaborazione è fallita: da riprovare al prossimo run (frontiera del checkpoint)
+    failed_urls = []
+    processed_pages = []
+
+    def commit(url: str, seduta_info: dict, frontier: list) -> None:
+        # Impronte e checkpoint salvati solo dopo che l'anagrafica è su disco
+        if not backend.flush():
+            return
+        if manifest is not None:
+            manifest.save()
+        if checkpoint is not None:
+            checkpoint.commit(url, seduta_info, frontier + failed_urls)
+
+    def on_page(url: str, seduta_info: dict, frontier: list) -> None:
+        # Pagine consegnate in ordine cronologico mentre il crawl prosegue
         try:
-            print(f"Analisi: {current_url}")
-
-            # Scarica pagina
-            scraping_cfg = config.get('scraping', {})
-            html = scraper.get_seduta_page(
-                current_url,
-                scraping_cfg.get('user_agent', 'ARS-YouTube-Bot/1.0'),
-                timeout=scraping_cfg.get('timeout', 30),
-                retries=scraping_cfg.get('retries', 3),
-                backoff_factor=scraping_cfg.get('backoff_factor', 0.5)
+            print(f"Analisi: {url}")
+            process_seduta_info(
+                seduta_info, sedute_processate, seduta_video_count, start_date, backend, stats,
+                duration_cache=duration_cache,
+                probe_workers=probe_cfg.get('workers', duration_probe.DEFAULT_WORKERS),
+                manifest=manifest
             )
-
-            # Estrai info
-            seduta_info = scraper.extract_seduta_info(html, current_url)
-            numero_seduta = seduta_info['numero_seduta']
-            video_count_new = len(seduta_info['videos'])
-            start_date = config.get('scraping', {}).get('start_date')
-
-            if start_date and seduta_info.get('data_seduta'):
-                if seduta_info['data_seduta'] < start_date:
-                    print(f"  ⊙ Seduta {numero_seduta} prima di start_date ({start_date}), skip")
-                    current_url = scraper.get_next_seduta_url(html, numero_seduta, go_forward=True)
-                    continue
-
-            # Verifica se già processata
-            if numero_seduta in sedute_processate:
-                video_count_old = seduta_video_count.get(numero_seduta, 0)
-
-                # Sempre aggiorna sedute recenti (ultimi 14 giorni)
-                # perché l'ARS può cambiare gli ID video anche senza cambiare il count
-                from datetime import date, timedelta
-                is_recent = False
-                if seduta_info.get('data_seduta'):
-                    cutoff_date = (date.today() - timedelta(days=14)).isoformat()
-                    is_recent = seduta_info['data_seduta'] >= cutoff_date
-
-                # Se count video è uguale e NON è recente, skip
-                if video_count_new == video_count_old and not is_recent:
-                    print(f"  ⊙ Seduta {numero_seduta} già in anagrafica ({video_count_old} video), skip")
-                    stats['sedute_skip'] += 1
-                    current_url = scraper.get_next_seduta_url(html, numero_seduta, go_forward=True)
-                    continue
-
-                # Aggiorna se count diverso o se recente
-                reason = f"{video_count_old} → {video_count_new} video" if video_count_new != video_count_old else "seduta recente"
-                print(f"  ↻ Seduta {numero_seduta} aggiornata: {reason}")
-
-                # Salva youtube_id esistenti prima di rimuovere
-                existing_youtube_ids = get_existing_youtube_ids(anagrafica_file, numero_seduta)
-
-                # Rimuovi video vecchi dall'anagrafica
-                remove_seduta_from_anagrafica(anagrafica_file, numero_seduta)
-                sedute_processate.remove(numero_seduta)
-                stats['sedute_aggiornate'] += 1
-                # Continua per salvare nuovi dati con youtube_id preservati
-            else:
-                # Nuova seduta, nessun youtube_id da preservare
-                existing_youtube_ids = {}
-
-            # Nuova seduta
-            print(f"  ✓ Seduta {numero_seduta} del {seduta_info['data_seduta']}")
-            print(f"    Video trovati: {len(seduta_info['videos'])}")
-
-            if seduta_info.get('odg_url'):
-                print(f"    OdG: presente")
-            if seduta_info.get('resoconto_url'):
-                print(f"    Resoconto: presente")
-
-            # Salva in anagrafica preservando youtube_id esistenti
-            video_count = save_seduta_to_anagrafica(anagrafica_file, seduta_info, existing_youtube_ids)
-
-            if video_count > 0:
-                print(f"    Salvati {video_count} video in anagrafica")
-                stats['sedute_nuove'] += 1
-                stats['video_totali'] += video_count
-                sedute_processate.add(numero_seduta)
-
-            # Cerca prossima seduta FUTURA (numero maggiore)
-            current_url = scraper.get_next_seduta_url(html, numero_seduta, go_forward=True)
-
         except Exception as e:
             print(f"  ✗ Errore: {e}")
             stats['errori'] += 1
-            # Continua con prossima seduta FUTURA
-            try:
-                if 'seduta_info' in locals() and seduta_info.get('numero_seduta'):
-                    current_url = scraper.get_next_seduta_url(html, seduta_info['numero_seduta'], go_forward=True)
-                else:
-                    current_url = None
-            except:
-                current_url = None
+            failed_urls.append(url)
+
+        processed_pages.append((url, seduta_info))
+        if checkpoint_every and len(processed_pages) % checkpoint_every == 0:
+            commit(url, seduta_info, frontier)
+
+    crawl = crawler.crawl_sedute_frontier(
+        start_url,
+        start_date=link_min_date,
+        listing_urls=scraping_cfg.get('listing_urls', []),
+        parser=scraping_cfg.get('html_parser'),
+        cache=cache,
+        max_workers=scraping_cfg.get('crawl_workers', crawler.DEFAULT_WORKERS),
+        seed_urls=seed_urls,
+        on_page=on_page
+    )
+
+    for url, error in crawl['errors']:
+        print(f"  ✗ Errore {url}: {error}")
+        stats['errori'] += 1
+
+    if duration_cache is not None:
+        duration_cache.save()
+
+    if crawl['pages']:
+        # Ultima seduta in ordine cronologico: anche se consegnata fuori ordine
+        url, seduta_info = crawl['pages'][-1]
+        commit(url, seduta_info, [url for url, _ in crawl['errors']])
+
+    if cache is not None:
+        removed, freed = cache.evict()
+        cache.print_stats()
+        if removed:
+            print(f"  Cache HTTP: eliminate {removed} voci ({freed / 1024:.0f} KB)")
 
     return stats
 
 
+def process_seduta_info(
+    seduta_info: dict,
+    sedute_processate: Set[str],
+    seduta_video_count: dict,
+    start_date: Optional[str],
+    backend,
+    stats: dict,
+    duration_cache: Optional[duration_probe.DurationCache] = None,
+    probe_workers: int = duration_probe.DEFAULT_WORKERS,
+    manifest: Optional[seduta_manifest.SedutaManifest] = None
+) -> None:
+    """
+    Salva una seduta scaricata in anagrafica (nuova, aggiornata o skip).
+
+    Args:
+        seduta_info: Info seduta da scraper
+        sedute_processate: Set numeri sedute già processate (aggiornato)
+        seduta_video_count: Numero video per seduta già in anagrafica
+        start_date: Data minima seduta (YYYY-MM-DD) o None
+        backend: Backend storage
+        stats: Statistiche da aggiornare
+        duration_cache: Se presente, durata dei video dal manifest HLS
+            (duration_minutes valorizzata già in fase di crawl)
+        probe_workers: Manifest letti in parallelo
+        manifest: Se presente, impronte delle sedute salvate: una seduta con
+            impronta invariata viene saltata a qualunque età, una cambiata
+            viene aggiornata registrando le differenze
+    """
+    numero_seduta = seduta_info['numero_seduta']
+    video_count_new = len(seduta_info['videos'])
+
+    if start_date and seduta_info.get('data_seduta'):
+        if seduta_info['data_seduta'] < start_date:
+            print(f"  ⊙ Seduta {numero_seduta} prima di start_date ({start_date}), skip")
+            return
+
+    # Verifica se già processata
+    if numero_seduta in sedute_processate:
+        video_count_old = seduta_video_count.get(numero_seduta, 0)
+
+        if manifest is not None and numero_seduta in manifest:
+            # L'impronta dice esattamente se ID video, orari o documenti sono cambiati
+            if manifest.unchanged(seduta_info) and video_count_new == video_count_old:
+                print(f"  ⊙ Seduta {numero_seduta} invariata ({video_count_old} video), skip")
+                stats['sedute_skip'] += 1
+                return
+
+            print(f"  ↻ Seduta {numero_seduta} aggiornata: contenuto cambiato")
+            changes = manifest.diff(seduta_info)
+            for line in seduta_manifest.format_diff(changes, seduta_manifest.structure(seduta_info)):
+                print(f"    {line}")
+        else:
+            # Senza impronta: sempre aggiorna sedute recenti (ultimi REFRESH_DAYS giorni)
+            # perché l'ARS può cambiare gli ID video anche senza cambiare il count
+            is_recent = False
+            if seduta_info.get('data_seduta'):
+                cutoff_date = (date.today() - timedelta(days=REFRESH_DAYS)).isoformat()
+                is_recent = seduta_info['data_seduta'] >= cutoff_date
+
+            # Se count video è uguale e NON è recente, skip
+            if video_count_new == video_count_old and not is_recent:
+                print(f"  ⊙ Seduta {numero_seduta} già in anagrafica ({video_count_old} video), skip")
+                stats['sedute_skip'] += 1
+                return
+
+            # Aggiorna se count diverso o se recente
+            reason = f"{video_count_old} → {video_count_new} video" if video_count_new != video_count_old else "seduta recente"
+            print(f"  ↻ Seduta {numero_seduta} aggiornata: {reason}")
+
+        sedute_processate.remove(numero_seduta)
+        stats['sedute_aggiornate'] += 1
+        # Continua per salvare nuovi dati con youtube_id preservati
+        replace = True
+    else:
+        # Nuova seduta, nessun youtube_id da preservare
+        replace = False
+
+    # Nuova seduta
+    print(f"  ✓ Seduta {numero_seduta} del {seduta_info['data_seduta']}")
+    print(f"    Video trovati: {len(seduta_info['videos'])}")
+
+    if seduta_info.get('odg_url'):
+        print(f"    OdG: presente")
+    if seduta_info.get('resoconto_url'):
+        print(f"    Resoconto: presente")
+
+    if duration_cache is not None:
+        if replace:
+            # Durate già in anagrafica (crawl o upload precedenti): niente probe per questi video
+            existing = backend.get_existing_youtube_ids(numero_seduta)
+            for video in seduta_info['videos']:
+                previous = existing.get((video.get('data_video', seduta_info['data_seduta']), video['ora_video']), {})
+                if previous.get('duration_minutes') and not video.get('duration_minutes'):
+                    video['duration_minutes'] = previous['duration_minutes']
+        filled = duration_probe.fill_durations(seduta_info['videos'], duration_cache, probe_workers)
+        if filled:
+            print(f"    Durata da manifest HLS: {filled} video")
+
+    # Unisce in anagrafica (in memoria) preservando youtube_id esistenti
+    video_count = backend.upsert_seduta(seduta_info, replace=replace)
+
+    if video_count > 0:
+        print(f"    Salvati {video_count} video in anagrafica")
+        stats['sedute_nuove'] += 1
+        stats['video_totali'] += video_count
+        sedute_processate.add(numero_seduta)
+        if manifest is not None:
+            manifest.update(seduta_info)
+
+
+def parse_args():
+    """Argomenti da riga di comando."""
+    parser = argparse.ArgumentParser(description='Aggiorna anagrafica sedute ARS')
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument(
+        '--from-checkpoint', dest='resume', action='store_const', const=True,
+        help="Riparti dal checkpoint del crawl (errore se manca)"
+    )
+    mode.add_argument(
+        '--full', dest='resume', action='store_const', const=False,
+        help="Crawl completo da scraping.start_url, ignorando il checkpoint"
+    )
+    return parser.parse_args()
+
+
 def main():
     """Main entry point."""
+    args = parse_args()
     print("ARS - Build Anagrafica Filmati\n")
 
     # Carica config
@@ -426,12 +337,16 @@ def main():
 
     anagrafica_file = config['logging']['anagrafica_file']
 
-    # Init anagrafica
-    init_anagrafica_csv(anagrafica_file)
+    # Client HTTP condiviso (keep-alive per host) dalla sezione scraping
+    http_client.configure(config.get('scraping', {}))
+
+    # Init storage (CSV o SQLite)
+    backend = storage.get_backend(config)
+    backend.init()
 
     # Carica anagrafica esistente
     print("Caricamento anagrafica esistente...")
-    sedute_processate, ultima_seduta, seduta_video_count = load_existing_anagrafica(anagrafica_file)
+    sedute_processate, ultima_seduta, seduta_video_count = backend.load_summary()
 
     if sedute_processate:
         print(f"  Sedute già processate: {len(sedute_processate)}")
@@ -447,7 +362,9 @@ def main():
 
     # Crawl nuove sedute
     try:
-        stats = crawl_nuove_sedute(config, sedute_processate, seduta_video_count, start_url)
+        stats = crawl_nuove_sedute(
+            config, sedute_processate, seduta_video_count, start_url, backend, resume=args.resume
+        )
 
         # Riepilogo
         print(f"\n{'='*70}")
@@ -457,6 +374,8 @@ def main():
         print(f"  Sedute già viste:    {stats['sedute_skip']}")
         print(f"  Video totali:        {stats['video_totali']}")
         print(f"  Errori:              {stats['errori']}")
+        print(f"Connessioni HTTP:")
+        http_client.print_connection_stats()
         print(f"{'='*70}\n")
 
         print(f"✓ Anagrafica aggiornata: {anagrafica_file}\n")
@@ -469,6 +388,8 @@ def main():
         import traceback
         traceback.print_exc()
         sys.exit(1)
+    finally:
+        backend.close()
 
 
 if __name__ == '__main__':
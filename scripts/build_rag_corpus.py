@@ -14,13 +14,16 @@ Uso:
 
 import argparse
 import csv
-import re
 import sys
 from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from src import srt_parser
 
 REPO_ROOT = Path(__file__).resolve().parents[1]
 ANAGRAFICA = REPO_ROOT / "data" / "anagrafica_video.csv"
 TRASCRIZIONI_DIR = REPO_ROOT / "data" / "trascrizioni"
+CUE_CACHE_DIR = REPO_ROOT / "data" / "cache" / "srt_cues"
 DEFAULT_OUTPUT = REPO_ROOT / "data" / "rag_corpus"
 
 PARAGRAPH_SECONDS = 60
@@ -30,33 +33,10 @@ MESI = [
     "luglio", "agosto", "settembre", "ottobre", "novembre", "dicembre",
 ]
 
-TIMESTAMP_RE = re.compile(
-    r"(\d{2}):(\d{2}):(\d{2}),\d{3}\s*-->\s*\d{2}:\d{2}:\d{2},\d{3}"
-)
-
-
-def parse_srt(path: Path):
-    """Restituisce lista di cue (start_seconds, text)."""
-    cues = []
-    start = None
-    text_lines = []
-    for line in path.read_text(encoding="utf-8").splitlines():
-        line = line.strip()
-        m = TIMESTAMP_RE.match(line)
-        if m:
-            start = int(m.group(1)) * 3600 + int(m.group(2)) * 60 + int(m.group(3))
-            text_lines = []
-        elif not line:
-            if start is not None and text_lines:
-                cues.append((start, " ".join(text_lines)))
-            start = None
-            text_lines = []
-        elif not line.isdigit() or start is not None:
-            if start is not None:
-                text_lines.append(line)
-    if start is not None and text_lines:
-        cues.append((start, " ".join(text_lines)))
-    return cues
+def parse_srt(path: Path, cache_dir=CUE_CACHE_DIR):
+    """Restituisce lista di cue (start_seconds, text), dal sidecar dei cue se aggiornato."""
+    cues = srt_parser.load_cues(path, cache_dir)
+    return [(cues.start_ms(i) // 1000, cues.text(i).replace("\n", " ")) for i in range(len(cues))]
 
 
 def to_hms(seconds: int) -> str:
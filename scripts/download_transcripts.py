@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+Scarica le trascrizioni archiviate dei video in anagrafica via YouTube Data API.
+
+Per ogni youtube_id senza trascrizione scrive data/trascrizioni/<id>.it.srt e
+il testo derivato <id>.it.txt (scritture atomiche), più il sidecar dei cue
+(src/srt_parser.py) per gli script che rileggono le trascrizioni. Un solo client
+autenticato per tutto il batch, download in parallelo (thread) finché la
+quota del job sottotitoli lo consente. I video senza sottotitoli (o
+inesistenti) vengono marcati nella colonna no_transcript dell'anagrafica e
+non vengono più richiesti (--retry-missing per riprovarli).
+
+Variabili d'ambiente (compatibili con download_transcripts.sh):
+  MAX_DOWNLOADS  Trascrizioni nuove da scaricare per run (0 = illimitato)
+  CSV_FILE       Anagrafica da leggere (default: logging.anagrafica_file)
+  OUTPUT_DIR     Directory trascrizioni (default: data/trascrizioni)
+
+Usage:
+  python3 download_transcripts.py
+  python3 download_transcripts.py --limit 10 --workers 4
+  python3 download_transcripts.py --retry-missing
+"""
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import argparse
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime, timedelta
+
+import yaml
+from googleapiclient.errors import HttpError
+
+from src import captions, quota, srt_parser, storage, youtube_auth
+from src.utils import atomic_write
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+DEFAULT_OUTPUT_DIR = REPO_ROOT / 'data' / 'trascrizioni'
+DEFAULT_WORKERS = 8
+# YouTube genera i sottotitoli automatici qualche ora dopo l'upload:
+# un video caricato da poco senza tracce non viene marcato no_transcript
+DEFAULT_ASR_GRACE_DAYS = 2
+SCOPES = [
+    'https://www.googleapis.com/auth/youtube.readonly',
+    'https://www.googleapis.com/auth/youtube.force-ssl',
+]
+LEGACY_NO_TRANSCRIPT_FILE = 'no_transcript.txt'
+
+
+def load_config(config_path: str = None) -> dict:
+    """Carica configurazione."""
+    if not config_path:
+        config_path = str(REPO_ROOT / 'config' / 'config.yaml')
+    with open(config_path, 'r', encoding='utf-8') as f:
+        return yaml.safe_load(f)
+
+
+def _recently_uploaded(row: dict, grace_days: int) -> bool:
+    """True se il video è stato caricato (last_check) meno di grace_days giorni fa."""
+    try:
+        uploaded = datetime.fromisoformat(row.get('last_check') or '')
+    except ValueError:
+        return False
+    return datetime.now() - uploaded < timedelta(days=grace_days)
+
+
+def output_paths(output_dir: Path, youtube_id: str, language: str) -> tuple[Path, Path]:
+    """Path (SRT, TXT) della trascrizione di un video."""
+    return output_dir / f'{youtube_id}.{language}.srt', output_dir / f'{youtube_id}.{language}.txt'
+
+
+def write_transcript(output_dir: Path, youtube_id: str, language: str, srt: bytes, cue_cache: str = None) -> None:
+    """Scrive SRT e testo derivato (TXT), ciascuno in modo atomico, e il sidecar dei cue se cue_cache è dato."""
+    srt_path, txt_path = output_paths(output_dir, youtube_id, language)
+    cues = srt_parser.parse_text(srt.decode('utf-8', errors='replace'))
+    with atomic_write(srt_path, 'wb') as f:
+        f.write(srt)
+    with atomic_write(txt_path, 'wb') as f:
+        f.write(cues.to_text().encode('utf-8'))
+    if cue_cache:
+        cues.save(srt_parser.sidecar_path(srt_path, cue_cache), srt_path.stat())
+
+
+def migrate_legacy_list(backend, output_dir: Path) -> list:
+    """
+    Porta gli id di data/trascrizioni/no_transcript.txt nella colonna no_transcript.
+
+    Returns:
+        youtube_id migrati (il file va rimosso dopo il flush dell'anagrafica)
+    """
+    legacy = output_dir / LEGACY_NO_TRANSCRIPT_FILE
+    if not legacy.exists():
+        return []
+    ids = sorted({line.strip() for line in legacy.read_text(encoding='utf-8').splitlines() if line.strip()})
+    for youtube_id in ids:
+        backend.mark_no_transcript(youtube_id, flush=False)
+    return ids
+
+
+def select_videos(rows: list, output_dir: Path, language: str, retry_missing: bool) -> tuple[list, list]:
+    """
+    Video da scaricare e video con SRT già presente ma TXT mancante.
+
+    Returns:
+        Tuple (righe da scaricare, youtube_id da cui rigenerare il TXT)
+    """
+    todo = []
+    txt_only = []
+    seen = set()
+    for row in rows:
+        youtube_id = row.get('youtube_id')
+        if not youtube_id or youtube_id in seen:
+            continue
+        seen.add(youtube_id)
+        srt_path, txt_path = output_paths(output_dir, youtube_id, language)
+        if srt_path.exists():
+            if not txt_path.exists():
+                txt_only.append(youtube_id)
+            continue
+        if (row.get('no_transcript') or '').lower() == 'true' and not retry_missing:
+            continue
+        todo.append(row)
+    return todo, txt_only
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Scarica trascrizioni YouTube (SRT + TXT) per i video in anagrafica')
+    parser.add_argument('--limit', type=int, default=int(os.environ.get('MAX_DOWNLOADS') or 0),
+                        help='Trascrizioni nuove da scaricare (0 = illimitato, default env MAX_DOWNLOADS)')
+    parser.add_argument('--workers', type=int, help='Download in parallelo (default youtube.captions.workers)')
+    parser.add_argument('--output-dir', default=os.environ.get('OUTPUT_DIR') or str(DEFAULT_OUTPUT_DIR))
+    parser.add_argument('--retry-missing', action='store_true', help='Riprova anche i video marcati no_transcript')
+    args = parser.parse_args()
+
+    config = load_config()
+    if os.environ.get('CSV_FILE'):
+        config['logging']['anagrafica_file'] = os.environ['CSV_FILE']
+    quota.configure(config, job=quota.JOB_CAPTIONS)
+    captions_cfg = config.get('youtube', {}).get('captions') or {}
+    language = captions_cfg.get('language', captions.DEFAULT_LANGUAGE)
+    workers = max(1, args.workers or captions_cfg.get('workers', DEFAULT_WORKERS))
+    grace_days = captions_cfg.get('asr_grace_days', DEFAULT_ASR_GRACE_DAYS)
+    cue_cache = captions_cfg.get('cue_cache', srt_parser.DEFAULT_CUE_CACHE_DIR)
+    output_dir = Path(args.output_dir)
+
+    backend = storage.get_backend(config)
+    backend.init()
+    migrated = migrate_legacy_list(backend, output_dir)
+    todo, txt_only = select_videos(backend.rows(), output_dir, language, args.retry_missing)
+
+    for youtube_id in txt_only:
+        srt_path, _ = output_paths(output_dir, youtube_id, language)
+        write_transcript(output_dir, youtube_id, language, srt_path.read_bytes(), cue_cache)
+        print(f"  ✓ {youtube_id}: TXT rigenerato da SRT")
+
+    print(f"Trascrizioni da scaricare: {len(todo)} (worker: {workers}, quota disponibile: {quota.allowance()} unità)")
+
+    downloaded = 0
+    missing = 0
+    errors = 0
+    stop_reason = None
+    started = time.monotonic()
+
+    if todo:
+        secrets_file = str(REPO_ROOT / config['youtube']['credentials_file'])
+        token_file = str(REPO_ROOT / config['youtube']['token_file'])
+        youtube = youtube_auth.get_client(secrets_file, token_file, SCOPES, interactive=False)
+        local = threading.local()
+
+        def fetch(youtube_id: str):
+            # Un Http per thread (httplib2 non è thread-safe), stesso client e credenziali
+            if not hasattr(local, 'http'):
+                local.http = youtube_auth.authorized_http(secrets_file, token_file, SCOPES, interactive=False)
+            return captions.fetch_srt(youtube, youtube_id, language, http=local.http)
+
+        queue = iter(todo)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            in_flight = {}
+
+            def fill() -> None:
+                nonlocal stop_reason
+                while stop_reason is None and len(in_flight) < workers:
+                    if args.limit and downloaded + len(in_flight) >= args.limit:
+                        return
+                    # Ogni richiesta in volo può costare list + download
+                    if quota.allowance() < captions.CAPTION_COST * (len(in_flight) + 1):
+                        if not in_flight:
+                            stop_reason = f"quota esaurita per i sottotitoli ({quota.allowance()} unità)"
+                        return
+                    row = next(queue, None)
+                    if row is None:
+                        return
+                    in_flight[executor.submit(fetch, row['youtube_id'])] = row
+
+            fill()
+            while in_flight:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    row = in_flight.pop(future)
+                    youtube_id = row['youtube_id']
+                    try:
+                        payload = future.result()
+                    except HttpError as e:
+                        if quota.is_quota_exceeded(e):
+                            stop_reason = "quotaExceeded dall'API"
+                        elif e.resp.status == 404:
+                            print(f"  ⚠ {youtube_id}: video non trovato (404)")
+                            backend.mark_no_transcript(youtube_id, flush=False)
+                            missing += 1
+                        else:
+                            print(f"  ✗ {youtube_id}: errore API HTTP {e.resp.status}")
+                            errors += 1
+                        continue
+                    except Exception as e:
+                        print(f"  ✗ {youtube_id}: {e}")
+                        errors += 1
+                        continue
+
+                    if payload is None:
+                        if _recently_uploaded(row, grace_days):
+                            print(f"  ⊙ {youtube_id}: nessun sottotitolo (caricato da poco), riprovo al prossimo run")
+                        else:
+                            print(f"  ⚠ {youtube_id}: nessun sottotitolo")
+                            backend.mark_no_transcript(youtube_id, flush=False)
+                            missing += 1
+                        continue
+
+                    write_transcript(output_dir, youtube_id, language, payload, cue_cache)
+                    downloaded += 1
+                    print(f"  ✓ {youtube_id}: SRT + TXT")
+                fill()
+
+    if stop_reason:
+        print(f"⚠ Stop: {stop_reason} (vedi data/quota_ledger.json)")
+    elif args.limit and downloaded >= args.limit:
+        print(f"Raggiunto limite download ({args.limit}), stop.")
+
+    if backend.flush() and migrated:
+        (output_dir / LEGACY_NO_TRANSCRIPT_FILE).unlink()
+        print(f"✓ {len(migrated)} video da {LEGACY_NO_TRANSCRIPT_FILE} marcati no_transcript in anagrafica")
+    backend.close()
+
+    elapsed = time.monotonic() - started
+    print(f"\nRiepilogo: scaricate={downloaded}, senza sottotitoli={missing}, errori={errors} ({elapsed:.1f}s)")
+    return 1 if errors else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -42,6 +42,11 @@ OUTPUT_DIR="$PROJECT_DIR/data"
 OUTPUT_JSONL="$OUTPUT_DIR/disegni_legge.jsonl"
 PROCESSED_LOG="$OUTPUT_DIR/logs/odg_pdfs_processed.txt"
 
+# PDF scaricati in anticipo con una sola sessione HTTP (vedi fetch_documents.py)
+PDF_CACHE_DIR=""
+PYTHON_BIN="$PROJECT_DIR/.venv/bin/python3"
+[[ -x "$PYTHON_BIN" ]] || PYTHON_BIN="python3"
+
 # Modello LLM esplicito (override con env ODG_MODEL). Evita dipendenza dal default di llm cli.
 MODEL="${ODG_MODEL:-gemini-2.5-flash}"
 
@@ -125,15 +130,29 @@ generate_icaro_url() {
     echo "https://dati.ars.sicilia.it/icaro/default.jsp?icaDB=221&icaQuery=(${legislatura_num}.LEGISL+E+${numero_disegno}.NUMDDL)"
 }
 
+# Funzione per trovare la copia locale di un PDF scaricato in anticipo
+cached_pdf_path() {
+    local pdf_url="$1"
+    [[ -n "$PDF_CACHE_DIR" && -f "$PDF_CACHE_DIR/index.tsv" ]] || return 1
+    local name
+    name=$(awk -F'\t' -v u="$pdf_url" '$1 == u { print $2; exit }' "$PDF_CACHE_DIR/index.tsv")
+    [[ -n "$name" && -s "$PDF_CACHE_DIR/$name" ]] || return 1
+    echo "$PDF_CACHE_DIR/$name"
+}
+
 # Funzione per processare un PDF
 process_pdf() {
     local pdf_url="$1"
 
     echo "Processing: $pdf_url" >&2
 
+    # Usa la copia scaricata in anticipo se disponibile, altrimenti l'URL
+    local source
+    source=$(cached_pdf_path "$pdf_url") || source="$pdf_url"
+
     # Estrai testo dal PDF
     local text
-    text=$(markitdown "$pdf_url" 2>/dev/null) || { echo "  ERRORE: markitdown fallito" >&2; return 1; }
+    text=$(markitdown "$source" 2>/dev/null) || { echo "  ERRORE: markitdown fallito" >&2; return 1; }
     if [[ -z "$text" ]]; then echo "  ERRORE: testo vuoto" >&2; return 1; fi
 
     # Estrai dati con llm, con retry e backoff sui rate limit (free tier ~10 RPM, 429)
@@ -277,6 +296,26 @@ main() {
     echo "Trovati $total PDF OdG distinti" >&2
     echo "" >&2
 
+    # Scarica in anticipo i PDF da elaborare riusando le connessioni keep-alive
+    local pending_urls=""
+    while IFS= read -r pdf_url; do
+        [[ -z "$pdf_url" ]] && continue
+        if [[ "$reprocess" -eq 1 ]] || ! is_pdf_processed "$pdf_url"; then
+            pending_urls+="$pdf_url"$'\n'
+        fi
+    done <<< "$pdf_urls"
+    if [[ "$limit" -gt 0 ]]; then
+        pending_urls=$(printf '%s' "$pending_urls" | head -n "$limit")
+    fi
+    if [[ -n "$pending_urls" ]]; then
+        PDF_CACHE_DIR=$(mktemp -d)
+        trap 'rm -rf "$PDF_CACHE_DIR"' EXIT
+        echo "Download PDF da elaborare..." >&2
+        printf '%s\n' "$pending_urls" | "$PYTHON_BIN" "$SCRIPT_DIR/fetch_documents.py" --out-dir "$PDF_CACHE_DIR" >&2 \
+            || echo "  ⚠ Alcuni PDF non scaricati, markitdown userà l'URL" >&2
+        echo "" >&2
+    fi
+
     local count=0
     local skipped=0
     local processed=0
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Scarica documenti (es. PDF OdG) riusando la sessione HTTP condivisa.
+
+Legge gli URL da stdin (uno per riga) e li salva in --out-dir; scrive
+index.tsv (url<TAB>file) con i download riusciti. Usato da
+extract_odg_data.sh per scaricare tutti i PDF su poche connessioni
+keep-alive invece di una connessione per PDF.
+
+Usage:
+    printf '%s\\n' "$URL1" "$URL2" | python3 fetch_documents.py --out-dir /tmp/odg
+"""
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+
+import argparse
+import hashlib
+import yaml
+
+from src import http_client
+from src.utils import atomic_write
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+
+
+def load_config(config_path: str = None) -> dict:
+    """Carica configurazione."""
+    if not config_path:
+        config_path = str(REPO_ROOT / 'config' / 'config.yaml')
+    with open(config_path, 'r', encoding='utf-8') as f:
+        return yaml.safe_load(f)
+
+
+def fetch_document(url: str, out_dir: Path) -> Path:
+    """
+    Scarica un documento in out_dir (scrittura atomica).
+
+    Returns:
+        Path del file scaricato
+
+    Raises:
+        requests.RequestException: Se il download fallisce
+    """
+    suffix = Path(url.split('?', 1)[0]).suffix or '.bin'
+    path = out_dir / (hashlib.sha1(url.encode('utf-8')).hexdigest() + suffix)
+    response = http_client.get(url, stream=True)
+    response.raise_for_status()
+
+    with atomic_write(path, 'wb') as f:
+        for chunk in response.iter_content(chunk_size=64 * 1024):
+            f.write(chunk)
+    return path
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Download documenti con sessione HTTP condivisa')
+    parser.add_argument('--out-dir', required=True, help='Directory di destinazione')
+    args = parser.parse_args()
+
+    http_client.configure(load_config().get('scraping', {}))
+    out_dir = Path(args.out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    urls = [line.strip() for line in sys.stdin if line.strip()]
+    errors = 0
+    with open(out_dir / 'index.tsv', 'a', encoding='utf-8') as index:
+        for url in dict.fromkeys(urls):
+            try:
+                path = fetch_document(url, out_dir)
+                index.write(f"{url}\t{path.name}\n")
+                print(f"✓ {url}")
+            except Exception as e:
+                errors += 1
+                print(f"✗ {url}: {e}")
+
+    http_client.print_connection_stats()
+    return 1 if errors else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
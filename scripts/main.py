@@ -9,16 +9,17 @@ from pathlib import Path
 sys.path.append(str(Path(__file__).resolve().parents[1]))
 
 
+import argparse
 import sys
+import time
 import yaml
-from datetime import datetime
 from pathlib import Path
-import re
+from typing import Callable, Optional
 
 REPO_ROOT = Path(__file__).resolve().parents[1]
 
 # Import moduli locali
-from src import scraper, downloader, uploader, metadata, logger
+from src import async_scraper, backlog, http_client, scraper, downloader, uploader, metadata, logger, pipeline, quota, storage, streaming
 
 
 def load_config(config_path: str = None) -> dict:
@@ -37,24 +38,325 @@ def load_config(config_path: str = None) -> dict:
         return yaml.safe_load(f)
 
 
-def extract_seduta_date_from_href(href: str) -> str | None:
+def _mark_failed(seduta_info: dict, video: dict, backend, results: dict, error: str) -> None:
+    """Registra un video fallito in log e anagrafica."""
+    backend.log_upload(video, '', 'failed', error)
+    backend.mark_failed(
+        video['id_video'],
+        error,
+        numero_seduta=seduta_info.get('numero_seduta'),
+        data_seduta=seduta_info.get('data_seduta'),
+        flush=False
+    )
+    results['failed'] += 1
+
+
+def check_video(seduta_info: dict, video: dict, backend, results: dict) -> Optional[str]:
     """
-    Estrae data seduta da URL tipo .../seduta-numero-219-del-10122025.
+    Verifica se un video va processato.
 
     Returns:
-        Data in formato YYYY-MM-DD o None
+        URL da scaricare, None se già uploadato o senza URL (conteggiato in results)
     """
-    match = re.search(r'seduta-numero-.*-del-(\d{8})', href)
-    if not match:
+    video_id = video['id_video']
+
+    # Check se già uploadato (priorità: anagrafica)
+    if backend.is_uploaded(
+        video_id,
+        numero_seduta=seduta_info.get('numero_seduta'),
+        data_seduta=seduta_info.get('data_seduta')
+    ):
+        print(f"  ⊙ Video già uploadato (anagrafica, ID {video_id}), skip")
+        results['skipped'] += 1
         return None
-    try:
-        raw = match.group(1)
-        return datetime.strptime(raw, "%d%m%Y").date().isoformat()
-    except Exception:
+    if backend.is_logged_uploaded(
+        video_id,
+        numero_seduta=seduta_info.get('numero_seduta'),
+        data_seduta=seduta_info.get('data_seduta')
+    ):
+        print(f"  ⊙ Video già uploadato (log, ID {video_id}), skip")
+        results['skipped'] += 1
         return None
 
+    # Determina URL stream (usa video_page_url con yt-dlp)
+    video_url = video.get('stream_url') or video.get('video_page_url')
+    if not video_url:
+        print(f"  ✗ URL video non disponibile")
+        _mark_failed(seduta_info, video, backend, results, 'URL video mancante')
+        return None
+    return video_url
+
 
-def process_seduta(seduta_url: str, config: dict, youtube_client) -> dict:
+def download(video: dict, video_url: str, config: dict) -> tuple[str, bool, Optional[int]]:
+    """
+    Scarica un video in download.temp_dir.
+
+    Returns:
+        Tuple (output_file, success, duration_minutes)
+    """
+    output_file = f"{config['download']['temp_dir']}/{video['id_video']}.mp4"
+    if uploader.load_upload_session(output_file):
+        # Upload interrotto in un'esecuzione precedente: il file serve così com'è
+        print(f"  ↻ File già scaricato con upload in sospeso: {output_file}")
+        return output_file, True, video.get('duration_minutes')
+
+    hls_cfg = config['download'].get('hls') or {}
+    success, duration_mins = downloader.download_video(
+        video_url,
+        output_file,
+        retries=config['download']['max_retries'],
+        max_height=config['download'].get('max_height'),
+        timeout=config['download'].get('timeout', 3600),
+        hls_workers=hls_cfg.get('workers', 0),
+        segment_dir=hls_cfg.get('segment_dir', downloader.hls.DEFAULT_STORE_DIR),
+        # Etichetta: con la pipeline più download stampano in parallelo
+        progress_callback=downloader.ProgressPrinter(label=video['id_video'])
+    )
+    return output_file, success, duration_mins
+
+
+def upload(
+    seduta_info: dict,
+    video: dict,
+    downloaded: Optional[tuple],
+    error: Optional[Exception],
+    config: dict,
+    youtube_client,
+    backend,
+    results: dict
+) -> None:
+    """
+    Carica su YouTube un video scaricato e registra l'esito.
+
+    Args:
+        seduta_info: Dati seduta
+        video: Dati video
+        downloaded: Risultato di download() (None se il download ha sollevato errore)
+        error: Eccezione del download o None
+        config: Dict configurazione
+        youtube_client: Client YouTube API
+        backend: Backend storage
+        results: Contatori della seduta (aggiornati)
+    """
+    video_id = video['id_video']
+    if error is not None or not downloaded[1]:
+        if error is not None:
+            print(f"  ✗ Errore download ({video_id}): {error}")
+        _mark_failed(seduta_info, video, backend, results, 'Download fallito')
+        return
+
+    output_file, _, duration_mins = downloaded
+
+    # 4. Upload YouTube
+    print(f"[4/4] Upload su YouTube ({video['ora_video']})...")
+
+    try:
+        publish(
+            seduta_info, video, duration_mins, config, backend, results,
+            lambda meta: uploader.upload_video(
+                youtube_client,
+                output_file,
+                meta,
+                chunk_mb=config['youtube'].get('upload_chunk_mb', uploader.DEFAULT_UPLOAD_CHUNK_MB)
+            )
+        )
+    finally:
+        # Cleanup video (tenuto se l'upload è da riprendere)
+        if config['download']['cleanup_after_upload'] and not uploader.load_upload_session(output_file):
+            downloader.cleanup_video(output_file)
+
+
+def publish(
+    seduta_info: dict,
+    video: dict,
+    duration_mins: Optional[int],
+    config: dict,
+    backend,
+    results: dict,
+    send: Callable[[dict], Optional[str]]
+) -> None:
+    """
+    Costruisce i metadati, esegue l'upload (send) e registra l'esito.
+
+    Args:
+        send: Funzione metadati -> youtube_id (upload da file o in streaming)
+    """
+    video_id = video['id_video']
+    try:
+        # Build metadati
+        meta = metadata.build_youtube_metadata(seduta_info, video, config)
+
+        print(f"  Titolo: {meta['title']}")
+
+        # Upload
+        youtube_id = send(meta)
+
+        if youtube_id:
+            # Log success
+            backend.log_upload(video, youtube_id, 'success')
+            backend.mark_uploaded(
+                video_id,
+                youtube_id,
+                numero_seduta=seduta_info.get('numero_seduta'),
+                data_seduta=seduta_info.get('data_seduta'),
+                duration_minutes=duration_mins
+            )
+            results['uploaded'] += 1
+        else:
+            _mark_failed(seduta_info, video, backend, results, 'Upload fallito (no ID)')
+
+    except Exception as e:
+        print(f"  ✗ Errore upload: {e}")
+        backend.log_upload(video, '', 'failed', str(e))
+        backend.mark_failed(
+            video_id,
+            f"Upload fallito: {e}",
+            numero_seduta=seduta_info.get('numero_seduta'),
+            data_seduta=seduta_info.get('data_seduta'),
+            flush=False
+        )
+        results['failed'] += 1
+
+
+def stream_upload(
+    seduta_info: dict,
+    video: dict,
+    video_url: str,
+    config: dict,
+    youtube_client,
+    backend,
+    results: dict
+) -> None:
+    """
+    Upload in streaming (download.streaming): lo stream HLS va su YouTube
+    senza passare dal disco. Se il video non è HLS si usa download + upload.
+    """
+    download_cfg = config['download']
+    streaming_cfg = download_cfg.get('streaming') or {}
+
+    stream_url, info = downloader.get_hls_stream(video_url, download_cfg.get('max_height'))
+    if not stream_url:
+        print("  ⚠ Stream HLS non disponibile, download su disco")
+        upload(
+            seduta_info, video, download(video, video_url, config), None,
+            config, youtube_client, backend, results
+        )
+        return
+
+    duration_mins = round(info['duration'] / 60) if info.get('duration') else None
+    print(f"[3/4] Download + upload in streaming ({video['ora_video']})...")
+    publish(
+        seduta_info, video, duration_mins, config, backend, results,
+        lambda meta: uploader.upload_video_stream(
+            youtube_client,
+            stream_url,
+            meta,
+            chunk_mb=streaming_cfg.get('chunk_mb', 8),
+            buffer_chunks=streaming_cfg.get('buffer_chunks', 4),
+            max_restart_mb=streaming_cfg.get('max_restart_mb', streaming.DEFAULT_MAX_RESTART_MB)
+        )
+    )
+
+
+def process_video(
+    seduta_info: dict,
+    video: dict,
+    config: dict,
+    youtube_client,
+    backend,
+    results: dict,
+    before_upload: Optional[Callable[[], bool]] = None
+) -> None:
+    """
+    Processa un video senza pipeline: in streaming (download.streaming)
+    oppure download e poi upload.
+
+    Args:
+        before_upload: Chiamata quando il video va davvero caricato; se
+            ritorna False (quota insufficiente) l'upload è rimandato
+            (default: quota giornaliera del job upload, vedi src/quota.py)
+    """
+    video_url = check_video(seduta_info, video, backend, results)
+    if not video_url:
+        return
+    if before_upload is None:
+        before_upload = lambda: quota.can_spend('videos.insert')
+    if not before_upload():
+        print(f"  ⚠ Quota YouTube insufficiente, upload rimandato")
+        results['skipped'] += 1
+        return
+
+    if (config['download'].get('streaming') or {}).get('enabled'):
+        # Nessun file su disco: stream HLS → ffmpeg → upload resumable
+        stream_upload(seduta_info, video, video_url, config, youtube_client, backend, results)
+        return
+
+    # 3. Download
+    print("[3/4] Download video...")
+    downloaded = download(video, video_url, config)
+    upload(seduta_info, video, downloaded, None, config, youtube_client, backend, results)
+
+
+def process_backlog(
+    config: dict,
+    youtube_client,
+    backend,
+    budget: backlog.QuotaBudget,
+    deadline: Optional[float] = None
+) -> dict:
+    """
+    Carica i video dell'anagrafica ancora senza youtube_id, in ordine di priorità.
+
+    L'anagrafica viene letta una sola volta per costruire la coda (vedi
+    backlog.priority); si procede finché restano quota e tempo.
+
+    Args:
+        config: Dict configurazione
+        youtube_client: Client YouTube API
+        backend: Backend storage
+        budget: Quota YouTube spendibile
+        deadline: Istante time.monotonic() dopo cui non avviare upload
+
+    Returns:
+        Dict con risultati processing
+    """
+    queue = backlog.build_queue(backend.rows())
+
+    print(f"\n{'='*70}")
+    print(f"Backlog: {len(queue)} video senza youtube_id")
+    print(f"  Quota disponibile: {budget.units} unità ({budget.cost} per upload)")
+    if budget.ledger is not None:
+        print(f"  Quota giornaliera residua per upload: {budget.ledger.allowance(budget.job)} unità")
+    print(f"{'='*70}\n")
+
+    results = {
+        'total_videos': len(queue),
+        'uploaded': 0,
+        'skipped': 0,
+        'failed': 0
+    }
+
+    for i, row in enumerate(backlog.drain(queue, budget, deadline), 1):
+        seduta_info, video = backlog.split_row(row)
+        print(f"\n[2/4] Backlog {i}: seduta {seduta_info['numero_seduta']}, "
+              f"{video['data_video']} {video['ora_video']} (ID {video['id_video']})")
+        process_video(seduta_info, video, config, youtube_client, backend, results, before_upload=budget.charge)
+        # Checkpoint dopo ogni video: i fallimenti non vanno persi se il run si interrompe
+        backend.flush()
+
+    print(f"\n{'='*70}")
+    print(f"Riepilogo backlog:")
+    print(f"  Video in coda:   {results['total_videos']}")
+    print(f"  Uploadati:       {results['uploaded']}")
+    print(f"  Già presenti:    {results['skipped']}")
+    print(f"  Falliti:         {results['failed']}")
+    print(f"  Quota usata:     {budget.spent}/{budget.units}")
+    print(f"{'='*70}\n")
+
+    return results
+
+
+def process_seduta(seduta_url: str, config: dict, youtube_client, backend=None) -> dict:
     """
     Processa una singola seduta: scraping, download, upload.
 
@@ -62,10 +364,14 @@ def process_seduta(seduta_url: str, config: dict, youtube_client) -> dict:
         seduta_url: URL pagina seduta
         config: Dict configurazione
         youtube_client: Client YouTube API
+        backend: Backend storage (default: da config)
 
     Returns:
         Dict con risultati processing
     """
+    if backend is None:
+        backend = storage.get_backend(config)
+
     print(f"\n{'='*70}")
     print(f"Processando seduta: {seduta_url}")
     print(f"{'='*70}\n")
@@ -76,10 +382,7 @@ def process_seduta(seduta_url: str, config: dict, youtube_client) -> dict:
         scraping_cfg = config.get('scraping', {})
         html = scraper.get_seduta_page(
             seduta_url,
-            scraping_cfg.get('user_agent', 'ARS-YouTube-Bot/1.0'),
-            timeout=scraping_cfg.get('timeout', 30),
-            retries=scraping_cfg.get('retries', 3),
-            backoff_factor=scraping_cfg.get('backoff_factor', 0.5)
+            parser=scraping_cfg.get('html_parser')
         )
         seduta_info = scraper.extract_seduta_info(html, seduta_url)
 
@@ -109,132 +412,50 @@ def process_seduta(seduta_url: str, config: dict, youtube_client) -> dict:
         'failed': 0
     }
 
-    for i, video in enumerate(seduta_info['videos'], 1):
-        print(f"\n[2/4] Video {i}/{len(seduta_info['videos'])}: {video['ora_video']}")
-
-        video_id = video['id_video']
-        log_file = config['logging']['log_file']
-
-        # Check se già uploadato (priorità: anagrafica)
-        anagrafica_path = config.get('logging', {}).get('anagrafica_file')
-        if anagrafica_path and logger.is_video_uploaded_in_anagrafica(
-            anagrafica_path,
-            video_id,
-            numero_seduta=seduta_info.get('numero_seduta'),
-            data_seduta=seduta_info.get('data_seduta')
-        ):
-            print(f"  ⊙ Video già uploadato (anagrafica, ID {video_id}), skip")
-            results['skipped'] += 1
-            continue
-        if logger.is_video_uploaded(
-            log_file,
-            video_id,
-            numero_seduta=seduta_info.get('numero_seduta'),
-            data_seduta=seduta_info.get('data_seduta')
-        ):
-            print(f"  ⊙ Video già uploadato (log, ID {video_id}), skip")
-            results['skipped'] += 1
-            continue
-
-        # 3. Download
-        print("[3/4] Download video...")
-
-        # Determina URL stream (usa video_page_url con yt-dlp)
-        video_url = video.get('stream_url') or video.get('video_page_url')
-        if not video_url:
-            print(f"  ✗ URL video non disponibile")
-            logger.log_upload(log_file, video, '', 'failed', 'URL video mancante')
-            if anagrafica_path:
-                logger.update_anagrafica_failure(
-                    anagrafica_path,
-                    video_id,
-                    'URL video mancante',
-                    numero_seduta=seduta_info.get('numero_seduta'),
-                    data_seduta=seduta_info.get('data_seduta')
-                )
-            results['failed'] += 1
-            continue
-
-        output_file = f"{config['download']['temp_dir']}/{video_id}.mp4"
-
-        success, duration_mins = downloader.download_video(
-            video_url,
-            output_file,
-            retries=config['download']['max_retries'],
-            max_height=config['download'].get('max_height')
+    download_cfg = config['download']
+    pipeline_cfg = download_cfg.get('pipeline') or {}
+
+    if pipeline_cfg.get('enabled') and not (download_cfg.get('streaming') or {}).get('enabled'):
+        # Download in parallelo, upload appena un file è pronto
+        pending = []
+        for i, video in enumerate(seduta_info['videos'], 1):
+            print(f"\n[2/4] Video {i}/{len(seduta_info['videos'])}: {video['ora_video']}")
+            video_url = check_video(seduta_info, video, backend, results)
+            if video_url:
+                pending.append((video, video_url))
+
+        # Si scaricano solo i video che la quota giornaliera permette di caricare
+        affordable = quota.allowance() // quota.COSTS['videos.insert']
+        if len(pending) > affordable:
+            print(f"  ⚠ Quota YouTube sufficiente per {affordable} upload: {len(pending) - affordable} video rimandati")
+            results['skipped'] += len(pending) - affordable
+            pending = pending[:affordable]
+
+        print(f"\n[3/4] Pipeline download/upload: {len(pending)} video")
+        timings = pipeline.run_pipeline(
+            pending,
+            download=lambda item: download(item[0], item[1], config),
+            upload=lambda item, downloaded, error: upload(
+                seduta_info, item[0], downloaded, error, config, youtube_client, backend, results
+            ),
+            workers=pipeline_cfg.get('workers', pipeline.DEFAULT_WORKERS),
+            queue_size=pipeline_cfg.get('queue_size', pipeline.DEFAULT_QUEUE_SIZE),
+            temp_dir=download_cfg['temp_dir'],
+            min_free_mb=pipeline_cfg.get('min_free_mb', 0),
+            discard=lambda item, downloaded: downloader.cleanup_video(downloaded[0])
         )
+        pipeline.print_timings(timings)
+    else:
+        for i, video in enumerate(seduta_info['videos'], 1):
+            print(f"\n[2/4] Video {i}/{len(seduta_info['videos'])}: {video['ora_video']}")
+            process_video(seduta_info, video, config, youtube_client, backend, results)
 
-        if not success:
-            logger.log_upload(log_file, video, '', 'failed', 'Download fallito')
-            if anagrafica_path:
-                logger.update_anagrafica_failure(
-                    anagrafica_path,
-                    video_id,
-                    'Download fallito',
-                    numero_seduta=seduta_info.get('numero_seduta'),
-                    data_seduta=seduta_info.get('data_seduta')
-                )
-            results['failed'] += 1
-            continue
-
-        # 4. Upload YouTube
-        print("[4/4] Upload su YouTube...")
-
-        try:
-            # Build metadati
-            meta = metadata.build_youtube_metadata(seduta_info, video, config)
-
-            print(f"  Titolo: {meta['title']}")
-
-            # Upload
-            youtube_id = uploader.upload_video(youtube_client, output_file, meta)
-
-            if youtube_id:
-                # Log success
-                logger.log_upload(log_file, video, youtube_id, 'success')
-                if anagrafica_path:
-                    logger.update_anagrafica_youtube_id(
-                        anagrafica_path,
-                        video_id,
-                        youtube_id,
-                        numero_seduta=seduta_info.get('numero_seduta'),
-                        data_seduta=seduta_info.get('data_seduta'),
-                        duration_minutes=duration_mins
-                    )
-                results['uploaded'] += 1
-            else:
-                logger.log_upload(log_file, video, '', 'failed', 'Upload fallito (no ID)')
-                if anagrafica_path:
-                    logger.update_anagrafica_failure(
-                        anagrafica_path,
-                        video_id,
-                        'Upload fallito (no ID)',
-                        numero_seduta=seduta_info.get('numero_seduta'),
-                        data_seduta=seduta_info.get('data_seduta')
-                    )
-                results['failed'] += 1
-
-        except Exception as e:
-            print(f"  ✗ Errore upload: {e}")
-            logger.log_upload(log_file, video, '', 'failed', str(e))
-            if anagrafica_path:
-                logger.update_anagrafica_failure(
-                    anagrafica_path,
-                    video_id,
-                    f"Upload fallito: {e}",
-                    numero_seduta=seduta_info.get('numero_seduta'),
-                    data_seduta=seduta_info.get('data_seduta')
-                )
-            results['failed'] += 1
-
-        finally:
-            # Cleanup video
-            if config['download']['cleanup_after_upload']:
-                downloader.cleanup_video(output_file)
+    # Checkpoint anagrafica: scrive in blocco i fallimenti registrati in memoria
+    # (gli upload riusciti sono già scritti subito per evitare doppi upload)
+    backend.flush()
 
     # Aggiorna indice
-    logger.update_index(
-        config['logging']['index_file'],
+    backend.update_index(
         seduta_info,
         seduta_info['videos']
     )
@@ -251,8 +472,34 @@ def process_seduta(seduta_url: str, config: dict, youtube_client) -> dict:
     return results
 
 
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Download video sedute ARS e upload su YouTube')
+    parser.add_argument(
+        'seduta_url',
+        nargs='?',
+        help='URL pagina seduta (default: ultima seduta disponibile)'
+    )
+    parser.add_argument(
+        '--backlog',
+        action='store_true',
+        help='Carica tutti i video in anagrafica senza youtube_id (per priorità, entro quota e scadenza)'
+    )
+    parser.add_argument(
+        '--budget',
+        type=int,
+        help='Unità di quota YouTube spendibili (default: backlog.quota_budget)'
+    )
+    parser.add_argument(
+        '--max-minutes',
+        type=float,
+        help='Nessun nuovo upload dopo N minuti (default: backlog.max_minutes)'
+    )
+    return parser.parse_args()
+
+
 def main():
     """Main entry point."""
+    args = parse_args()
     print("ARS YouTube Uploader\n")
 
     # Carica config
@@ -262,8 +509,16 @@ def main():
         print(f"✗ Errore caricamento config: {e}")
         sys.exit(1)
 
-    # Init log
-    logger.init_log_file(config['logging']['log_file'])
+    # Client HTTP condiviso (keep-alive per host) dalla sezione scraping
+    http_client.configure(config.get('scraping', {}))
+    # Registro quota YouTube condiviso con descrizioni e sottotitoli
+    quota.configure(config, job=quota.JOB_UPLOAD)
+
+    # Init storage (CSV o SQLite) e log
+    backend = storage.get_backend(config)
+    backend.init()
+    if backend.name == 'csv':
+        logger.init_log_file(config['logging']['log_file'])
 
     # Autenticazione YouTube
     print("Autenticazione YouTube...")
@@ -294,8 +549,10 @@ def main():
         sys.exit(1)
 
     # Determina seduta da processare
-    if len(sys.argv) > 1:
-        seduta_url = sys.argv[1]
+    if args.backlog:
+        seduta_url = None
+    elif args.seduta_url:
+        seduta_url = args.seduta_url
     else:
         # Default: ultima seduta disponibile
         seduta_url = "https://www.ars.sicilia.it/agenda/lavori-aula"
@@ -303,23 +560,18 @@ def main():
         print("URL seduta non specificato, cerco ultima seduta...")
         try:
             scraping_cfg = config.get('scraping', {})
-            html = scraper.get_seduta_page(
+            links = async_scraper.scrape_one(
                 seduta_url,
-                scraping_cfg.get('user_agent', 'ARS-YouTube-Bot/1.0'),
-                timeout=scraping_cfg.get('timeout', 30),
-                retries=scraping_cfg.get('retries', 3),
-                backoff_factor=scraping_cfg.get('backoff_factor', 0.5)
+                lambda html, url: scraper.extract_seduta_links(html),
+                parser=scraping_cfg.get('html_parser')
             )
 
             # Trova link all'ultima seduta
             # Seleziona la seduta più recente in base alla data nell'URL
-            candidates = []
-            for link in html.find_all('a', href=True):
-                href = link['href']
-                if 'seduta-numero-' in href:
-                    full_url = href if href.startswith('http') else f"https://www.ars.sicilia.it{href}"
-                    seduta_date = extract_seduta_date_from_href(href)
-                    candidates.append((seduta_date, full_url))
+            candidates = [
+                (scraper.seduta_date_from_url(url), url)
+                for url in links
+            ]
 
             if candidates:
                 dated = [c for c in candidates if c[0]]
@@ -336,12 +588,24 @@ def main():
             print(f"✗ Errore ricerca ultima seduta: {e}")
             sys.exit(1)
 
-    # Processa seduta
+    # Processa seduta (o backlog)
     try:
-        results = process_seduta(seduta_url, config, youtube)
+        if args.backlog:
+            backlog_cfg = config.get('backlog') or {}
+            budget = backlog.QuotaBudget(
+                args.budget if args.budget is not None
+                else backlog_cfg.get('quota_budget', backlog.DEFAULT_QUOTA_BUDGET),
+                backlog_cfg.get('upload_cost', backlog.DEFAULT_UPLOAD_COST),
+                ledger=quota.get_ledger()
+            )
+            max_minutes = args.max_minutes if args.max_minutes is not None else backlog_cfg.get('max_minutes')
+            deadline = time.monotonic() + max_minutes * 60 if max_minutes else None
+            results = process_backlog(config, youtube, backend, budget, deadline)
+        else:
+            results = process_seduta(seduta_url, config, youtube, backend)
 
         # Statistiche finali
-        stats = logger.get_upload_stats(config['logging']['log_file'])
+        stats = backend.upload_stats()
         print(f"\nStatistiche totali:")
         print(f"  Upload riusciti:  {stats['success']}")
         print(f"  Upload falliti:   {stats['failed']}")
@@ -357,6 +621,8 @@ def main():
         import traceback
         traceback.print_exc()
         sys.exit(1)
+    finally:
+        backend.close()
 
 
 if __name__ == '__main__':
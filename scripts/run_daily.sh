@@ -16,28 +16,36 @@ LOCK_FILE="$PROJECT_ROOT/data/.anagrafica.lock"
 LOG_DIR="$PROJECT_ROOT/data/logs"
 LOG_FILE="$LOG_DIR/build_anagrafica_$(date +%Y-%m-%d).log"
 
+# Backend storage (env ARS_STORAGE_BACKEND o storage.backend in config.yaml)
+STORAGE_BACKEND="${ARS_STORAGE_BACKEND:-$(sed -n '/^storage:/,/^[^ ]/s/^  backend: *"\{0,1\}\([a-z]*\).*/\1/p' config/config.yaml)}"
+STORAGE_BACKEND="${STORAGE_BACKEND:-csv}"
+
 # Funzione cleanup
 cleanup() {
     rm -f "$LOCK_FILE"
 }
 
-# Rimuovi lock al termine
-trap cleanup EXIT INT TERM
+# Il lock serve solo con il backend CSV (riscritture non transazionali);
+# con SQLite le scritture sono transazioni e i job possono girare in parallelo
+if [ "$STORAGE_BACKEND" = "csv" ]; then
+    # Rimuovi lock al termine
+    trap cleanup EXIT INT TERM
 
-# Verifica lock
-if [ -f "$LOCK_FILE" ]; then
-    PID=$(cat "$LOCK_FILE")
-    if kill -0 "$PID" 2>/dev/null; then
-        echo "[$(date +%Y-%m-%d\ %H:%M:%S)] Altra istanza in esecuzione (PID: $PID)" | tee -a "$LOG_FILE"
-        exit 1
-    else
-        echo "[$(date +%Y-%m-%d\ %H:%M:%S)] Lock file stale, rimuovo" | tee -a "$LOG_FILE"
-        rm -f "$LOCK_FILE"
+    # Verifica lock
+    if [ -f "$LOCK_FILE" ]; then
+        PID=$(cat "$LOCK_FILE")
+        if kill -0 "$PID" 2>/dev/null; then
+            echo "[$(date +%Y-%m-%d\ %H:%M:%S)] Altra istanza in esecuzione (PID: $PID)" | tee -a "$LOG_FILE"
+            exit 1
+        else
+            echo "[$(date +%Y-%m-%d\ %H:%M:%S)] Lock file stale, rimuovo" | tee -a "$LOG_FILE"
+            rm -f "$LOCK_FILE"
+        fi
     fi
-fi
 
-# Crea lock
-echo $$ > "$LOCK_FILE"
+    # Crea lock
+    echo $$ > "$LOCK_FILE"
+fi
 
 # Crea directory log se non esiste
 mkdir -p "$LOG_DIR"
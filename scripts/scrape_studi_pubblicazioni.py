@@ -11,15 +11,20 @@ from __future__ import annotations
 import argparse
 import json
 import re
+import sys
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Iterable
 from urllib.parse import urljoin
 
-import requests
 from bs4 import BeautifulSoup
 
 REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(REPO_ROOT))
+
+from src import http_client
+from src.async_scraper import AsyncScraper, scrape_one
+
 BASE_URL = "https://www.ars.sicilia.it"
 HOME_URL = f"{BASE_URL}/studi-e-pubblicazioni"
 DEFAULT_OUTPUT = REPO_ROOT / "data" / "studi_pubblicazioni.jsonl"
@@ -40,12 +45,6 @@ def normalize_space(value: str) -> str:
     return " ".join(value.split())
 
 
-def get_soup(session: requests.Session, url: str, timeout: int) -> BeautifulSoup:
-    response = session.get(url, timeout=timeout)
-    response.raise_for_status()
-    return BeautifulSoup(response.text, "html.parser")
-
-
 def extract_category_links(home_soup: BeautifulSoup) -> list[tuple[str, str]]:
     categories: list[tuple[str, str]] = []
     seen_urls: set[str] = set()
@@ -231,6 +230,24 @@ def parse_args() -> argparse.Namespace:
         help="append: aggiunge solo nuovi URL; snapshot: sovrascrive con lo stato corrente",
     )
     parser.add_argument("--timeout", type=int, default=30, help="Timeout HTTP in secondi")
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=4,
+        help="Pagine categoria scaricate in parallelo (default: 4)",
+    )
+    parser.add_argument(
+        "--rate",
+        type=float,
+        default=2.0,
+        help="Richieste/secondo verso il sito (default: 2, 0 = nessun limite)",
+    )
+    parser.add_argument(
+        "--parser",
+        choices=("auto", "lxml", "html.parser"),
+        default=None,
+        help="Parser HTML (default: ARS_HTML_PARSER o auto = lxml se installato)",
+    )
     return parser.parse_args()
 
 
@@ -238,29 +255,36 @@ def main() -> int:
     args = parse_args()
     run_ts = datetime.now(timezone.utc).replace(microsecond=0).isoformat()
 
-    session = requests.Session()
-    session.headers.update({"User-Agent": USER_AGENT})
+    http_client.configure(
+        {"user_agent": USER_AGENT, "timeout": args.timeout, "rate_limit_per_host": args.rate}
+    )
 
-    home_soup = get_soup(session, HOME_URL, args.timeout)
-    categories = extract_category_links(home_soup)
+    categories = scrape_one(HOME_URL, lambda soup, url: extract_category_links(soup), args.parser)
     if not categories:
         print("Nessuna categoria trovata nella pagina Studi e Pubblicazioni.")
         return 1
 
     print(f"Categorie trovate (archivio escluso): {len(categories)}")
 
+    # Tutte le categorie in un solo event loop; l'ordine dei risultati segue categories
+    engine = AsyncScraper(concurrency=args.concurrency, parser=args.parser)
+    jobs = [
+        (
+            category_url,
+            lambda soup, url, name=category_name: extract_records_for_category(name, url, soup, run_ts),
+        )
+        for category_name, category_url in categories
+    ]
     all_records: list[dict] = []
-    for category_name, category_url in categories:
-        try:
-            category_soup = get_soup(session, category_url, args.timeout)
-            records = extract_records_for_category(category_name, category_url, category_soup, run_ts)
-            print(f"- {category_name}: {len(records)} record")
-            all_records.extend(records)
-        except requests.RequestException as exc:
-            print(f"- {category_name}: errore download ({exc})")
+    for (category_name, _), records in zip(categories, engine.run(jobs)):
+        if isinstance(records, Exception):
+            print(f"- {category_name}: errore download ({records})")
             continue
+        print(f"- {category_name}: {len(records)} record")
+        all_records.extend(records)
 
     merged_records = merge_records_by_url(all_records)
+    http_client.print_connection_stats()
     print(f"Record totali estratti: {len(all_records)}")
     print(f"Record unici per URL: {len(merged_records)}")
 
@@ -14,7 +14,7 @@ import yaml
 import csv
 from pathlib import Path
 
-from src import uploader
+from src import quota, uploader, youtube_api
 from src.utils import extract_year
 
 REPO_ROOT = Path(__file__).resolve().parents[1]
@@ -29,6 +29,7 @@ def main():
     config_path = REPO_ROOT / 'config' / 'config.yaml'
     with open(config_path, 'r', encoding='utf-8') as f:
         config = yaml.safe_load(f)
+    quota.configure(config, job=quota.JOB_UPLOAD)
 
     # Autenticazione YouTube
     print("🔐 Autenticazione YouTube...")
@@ -99,16 +100,20 @@ def main():
 
     # Aggiungi video a playlist
     print(f"➕ Aggiunta video a playlist...")
-    success_count = 0
-    
+    # Inserimenti in sequenza: la playlist segue l'ordine dell'anagrafica
+    added, errors = youtube_api.add_videos_to_playlist(
+        youtube,
+        [video['youtube_id'] for video in videos_2025],
+        playlist_id
+    )
+    success_count = len(added)
+
     for video in videos_2025:
         print(f"  - Seduta {video['numero_seduta']} ({video['data_video']} {video['ora_video']}): ", end='')
-        
-        if uploader.add_video_to_playlist(youtube, video['youtube_id'], playlist_id):
-            success_count += 1
-            print("✓")
+        if video['youtube_id'] in errors:
+            print(f"✗ {errors[video['youtube_id']]}")
         else:
-            print("✗")
+            print("✓")
 
     print(f"\n✅ Completato: {success_count}/{len(videos_2025)} video aggiunti\n")
 
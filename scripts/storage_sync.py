@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Sincronizzazione tra i CSV in data/ e il database SQLite (storage.sqlite_path).
+
+Usage:
+    python3 storage_sync.py import    # CSV → SQLite (sostituisce il contenuto del db)
+    python3 storage_sync.py export    # SQLite → anagrafica_video.csv + index.csv
+"""
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+
+import argparse
+import yaml
+
+from src.storage import SqliteBackend
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+
+
+def load_config(config_path: str = None) -> dict:
+    """Carica configurazione."""
+    if not config_path:
+        config_path = str(REPO_ROOT / 'config' / 'config.yaml')
+    with open(config_path, 'r', encoding='utf-8') as f:
+        return yaml.safe_load(f)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Sincronizzazione CSV ↔ SQLite')
+    parser.add_argument('command', choices=('import', 'export'))
+    parser.add_argument('--config', help='Path config.yaml (default: config/config.yaml)')
+    args = parser.parse_args()
+
+    config = load_config(args.config)
+    backend = SqliteBackend(config)
+    try:
+        if not backend.init():
+            return 1
+
+        if args.command == 'import':
+            if not backend.reimport_csv():
+                return 1
+            print(f"✓ Database aggiornato dai CSV: {backend.db_path}")
+        else:
+            if not backend.export_csv():
+                return 1
+            print(f"✓ CSV rigenerati da {backend.db_path}")
+        return 0
+    finally:
+        backend.export_on_close = False
+        backend.close()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+Test AnagraficaStore: indici, upsert delle sedute, modifiche pendenti, riapplicazione dopo reload e ordine al flush.
+
+Usage:
+    python3 -m pytest scripts/tests/test_anagrafica.py
+"""
+import csv
+import os
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+
+from src import anagrafica
+from src.anagrafica import AnagraficaStore
+
+FIELDS = ['numero_seduta', 'data_seduta', 'id_video', 'data_video', 'ora_video', 'youtube_id', 'last_check']
+
+
+def write_csv(path: Path, rows: list, fields: list = FIELDS) -> None:
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=fields)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def read_csv(path: Path) -> list:
+    with open(path, newline='', encoding='utf-8') as f:
+        return list(csv.DictReader(f))
+
+
+def row(numero: str, data: str, id_video: str, ora: str = '10:00', youtube_id: str = '') -> dict:
+    return {
+        'numero_seduta': numero,
+        'data_seduta': data,
+        'id_video': id_video,
+        'data_video': data,
+        'ora_video': ora,
+        'youtube_id': youtube_id,
+        'last_check': ''
+    }
+
+
+def bump_mtime(path: Path) -> None:
+    """Garantisce una firma diversa anche su filesystem con mtime a bassa risoluzione."""
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def test_load_adds_extra_fields_and_indexes(tmp_path):
+    path = tmp_path / 'anagrafica.csv'
+    write_csv(path, [row('10', '2025-01-10', 'v1'), row('10', '2025-01-10', 'v1', '15:00'), row('11', '2025-01-11', 'v2')])
+
+    store = AnagraficaStore(str(path))
+
+    assert store.fieldnames[-2:] == ['status', 'failure_reason']
+    assert len(store.find('v1')) == 2
+    assert len(store.find('v1', '10', '2025-01-10')) == 2
+    assert store.find('v1', '11', '2025-01-11') == []
+    assert store.find('missing') == []
+    assert not store.dirty
+
+
+def test_missing_file_is_empty_store(tmp_path):
+    store = AnagraficaStore(str(tmp_path / 'nuovo.csv'))
+    assert store.rows == []
+    assert not store.is_uploaded('v1')
+
+
+def test_changes_stay_in_memory_until_flush(tmp_path):
+    path = tmp_path / 'anagrafica.csv'
+    write_csv(path, [row('10', '2025-01-10', 'v1'), row('11', '2025-01-11', 'v2')])
+    before = path.read_bytes()
+
+    store = AnagraficaStore(str(path))
+    assert store.mark_uploaded('v1', 'yt1', duration_minutes=42) == 1
+    assert store.mark_failed('v2', 'errore\nsu due righe') == 1
+
+    assert store.dirty
+    assert store.is_uploaded('v1')
+    assert path.read_bytes() == before
+
+    assert store.flush()
+    assert not store.dirty
+    rows = {r['id_video']: r for r in read_csv(path)}
+    assert rows['v1']['youtube_id'] == 'yt1'
+    assert rows['v1']['status'] == 'success'
+    assert rows['v1']['duration_minutes'] == '42'
+    assert rows['v2']['status'] == 'failed'
+    assert rows['v2']['failure_reason'] == 'errore su due righe'
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['anagrafica.csv']
+
+
+def test_flush_without_changes_does_not_write(tmp_path):
+    path = tmp_path / 'anagrafica.csv'
+    write_csv(path, [row('10', '2025-01-10', 'v1')])
+    mtime = path.stat().st_mtime_ns
+
+    assert AnagraficaStore(str(path)).flush()
+    assert path.stat().st_mtime_ns == mtime
+
+
+def test_flush_replays_pending_changes_on_external_update(tmp_path):
+    path = tmp_path / 'anagrafica.csv'
+    write_csv(path, [row('10', '2025-01-10', 'v1'), row('11', '2025-01-11', 'v2')])
+
+    store = AnagraficaStore(str(path))
+    store.mark_uploaded('v1', 'yt1')
+
+    # Un altro processo aggiunge una seduta e carica v2
+    write_csv(path, [
+        row('10', '2025-01-10', 'v1'),
+        row('11', '2025-01-11', 'v2', youtube_id='yt2'),
+        row('12', '2025-01-12', 'v3')
+    ])
+    bump_mtime(path)
+    assert store.is_stale()
+
+    assert store.flush()
+    rows = {r['id_video']: r for r in read_csv(path)}
+    assert set(rows) == {'v1', 'v2', 'v3'}
+    assert rows['v1']['youtube_id'] == 'yt1'
+    assert rows['v2']['youtube_id'] == 'yt2'
+    assert not store.is_stale()
+
+
+def test_get_store_is_shared_per_path(tmp_path, monkeypatch):
+    monkeypatch.setattr(anagrafica, '_STORES', {})
+    path = tmp_path / 'anagrafica.csv'
+    write_csv(path, [row('10', '2025-01-10', 'v1')])
+
+    store = anagrafica.get_store(str(path))
+    assert anagrafica.get_store(str(tmp_path / '.' / 'anagrafica.csv')) is store
+
+    write_csv(path, [row('10', '2025-01-10', 'v1'), row('11', '2025-01-11', 'v2')])
+    bump_mtime(path)
+    assert len(anagrafica.get_store(str(path)).rows) == 2
+
+
+def rebuild(numero: str, data: str, videos: list):
+    """build_rows come quello del backend: righe nuove con youtube_id preservato per (data, ora)."""
+    def build_rows(existing: dict) -> list:
+        rows = []
+        for id_video, ora in videos:
+            new = row(numero, data, id_video, ora)
+            new['youtube_id'] = existing.get((data, ora), {}).get('youtube_id', '')
+            rows.append(new)
+        return rows
+    return build_rows
+
+
+def test_upsert_replaces_seduta_in_place_preserving_fields(tmp_path):
+    path = tmp_path / 'anagrafica.csv'
+    write_csv(path, [
+        row('10', '2025-01-10', 'v1', '10:00', youtube_id='yt1'),
+        row('10', '2025-01-10', 'v2', '15:00'),
+        row('11', '2025-01-11', 'v3'),
+    ])
+
+    store = AnagraficaStore(str(path))
+    received = {}
+
+    def build_rows(existing: dict) -> list:
+        received.update(existing)
+        return rebuild('10', '2025-01-10', [('v1b', '10:00'), ('v4', '18:00')])(existing)
+
+    assert store.upsert_seduta('10', build_rows) == 2
+
+    assert set(received) == {('2025-01-10', '10:00'), ('2025-01-10', '15:00')}
+    assert [(r['id_video'], r['youtube_id']) for r in store.rows] == [('v1b', 'yt1'), ('v4', ''), ('v3', '')]
+    # Indici ricostruiti: le righe sostituite non si trovano più
+    assert store.find('v2') == []
+    assert store.is_uploaded('v1b', '10', '2025-01-10')
+
+
+def test_new_seduta_is_appended_and_flush_sorts_stably_by_date(tmp_path):
+    path = tmp_path / 'anagrafica.csv'
+    write_csv(path, [
+        row('12', '2025-01-20', 'v5'),
+        row('10', '2025-01-10', 'v1'),
+        row('10/A', '2025-01-10', 'v2'),
+    ])
+
+    store = AnagraficaStore(str(path))
+    store.upsert_seduta('11', rebuild('11', '2025-01-15', [('v3', '09:00'), ('v4', '11:00')]), replace=False)
+    assert [r['id_video'] for r in store.rows] == ['v5', 'v1', 'v2', 'v3', 'v4']
+
+    store.flush()
+
+    # Stessa data: resta l'ordine di file (10 prima di 10/A, v3 prima di v4)
+    assert [r['id_video'] for r in read_csv(path)] == ['v1', 'v2', 'v3', 'v4', 'v5']
+
+
+def test_upsert_adds_new_columns(tmp_path):
+    path = tmp_path / 'anagrafica.csv'
+    write_csv(path, [row('10', '2025-01-10', 'v1')])
+
+    store = AnagraficaStore(str(path))
+    store.upsert_seduta('10', lambda existing: [dict(row('10', '2025-01-10', 'v1'), odg_url='https://odg')])
+    store.flush()
+
+    assert read_csv(path)[0]['odg_url'] == 'https://odg'
+    assert 'odg_url' in store.fieldnames
+
+
+def test_pending_upsert_is_replayed_on_rows_changed_by_other_process(tmp_path):
+    path = tmp_path / 'anagrafica.csv'
+    write_csv(path, [row('10', '2025-01-10', 'v1', '10:00'), row('11', '2025-01-11', 'v3')])
+
+    store = AnagraficaStore(str(path))
+    store.upsert_seduta('10', rebuild('10', '2025-01-10', [('v1', '10:00'), ('v2', '15:00')]))
+    store.mark_uploaded('v2', 'yt2')
+
+    # Nel frattempo l'uploader carica v1 e aggiunge una seduta
+    write_csv(path, [
+        row('10', '2025-01-10', 'v1', '10:00', youtube_id='yt1'),
+        row('11', '2025-01-11', 'v3'),
+        row('09', '2025-01-09', 'v0'),
+    ])
+    bump_mtime(path)
+
+    store.flush()
+
+    rows = read_csv(path)
+    # L'upsert è ricostruito sulle righe nuove (youtube_id di v1 preservato),
+    # mark_uploaded riapplicato dopo l'upsert, poi ordinamento per data
+    assert [(r['id_video'], r['youtube_id']) for r in rows] == [
+        ('v0', ''), ('v1', 'yt1'), ('v2', 'yt2'), ('v3', '')
+    ]
+    assert not store.dirty
+
+
+def test_two_stores_flushing_in_turn_keep_both_upserts(tmp_path):
+    path = tmp_path / 'anagrafica.csv'
+    write_csv(path, [row('10', '2025-01-10', 'v1')])
+
+    first = AnagraficaStore(str(path))
+    second = AnagraficaStore(str(path))
+    first.upsert_seduta('11', rebuild('11', '2025-01-11', [('v2', '10:00')]), replace=False)
+    second.upsert_seduta('12', rebuild('12', '2025-01-12', [('v3', '10:00')]), replace=False)
+
+    first.flush()
+    bump_mtime(path)
+    second.flush()
+
+    assert [r['id_video'] for r in read_csv(path)] == ['v1', 'v2', 'v3']
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Test backlog: priorità della coda, video falliti in fondo, taglio per quota e scadenza.
+
+Usage:
+    python3 -m pytest scripts/tests/test_backlog.py
+"""
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+
+from src import backlog, quota
+from src.backlog import QuotaBudget, WorkQueue
+
+
+def row(id_video: str, data: str, ora: str, duration: str = '', status: str = '', youtube_id: str = '') -> dict:
+    return {
+        'numero_seduta': '10',
+        'data_seduta': data,
+        'id_video': id_video,
+        'data_video': data,
+        'ora_video': ora,
+        'duration_minutes': duration,
+        'status': status,
+        'youtube_id': youtube_id
+    }
+
+
+def pop_all(queue: WorkQueue) -> list:
+    return [queue.pop()['id_video'] for _ in range(len(queue))]
+
+
+def test_newest_day_first_then_shortest_then_latest():
+    queue = WorkQueue([
+        row('vecchio', '2025-01-10', '18:00', '10'),
+        row('lungo', '2025-02-01', '09:00', '180'),
+        row('breve', '2025-02-01', '11:00', '20'),
+        row('senza_durata', '2025-02-01', '16:00'),
+        row('breve_tardi', '2025-02-01', '17:30', '20'),
+    ])
+
+    assert pop_all(queue) == ['breve_tardi', 'breve', 'lungo', 'senza_durata', 'vecchio']
+
+
+def test_failed_videos_are_demoted_behind_all_others():
+    queue = WorkQueue([
+        row('fallito_recente', '2025-03-01', '10:00', '5', status='failed'),
+        row('vecchio', '2024-01-01', '10:00', '200'),
+        row('fallito_vecchio', '2024-06-01', '10:00', '5', status='FAILED'),
+        row('nuovo', '2025-02-01', '10:00', '50', status='pending'),
+    ])
+
+    assert pop_all(queue) == ['nuovo', 'vecchio', 'fallito_recente', 'fallito_vecchio']
+
+
+def test_equal_priority_keeps_insertion_order_and_bad_dates_go_last():
+    queue = WorkQueue([
+        row('a', '2025-01-10', '10:00', '30'),
+        row('data_illeggibile', 'n/d', '10:00', '30'),
+        row('b', '2025-01-10', '10:00', '30'),
+    ])
+
+    assert pop_all(queue) == ['a', 'b', 'data_illeggibile']
+
+
+def test_build_queue_keeps_only_uploadable_rows():
+    queue = backlog.build_queue([
+        row('da_caricare', '2025-01-10', '10:00'),
+        row('caricato', '2025-01-10', '11:00', youtube_id='yt1'),
+        row('', '2025-01-10', '12:00'),
+        row('senza_ora', '2025-01-10', ''),
+    ])
+
+    assert pop_all(queue) == ['da_caricare']
+
+
+def test_split_row_rebuilds_seduta_and_video():
+    seduta_info, video = backlog.split_row(row('v1', '2025-01-10', '10:00', '42'))
+    assert seduta_info['numero_seduta'] == '10'
+    assert seduta_info['odg_url'] == ''
+    assert video['duration_minutes'] == 42
+
+    _, video = backlog.split_row(row('v2', '2025-01-10', '10:00', 'n/d'))
+    assert video['duration_minutes'] is None
+
+
+def test_budget_stops_at_units():
+    budget = QuotaBudget(units=3500, cost=1600)
+    assert budget.charge() and budget.charge()
+    assert budget.remaining == 300
+    assert not budget.can_afford()
+    assert not budget.charge()
+    assert budget.spent == 3200
+
+
+def test_budget_respects_shared_daily_ledger(tmp_path):
+    ledger = quota.QuotaLedger(str(tmp_path / 'quota.json'), daily_limit=5000, reserve={quota.JOB_CAPTIONS: 2000})
+    budget = QuotaBudget(units=10000, cost=1600, ledger=ledger)
+
+    # 5000 - 2000 riservate ai sottotitoli: un solo upload
+    assert budget.charge()
+    ledger.record('videos.insert', quota.JOB_UPLOAD)
+    assert not budget.can_afford()
+
+    ledger.mark_exhausted()
+    assert ledger.allowance(quota.JOB_UPLOAD) == 0
+
+
+def test_drain_cuts_off_when_budget_runs_out(capsys):
+    queue = WorkQueue([row(f'v{i}', '2025-01-10', f'1{i}:00', '30') for i in range(5)])
+    budget = QuotaBudget(units=3200, cost=1600)
+
+    taken = []
+    for item in backlog.drain(queue, budget):
+        # Il primo video è saltato (già presente): non consuma quota
+        if item['id_video'] != 'v4':
+            assert budget.charge()
+        taken.append(item['id_video'])
+
+    assert taken == ['v4', 'v3', 'v2']
+    assert len(queue) == 2
+    assert '2 video rimandati' in capsys.readouterr().out
+
+
+def test_drain_stops_after_deadline(monkeypatch, capsys):
+    queue = WorkQueue([row(f'v{i}', '2025-01-10', f'1{i}:00', '30') for i in range(3)])
+    clock = iter([0.0, 5.0, 11.0])
+    monkeypatch.setattr(backlog.time, 'monotonic', lambda: next(clock))
+
+    taken = [item['id_video'] for item in backlog.drain(queue, QuotaBudget(), deadline=10.0)]
+
+    assert taken == ['v2', 'v1']
+    assert 'Tempo esaurito, 1 video rimandati' in capsys.readouterr().out
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Test crawler: frontiera di URL, ordine cronologico, filtri sui link, sedute duplicate ed errori.
+
+Usage:
+    python3 -m pytest scripts/tests/test_crawler.py
+"""
+import sys
+import threading
+import time
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+
+import pytest
+from bs4 import BeautifulSoup
+
+from src import crawler, scraper
+
+BASE = 'https://www.ars.sicilia.it/agenda/sedute-aula'
+
+
+def seduta_url(numero: str, data: str) -> str:
+    """URL seduta come sul sito (data YYYY-MM-DD -> ddmmyyyy)."""
+    year, month, day = data.split('-')
+    return f'{BASE}/seduta-numero-{numero.replace("/", "")}-del-{day}{month}{year}'
+
+
+class FakeSite:
+    """
+    Sostituisce scraper.fetch_seduta con pagine in memoria.
+
+    Ogni seduta punta alla successiva (next_url); delays rallenta alcune
+    pagine per far completare i download fuori ordine.
+    """
+
+    def __init__(self, sedute: list, links: dict = None, delays: dict = None, failing: set = ()):
+        self.pages = {}
+        self.urls = [seduta_url(numero, data) for numero, data in sedute]
+        for index, (numero, data) in enumerate(sedute):
+            url = self.urls[index]
+            self.pages[url] = {
+                'seduta_info': {'numero_seduta': numero, 'data_seduta': data, 'videos': []},
+                'next_url': self.urls[index + 1] if index + 1 < len(sedute) else None,
+                'links': (links or {}).get(numero, [])
+            }
+        self.delays = delays or {}
+        self.failing = set(failing)
+        self.fetched = []
+        self._lock = threading.Lock()
+
+    def __call__(self, url, parser=None, cache=None):
+        with self._lock:
+            self.fetched.append(url)
+        numero = self.pages.get(url, {}).get('seduta_info', {}).get('numero_seduta')
+        time.sleep(self.delays.get(numero, 0))
+        if numero in self.failing or url not in self.pages:
+            raise ConnectionError(f'errore {url}')
+        return self.pages[url]
+
+
+@pytest.fixture
+def site(monkeypatch):
+    def install(*args, **kwargs):
+        fake = FakeSite(*args, **kwargs)
+        monkeypatch.setattr(scraper, 'fetch_seduta', fake)
+        return fake
+    return install
+
+
+def numeri(crawl: dict) -> list:
+    return [info['numero_seduta'] for _, info in crawl['pages']]
+
+
+def test_pages_are_returned_in_chronological_order(site):
+    # Le prime sedute sono le più lente: completano dopo quelle successive
+    fake = site(
+        [('10', '2025-01-10'), ('11', '2025-01-15'), ('11/A', '2025-01-15'), ('12', '2025-01-20')],
+        links={'10': [seduta_url('12', '2025-01-20')]},
+        delays={'10': 0.05, '11': 0.03}
+    )
+
+    crawl = crawler.crawl_sedute_frontier(fake.urls[0], max_workers=4)
+
+    assert numeri(crawl) == ['10', '11', '11/A', '12']
+    assert crawl['errors'] == []
+    # Ogni URL scaricato una sola volta anche se raggiungibile da più pagine
+    assert sorted(fake.fetched) == sorted(fake.urls)
+
+
+def test_discovered_links_respect_start_date(site):
+    vecchia = seduta_url('5', '2024-12-01')
+    fake = site(
+        [('20', '2025-02-01'), ('21', '2025-02-05')],
+        links={'20': [vecchia, f'{BASE}/altra-pagina', seduta_url('21', '2025-02-05') + '/#video']}
+    )
+
+    crawl = crawler.crawl_sedute_frontier(fake.urls[0], start_date='2025-01-01')
+
+    assert numeri(crawl) == ['20', '21']
+    assert vecchia not in fake.fetched
+    assert f'{BASE}/altra-pagina' not in fake.fetched
+
+
+def test_listing_and_seed_urls_join_the_frontier(site, monkeypatch):
+    fake = site([('30', '2025-03-01'), ('31', '2025-03-03'), ('40', '2025-04-01'), ('41', '2025-04-03')])
+    # 30 -> 31 -> 40 -> 41: la catena si interrompe su 31 (next_url assente)
+    fake.pages[fake.urls[1]]['next_url'] = None
+    listing = BeautifulSoup(
+        f'<a href="{fake.urls[2]}">40</a><a href="{seduta_url("1", "2020-01-01")}">1</a>',
+        'html.parser'
+    )
+    monkeypatch.setattr(scraper, 'get_seduta_page', lambda url, parser=None: listing)
+
+    crawl = crawler.crawl_sedute_frontier(
+        fake.urls[0],
+        start_date='2025-01-01',
+        listing_urls=['https://www.ars.sicilia.it/agenda/lavori-aula'],
+        seed_urls=[fake.urls[3]]
+    )
+
+    assert numeri(crawl) == ['30', '31', '40', '41']
+
+
+def test_same_seduta_from_different_urls_is_returned_once(site):
+    fake = site([('50', '2025-05-05'), ('51', '2025-05-06')])
+    alias = fake.urls[1].replace('-del-', '-bis-del-')
+    fake.pages[alias] = fake.pages[fake.urls[1]]
+    fake.pages[fake.urls[0]]['links'] = [alias]
+
+    crawl = crawler.crawl_sedute_frontier(fake.urls[0])
+
+    assert numeri(crawl) == ['50', '51']
+    assert len(fake.fetched) == 3
+
+
+def test_failed_pages_are_reported_and_crawl_continues(site):
+    fake = site(
+        [('60', '2025-06-01'), ('61', '2025-06-02'), ('62', '2025-06-03')],
+        links={'60': [seduta_url('62', '2025-06-03')]},
+        failing={'61'}
+    )
+
+    crawl = crawler.crawl_sedute_frontier(fake.urls[0], max_workers=2)
+
+    assert numeri(crawl) == ['60', '62']
+    assert [url for url, _ in crawl['errors']] == [fake.urls[1]]
+    assert isinstance(crawl['errors'][0][1], ConnectionError)
+
+
+def test_unavailable_listing_is_skipped(site, monkeypatch, capsys):
+    fake = site([('70', '2025-07-01')])
+
+    def broken(url, parser=None):
+        raise ConnectionError('elenco non raggiungibile')
+    monkeypatch.setattr(scraper, 'get_seduta_page', broken)
+
+    crawl = crawler.crawl_sedute_frontier(fake.urls[0], listing_urls=['https://www.ars.sicilia.it/agenda/lavori-aula'])
+
+    assert numeri(crawl) == ['70']
+    assert 'Elenco sedute non disponibile' in capsys.readouterr().out
+
+
+def test_pages_are_delivered_in_order_while_crawl_continues(site):
+    fake = site(
+        [('80', '2025-08-01'), ('81', '2025-08-02'), ('82', '2025-08-03'), ('83', '2025-08-04')],
+        links={'80': [seduta_url('83', '2025-08-04')]},
+        delays={'81': 0.05}
+    )
+    delivered = []
+
+    def on_page(url, seduta_info, frontier):
+        delivered.append((seduta_info['numero_seduta'], sorted(frontier)))
+
+    crawl = crawler.crawl_sedute_frontier(fake.urls[0], max_workers=4, on_page=on_page)
+
+    assert [numero for numero, _ in delivered] == ['80', '81', '82', '83']
+    # 80 consegnata mentre 81 è ancora in volo e 83 attende l'ordine
+    assert delivered[0][1] == sorted([fake.urls[1], fake.urls[3]])
+    assert delivered[-1][1] == []
+    assert numeri(crawl) == ['80', '81', '82', '83']
+
+
+def test_interrupted_crawl_resumes_from_checkpoint(site, tmp_path):
+    sedute = [(str(numero), f'2025-09-{numero - 89:02d}') for numero in range(90, 98)]
+    fake = site(sedute)
+    checkpoint = crawler.CrawlCheckpoint(str(tmp_path / 'checkpoint.json'))
+    saved = []
+
+    def save_and_stop(url, seduta_info, frontier):
+        saved.append(seduta_info['numero_seduta'])
+        checkpoint.commit(url, seduta_info, frontier)
+        if len(saved) == 4:
+            raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        crawler.crawl_sedute_frontier(fake.urls[0], on_page=save_and_stop)
+    assert saved == ['90', '91', '92', '93']
+
+    # Nuovo processo: riparte dall'ultima seduta salvata e dalla sua frontiera
+    resumed = crawler.CrawlCheckpoint(str(tmp_path / 'checkpoint.json'))
+    assert resumed.last_numero == '93'
+    fake.fetched.clear()
+
+    crawl = crawler.crawl_sedute_frontier(resumed.last_url, seed_urls=resumed.frontier)
+
+    assert numeri(crawl) == ['93', '94', '95', '96', '97']
+    assert not set(fake.fetched) & set(fake.urls[:3])
+    assert [p.name for p in tmp_path.iterdir()] == ['checkpoint.json']
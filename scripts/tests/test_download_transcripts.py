@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+Test download_transcripts: scelta dei video da scaricare e marcatura no_transcript in anagrafica.
+
+Usage:
+    python3 -m pytest scripts/tests/test_download_transcripts.py
+"""
+import csv
+import json
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import httplib2
+import pytest
+from googleapiclient.errors import HttpError
+
+from src import quota, storage
+from src.anagrafica import AnagraficaStore
+import download_transcripts
+
+FIELDS = [
+    'numero_seduta', 'data_seduta', 'url_pagina', 'id_video', 'ora_video', 'data_video',
+    'youtube_id', 'last_check', 'status', 'no_transcript'
+]
+SRT = b'1\n00:00:01,000 --> 00:00:02,500\nBuongiorno a tutti.\n\n2\n00:00:03,000 --> 00:00:04,000\nSi apre la seduta.\n'
+OLD_UPLOAD = '2025-01-10T10:00:00'
+
+
+def row(id_video: str, youtube_id: str, no_transcript: str = '', last_check: str = OLD_UPLOAD) -> dict:
+    return {
+        'numero_seduta': '10',
+        'data_seduta': '2025-01-10',
+        'url_pagina': '',
+        'id_video': id_video,
+        'ora_video': '10:00',
+        'data_video': '2025-01-10',
+        'youtube_id': youtube_id,
+        'last_check': last_check,
+        'status': 'success' if youtube_id else '',
+        'no_transcript': no_transcript
+    }
+
+
+def write_anagrafica(path: Path, rows: list) -> None:
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def read_no_transcript(path: Path) -> dict:
+    with open(path, newline='', encoding='utf-8') as f:
+        return {r['youtube_id']: r['no_transcript'] for r in csv.DictReader(f) if r['youtube_id']}
+
+
+def make_config(tmp_path: Path) -> dict:
+    return {
+        'logging': {
+            'anagrafica_file': str(tmp_path / 'anagrafica.csv'),
+            'log_file': str(tmp_path / 'upload_log.csv'),
+            'index_file': str(tmp_path / 'index.csv')
+        },
+        'youtube': {
+            'credentials_file': 'config/client_secrets.json',
+            'token_file': 'config/token.json',
+            'quota': {'ledger_file': str(tmp_path / 'quota.json'), 'daily_limit': 10000},
+            'captions': {'language': 'it', 'workers': 2, 'asr_grace_days': 2, 'cue_cache': str(tmp_path / 'cues')}
+        }
+    }
+
+
+def http_error(status: int) -> HttpError:
+    resp = httplib2.Response({'status': status})
+    return HttpError(resp, json.dumps({'error': {'code': status, 'message': 'errore'}}).encode('utf-8'))
+
+
+def test_select_videos_skips_done_marked_and_duplicates(tmp_path):
+    (tmp_path / 'fatto.it.srt').write_bytes(SRT)
+    (tmp_path / 'fatto.it.txt').write_text('testo', encoding='utf-8')
+    (tmp_path / 'senza_txt.it.srt').write_bytes(SRT)
+    rows = [
+        row('1', 'nuovo'),
+        row('2', ''),
+        row('3', 'fatto'),
+        row('4', 'senza_txt'),
+        row('5', 'marcato', no_transcript='true'),
+        row('6', 'marcato_maiuscolo', no_transcript='TRUE'),
+        row('7', 'nuovo'),
+        row('8', 'falso', no_transcript='false'),
+    ]
+
+    todo, txt_only = download_transcripts.select_videos(rows, tmp_path, 'it', retry_missing=False)
+    assert [r['id_video'] for r in todo] == ['1', '8']
+    assert txt_only == ['senza_txt']
+
+    todo, _ = download_transcripts.select_videos(rows, tmp_path, 'it', retry_missing=True)
+    assert [r['youtube_id'] for r in todo] == ['nuovo', 'marcato', 'marcato_maiuscolo', 'falso']
+
+
+def test_select_videos_uses_language_in_file_names(tmp_path):
+    (tmp_path / 'yt1.it.srt').write_bytes(SRT)
+    (tmp_path / 'yt1.it.txt').write_text('testo', encoding='utf-8')
+
+    todo, _ = download_transcripts.select_videos([row('1', 'yt1')], tmp_path, 'en', retry_missing=False)
+    assert [r['youtube_id'] for r in todo] == ['yt1']
+
+
+def test_mark_no_transcript_adds_column(tmp_path):
+    # Anagrafica scritta prima della colonna no_transcript
+    path = tmp_path / 'anagrafica.csv'
+    fields = [field for field in FIELDS if field != 'no_transcript']
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=fields, extrasaction='ignore')
+        writer.writeheader()
+        writer.writerows([row('1', 'yt1'), row('2', 'yt2')])
+
+    store = AnagraficaStore(str(path))
+    assert store.mark_no_transcript('yt2') == 1
+    store.flush()
+
+    assert read_no_transcript(path) == {'yt1': '', 'yt2': 'true'}
+
+
+def test_legacy_list_is_migrated_to_anagrafica(tmp_path):
+    config = make_config(tmp_path)
+    write_anagrafica(Path(config['logging']['anagrafica_file']), [row('1', 'yt1'), row('2', 'yt2'), row('3', 'yt3')])
+    output_dir = tmp_path / 'trascrizioni'
+    output_dir.mkdir()
+    backend = storage.CsvBackend(config)
+    backend.init()
+
+    assert download_transcripts.migrate_legacy_list(backend, output_dir) == []
+
+    (output_dir / download_transcripts.LEGACY_NO_TRANSCRIPT_FILE).write_text('yt3\n\nyt1\nyt3\n', encoding='utf-8')
+    assert download_transcripts.migrate_legacy_list(backend, output_dir) == ['yt1', 'yt3']
+    assert backend.flush()
+
+    marked = read_no_transcript(Path(config['logging']['anagrafica_file']))
+    assert marked == {'yt1': 'true', 'yt2': '', 'yt3': 'true'}
+
+
+@pytest.fixture
+def run_main(tmp_path, monkeypatch):
+    """Esegue main() con anagrafica, quota e API finte; ritorna (exit code, output_dir, config)."""
+    monkeypatch.setattr(quota, '_ledger', None)
+    monkeypatch.setattr(quota, '_job', quota._job)
+    monkeypatch.delenv('MAX_DOWNLOADS', raising=False)
+    monkeypatch.delenv('CSV_FILE', raising=False)
+    monkeypatch.delenv('ARS_STORAGE_BACKEND', raising=False)
+    config = make_config(tmp_path)
+    output_dir = tmp_path / 'trascrizioni'
+    monkeypatch.setattr(download_transcripts, 'load_config', lambda config_path=None: config)
+    monkeypatch.setattr(download_transcripts.youtube_auth, 'get_client', lambda *args, **kwargs: object())
+    monkeypatch.setattr(download_transcripts.youtube_auth, 'authorized_http', lambda *args, **kwargs: object())
+
+    def run(rows: list, results: dict, *argv) -> tuple:
+        write_anagrafica(Path(config['logging']['anagrafica_file']), rows)
+
+        def fetch_srt(youtube, youtube_id, language, http=None):
+            result = results[youtube_id]
+            if isinstance(result, Exception):
+                raise result
+            return result
+        monkeypatch.setattr(download_transcripts.captions, 'fetch_srt', fetch_srt)
+        monkeypatch.setattr(sys, 'argv', ['download_transcripts.py', '--output-dir', str(output_dir), *argv])
+        return download_transcripts.main(), output_dir, config
+
+    return run
+
+
+def test_missing_captions_are_marked_in_anagrafica(run_main, capsys):
+    recent = (datetime.now() - timedelta(hours=3)).isoformat()
+    rows = [
+        row('1', 'ok'),
+        row('2', 'senza_sottotitoli'),
+        row('3', 'caricato_ora', last_check=recent),
+        row('4', 'rimosso'),
+        row('5', 'errore_server'),
+    ]
+    results = {
+        'ok': SRT,
+        'senza_sottotitoli': None,
+        'caricato_ora': None,
+        'rimosso': http_error(404),
+        'errore_server': http_error(500),
+    }
+
+    code, output_dir, config = run_main(rows, results)
+
+    assert code == 1
+    assert read_no_transcript(Path(config['logging']['anagrafica_file'])) == {
+        'ok': '',
+        'senza_sottotitoli': 'true',
+        'caricato_ora': '',
+        'rimosso': 'true',
+        'errore_server': ''
+    }
+    assert (output_dir / 'ok.it.srt').read_bytes() == SRT
+    assert (output_dir / 'ok.it.txt').read_text(encoding='utf-8').split() == 'Buongiorno a tutti. Si apre la seduta.'.split()
+    out = capsys.readouterr().out
+    assert '⊙ caricato_ora: nessun sottotitolo (caricato da poco)' in out
+    assert 'scaricate=1, senza sottotitoli=2, errori=1' in out
+
+
+def test_marked_videos_are_not_requested_again(run_main, capsys):
+    rows = [row('1', 'marcato', no_transcript='true'), row('2', 'ok')]
+
+    # Un video marcato non viene richiesto (fetch_srt fallirebbe con KeyError)
+    code, _, config = run_main(rows, {'ok': SRT})
+    assert code == 0
+    assert 'Trascrizioni da scaricare: 1' in capsys.readouterr().out
+
+    # --retry-missing lo richiede di nuovo
+    code, output_dir, _ = run_main(rows, {'marcato': SRT, 'ok': SRT}, '--retry-missing')
+    assert code == 0
+    assert (output_dir / 'marcato.it.srt').exists()
+
+
+def test_legacy_file_is_removed_after_flush(run_main, tmp_path, capsys):
+    output_dir = tmp_path / 'trascrizioni'
+    output_dir.mkdir()
+    legacy = output_dir / download_transcripts.LEGACY_NO_TRANSCRIPT_FILE
+    legacy.write_text('yt1\n', encoding='utf-8')
+
+    code, _, config = run_main([row('1', 'yt1'), row('2', 'yt2')], {'yt2': None})
+
+    assert code == 0
+    assert not legacy.exists()
+    assert read_no_transcript(Path(config['logging']['anagrafica_file'])) == {'yt1': 'true', 'yt2': 'true'}
+    assert '1 video da no_transcript.txt marcati no_transcript' in capsys.readouterr().out
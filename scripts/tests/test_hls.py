@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+Test hls: analisi delle playlist m3u8, store dei segmenti riprendibile e timeout del download.
+
+Usage:
+    python3 -m pytest scripts/tests/test_hls.py
+"""
+import json
+import sys
+import threading
+import time
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+
+import pytest
+import requests
+
+from src import hls
+from src.hls import HlsError, HlsTimeout, HlsUnsupported, SegmentStore
+
+BASE = 'https://vod.ars.sicilia.it/vodsed/seduta_219'
+
+MASTER = """#EXTM3U
+#EXT-X-VERSION:3
+#EXT-X-STREAM-INF:BANDWIDTH=800000,RESOLUTION=640x360,CODECS="avc1.4d401e,mp4a.40.2"
+360p/index.m3u8
+#EXT-X-STREAM-INF:BANDWIDTH=2500000,RESOLUTION=1280x720
+720p/index.m3u8
+#EXT-X-STREAM-INF:BANDWIDTH=5000000,RESOLUTION=1920x1080
+https://cdn.ars.sicilia.it/1080p/index.m3u8
+"""
+
+
+def media_playlist(count: int, duration: float = 6.0, extra: str = '') -> str:
+    lines = ['#EXTM3U', '#EXT-X-TARGETDURATION:6', '#EXT-X-MEDIA-SEQUENCE:0']
+    if extra:
+        lines.append(extra)
+    for index in range(count):
+        lines += [f'#EXTINF:{duration},', f'seg{index}.ts?token=abc']
+    lines.append('#EXT-X-ENDLIST')
+    return '\n'.join(lines) + '\n'
+
+
+class FakeResponse:
+    def __init__(self, status_code: int, content: bytes = b''):
+        self.status_code = status_code
+        self.content = content
+        self.text = content.decode('utf-8', errors='replace')
+        self.closed = False
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f'{self.status_code} Error')
+
+    def iter_content(self, chunk_size=1):
+        for start in range(0, len(self.content), chunk_size):
+            yield self.content[start:start + chunk_size]
+
+    def close(self):
+        self.closed = True
+
+
+class FakeCdn:
+    """Sostituisce http_client.get: contenuti per URL, segmenti lenti o falliti, richieste registrate."""
+
+    def __init__(self, files: dict, delays: dict = None, failing: set = ()):
+        self.files = files
+        self.delays = delays or {}
+        self.failing = set(failing)
+        self.requests = []
+        self._lock = threading.Lock()
+
+    def __call__(self, url, stream=False, **kwargs):
+        with self._lock:
+            self.requests.append(url)
+        time.sleep(self.delays.get(url, 0))
+        if url in self.failing or url not in self.files:
+            return FakeResponse(404)
+        content = self.files[url]
+        return FakeResponse(200, content.encode('utf-8') if isinstance(content, str) else content)
+
+    def segments_fetched(self) -> list:
+        return sorted(url.split('/')[-1].split('?')[0] for url in self.requests if '.m3u8' not in url)
+
+
+def segment_url(index: int) -> str:
+    return f'{BASE}/seg{index}.ts?token=abc'
+
+
+@pytest.fixture
+def cdn(monkeypatch):
+    def install(count: int = 4, **kwargs):
+        files = {f'{BASE}/index.m3u8': media_playlist(count)}
+        files.update({segment_url(index): f'<segmento {index}>'.encode('utf-8') for index in range(count)})
+        fake = FakeCdn(files, **kwargs)
+        monkeypatch.setattr(hls.http_client, 'get', fake)
+        return fake
+    return install
+
+
+@pytest.fixture
+def fake_remux(monkeypatch):
+    """Remux senza ffmpeg: concatena i segmenti nell'output, come ffmpeg li riceve su stdin."""
+    monkeypatch.setattr(hls.shutil, 'which', lambda name: f'/usr/bin/{name}')
+
+    def remux(store, output_path, fmp4=False):
+        with open(output_path, 'wb') as out:
+            for path in store.ordered_paths():
+                out.write(path.read_bytes())
+    monkeypatch.setattr(hls, 'remux', remux)
+
+
+def test_parse_master_playlist_resolves_variants():
+    playlist = hls.parse_playlist(MASTER, f'{BASE}/master.m3u8')
+
+    assert playlist['segments'] == []
+    assert playlist['variants'] == [
+        {'bandwidth': 800000, 'height': 360, 'url': f'{BASE}/360p/index.m3u8'},
+        {'bandwidth': 2500000, 'height': 720, 'url': f'{BASE}/720p/index.m3u8'},
+        {'bandwidth': 5000000, 'height': 1080, 'url': 'https://cdn.ars.sicilia.it/1080p/index.m3u8'},
+    ]
+
+
+def test_parse_media_playlist_with_map_and_key():
+    text = media_playlist(3, 4.5, extra='#EXT-X-MAP:URI="init.mp4",BYTERANGE="720@0"')
+    playlist = hls.parse_playlist(text, f'{BASE}/index.m3u8')
+
+    assert playlist['variants'] == []
+    assert playlist['segments'] == [{'url': segment_url(index), 'duration': 4.5} for index in range(3)]
+    assert playlist['init_url'] == f'{BASE}/init.mp4'
+    assert not playlist['encrypted']
+
+    assert not hls.parse_playlist(media_playlist(1, extra='#EXT-X-KEY:METHOD=NONE'), BASE)['encrypted']
+    encrypted = media_playlist(1, extra='#EXT-X-KEY:METHOD=AES-128,URI="https://keys.example/k",IV=0x1')
+    assert hls.parse_playlist(encrypted, BASE)['encrypted']
+
+
+def test_parse_playlist_rejects_other_content():
+    for text in ('', '<html>errore</html>', '\n\n#EXTINF:6,\nseg0.ts'):
+        with pytest.raises(HlsError):
+            hls.parse_playlist(text, BASE)
+
+
+def test_resolve_media_playlist_picks_best_variant_within_height(monkeypatch):
+    fake = FakeCdn({
+        f'{BASE}/master.m3u8': MASTER,
+        f'{BASE}/720p/index.m3u8': media_playlist(2),
+        f'{BASE}/360p/index.m3u8': media_playlist(3),
+    })
+    monkeypatch.setattr(hls.http_client, 'get', fake)
+
+    url, playlist = hls.resolve_media_playlist(f'{BASE}/master.m3u8', max_height=720)
+    assert url == f'{BASE}/720p/index.m3u8'
+    assert len(playlist['segments']) == 2
+
+    # Nessuna variante entro il limite: la più piccola
+    url, _ = hls.resolve_media_playlist(f'{BASE}/master.m3u8', max_height=240)
+    assert url == f'{BASE}/360p/index.m3u8'
+
+    assert hls.manifest_duration(f'{BASE}/master.m3u8') == 18.0
+
+
+def test_segment_store_keeps_segments_for_same_playlist(tmp_path):
+    segments = [{'url': segment_url(index), 'duration': 6.0} for index in range(3)]
+    store = SegmentStore(tmp_path / 'seduta', segments, init_url=f'{BASE}/init.mp4')
+    assert store.missing() == [-1, 0, 1, 2]
+
+    store.save(-1, FakeResponse(200, b'init'))
+    assert store.save(1, FakeResponse(200, b'segmento 1')) == 10
+    assert [path.name for path in store.ordered_paths()] == ['init.mp4', '000000.seg', '000001.seg', '000002.seg']
+
+    # Nuovo run, URL con token diversi ma stesse durate: segmenti riusati
+    renewed = [{'url': segment['url'] + '&run=2', 'duration': segment['duration']} for segment in segments]
+    store = SegmentStore(tmp_path / 'seduta', renewed, init_url=f'{BASE}/init.mp4')
+    assert store.missing() == [0, 2]
+    assert store.path(1).read_bytes() == b'segmento 1'
+    assert not list((tmp_path / 'seduta').glob('*.tmp'))
+
+
+def test_segment_store_resets_when_playlist_changes(tmp_path):
+    segments = [{'url': segment_url(index), 'duration': 6.0} for index in range(3)]
+    SegmentStore(tmp_path / 'seduta', segments).save(0, FakeResponse(200, b'vecchio'))
+
+    changed = segments[:2] + [{'url': segment_url(2), 'duration': 5.0}]
+    store = SegmentStore(tmp_path / 'seduta', changed)
+    assert store.missing() == [0, 1, 2]
+    manifest = json.loads((tmp_path / 'seduta' / 'manifest.json').read_text(encoding='utf-8'))
+    assert manifest == {'durations': [6.0, 6.0, 5.0], 'init': False}
+
+    # Stesse durate ma con EXT-X-MAP: formato diverso, store svuotato
+    store.save(0, FakeResponse(200, b'ts'))
+    assert SegmentStore(tmp_path / 'seduta', changed, init_url=f'{BASE}/init.mp4').missing() == [-1, 0, 1, 2]
+
+    # Manifest illeggibile: store svuotato
+    store = SegmentStore(tmp_path / 'seduta', changed)
+    store.save(0, FakeResponse(200, b'ts'))
+    (tmp_path / 'seduta' / 'manifest.json').write_text('{troncato', encoding='utf-8')
+    assert SegmentStore(tmp_path / 'seduta', changed).missing() == [0, 1, 2]
+
+
+def test_failed_download_resumes_with_missing_segments(tmp_path, cdn, fake_remux):
+    fake = cdn(4, failing={segment_url(2)})
+    output = tmp_path / 'seduta_219.mp4'
+    store_dir = tmp_path / 'segments'
+
+    with pytest.raises(HlsError, match='Segmento 2'):
+        hls.download_hls(f'{BASE}/index.m3u8', str(output), workers=1, store_dir=str(store_dir))
+    assert not output.exists()
+    assert (store_dir / 'seduta_219' / '000000.seg').exists()
+
+    # Secondo run: il segmento torna disponibile, si scaricano solo i mancanti
+    fake.failing.clear()
+    fake.requests.clear()
+    progress = []
+    result = hls.download_hls(
+        f'{BASE}/index.m3u8', str(output), workers=2, store_dir=str(store_dir), progress_callback=progress.append
+    )
+
+    assert 'seg0.ts' not in fake.segments_fetched()
+    assert result['fetched'] == len(fake.segments_fetched())
+    assert result['segments'] == 4
+    assert result['duration'] == 24.0
+    assert output.read_bytes() == b''.join(f'<segmento {index}>'.encode('utf-8') for index in range(4))
+    assert progress[-1]['status'] == 'finished'
+    assert progress[-2]['fragment_index'] == 4
+    # Remux riuscito: store eliminato
+    assert not (store_dir / 'seduta_219').exists()
+
+
+def test_timeout_keeps_downloaded_segments(tmp_path, cdn, fake_remux):
+    fake = cdn(4, delays={segment_url(2): 0.5})
+    output = tmp_path / 'seduta_219.mp4'
+    store_dir = tmp_path / 'segments'
+
+    with pytest.raises(HlsTimeout):
+        hls.download_hls(f'{BASE}/index.m3u8', str(output), workers=1, store_dir=str(store_dir), timeout=0.2)
+
+    # Il segmento in volo si completa, quello non ancora avviato no
+    store_path = store_dir / 'seduta_219'
+    assert sorted(path.name for path in store_path.glob('*.seg')) == ['000000.seg', '000001.seg', '000002.seg']
+    assert fake.segments_fetched() == ['seg0.ts', 'seg1.ts', 'seg2.ts']
+
+    fake.requests.clear()
+    result = hls.download_hls(f'{BASE}/index.m3u8', str(output), workers=1, store_dir=str(store_dir))
+    assert fake.segments_fetched() == ['seg3.ts']
+    assert result['fetched'] == 1
+    assert output.exists()
+
+
+def test_encrypted_stream_is_left_to_yt_dlp(tmp_path, monkeypatch, fake_remux):
+    text = media_playlist(2, extra='#EXT-X-KEY:METHOD=AES-128,URI="key.bin"')
+    monkeypatch.setattr(hls.http_client, 'get', FakeCdn({f'{BASE}/index.m3u8': text}))
+
+    with pytest.raises(HlsUnsupported):
+        hls.download_hls(f'{BASE}/index.m3u8', str(tmp_path / 'out.mp4'), store_dir=str(tmp_path / 'segments'))
+    assert not (tmp_path / 'segments').exists()
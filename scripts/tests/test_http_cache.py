@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Test HttpCache: GET condizionali, riuso dei risultati di parsing, voci corrotte ed eviction.
+
+Usage:
+    python3 -m pytest scripts/tests/test_http_cache.py
+"""
+import json
+import os
+import sys
+import time
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+
+import pytest
+import requests
+
+from src import http_cache
+from src.http_cache import HttpCache
+
+URL = 'https://www.ars.sicilia.it/agenda/sedute-aula/seduta-10'
+
+
+class FakeResponse:
+    def __init__(self, status_code: int, content: bytes = b'', headers: dict = None):
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers or {}
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f'{self.status_code} Error')
+
+
+class FakeServer:
+    """Sostituisce http_client.get: risponde dalla coda e registra gli header ricevuti."""
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.requests = []
+
+    def __call__(self, url, headers=None, timeout=None):
+        self.requests.append((url, dict(headers or {})))
+        return self.responses.pop(0)
+
+
+@pytest.fixture
+def server(monkeypatch):
+    def install(*responses):
+        fake = FakeServer(*responses)
+        monkeypatch.setattr(http_cache.http_client, 'get', fake)
+        return fake
+    return install
+
+
+def test_second_fetch_is_conditional_and_reuses_body(tmp_path, server):
+    fake = server(
+        FakeResponse(200, b'<html>seduta</html>', {'ETag': '"abc"', 'Last-Modified': 'Mon, 10 Feb 2025 10:00:00 GMT'}),
+        FakeResponse(304)
+    )
+    cache = HttpCache(str(tmp_path))
+
+    first = cache.fetch(URL, headers={'Accept': 'text/html'})
+    assert not first.not_modified
+    assert fake.requests[0][1] == {'Accept': 'text/html'}
+
+    second = cache.fetch(URL)
+    assert second.not_modified
+    assert second.body == b'<html>seduta</html>'
+    assert fake.requests[1][1] == {
+        'If-None-Match': '"abc"',
+        'If-Modified-Since': 'Mon, 10 Feb 2025 10:00:00 GMT'
+    }
+    assert cache.stats == {'not_modified': 1, 'downloaded': 1, 'bytes_downloaded': 19, 'parse_reused': 0}
+    # Nessun file temporaneo lasciato nella directory della cache
+    assert sorted(p.suffix for p in tmp_path.iterdir()) == ['.body', '.json']
+
+
+def test_parse_result_valid_until_body_or_version_changes(tmp_path, server):
+    server(
+        FakeResponse(200, b'v1', {'ETag': '"1"'}),
+        FakeResponse(304),
+        FakeResponse(200, b'v1', {'ETag': '"2"'}),
+        FakeResponse(200, b'v2', {'ETag': '"3"'})
+    )
+    cache = HttpCache(str(tmp_path))
+
+    page = cache.fetch(URL)
+    assert page.get_result('seduta', '1') is None
+    cache.put_result(page, 'seduta', '1', {'numero': '10'})
+
+    # 304: risultato riusato, ma non per un estrattore di versione diversa
+    page = cache.fetch(URL)
+    assert page.get_result('seduta', '1') == {'numero': '10'}
+    assert page.get_result('seduta', '2') is None
+
+    # 200 con corpo identico (ETag cambiato): il risultato resta valido
+    page = cache.fetch(URL)
+    assert not page.not_modified
+    assert page.get_result('seduta', '1') == {'numero': '10'}
+
+    # Corpo diverso: risultato scartato
+    page = cache.fetch(URL)
+    assert page.get_result('seduta', '1') is None
+
+
+def test_corrupted_body_forces_unconditional_download(tmp_path, server):
+    fake = server(FakeResponse(200, b'originale', {'ETag': '"1"'}), FakeResponse(200, b'nuovo', {'ETag': '"2"'}))
+    cache = HttpCache(str(tmp_path))
+    cache.fetch(URL)
+
+    _, body_path = cache._paths(URL)
+    body_path.write_bytes(b'troncato')
+
+    page = cache.fetch(URL)
+    assert 'If-None-Match' not in fake.requests[1][1]
+    assert page.body == b'nuovo'
+
+
+def test_http_error_is_raised_and_keeps_entry(tmp_path, server):
+    server(FakeResponse(200, b'corpo', {'ETag': '"1"'}), FakeResponse(503), FakeResponse(304))
+    cache = HttpCache(str(tmp_path))
+    cache.fetch(URL)
+
+    with pytest.raises(requests.HTTPError):
+        cache.fetch(URL)
+    assert cache.fetch(URL).body == b'corpo'
+
+
+def fill(cache: HttpCache, server, names: list) -> None:
+    server(*[FakeResponse(200, b'x' * 1000, {'ETag': f'"{name}"'}) for name in names])
+    for name in names:
+        cache.fetch(f'{URL}/{name}')
+
+
+def set_last_used(cache: HttpCache, url: str, last_used: float) -> None:
+    meta_path, _ = cache._paths(url)
+    entry = json.loads(meta_path.read_text(encoding='utf-8'))
+    entry['last_used'] = last_used
+    meta_path.write_text(json.dumps(entry), encoding='utf-8')
+
+
+def test_evict_removes_entries_older_than_max_age(tmp_path, server):
+    cache = HttpCache(str(tmp_path), max_age_days=30)
+    fill(cache, server, ['vecchia', 'recente'])
+    set_last_used(cache, f'{URL}/vecchia', time.time() - 31 * 86400)
+
+    removed, freed = cache.evict()
+
+    assert removed == 1 and freed > 1000
+    assert not any(p.exists() for p in cache._paths(f'{URL}/vecchia'))
+    assert all(p.exists() for p in cache._paths(f'{URL}/recente'))
+
+
+def test_evict_removes_least_recently_used_over_max_size(tmp_path, server):
+    # Ogni voce occupa ~1.3 KB (corpo + metadati): ne restano due su quattro
+    cache = HttpCache(str(tmp_path), max_size_mb=3000 / (1024 * 1024))
+    names = ['a', 'b', 'c', 'd']
+    fill(cache, server, names)
+    now = time.time()
+    for age, name in zip([10, 40, 20, 30], names):
+        set_last_used(cache, f'{URL}/{name}', now - age)
+
+    removed, _ = cache.evict()
+
+    assert removed == 2
+    kept = sorted(name for name in names if cache._paths(f'{URL}/{name}')[0].exists())
+    assert kept == ['a', 'c']
+    assert sum(p.stat().st_size for p in tmp_path.iterdir()) <= cache.max_size
+
+
+def test_evict_handles_unreadable_metadata_and_missing_dir(tmp_path, server):
+    assert HttpCache(str(tmp_path / 'mancante')).evict() == (0, 0)
+
+    cache = HttpCache(str(tmp_path))
+    fill(cache, server, ['a'])
+    meta_path, _ = cache._paths(f'{URL}/a')
+    meta_path.write_text('{non json', encoding='utf-8')
+
+    # Metadati illeggibili = mai usata: eliminata per età
+    assert cache.evict()[0] == 1
+    assert os.listdir(tmp_path) == []
+
+
+def test_get_cache_reads_config():
+    assert http_cache.get_cache({'http_cache': {'enabled': False}}) is None
+    cache = http_cache.get_cache({'http_cache': {'dir': '/tmp/x', 'max_age_days': 1, 'max_size_mb': 2}})
+    assert cache.cache_dir == Path('/tmp/x')
+    assert cache.max_age == 86400
+    assert cache.max_size == 2 * 1024 * 1024
+    assert http_cache.get_cache({}).cache_dir == Path(http_cache.DEFAULT_CACHE_DIR)
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Test parità tra parser HTML: stessi record estratti con ogni parser disponibile,
+e stesso risultato tra scan_seduta_page (visita singola) e il percorso multi-pass
+extract_* / find_video_elements / extract_video_metadata.
+
+Usa le pagine di esempio incluse qui sotto e, se presenti, le pagine seduta
+salvate in data/cache/sedute_html (vedi benchmark_seduta_parser.py --fetch)
+o nella directory indicata da ARS_PARITY_PAGES.
+
+Usage:
+    python3 scripts/tests/test_parser_parity.py
+    python3 -m pytest scripts/tests/test_parser_parity.py
+"""
+import os
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import pytest
+
+from src import scraper
+from src.html_parser import available_parsers, parse_html
+from benchmark_seduta_parser import extract_seduta_info_multipass
+from scrape_studi_pubblicazioni import extract_category_links, extract_records_for_category
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+PAGES_DIR = Path(os.environ.get('ARS_PARITY_PAGES', REPO_ROOT / 'data' / 'cache' / 'sedute_html'))
+
+SEDUTA_HTML = """<!DOCTYPE html>
+<html><head><title>Seduta numero 219 - ARS</title></head>
+<body>
+<div class="page"><div class="content">
+<h2>SEDUTA NUMERO 219 DEL 10 DICEMBRE 2025</h2>
+<div class="documenti">
+  <p><a href="/sites/default/files/odg_219.pdf">OdG e Comunicazioni</a></p>
+  <div class="doc"><h4>Resoconto provvisorio</h4><a href="sites/default/files/resoconto_219.pdf">Scarica</a></div>
+  <p>Allegato alla seduta <a href="https://www.ars.sicilia.it/allegato_219.pdf">pdf</a></p>
+</div>
+<h4>10 Dicembre 2025</h4>
+<div class="video_box" data-src="//www.ars.sicilia.it//video/2484769"
+     title="10 Dicembre 2025 - Video dalle 11:37"><span>Video dalle 11:37</span></div>
+<div class="row"><div class="video_box col" data-src="/video/2484770"><span>Video dalle 16:05</span></div></div>
+<h4>11 Dicembre 2025</h4>
+<div class="video_box" data-src="/video/2484771"><p>Video dalle 10:12</p></div>
+</div></div>
+<div class="next_link"><a href="/agenda/sedute-aula/seduta-numero-220-del-16122025">&gt;</a></div>
+</body></html>
+"""
+
+# Casi limite per la visita singola: numero solo nell'h1, documenti con link nel
+# sibling o nel parent, video prima di ogni h4, h4 non data, video senza ora
+SEDUTA_EDGE_HTML = """<!DOCTYPE html>
+<html><head><title>ARS - Agenda</title></head>
+<body>
+<h1>Seduta n. 220/A</h1>
+<p>Resoconto della seduta DEL 16 dicembre 2025</p>
+<div class="video_box" data-src="https://www.ars.sicilia.it//video/2490001"><span>Video dalle 09:05</span></div>
+<div class="documenti">
+  <h3>Resoconto stenografico</h3><p><a href="/files/steno_220.pdf">pdf</a></p>
+  <div><h4>Resoconto provvisorio</h4></div><p><a href="files/provv_220.pdf">pdf</a></p>
+  <div class="doc"><h4>Allegato alla seduta</h4><a href="https://w3.ars.sicilia.it/allegato_220.pdf">pdf</a></div>
+  <p>OdG e Comunicazioni</p></div>
+<h4>Interventi</h4>
+<div class="video_box" data-src="/video/2490002" title="17 Dicembre 2025 - Video dalle 15:30"></div>
+<h4>18 Dicembre 2025</h4>
+<div class="video_box" data-src="/video/2490003"><span>senza orario</span></div>
+<div class="video_box"><span>Video dalle 12:00</span></div>
+<div class="video_box" data-src="/altro/2490004"><span>Video dalle 12:30</span></div>
+<div><div class="video_box" data-src="/video/2490005"><span>Video dalle 18:45</span></div></div>
+</body></html>
+"""
+
+STUDI_HTML = """<!DOCTYPE html>
+<html><body>
+<ul class="smenu_left">
+  <li><a href="/studi-e-pubblicazioni/dossier">Dossier</a></li>
+  <li><a href="/studi-e-pubblicazioni-archivio">Archivio</a></li>
+</ul>
+<div class="views-element-container"><div class="pad-blocco-discorsi"><ul>
+  <li>
+    <div class="blocco-discorsi-1"><p>Dossier n. 12 - DDL n. 1024/A</p></div>
+    <div class="blocco-discorsi-2"><p>Disposizioni   in materia di bilancio</p></div>
+    <div class="blocco-discorsi-3"><a href="/sites/default/files/downloads/2025-11/dossier_12.pdf">pdf</a></div>
+  </li>
+  <li>
+    <div class="blocco-discorsi-2"><p>Nota di lettura</p></div>
+    <div class="blocco-discorsi-3"><a href="/sites/default/files/downloads/2025-10/nota.pdf">pdf</a></div>
+  </li>
+</ul></div></div>
+</body></html>
+"""
+
+
+def seduta_pages() -> list:
+    pages = [('esempio', SEDUTA_HTML.encode('utf-8')), ('casi_limite', SEDUTA_EDGE_HTML.encode('utf-8'))]
+    if PAGES_DIR.is_dir():
+        pages.extend((path.name, path.read_bytes()) for path in sorted(PAGES_DIR.glob('*.html')))
+    return pages
+
+
+def extract_seduta(markup: bytes, parser: str) -> dict:
+    html = parse_html(markup, parser)
+    info = scraper.extract_seduta_info(html, 'https://www.ars.sicilia.it/agenda/sedute-aula/test')
+    info['next_url'] = scraper.get_next_seduta_url(html, go_forward=True)
+    return info
+
+
+def extract_studi(markup: str, parser: str) -> dict:
+    soup = parse_html(markup, parser)
+    return {
+        'categorie': extract_category_links(soup),
+        'record': extract_records_for_category('Dossier', 'https://example.org', soup, '2025-01-01T00:00:00+00:00'),
+    }
+
+
+def test_seduta_example_extraction():
+    info = extract_seduta(SEDUTA_HTML.encode('utf-8'), 'html.parser')
+    assert info['numero_seduta'] == '219'
+    assert info['data_seduta'] == '2025-12-10'
+    assert info['odg_url'] == 'https://www.ars.sicilia.it/sites/default/files/odg_219.pdf'
+    assert info['resoconto_url'] == 'https://www.ars.sicilia.it/sites/default/files/resoconto_219.pdf'
+    assert [(v['id_video'], v['data_video'], v['ora_video']) for v in info['videos']] == [
+        ('2484769', '2025-12-10', '11:37'),
+        ('2484770', '2025-12-10', '16:05'),
+        ('2484771', '2025-12-11', '10:12'),
+    ]
+
+
+def test_single_pass_scan_matches_multipass_extraction():
+    # scan_seduta_page deve restituire quanto le funzioni extract_* e find_video_elements
+    url = 'https://www.ars.sicilia.it/agenda/sedute-aula/test'
+    for name, markup in seduta_pages():
+        for parser in available_parsers():
+            html = parse_html(markup, parser)
+            page = scraper.scan_seduta_page(html)
+            assert page['numero_seduta'] == scraper.extract_seduta_number(html), f"{name} ({parser})"
+            assert page['data_seduta'] == scraper.extract_seduta_date(html), f"{name} ({parser})"
+            assert page['documents'] == scraper.extract_document_urls(html), f"{name} ({parser})"
+            assert [tag for tag, _ in page['video_boxes']] == scraper.find_video_elements(html), f"{name} ({parser})"
+            assert scraper.extract_seduta_info(html, url) == extract_seduta_info_multipass(html, url), f"{name} ({parser})"
+
+
+def test_seduta_edge_cases_extraction():
+    info = extract_seduta(SEDUTA_EDGE_HTML.encode('utf-8'), 'html.parser')
+    assert info['numero_seduta'] == '220/A'
+    assert info['data_seduta'] == '2025-12-16'
+    assert info['resoconto_stenografico_url'] == 'https://www.ars.sicilia.it/files/steno_220.pdf'
+    assert info['resoconto_provvisorio_url'] == 'https://www.ars.sicilia.it/files/provv_220.pdf'
+    assert info['resoconto_url'] == info['resoconto_stenografico_url']
+    assert info['allegato_url'] == 'https://w3.ars.sicilia.it/allegato_220.pdf'
+    # OdG senza link proprio né nel sibling: primo link del contenitore
+    assert info['odg_url'] == 'https://www.ars.sicilia.it/files/steno_220.pdf'
+    assert [(v['id_video'], v['data_video'], v['ora_video']) for v in info['videos']] == [
+        ('2490001', '2025-12-16', '09:05'),
+        ('2490002', '2025-12-17', '15:30'),
+        ('2490005', '2025-12-18', '18:45'),
+    ]
+
+
+def other_parsers() -> list:
+    """Parser da confrontare con html.parser; senza lxml il confronto non ha senso e il test è saltato."""
+    pytest.importorskip('lxml', reason='lxml non installato: parità dei parser non verificata')
+    return [parser for parser in available_parsers() if parser != 'html.parser']
+
+
+def test_seduta_parity():
+    parsers = other_parsers()
+    for name, markup in seduta_pages():
+        expected = extract_seduta(markup, 'html.parser')
+        for parser in parsers:
+            assert extract_seduta(markup, parser) == expected, f"{name}: {parser} diverso da html.parser"
+
+
+def test_studi_parity():
+    parsers = other_parsers()
+    expected = extract_studi(STUDI_HTML, 'html.parser')
+    assert len(expected['record']) == 2
+    for parser in parsers:
+        assert extract_studi(STUDI_HTML, parser) == expected, f"{parser} diverso da html.parser"
+
+
+def main():
+    print(f"Parser disponibili: {', '.join(available_parsers())}")
+    tests = [
+        test_seduta_example_extraction, test_seduta_edge_cases_extraction,
+        test_single_pass_scan_matches_multipass_extraction, test_seduta_parity, test_studi_parity
+    ]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✓ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"✗ {test.__name__}: {e}")
+        except pytest.skip.Exception as e:
+            print(f"⊙ {test.__name__}: {e}")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
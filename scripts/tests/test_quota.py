@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Test QuotaLedger: cambio del giorno di quota, riserve tra job, lock tra thread e processi.
+
+Usage:
+    python3 -m pytest scripts/tests/test_quota.py
+"""
+import json
+import subprocess
+import sys
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+
+import httplib2
+from googleapiclient.errors import HttpError
+
+from src import quota
+from src.quota import JOB_CAPTIONS, JOB_DESCRIPTIONS, JOB_UPLOAD, QuotaLedger
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+
+
+def http_error(status: int, reason: str) -> HttpError:
+    resp = httplib2.Response({'status': status})
+    content = json.dumps({'error': {'code': status, 'errors': [{'reason': reason}], 'message': reason}})
+    return HttpError(resp, content.encode('utf-8'))
+
+
+def test_quota_day_follows_pacific_midnight():
+    # 07:59 UTC = 23:59 del giorno prima a Los Angeles (inverno, UTC-8)
+    assert quota.quota_day(datetime(2025, 1, 2, 7, 59, tzinfo=timezone.utc)) == '2025-01-01'
+    assert quota.quota_day(datetime(2025, 1, 2, 8, 0, tzinfo=timezone.utc)) == '2025-01-02'
+
+
+def test_record_and_used_per_job(tmp_path):
+    ledger = QuotaLedger(str(tmp_path / 'quota.json'), daily_limit=10000)
+
+    assert ledger.record('videos.insert', JOB_UPLOAD) == 1600
+    assert ledger.record('videos.list', JOB_DESCRIPTIONS, calls=3) == 3
+    assert ledger.record('videos.update', JOB_DESCRIPTIONS, units=7) == 7
+
+    assert ledger.used(JOB_UPLOAD) == 1600
+    assert ledger.used(JOB_DESCRIPTIONS) == 10
+    assert ledger.used() == 1610
+    assert ledger.remaining() == 8390
+    jobs = ledger.snapshot()['jobs']
+    assert jobs[JOB_DESCRIPTIONS]['videos.list'] == {'calls': 3, 'units': 3}
+
+
+def test_new_quota_day_starts_from_zero(tmp_path, monkeypatch):
+    ledger = QuotaLedger(str(tmp_path / 'quota.json'), daily_limit=10000)
+    monkeypatch.setattr(quota, 'quota_day', lambda now=None: '2025-01-01')
+    ledger.record('videos.insert', JOB_UPLOAD, calls=2)
+    ledger.mark_exhausted()
+    assert ledger.remaining() == 0
+
+    monkeypatch.setattr(quota, 'quota_day', lambda now=None: '2025-01-02')
+    assert ledger.remaining() == 10000
+    assert ledger.used(JOB_UPLOAD) == 0
+
+    ledger.record('videos.list', JOB_UPLOAD)
+    data = json.loads((tmp_path / 'quota.json').read_text(encoding='utf-8'))
+    assert data['day'] == '2025-01-02'
+    assert data['exhausted'] is False
+    assert data['jobs'] == {JOB_UPLOAD: {'videos.list': {'calls': 1, 'units': 1}}}
+
+
+def test_unreadable_ledger_counts_as_empty(tmp_path):
+    path = tmp_path / 'quota.json'
+    path.write_text('{troncato', encoding='utf-8')
+    ledger = QuotaLedger(str(path), daily_limit=100)
+    assert ledger.remaining() == 100
+    ledger.record('videos.list', JOB_UPLOAD)
+    assert ledger.used() == 1
+
+
+def test_reserves_protect_other_jobs_until_spent(tmp_path):
+    ledger = QuotaLedger(
+        str(tmp_path / 'quota.json'),
+        daily_limit=10000,
+        reserve={JOB_UPLOAD: 6400, JOB_CAPTIONS: 1000}
+    )
+
+    # Il job upload non vede la riserva dei sottotitoli e viceversa
+    assert ledger.allowance(JOB_UPLOAD) == 9000
+    assert ledger.allowance(JOB_CAPTIONS) == 3600
+    assert ledger.allowance(JOB_DESCRIPTIONS) == 2600
+    assert not ledger.can_spend(JOB_DESCRIPTIONS, 'videos.update', calls=53)
+    assert ledger.can_spend(JOB_DESCRIPTIONS, 'videos.update', calls=52)
+
+    # Riserva spesa in parte dal titolare: resta bloccato solo il residuo
+    ledger.record('videos.insert', JOB_UPLOAD, calls=2)
+    assert ledger.allowance(JOB_DESCRIPTIONS) == 2600
+    assert ledger.allowance(JOB_UPLOAD) == 5800
+
+    # Oltre la riserva il titolare attinge alla quota comune
+    ledger.record('videos.insert', JOB_UPLOAD, calls=3)
+    assert ledger.allowance(JOB_DESCRIPTIONS) == 1000
+    assert ledger.allowance(JOB_CAPTIONS) == 2000
+
+    ledger.record('captions.download', JOB_CAPTIONS, calls=10)
+    assert ledger.allowance(JOB_DESCRIPTIONS) == 0
+    assert ledger.allowance(JOB_UPLOAD) == 0
+
+
+def test_concurrent_threads_do_not_lose_records(tmp_path):
+    ledger = QuotaLedger(str(tmp_path / 'quota.json'), daily_limit=100000)
+
+    def worker(job: str) -> None:
+        for _ in range(25):
+            ledger.record('videos.list', job)
+
+    threads = [threading.Thread(target=worker, args=(job,)) for job in (JOB_UPLOAD, JOB_CAPTIONS) * 4]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert ledger.used(JOB_UPLOAD) == 100
+    assert ledger.used(JOB_CAPTIONS) == 100
+
+
+def test_concurrent_processes_share_the_file_lock(tmp_path):
+    path = tmp_path / 'quota.json'
+    script = (
+        'import sys\n'
+        f'sys.path.insert(0, {str(REPO_ROOT)!r})\n'
+        'from src.quota import QuotaLedger\n'
+        f'ledger = QuotaLedger({str(path)!r}, daily_limit=100000)\n'
+        'for _ in range(40):\n'
+        '    ledger.record("videos.list", sys.argv[1])\n'
+    )
+    processes = [
+        subprocess.Popen([sys.executable, '-c', script, job])
+        for job in (JOB_UPLOAD, JOB_UPLOAD, JOB_DESCRIPTIONS, JOB_CAPTIONS)
+    ]
+    assert all(process.wait(timeout=60) == 0 for process in processes)
+
+    ledger = QuotaLedger(str(path), daily_limit=100000)
+    assert ledger.used(JOB_UPLOAD) == 80
+    assert ledger.used() == 160
+
+
+def test_quota_exceeded_errors_mark_ledger_exhausted(tmp_path, monkeypatch):
+    ledger = QuotaLedger(str(tmp_path / 'quota.json'), daily_limit=10000)
+    monkeypatch.setattr(quota, '_ledger', ledger)
+
+    assert not quota.note_error(http_error(403, 'forbidden'))
+    assert not quota.note_error(http_error(500, 'quotaExceeded'))
+    assert not quota.note_error(ValueError('quotaExceeded'))
+    assert ledger.remaining() == 10000
+
+    assert quota.note_error(http_error(403, 'quotaExceeded'))
+    assert ledger.remaining() == 0
+    assert ledger.allowance(JOB_UPLOAD) == 0
+    assert quota.is_quota_exceeded(http_error(403, 'dailyLimitExceeded'))
+
+
+def test_configure_reads_config_section(tmp_path, monkeypatch):
+    # configure() cambia registro e job globali: ripristinati a fine test
+    monkeypatch.setattr(quota, '_ledger', None)
+    monkeypatch.setattr(quota, '_job', quota._job)
+    ledger = quota.configure(
+        {'youtube': {'quota': {'ledger_file': str(tmp_path / 'q.json'), 'daily_limit': 500, 'reserve': {JOB_UPLOAD: 100}}}},
+        job=JOB_CAPTIONS
+    )
+    assert quota.get_ledger() is ledger
+    assert quota.current_job() == JOB_CAPTIONS
+    assert ledger.allowance(JOB_CAPTIONS) == 400
+
+    quota.record('captions.list')
+    assert ledger.used(JOB_CAPTIONS) == 50
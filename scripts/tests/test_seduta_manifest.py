@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Test seduta_manifest: impronta delle sedute, diff delle strutture, file JSON e skip delle sedute invariate.
+
+Usage:
+    python3 -m pytest scripts/tests/test_seduta_manifest.py
+"""
+import json
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from src import seduta_manifest, storage
+from src.seduta_manifest import SedutaManifest, diff, fingerprint, format_diff, structure
+import build_anagrafica
+
+
+def seduta(videos: list, numero: str = '219', **documents) -> dict:
+    info = {
+        'numero_seduta': numero,
+        'data_seduta': '2025-12-10',
+        'url_pagina': f'https://www.ars.sicilia.it/agenda/sedute-aula/seduta-numero-{numero}-del-10122025',
+        'odg_url': 'https://w3.ars.sicilia.it/odg.pdf',
+        'resoconto_url': '',
+        'videos': [
+            {
+                'id_video': id_video,
+                'ora_video': ora,
+                'data_video': data,
+                'stream_url': '',
+                'video_page_url': f'https://www.ars.sicilia.it/agenda/seduta/aula/video/{id_video}'
+            }
+            for id_video, ora, data in videos
+        ]
+    }
+    info.update(documents)
+    return info
+
+
+VIDEOS = [('2492395', '11:30', '2025-12-10'), ('2492396', '13:01', '2025-12-10'), ('2492393', '12:12', '2025-12-15')]
+
+
+def test_fingerprint_ignores_video_order_and_unrelated_fields():
+    base = seduta(VIDEOS)
+    reordered = seduta(list(reversed(VIDEOS)))
+    reordered['videos'][0]['duration_minutes'] = 42
+    reordered['prossima'] = 'ignorato'
+
+    assert fingerprint(structure(base)) == fingerprint(structure(reordered))
+
+
+def test_fingerprint_changes_with_ids_times_and_documents():
+    base = fingerprint(structure(seduta(VIDEOS)))
+
+    new_id = seduta([('9999999', '11:30', '2025-12-10')] + VIDEOS[1:])
+    new_time = seduta([('2492395', '11:31', '2025-12-10')] + VIDEOS[1:])
+    new_doc = seduta(VIDEOS, resoconto_stenografico_url='https://w3.ars.sicilia.it/steno.pdf')
+
+    fingerprints = {base} | {fingerprint(structure(info)) for info in (new_id, new_time, new_doc)}
+    assert len(fingerprints) == 4
+
+
+def test_structure_uses_seduta_date_when_video_date_missing():
+    info = seduta([('1', '10:00', '')])
+    assert list(structure(info)['videos']) == ['2025-12-10 10:00']
+    assert structure(info)['documents']['allegato_url'] == ''
+
+
+def test_diff_reports_added_removed_changed_and_documents():
+    old = structure(seduta(VIDEOS))
+    new_info = seduta(
+        [('2492395', '11:30', '2025-12-10'), ('7777777', '13:01', '2025-12-10'), ('2492400', '16:00', '2025-12-15')],
+        resoconto_url='https://w3.ars.sicilia.it/resoconto.pdf'
+    )
+    new = structure(new_info)
+
+    changes = diff(old, new)
+
+    assert changes['added'] == ['2025-12-15 16:00']
+    assert changes['removed'] == ['2025-12-15 12:12']
+    assert changes['changed'] == {
+        '2025-12-10 13:01': {
+            'id_video': ('2492396', '7777777'),
+            'video_page_url': (
+                'https://www.ars.sicilia.it/agenda/seduta/aula/video/2492396',
+                'https://www.ars.sicilia.it/agenda/seduta/aula/video/7777777'
+            )
+        }
+    }
+    assert changes['documents'] == {'resoconto_url': ('', 'https://w3.ars.sicilia.it/resoconto.pdf')}
+
+    lines = format_diff(changes, new)
+    assert lines[0] == '+ video 2025-12-15 16:00 (id 2492400)'
+    assert lines[1] == '- video 2025-12-15 12:12'
+    assert '~ video 2025-12-10 13:01 id_video: 2492396 → 7777777' in lines
+    assert lines[-1] == '~ resoconto_url: - → https://w3.ars.sicilia.it/resoconto.pdf'
+
+
+def test_identical_structures_have_empty_diff():
+    info = structure(seduta(VIDEOS))
+    assert diff(info, info) == {'added': [], 'removed': [], 'changed': {}, 'documents': {}}
+    assert format_diff(diff(info, info)) == []
+
+
+def test_manifest_round_trip(tmp_path):
+    path = tmp_path / 'manifest.json'
+    manifest = SedutaManifest(str(path))
+    info = seduta(VIDEOS)
+
+    assert '219' not in manifest
+    assert not manifest.unchanged(info)
+    assert manifest.diff(info) is None
+
+    manifest.update(info)
+    manifest.save()
+    mtime = path.stat().st_mtime_ns
+    manifest.save()
+    assert path.stat().st_mtime_ns == mtime
+
+    reloaded = SedutaManifest(str(path))
+    assert '219' in reloaded
+    assert reloaded.unchanged(info)
+    assert not reloaded.unchanged(seduta(VIDEOS[:2]))
+    assert reloaded.diff(seduta(VIDEOS[:2]))['removed'] == ['2025-12-15 12:12']
+    assert json.loads(path.read_text(encoding='utf-8'))['219']['fingerprint'] == fingerprint(structure(info))
+
+
+def test_unreadable_manifest_is_empty(tmp_path):
+    path = tmp_path / 'manifest.json'
+    path.write_text('{troncato', encoding='utf-8')
+    assert '219' not in SedutaManifest(str(path))
+
+
+def run(info: dict, backend, manifest, processed: set, counts: dict) -> dict:
+    stats = {'sedute_nuove': 0, 'sedute_skip': 0, 'sedute_aggiornate': 0, 'video_totali': 0, 'errori': 0}
+    build_anagrafica.process_seduta_info(info, processed, counts, None, backend, stats, manifest=manifest)
+    return stats
+
+
+def test_unchanged_seduta_is_skipped_and_changed_one_rewritten(tmp_path, capsys):
+    config = {'logging': {
+        'anagrafica_file': str(tmp_path / 'anagrafica.csv'),
+        'log_file': str(tmp_path / 'upload_log.csv'),
+        'index_file': str(tmp_path / 'index.csv')
+    }}
+    backend = storage.CsvBackend(config)
+    backend.init()
+    manifest = SedutaManifest(str(tmp_path / 'manifest.json'))
+    processed = set()
+
+    assert run(seduta(VIDEOS), backend, manifest, processed, {})['sedute_nuove'] == 1
+    assert manifest.unchanged(seduta(VIDEOS))
+
+    # Stessa struttura, anche se vecchia: nessuna scrittura
+    assert run(seduta(VIDEOS), backend, manifest, processed, {'219': 3})['sedute_skip'] == 1
+
+    # ID video cambiato con lo stesso numero di video: aggiornata e diff nel log
+    changed = seduta([('2492395', '11:30', '2025-12-10'), ('7777777', '13:01', '2025-12-10'), VIDEOS[2]])
+    stats = run(changed, backend, manifest, processed, {'219': 3})
+    assert stats['sedute_aggiornate'] == 1 and stats['sedute_skip'] == 0
+    assert '~ video 2025-12-10 13:01 id_video: 2492396 → 7777777' in capsys.readouterr().out
+    assert manifest.unchanged(changed)
+
+    backend.close()
+    assert sorted(row['id_video'] for row in backend.rows()) == ['2492393', '2492395', '7777777']
+    assert seduta_manifest.DEFAULT_MANIFEST_FILE.endswith('sedute_manifest.json')
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Test srt_parser: casi limite del parser SRT, CueStore e sidecar binario (round trip e invalidazione).
+
+Usage:
+    python3 -m pytest scripts/tests/test_srt_parser.py
+"""
+import os
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+
+from src import srt_parser
+from src.srt_parser import Cue, CueStore, iter_cues
+
+SRT = (
+    '1\n'
+    '00:00:01,000 --> 00:00:02,500\n'
+    'Buongiorno a tutti.\n'
+    '\n'
+    '2\n'
+    '00:00:02,500 --> 00:00:05,000\n'
+    'Si apre la seduta,\n'
+    'numero 219.\n'
+    '\n'
+    '3\n'
+    '01:02:03,004 --> 01:02:04,000\n'
+    'Àrs è già qui: “virgolette”.\n'
+)
+
+
+def cues(text: str) -> list:
+    return list(iter_cues(text.splitlines(keepends=True)))
+
+
+def test_iter_cues_reads_times_text_and_skips_sequence_numbers():
+    assert cues(SRT) == [
+        Cue(1000, 2500, 'Buongiorno a tutti.'),
+        Cue(2500, 5000, 'Si apre la seduta,\nnumero 219.'),
+        Cue(3723004, 3724000, 'Àrs è già qui: “virgolette”.'),
+    ]
+
+
+def test_iter_cues_edge_cases():
+    # Riga vuota mancante tra due cue: il timestamp seguente chiude il precedente
+    # (senza riga vuota il numero di sequenza non è distinguibile dal testo)
+    assert cues('00:00:01,000 --> 00:00:02,000\nuno\n2\n00:00:02,000 --> 00:00:03,000\ndue') == [
+        Cue(1000, 2000, 'uno\n2'),
+        Cue(2000, 3000, 'due'),
+    ]
+    # Cue senza testo scartati, anche consecutivi o in fondo al file
+    assert cues('1\n00:00:01,000 --> 00:00:02,000\n\n2\n00:00:03,000 --> 00:00:04,000\n'
+                '00:00:05,000 --> 00:00:06,000\ntesto\n\n00:00:07,000 --> 00:00:08,000\n') == [
+        Cue(5000, 6000, 'testo')
+    ]
+    # Separatore dei millisecondi '.', ore a una cifra, spazi e CRLF
+    assert cues('  1:00:00.250-->1:00:01.000  \r\n  testo  \r\n\r\n') == [Cue(3600250, 3601000, 'testo')]
+    # Testo prima del primo timestamp e righe con '-->' non valide ignorate
+    assert cues('WEBVTT\n\nintestazione\n00:00:01,000 --> 00:00:02,000\na --> b\n') == [
+        Cue(1000, 2000, 'a --> b')
+    ]
+    assert cues('') == []
+
+
+def test_iter_cues_streams_from_file(tmp_path):
+    path = tmp_path / 'seduta.it.srt'
+    path.write_text(SRT, encoding='utf-8')
+    with open(path, encoding='utf-8') as f:
+        assert list(iter_cues(f)) == cues(SRT)
+    assert list(srt_parser.parse_file(path)) == cues(SRT)
+
+
+def test_cue_store_indexing_and_text():
+    store = srt_parser.parse_text(SRT)
+
+    assert len(store) == 3
+    assert store[0] == Cue(1000, 2500, 'Buongiorno a tutti.')
+    assert store[-1].text == 'Àrs è già qui: “virgolette”.'
+    assert (store.start_ms(1), store.end_ms(1), store.text(1)) == (2500, 5000, 'Si apre la seduta,\nnumero 219.')
+    assert list(store) == cues(SRT)
+    assert store.to_text() == 'Buongiorno a tutti.\nSi apre la seduta,\nnumero 219.\nÀrs è già qui: “virgolette”.\n'
+
+    empty = CueStore.from_cues([])
+    assert len(empty) == 0
+    assert empty.to_text() == ''
+
+
+def test_sidecar_round_trip(tmp_path):
+    srt_path = tmp_path / 'seduta.it.srt'
+    srt_path.write_text(SRT, encoding='utf-8')
+    cue_path = srt_parser.sidecar_path(srt_path, tmp_path / 'cues')
+    assert cue_path == tmp_path / 'cues' / 'seduta.it.cues'
+
+    srt_parser.parse_file(srt_path).save(cue_path, srt_path.stat())
+    loaded = CueStore.load(cue_path, srt_path.stat())
+
+    assert loaded is not None
+    assert list(loaded) == cues(SRT)
+    assert loaded.to_text() == srt_parser.parse_text(SRT).to_text()
+    assert os.listdir(cue_path.parent) == ['seduta.it.cues']
+
+    # Archivio vuoto e sidecar senza stat di origine
+    CueStore.from_cues([]).save(tmp_path / 'vuoto.cues')
+    assert len(CueStore.load(tmp_path / 'vuoto.cues')) == 0
+
+
+def test_stale_or_invalid_sidecar_is_rejected(tmp_path):
+    srt_path = tmp_path / 'seduta.it.srt'
+    srt_path.write_text(SRT, encoding='utf-8')
+    cue_path = tmp_path / 'seduta.it.cues'
+    srt_parser.parse_file(srt_path).save(cue_path, srt_path.stat())
+    stat = srt_path.stat()
+
+    # SRT riscritto: stessa dimensione, mtime diverso
+    os.utime(srt_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert CueStore.load(cue_path, srt_path.stat()) is None
+
+    # SRT con dimensione diversa
+    with open(srt_path, 'a', encoding='utf-8') as f:
+        f.write('\n')
+    assert CueStore.load(cue_path, srt_path.stat()) is None
+
+    # Senza stat di origine il sidecar resta leggibile
+    assert len(CueStore.load(cue_path)) == 3
+
+    data = cue_path.read_bytes()
+    (tmp_path / 'magic.cues').write_bytes(b'XXXX' + data[4:])
+    (tmp_path / 'troncato.cues').write_bytes(data[:-1])
+    (tmp_path / 'corto.cues').write_bytes(data[:10])
+    (tmp_path / 'vuoto.cues').write_bytes(b'')
+    for name in ('magic.cues', 'troncato.cues', 'corto.cues', 'vuoto.cues', 'assente.cues'):
+        assert CueStore.load(tmp_path / name) is None, name
+
+
+def test_load_cues_reparses_when_srt_changes(tmp_path, monkeypatch):
+    srt_path = tmp_path / 'seduta.it.srt'
+    srt_path.write_text(SRT, encoding='utf-8')
+    cache_dir = tmp_path / 'cues'
+
+    assert len(srt_parser.load_cues(srt_path, cache_dir)) == 3
+    assert srt_parser.sidecar_path(srt_path, cache_dir).exists()
+
+    # Sidecar aggiornato: nessun parsing
+    parsed = []
+    parse_file = srt_parser.parse_file
+    monkeypatch.setattr(srt_parser, 'parse_file', lambda path: parsed.append(path) or parse_file(path))
+    assert srt_parser.load_cues(srt_path, cache_dir)[0].text == 'Buongiorno a tutti.'
+    assert parsed == []
+
+    # SRT cambiato: nuovo parsing e sidecar riscritto
+    srt_path.write_text('00:00:09,000 --> 00:00:10,000\nNuovo testo.\n', encoding='utf-8')
+    assert list(srt_parser.load_cues(srt_path, cache_dir)) == [Cue(9000, 10000, 'Nuovo testo.')]
+    assert parsed == [srt_path]
+    assert list(CueStore.load(srt_parser.sidecar_path(srt_path, cache_dir), srt_path.stat())) == [
+        Cue(9000, 10000, 'Nuovo testo.')
+    ]
+
+    # cache_dir None: sempre parsing diretto
+    assert len(srt_parser.load_cues(srt_path, None)) == 1
+    assert len(parsed) == 2
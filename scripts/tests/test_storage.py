@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Test storage: l'export CSV del backend SQLite è identico byte per byte al backend CSV.
+
+Usage:
+    python3 -m pytest scripts/tests/test_storage.py
+"""
+import csv
+import sys
+from datetime import datetime
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+
+import pytest
+
+from src import anagrafica, storage
+from src.utils import atomic_write
+
+FIXED_NOW = datetime(2025, 3, 1, 12, 0, 0)
+
+
+class FrozenDatetime(datetime):
+    @classmethod
+    def now(cls, tz=None):
+        return FIXED_NOW
+
+
+def anagrafica_row(numero: str, data: str, id_video: str, ora: str, **fields) -> dict:
+    row = {field: '' for field in storage.ANAGRAFICA_FIELDS}
+    row.update({
+        'numero_seduta': numero,
+        'data_seduta': data,
+        'url_pagina': f'https://www.ars.sicilia.it/agenda/sedute-aula/seduta-{numero}',
+        'id_video': id_video,
+        'ora_video': ora,
+        'data_video': data,
+        'stream_url': f'https://vod.example/{id_video}/playlist.m3u8',
+        'last_check': '2025-01-01T00:00:00'
+    })
+    row.update(fields)
+    return row
+
+
+def seduta(numero: str, data: str, videos: list) -> dict:
+    return {
+        'numero_seduta': numero,
+        'data_seduta': data,
+        'url_pagina': f'https://www.ars.sicilia.it/agenda/sedute-aula/seduta-{numero}',
+        'odg_url': f'https://www.ars.sicilia.it/odg_{numero}.pdf',
+        'resoconto_url': '',
+        'resoconto_provvisorio_url': '',
+        'resoconto_stenografico_url': '',
+        'allegato_url': '',
+        'videos': [
+            {'id_video': id_video, 'ora_video': ora, 'data_video': data, 'stream_url': '', 'video_page_url': ''}
+            for id_video, ora in videos
+        ]
+    }
+
+
+def seed(directory: Path) -> dict:
+    directory.mkdir()
+    rows = [
+        anagrafica_row('11', '2025-01-15', 'v3', '10:00', youtube_id='yt3', status='success'),
+        anagrafica_row('10', '2025-01-10', 'v1', '10:00', youtube_id='yt1', status='success', duration_minutes='95'),
+        anagrafica_row('10', '2025-01-10', 'v2', '16:30', status='failed', failure_reason='errore, "virgolette"'),
+    ]
+    with open(directory / 'anagrafica_video.csv', 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=storage.ANAGRAFICA_FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+    with open(directory / 'index.csv', 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=storage.INDEX_FIELDS)
+        writer.writeheader()
+        writer.writerow({'numero_seduta': '11', 'data_seduta': '2025-01-15', 'url_pagina': 'u11', 'video_count': '1'})
+        writer.writerow({'numero_seduta': '10', 'data_seduta': '2025-01-10', 'url_pagina': 'u10', 'video_count': '2'})
+    return {
+        'logging': {
+            'anagrafica_file': str(directory / 'anagrafica_video.csv'),
+            'log_file': str(directory / 'upload_log.csv'),
+            'index_file': str(directory / 'index.csv')
+        },
+        'storage': {'sqlite_path': str(directory / 'ars.sqlite'), 'export_on_close': True}
+    }
+
+
+def run_operations(backend) -> None:
+    assert backend.init()
+    # Seduta nuova (in coda) e seduta esistente ri-scaricata con un video in più
+    nuova = seduta('12', '2025-01-20', [('v4', '09:30')])
+    backend.upsert_seduta(nuova, replace=False)
+    backend.update_index(nuova, nuova['videos'])
+    backend.upsert_seduta(seduta('10', '2025-01-10', [('v1', '10:00'), ('v2', '16:30'), ('v5', '18:00')]), replace=True)
+    backend.mark_uploaded('v4', 'yt4', '12', '2025-01-20', duration_minutes=42, flush=False)
+    backend.mark_failed('v5', 'timeout\nripetuto', '10', '2025-01-10', flush=False)
+    backend.mark_no_transcript('yt3', flush=False)
+    backend.close()
+
+
+@pytest.fixture(autouse=True)
+def frozen_clock(monkeypatch):
+    monkeypatch.setattr(storage, 'datetime', FrozenDatetime)
+    monkeypatch.setattr(anagrafica, 'datetime', FrozenDatetime)
+    monkeypatch.setattr(anagrafica, '_STORES', {})
+
+
+def test_sqlite_export_matches_csv_backend(tmp_path):
+    csv_config = seed(tmp_path / 'csv')
+    sqlite_config = seed(tmp_path / 'sqlite')
+
+    run_operations(storage.CsvBackend(csv_config))
+    run_operations(storage.SqliteBackend(sqlite_config))
+
+    for key in ('anagrafica_file', 'index_file'):
+        csv_bytes = Path(csv_config['logging'][key]).read_bytes()
+        sqlite_bytes = Path(sqlite_config['logging'][key]).read_bytes()
+        assert sqlite_bytes == csv_bytes, key
+
+    with open(csv_config['logging']['anagrafica_file'], newline='', encoding='utf-8') as f:
+        rows = list(csv.DictReader(f))
+    assert [(r['numero_seduta'], r['id_video']) for r in rows] == [
+        ('10', 'v1'), ('10', 'v2'), ('10', 'v5'), ('11', 'v3'), ('12', 'v4')
+    ]
+    assert rows[0]['youtube_id'] == 'yt1' and rows[0]['duration_minutes'] == '95'
+    assert rows[2]['status'] == 'failed' and rows[2]['failure_reason'] == 'timeout ripetuto'
+    assert rows[3]['no_transcript'] == 'true'
+    assert rows[4]['duration_minutes'] == '42'
+
+
+def test_export_matches_without_upserts(tmp_path):
+    # File non in ordine di data e solo aggiornamenti di video: stesso ordinamento al flush e all'export
+    csv_config = seed(tmp_path / 'csv')
+    sqlite_config = seed(tmp_path / 'sqlite')
+
+    for backend in (storage.CsvBackend(csv_config), storage.SqliteBackend(sqlite_config)):
+        assert backend.init()
+        backend.mark_uploaded('v2', 'yt2', '10', '2025-01-10', flush=False)
+        backend.close()
+
+    csv_bytes = Path(csv_config['logging']['anagrafica_file']).read_bytes()
+    assert Path(sqlite_config['logging']['anagrafica_file']).read_bytes() == csv_bytes
+
+
+def test_backends_agree_on_reads(tmp_path):
+    csv_backend = storage.CsvBackend(seed(tmp_path / 'csv'))
+    sqlite_backend = storage.SqliteBackend(seed(tmp_path / 'sqlite'))
+    for backend in (csv_backend, sqlite_backend):
+        backend.init()
+
+    assert csv_backend.load_summary() == sqlite_backend.load_summary()
+    assert csv_backend.get_existing_youtube_ids('10') == sqlite_backend.get_existing_youtube_ids('10')
+    assert csv_backend.rows() == sqlite_backend.rows()
+    assert sqlite_backend.is_uploaded('v1', '10', '2025-01-10')
+    assert not sqlite_backend.is_uploaded('v2')
+    sqlite_backend.close()
+
+
+def test_interleaved_atomic_writes_do_not_share_temp_file(tmp_path):
+    path = tmp_path / 'anagrafica_video.csv'
+    path.write_text('originale\n', encoding='utf-8')
+
+    # Due scritture aperte insieme (come due processi che esportano)
+    with atomic_write(path, 'w', encoding='utf-8') as first:
+        first.write('prima scrittura\n')
+        with atomic_write(path, 'w', encoding='utf-8') as second:
+            second.write('seconda scrittura\n')
+        assert path.read_text(encoding='utf-8') == 'seconda scrittura\n'
+        first.write('completa\n')
+
+    assert path.read_text(encoding='utf-8') == 'prima scrittura\ncompleta\n'
+    assert [p.name for p in tmp_path.iterdir()] == ['anagrafica_video.csv']
+
+
+def test_failed_atomic_write_keeps_original(tmp_path):
+    path = tmp_path / 'index.csv'
+    path.write_text('originale\n', encoding='utf-8')
+
+    with pytest.raises(RuntimeError):
+        with atomic_write(path, 'w', encoding='utf-8') as f:
+            f.write('parziale')
+            raise RuntimeError('interrotto')
+
+    assert path.read_text(encoding='utf-8') == 'originale\n'
+    assert [p.name for p in tmp_path.iterdir()] == ['index.csv']
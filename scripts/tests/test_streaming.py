@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Test streaming: RingBufferUpload e riavvio di FfmpegSource (ffmpeg sostituito da uno script Python).
+
+Usage:
+    python3 -m pytest scripts/tests/test_streaming.py
+"""
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+
+import pytest
+
+from src import streaming
+from src.streaming import FfmpegSource, RingBufferUpload, StreamSourceError
+
+CHUNK = streaming.CHUNK_ALIGN
+
+# Flusso deterministico di `total` byte; al primo avvio si interrompe dopo `fail_after` byte
+FAKE_FFMPEG = '''
+import sys
+from pathlib import Path
+total, fail_after, marker = int(sys.argv[1]), int(sys.argv[2]), Path(sys.argv[3])
+data = bytes(i % 251 for i in range(total))
+if fail_after and not marker.exists():
+    marker.write_text('x')
+    sys.stdout.buffer.write(data[:fail_after])
+    sys.exit(1)
+sys.stdout.buffer.write(data)
+'''
+
+
+class FakeSource(FfmpegSource):
+    def __init__(self, tmp_path: Path, total: int, fail_after: int = 0, **kwargs):
+        super().__init__('https://vod.example/playlist.m3u8', **kwargs)
+        self.args = [str(total), str(fail_after), str(tmp_path / 'failed_once')]
+        self.starts = 0
+
+    def command(self) -> list:
+        self.starts += 1
+        return [sys.executable, '-c', FAKE_FFMPEG] + self.args
+
+
+def drain(media: RingBufferUpload) -> bytes:
+    """Legge il flusso come farebbe googleapiclient: un chunk per volta, confermato subito."""
+    received = bytearray()
+    while True:
+        size = media.size()
+        data = media.getbytes(len(received), media.chunksize())
+        received += data
+        if size is not None and len(received) >= size:
+            return bytes(received)
+
+
+def expected(total: int) -> bytes:
+    return bytes(i % 251 for i in range(total))
+
+
+def test_stream_passes_through_buffer(tmp_path):
+    media = RingBufferUpload(CHUNK, buffer_chunks=2)
+    source = FakeSource(tmp_path, 5 * CHUNK + 123)
+    source.start(media)
+
+    assert drain(media) == expected(5 * CHUNK + 123)
+    assert media.peak_buffered <= 2 * CHUNK + streaming.READ_SIZE
+
+
+def test_restart_below_cap_resumes_from_same_byte(tmp_path, capsys):
+    media = RingBufferUpload(CHUNK, buffer_chunks=2)
+    source = FakeSource(tmp_path, 4 * CHUNK, fail_after=CHUNK + 10, max_restart_mb=1)
+    source.start(media)
+
+    assert drain(media) == expected(4 * CHUNK)
+    assert source.starts == 2
+    assert 'Riavvio ffmpeg' in capsys.readouterr().out
+
+
+def test_restart_over_cap_fails_fast(tmp_path):
+    media = RingBufferUpload(CHUNK, buffer_chunks=8)
+    # 0.25 MB = un chunk: l'interruzione dopo due chunk non viene ripresa
+    source = FakeSource(tmp_path, 4 * CHUNK, fail_after=2 * CHUNK, max_restart_mb=0.25)
+    thread = source.start(media)
+    thread.join(timeout=30)
+
+    assert media.failed
+    assert source.starts == 1
+    with pytest.raises(StreamSourceError, match='riavvio oltre'):
+        drain(media)
+
+
+def test_discarded_offset_is_an_error():
+    media = RingBufferUpload(CHUNK)
+    media.write(b'x' * (2 * CHUNK))
+    media.getbytes(CHUNK, CHUNK)
+    with pytest.raises(StreamSourceError):
+        media.getbytes(0, CHUNK)
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Test UploadJournal: snapshot compatto, replay della coda, righe interrotte, compattazione.
+
+Usage:
+    python3 -m pytest scripts/tests/test_upload_journal.py
+"""
+import csv
+import json
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+
+from src.upload_journal import LOG_FIELDS, UploadJournal
+
+
+def video(id_video: str, numero: str = '10', data: str = '2025-01-10') -> dict:
+    return {'id_video': id_video, 'numero_seduta': numero, 'data_seduta': data, 'data_video': data, 'ora_video': '10:00'}
+
+
+def read_rows(path: Path) -> list:
+    with open(path, newline='', encoding='utf-8') as f:
+        return list(csv.DictReader(f))
+
+
+def test_state_survives_reopen_via_compact_snapshot(tmp_path):
+    path = tmp_path / 'upload_log.csv'
+    journal = UploadJournal(str(path))
+    for attempt in range(5):
+        journal.append(video('v1'), '', 'failed', f'errore {attempt}')
+    journal.append(video('v1'), 'yt1', 'success')
+    journal.append(video('v2'), '', 'failed', 'errore\nsu due righe')
+    journal.close()
+
+    snapshot = json.loads(journal.snapshot_path.read_text(encoding='utf-8'))
+    # Una voce per video, non una per entry del log
+    assert len(snapshot['index']) == 2
+    assert 'failed' not in snapshot and 'success_keys' not in snapshot
+
+    reopened = UploadJournal(str(path))
+    assert reopened._offset == path.stat().st_size
+    assert reopened.get_stats() == {'total': 7, 'success': 1, 'failed': 6, 'pending': 0}
+    assert reopened.is_uploaded('v1')
+    assert reopened.is_uploaded('v1', '10', '2025-01-10')
+    assert not reopened.is_uploaded('v1', '11', '2025-01-10')
+    assert not reopened.is_uploaded('v2')
+
+    failed = reopened.failed_uploads()
+    assert [(row['id_video'], row['error_message']) for row in failed] == [
+        ('v1', 'errore 4'),
+        ('v2', 'errore\nsu due righe')
+    ]
+
+
+def test_tail_written_by_other_process_is_replayed(tmp_path):
+    path = tmp_path / 'upload_log.csv'
+    journal = UploadJournal(str(path))
+    journal.append(video('v1'), 'yt1', 'success')
+    journal.close()
+
+    other = UploadJournal(str(path))
+    other.append(video('v2'), 'yt2', 'success')
+    other.close()
+
+    assert journal.is_uploaded('v2')
+    assert journal.get_stats()['success'] == 2
+
+
+def test_torn_last_line_is_not_applied_and_gets_sealed(tmp_path):
+    path = tmp_path / 'upload_log.csv'
+    journal = UploadJournal(str(path))
+    journal.append(video('v1'), 'yt1', 'success')
+    journal.close()
+    complete_size = path.stat().st_size
+
+    # Processo interrotto a metà scrittura: riga senza newline finale
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write('v2,10,2025-01-10,2025-01-10,10:00,yt2,2025-01-10T12:00:00,succ')
+
+    journal = UploadJournal(str(path))
+    assert journal._offset == complete_size
+    assert journal.get_stats()['total'] == 1
+    assert not journal.is_uploaded('v2')
+
+    journal.append(video('v3'), 'yt3', 'success')
+    journal.close()
+
+    rows = read_rows(path)
+    assert rows[-1]['id_video'] == 'v3'
+    assert rows[-1]['status'] == 'success'
+
+    # Replay completo senza snapshot: la riga interrotta è ignorata
+    journal.snapshot_path.unlink()
+    fresh = UploadJournal(str(path))
+    assert fresh.get_stats() == {'total': 2, 'success': 2, 'failed': 0, 'pending': 0}
+    assert fresh.is_uploaded('v3')
+    assert not fresh.is_uploaded('v2')
+
+
+def test_fingerprint_mismatch_forces_full_replay(tmp_path):
+    path = tmp_path / 'upload_log.csv'
+    journal = UploadJournal(str(path))
+    journal.append(video('v1'), 'yt1', 'success')
+    journal.append(video('v2'), 'yt2', 'success')
+    journal.close()
+
+    # Riscrittura con la stessa dimensione ma contenuto diverso negli ultimi 64 byte
+    data = path.read_bytes()
+    head, last = data[:-40], data[-40:]
+    rewritten = head + last.replace(b',success,', b',pending,')
+    assert len(rewritten) == len(data) and rewritten != data
+    path.write_bytes(rewritten)
+
+    reopened = UploadJournal(str(path))
+    assert not reopened.is_uploaded('v2')
+    assert reopened.is_uploaded('v1')
+    assert reopened.get_stats() == {'total': 2, 'success': 1, 'failed': 0, 'pending': 1}
+
+
+def test_snapshot_with_offset_beyond_file_is_ignored(tmp_path):
+    path = tmp_path / 'upload_log.csv'
+    journal = UploadJournal(str(path))
+    journal.append(video('v1'), 'yt1', 'success')
+    journal.append(video('v2'), 'yt2', 'success')
+    journal.close()
+
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(LOG_FIELDS)
+        writer.writerow(['v3', '10', '2025-01-10', '2025-01-10', '10:00', '', '', 'failed', 'x'])
+
+    reopened = UploadJournal(str(path))
+    assert reopened.get_stats() == {'total': 1, 'success': 0, 'failed': 1, 'pending': 0}
+    assert not reopened.is_uploaded('v1')
+
+
+def test_compact_keeps_last_success_or_last_entry(tmp_path):
+    path = tmp_path / 'upload_log.csv'
+    journal = UploadJournal(str(path))
+    journal.append(video('v1'), '', 'failed', 'primo')
+    journal.append(video('v1'), 'yt1', 'success')
+    journal.append(video('v1'), '', 'failed', 'dopo il successo')
+    journal.append(video('v2'), '', 'failed', 'primo')
+    journal.append(video('v2'), '', 'failed', 'secondo')
+    journal.append(video('v3', numero='11'), 'yt3', 'success')
+
+    assert journal.compact() == (6, 3)
+
+    rows = read_rows(path)
+    assert [(r['id_video'], r['status'], r['error_message']) for r in rows] == [
+        ('v1', 'success', ''),
+        ('v2', 'failed', 'secondo'),
+        ('v3', 'success', '')
+    ]
+    assert journal.get_stats() == {'total': 3, 'success': 2, 'failed': 1, 'pending': 0}
+    assert [row['error_message'] for row in journal.failed_uploads()] == ['secondo']
+
+    # Lo snapshot scritto dalla compattazione è coerente con il file riscritto
+    reopened = UploadJournal(str(path))
+    assert reopened._offset == path.stat().st_size
+    assert reopened.is_uploaded('v1') and reopened.is_uploaded('v3')
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['upload_log.csv', 'upload_log.csv.snapshot.json']
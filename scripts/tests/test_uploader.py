@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Test uploader: sidecar della sessione di upload e ripresa dall'offset confermato dal server.
+
+Usage:
+    python3 -m pytest scripts/tests/test_uploader.py
+"""
+import json
+import os
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+
+import pytest
+from googleapiclient.discovery import build
+from googleapiclient.errors import HttpError
+
+from src import uploader
+
+CHUNK = 256 * 1024
+SESSION_URI = 'https://www.googleapis.com/upload/youtube/v3/videos?uploadType=resumable&upload_id=abc'
+METADATA = {'title': 'Seduta n. 10', 'description': 'Seduta del 10 gennaio 2025'}
+
+
+class Response(dict):
+    """Risposta httplib2: dict degli header (minuscoli) con status."""
+
+    def __init__(self, status: int, headers: dict = None):
+        super().__init__(headers or {})
+        self.status = status
+        self.reason = 'fake'
+        self['status'] = str(status)
+
+
+class FakeUploadServer:
+    """
+    Endpoint di upload resumable di YouTube.
+
+    received: byte già confermati nella sessione SESSION_URI (None = sessione scaduta).
+    """
+
+    def __init__(self, total: int, received=0):
+        self.total = total
+        self.received = received
+        self.requests = []
+
+    def request(self, uri, method='GET', body=None, headers=None, **kwargs):
+        headers = {k.lower(): v for k, v in (headers or {}).items()}
+        self.requests.append((method, uri, headers.get('content-range')))
+
+        if method == 'POST':
+            # Apertura di una nuova sessione
+            self.received = 0
+            return Response(200, {'location': SESSION_URI}), b''
+
+        if self.received is None:
+            return Response(404), b'{"error": {"code": 404, "message": "session expired"}}'
+
+        content_range = headers['content-range']
+        if content_range.startswith('bytes */'):
+            return self._status()
+
+        span = content_range.split(' ', 1)[1].split('/')[0]
+        first, last = (int(value) for value in span.split('-'))
+        assert first == self.received, f'chunk da {first}, il server ha {self.received} byte'
+        self.received = last + 1
+        return self._status()
+
+    def _status(self):
+        if self.received >= self.total:
+            return Response(200, {'content-type': 'application/json'}), json.dumps({'id': 'yt123'}).encode()
+        headers = {'range': f'bytes=0-{self.received - 1}'} if self.received else {}
+        return Response(308, headers), b''
+
+
+@pytest.fixture
+def video_file(tmp_path):
+    path = tmp_path / 'seduta.mp4'
+    path.write_bytes(os.urandom(3 * CHUNK))
+    return path
+
+
+@pytest.fixture
+def quota_calls(monkeypatch):
+    calls = []
+    monkeypatch.setattr(uploader.quota, 'record', lambda method, calls_=1: calls.append(method))
+    return calls
+
+
+def client(server: FakeUploadServer):
+    return build('youtube', 'v3', http=server, static_discovery=True)
+
+
+def chunk_ranges(server: FakeUploadServer) -> list:
+    return [content_range for method, _, content_range in server.requests if method == 'PUT']
+
+
+def test_session_is_valid_only_for_same_file(video_file):
+    uploader._save_upload_session(str(video_file), SESSION_URI, CHUNK)
+
+    session = uploader.load_upload_session(str(video_file))
+    assert session['resumable_uri'] == SESSION_URI
+    assert session['offset'] == CHUNK
+    assert [p.name for p in video_file.parent.iterdir() if p.name.endswith('.tmp')] == []
+
+    # Stessa dimensione ma file riscritto (mtime diverso)
+    stat = video_file.stat()
+    os.utime(video_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert uploader.load_upload_session(str(video_file)) is None
+
+    # Dimensione diversa
+    uploader._save_upload_session(str(video_file), SESSION_URI, CHUNK)
+    with open(video_file, 'ab') as f:
+        f.write(b'x')
+    assert uploader.load_upload_session(str(video_file)) is None
+
+
+def test_unreadable_or_incomplete_session_is_ignored(video_file):
+    state_path = uploader._upload_state_path(str(video_file))
+
+    state_path.write_text('{non json', encoding='utf-8')
+    assert uploader.load_upload_session(str(video_file)) is None
+
+    uploader._save_upload_session(str(video_file), '', 0)
+    assert uploader.load_upload_session(str(video_file)) is None
+
+    uploader.clear_upload_session(str(video_file))
+    assert not state_path.exists()
+    uploader.clear_upload_session(str(video_file))
+
+
+def test_new_upload_saves_session_after_each_chunk(video_file, quota_calls, monkeypatch):
+    server = FakeUploadServer(3 * CHUNK)
+    saved = []
+    save = uploader._save_upload_session
+    monkeypatch.setattr(
+        uploader, '_save_upload_session',
+        lambda path, uri, offset: saved.append(offset) or save(path, uri, offset)
+    )
+
+    assert uploader.upload_video(client(server), str(video_file), METADATA, chunk_mb=0.25) == 'yt123'
+
+    assert server.requests[0][0] == 'POST'
+    assert chunk_ranges(server) == [
+        f'bytes 0-{CHUNK - 1}/{3 * CHUNK}',
+        f'bytes {CHUNK}-{2 * CHUNK - 1}/{3 * CHUNK}',
+        f'bytes {2 * CHUNK}-{3 * CHUNK - 1}/{3 * CHUNK}'
+    ]
+    assert saved[:2] == [CHUNK, 2 * CHUNK]
+    assert quota_calls == ['videos.insert']
+    # Upload completato: sidecar eliminato
+    assert not uploader._upload_state_path(str(video_file)).exists()
+
+
+def test_resume_starts_from_offset_confirmed_by_server(video_file, quota_calls):
+    # Il sidecar dice 1 chunk, il server ne ha ricevuti 2 (crash prima del salvataggio)
+    uploader._save_upload_session(str(video_file), SESSION_URI, CHUNK)
+    server = FakeUploadServer(3 * CHUNK, received=2 * CHUNK)
+
+    assert uploader.upload_video(client(server), str(video_file), METADATA, chunk_mb=0.25) == 'yt123'
+
+    assert [method for method, _, _ in server.requests] == ['PUT', 'PUT']
+    assert chunk_ranges(server) == [
+        f'bytes */{3 * CHUNK}',
+        f'bytes {2 * CHUNK}-{3 * CHUNK - 1}/{3 * CHUNK}'
+    ]
+    assert all(uri == SESSION_URI for _, uri, _ in server.requests)
+    # Sessione già pagata: nessuna nuova videos.insert
+    assert quota_calls == []
+
+
+def test_resume_without_received_bytes_starts_from_zero(video_file, quota_calls):
+    uploader._save_upload_session(str(video_file), SESSION_URI, 0)
+    server = FakeUploadServer(3 * CHUNK, received=0)
+
+    assert uploader.upload_video(client(server), str(video_file), METADATA, chunk_mb=0.25) == 'yt123'
+    assert chunk_ranges(server)[1] == f'bytes 0-{CHUNK - 1}/{3 * CHUNK}'
+
+
+def test_resume_of_completed_session_sends_no_bytes(video_file, quota_calls):
+    uploader._save_upload_session(str(video_file), SESSION_URI, 2 * CHUNK)
+    server = FakeUploadServer(3 * CHUNK, received=3 * CHUNK)
+
+    assert uploader.upload_video(client(server), str(video_file), METADATA, chunk_mb=0.25) == 'yt123'
+    assert chunk_ranges(server) == [f'bytes */{3 * CHUNK}']
+    assert not uploader._upload_state_path(str(video_file)).exists()
+
+
+def test_expired_session_restarts_upload(video_file, quota_calls):
+    uploader._save_upload_session(str(video_file), SESSION_URI, CHUNK)
+    server = FakeUploadServer(3 * CHUNK, received=None)
+
+    assert uploader.upload_video(client(server), str(video_file), METADATA, chunk_mb=0.25) == 'yt123'
+
+    methods = [method for method, _, _ in server.requests]
+    assert methods == ['PUT', 'POST', 'PUT', 'PUT', 'PUT']
+    assert quota_calls == ['videos.insert']
+
+
+def test_resume_query_server_error_is_raised(video_file, quota_calls):
+    uploader._save_upload_session(str(video_file), SESSION_URI, CHUNK)
+
+    class BrokenServer(FakeUploadServer):
+        def request(self, uri, method='GET', body=None, headers=None, **kwargs):
+            return Response(400), b'{"error": {"code": 400, "message": "bad request"}}'
+
+    with pytest.raises(HttpError):
+        uploader.upload_video(client(BrokenServer(3 * CHUNK)), str(video_file), METADATA, chunk_mb=0.25)
+    # La sessione resta per un nuovo tentativo
+    assert uploader.load_upload_session(str(video_file)) is not None
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+Test youtube_api: videos.list a gruppi di 50, execute_batch (esiti per richiesta, retry, stop con quotaExceeded).
+
+Usage:
+    python3 -m pytest scripts/tests/test_youtube_api.py
+"""
+import email
+import json
+import re
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+
+import httplib2
+import pytest
+from googleapiclient.discovery import build
+from googleapiclient.errors import HttpError
+
+from src import quota, youtube_api
+from src.quota import QuotaLedger
+
+PLAYLIST = 'PL123'
+
+
+class Response(dict):
+    def __init__(self, status: int, headers: dict = None):
+        super().__init__(headers or {})
+        self.status = status
+        self.reason = 'fake'
+        self['status'] = str(status)
+
+
+class FakeYouTube:
+    """
+    Endpoint YouTube in memoria: batch multipart, inserimenti singoli e videos.list.
+
+    Esito per video: 'bad*' -> 404, 'quota*' -> 403 quotaExceeded, in flaky
+    -> 409 la prima volta (poi successo), altrimenti 200.
+    """
+
+    def __init__(self, flaky=(), always_conflict=(), broken_batches: int = 0):
+        self.flaky = set(flaky)
+        self.always_conflict = set(always_conflict)
+        self.broken_batches = broken_batches
+        self.batches = []   # video per ogni batch inviato
+        self.singles = []   # video inviati da soli
+        self.lists = []     # id per ogni videos.list
+
+    def _result(self, video_id: str) -> tuple:
+        if video_id.startswith('bad'):
+            return 404, {'error': {'code': 404, 'message': 'not found', 'errors': [{'reason': 'videoNotFound'}]}}
+        if video_id.startswith('quota'):
+            return 403, {'error': {'code': 403, 'message': 'quota', 'errors': [{'reason': 'quotaExceeded'}]}}
+        if video_id in self.always_conflict:
+            return 409, {'error': {'code': 409, 'message': 'conflict', 'errors': [{'reason': 'conflict'}]}}
+        if video_id in self.flaky:
+            self.flaky.discard(video_id)
+            return 409, {'error': {'code': 409, 'message': 'conflict', 'errors': [{'reason': 'conflict'}]}}
+        return 200, {'id': f'item-{video_id}', 'snippet': {'resourceId': {'videoId': video_id}}}
+
+    def request(self, uri, method='GET', body=None, headers=None, **kwargs):
+        headers = {k.lower(): v for k, v in (headers or {}).items()}
+        if '/batch' in uri:
+            return self._batch(body, headers['content-type'])
+        if method == 'GET':
+            ids = re.search(r'[?&]id=([^&]+)', uri).group(1).replace('%2C', ',').split(',')
+            self.lists.append(ids)
+            items = [{'id': video_id} for video_id in ids if not video_id.startswith('bad')]
+            return Response(200, {'content-type': 'application/json'}), json.dumps({'items': items}).encode()
+
+        video_id = json.loads(body)['snippet']['resourceId']['videoId']
+        self.singles.append(video_id)
+        status, payload = self._result(video_id)
+        return Response(status, {'content-type': 'application/json'}), json.dumps(payload).encode()
+
+    def _batch(self, body, content_type: str):
+        if self.broken_batches:
+            self.broken_batches -= 1
+            raise httplib2.HttpLib2Error('connessione interrotta')
+        raw = body if isinstance(body, bytes) else body.encode('utf-8')
+        message = email.message_from_bytes(b'Content-Type: ' + content_type.encode() + b'\r\n\r\n' + raw)
+        parts = []
+        sent = []
+        for part in message.get_payload():
+            content_id = part['Content-ID'][1:-1]
+            inner = part.get_payload()
+            payload = re.split(r'\r?\n\r?\n', inner, maxsplit=1)[1]
+            video_id = json.loads(payload)['snippet']['resourceId']['videoId']
+            sent.append(video_id)
+            status, result = self._result(video_id)
+            parts.append(
+                f'--BOUNDARY\r\nContent-Type: application/http\r\nContent-ID: <response-{content_id}>\r\n\r\n'
+                f'HTTP/1.1 {status} X\r\nContent-Type: application/json\r\n\r\n{json.dumps(result)}\r\n'
+            )
+        self.batches.append(sent)
+        body = (''.join(parts) + '--BOUNDARY--').encode('utf-8')
+        return Response(200, {'content-type': 'multipart/mixed; boundary=BOUNDARY'}), body
+
+
+@pytest.fixture
+def ledger(tmp_path, monkeypatch):
+    ledger = QuotaLedger(str(tmp_path / 'quota.json'), daily_limit=100000)
+    monkeypatch.setattr(quota, '_ledger', ledger)
+    monkeypatch.setattr(quota, '_job', quota.JOB_UPLOAD)
+    return ledger
+
+
+def client(server: FakeYouTube):
+    return build('youtube', 'v3', http=server, static_discovery=True)
+
+
+def insert_requests(youtube, video_ids: list) -> list:
+    # Chiavi non stringa: execute_batch usa la posizione come request_id
+    return [
+        ((index, video_id), 'playlistItems.insert', youtube_api.playlist_item_request(youtube, video_id, PLAYLIST))
+        for index, video_id in enumerate(video_ids)
+    ]
+
+
+def test_batch_results_are_demultiplexed_per_request(ledger):
+    server = FakeYouTube()
+    youtube = client(server)
+    ids = ['v1', 'bad1', 'v2', 'v3', 'bad2']
+
+    responses, errors = youtube_api.execute_batch(youtube, insert_requests(youtube, ids), batch_size=2)
+
+    assert server.batches == [['v1', 'bad1'], ['v2', 'v3'], ['bad2']]
+    assert {key: response['id'] for key, response in responses.items()} == {
+        (0, 'v1'): 'item-v1', (2, 'v2'): 'item-v2', (3, 'v3'): 'item-v3'
+    }
+    assert {key: error.resp.status for key, error in errors.items()} == {(1, 'bad1'): 404, (4, 'bad2'): 404}
+    # Ogni sottorichiesta costa come una chiamata singola
+    assert ledger.used(quota.JOB_UPLOAD) == 5 * quota.COSTS['playlistItems.insert']
+
+
+def test_transient_errors_are_retried_once_alone(ledger):
+    server = FakeYouTube(flaky={'v2'}, always_conflict={'v3'})
+    youtube = client(server)
+
+    responses, errors = youtube_api.execute_batch(youtube, insert_requests(youtube, ['v1', 'v2', 'v3']))
+
+    assert server.batches == [['v1', 'v2', 'v3']]
+    assert server.singles == ['v2', 'v3']
+    assert sorted(key[1] for key in responses) == ['v1', 'v2']
+    assert [(key[1], error.resp.status) for key, error in errors.items()] == [('v3', 409)]
+    assert ledger.used(quota.JOB_UPLOAD) == 5 * quota.COSTS['playlistItems.insert']
+
+
+def test_no_retry_when_disabled(ledger):
+    server = FakeYouTube(flaky={'v1'})
+    youtube = client(server)
+
+    responses, errors = youtube_api.execute_batch(youtube, insert_requests(youtube, ['v1']), retry_failed=False)
+
+    assert responses == {}
+    assert server.singles == []
+    assert errors[(0, 'v1')].resp.status == 409
+
+
+def test_quota_exceeded_stops_remaining_batches_and_retries(ledger):
+    server = FakeYouTube(flaky={'v1'})
+    youtube = client(server)
+    ids = ['v1', 'quota1', 'v2', 'v3', 'v4']
+
+    responses, errors = youtube_api.execute_batch(youtube, insert_requests(youtube, ids), batch_size=2)
+
+    # Solo il primo batch è stato inviato; il retry di v1 non parte
+    assert server.batches == [['v1', 'quota1']]
+    assert server.singles == []
+    assert responses == {}
+    exhausted = errors[(1, 'quota1')]
+    assert quota.is_quota_exceeded(exhausted)
+    assert all(errors[key] is exhausted for key in [(0, 'v1'), (2, 'v2'), (3, 'v3'), (4, 'v4')])
+    assert ledger.remaining() == 0
+    assert ledger.used(quota.JOB_UPLOAD) == 2 * quota.COSTS['playlistItems.insert']
+
+
+def test_failed_batch_marks_all_its_requests(ledger):
+    server = FakeYouTube(broken_batches=1)
+    youtube = client(server)
+
+    responses, errors = youtube_api.execute_batch(youtube, insert_requests(youtube, ['v1', 'v2', 'v3']), batch_size=2)
+
+    assert [key[1] for key in errors] == ['v1', 'v2']
+    assert all(isinstance(error, httplib2.HttpLib2Error) for error in errors.values())
+    assert [key[1] for key in responses] == ['v3']
+
+
+def test_add_videos_to_playlist_inserts_in_order_one_at_a_time(ledger):
+    server = FakeYouTube()
+
+    added, errors = youtube_api.add_videos_to_playlist(client(server), ['v2', 'v1', 'v2', 'bad1', 'v3'], PLAYLIST)
+
+    # Stessa playlist: niente batch (sottorichieste parallele), ordine sul server = ordine dato
+    assert server.batches == []
+    assert server.singles == ['v2', 'v1', 'bad1', 'v3']
+    assert added == ['v2', 'v1', 'v3']
+    assert errors['bad1'].resp.status == 404
+    assert ledger.used(quota.JOB_UPLOAD) == 4 * quota.COSTS['playlistItems.insert']
+
+
+def test_add_videos_to_playlist_stops_on_quota_exceeded(ledger):
+    server = FakeYouTube()
+
+    added, errors = youtube_api.add_videos_to_playlist(client(server), ['v1', 'quota1', 'v2', 'v3'], PLAYLIST)
+
+    assert server.singles == ['v1', 'quota1']
+    assert added == ['v1']
+    assert quota.is_quota_exceeded(errors['quota1'])
+    assert errors['v2'] is errors['quota1'] and errors['v3'] is errors['quota1']
+    assert ledger.remaining() == 0
+
+
+def test_list_videos_uses_one_call_per_50_ids(ledger):
+    server = FakeYouTube()
+    ids = [f'v{i}' for i in range(120)] + ['bad1', 'v0']
+
+    items = youtube_api.list_videos(client(server), ids, part='snippet')
+
+    assert [len(chunk) for chunk in server.lists] == [50, 50, 21]
+    assert len(items) == 120
+    assert 'bad1' not in items
+    assert ledger.used(quota.JOB_UPLOAD) == 3
+
+
+def test_list_videos_records_quota_exceeded(ledger):
+    class ExhaustedServer(FakeYouTube):
+        def request(self, uri, method='GET', body=None, headers=None, **kwargs):
+            payload = {'error': {'code': 403, 'message': 'quota', 'errors': [{'reason': 'quotaExceeded'}]}}
+            return Response(403, {'content-type': 'application/json'}), json.dumps(payload).encode()
+
+    with pytest.raises(HttpError):
+        youtube_api.list_videos(client(ExhaustedServer()), ['v1'])
+    assert ledger.remaining() == 0
+    assert ledger.used(quota.JOB_UPLOAD) == 1
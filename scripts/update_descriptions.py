@@ -2,8 +2,16 @@
 """
 Aggiorna le descrizioni YouTube per i video senza token seduta.
 
-Legge data/anagrafica_video.csv, ricostruisce la descrizione con token e link
-nuovo, e aggiorna solo i video che non lo contengono.
+Legge l'anagrafica dal backend di storage configurato (CSV o SQLite),
+ricostruisce la descrizione con token e link nuovo, e aggiorna solo i video
+che non lo contengono. Lo stato corrente si
+legge con una videos.list ogni 50 video e gli aggiornamenti partono in batch
+(src/youtube_api.py).
+
+Le impronte dei metadati pubblicati sono salvate in
+data/cache/description_snapshots.json: l'API viene interpellata solo per i
+video i cui metadati ricostruiti sono cambiati (es. è comparso il resoconto
+stenografico). --refresh ignora le impronte e confronta tutto con YouTube.
 
 Usage:
   python3 update_descriptions.py --dry-run
@@ -11,6 +19,7 @@ Usage:
   python3 update_descriptions.py --update-license
   python3 update_descriptions.py --update-recording-date
   python3 update_descriptions.py --update-audio-language
+  python3 update_descriptions.py --refresh
 """
 import sys
 from pathlib import Path
@@ -18,17 +27,19 @@ sys.path.append(str(Path(__file__).resolve().parents[1]))
 
 
 import argparse
-import csv
-from collections import defaultdict
+import hashlib
+import json
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, List
 
 import yaml
 
-from src import uploader
-from src.metadata import build_description, build_seduta_token, build_recording_date
+from src import backlog, quota, storage, uploader, youtube_api
+from src.metadata import build_description, build_seduta_token, build_recording_date, build_title
+from src.utils import atomic_write
 
 REPO_ROOT = Path(__file__).resolve().parents[1]
+DEFAULT_SNAPSHOT_FILE = './data/cache/description_snapshots.json'
 
 
 def load_config(config_path: str = None) -> dict:
@@ -39,13 +50,6 @@ def load_config(config_path: str = None) -> dict:
         return yaml.safe_load(f)
 
 
-def load_anagrafica(anagrafica_path: str) -> List[dict]:
-    """Carica tutte le righe dell'anagrafica."""
-    with open(anagrafica_path, 'r', newline='', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        return list(reader)
-
-
 def group_by_youtube_id(rows: List[dict]) -> Dict[str, dict]:
     """
     Ritorna la prima occorrenza per youtube_id (sufficiente per ricostruire seduta/video).
@@ -60,21 +64,7 @@ def group_by_youtube_id(rows: List[dict]) -> Dict[str, dict]:
     return grouped
 
 
-def get_video_snippet(youtube, video_id: str) -> Optional[dict]:
-    """Recupera snippet/status correnti del video."""
-    try:
-        response = youtube.videos().list(
-            part='snippet,status,recordingDetails',
-            id=video_id
-        ).execute()
-        items = response.get('items', [])
-        return items[0] if items else None
-    except Exception as e:
-        print(f"  ✗ Errore fetch video {video_id}: {e}")
-        return None
-
-
-def update_video_description(
+def build_update_request(
     youtube,
     video_id: str,
     new_description: str,
@@ -82,49 +72,86 @@ def update_video_description(
     recording_date: str | None,
     license_value: str | None,
     audio_language: str | None
-) -> bool:
-    """Aggiorna descrizione mantenendo titolo, tag, categoria, privacy (e licenza/lingua audio se richieste)."""
-    try:
-        snippet = current.get('snippet', {})
-        status = current.get('status', {})
-
-        status_body = {
-            'privacyStatus': status.get('privacyStatus', 'public')
-        }
-        if license_value:
-            status_body['license'] = license_value
-
-        snippet_body = {
-            'title': snippet.get('title', ''),
-            'description': new_description,
-            'tags': snippet.get('tags', []),
-            'categoryId': snippet.get('categoryId', '25'),
-            'defaultLanguage': snippet.get('defaultLanguage', 'it')
+):
+    """
+    Richiesta videos.update (non eseguita): aggiorna la descrizione mantenendo
+    titolo, tag, categoria, privacy (e licenza/lingua audio se richieste).
+    """
+    snippet = current.get('snippet', {})
+    status = current.get('status', {})
+
+    status_body = {
+        'privacyStatus': status.get('privacyStatus', 'public')
+    }
+    if license_value:
+        status_body['license'] = license_value
+
+    snippet_body = {
+        'title': snippet.get('title', ''),
+        'description': new_description,
+        'tags': snippet.get('tags', []),
+        'categoryId': snippet.get('categoryId', '25'),
+        'defaultLanguage': snippet.get('defaultLanguage', 'it')
+    }
+    if audio_language:
+        snippet_body['defaultAudioLanguage'] = audio_language
+
+    body = {
+        'id': video_id,
+        'snippet': snippet_body,
+        'status': status_body
+    }
+
+    if recording_date:
+        body['recordingDetails'] = {
+            'recordingDate': recording_date
         }
-        if audio_language:
-            snippet_body['defaultAudioLanguage'] = audio_language
 
-        body = {
-            'id': video_id,
-            'snippet': snippet_body,
-            'status': status_body
-        }
+    return youtube.videos().update(
+        part='snippet,status' + (',recordingDetails' if recording_date else ''),
+        body=body
+    )
 
-        if recording_date:
-            body['recordingDetails'] = {
-                'recordingDate': recording_date
-            }
 
-        youtube.videos().update(
-            part='snippet,status' + (',recordingDetails' if recording_date else ''),
-            body=body
-        ).execute()
+class DescriptionSnapshots:
+    """
+    Impronte (hash) dei metadati pubblicati per video: youtube_id -> {campo: hash}.
 
-        return True
+    Se i metadati ricostruiti dall'anagrafica hanno le stesse impronte
+    dell'ultimo aggiornamento il video non cambia e l'API non serve.
+    """
 
-    except Exception as e:
-        print(f"  ✗ Errore update video {video_id}: {e}")
-        return False
+    def __init__(self, path: str = DEFAULT_SNAPSHOT_FILE):
+        self.path = Path(path)
+        self._dirty = False
+        try:
+            self._data = json.loads(self.path.read_text(encoding='utf-8'))
+        except (FileNotFoundError, ValueError):
+            self._data = {}
+
+    @staticmethod
+    def fingerprint(fields: dict) -> dict:
+        return {
+            name: hashlib.sha256(str(value).encode('utf-8')).hexdigest()[:16]
+            for name, value in fields.items()
+        }
+
+    def unchanged(self, youtube_id: str, fields: dict) -> bool:
+        """True se tutti i campi coincidono con l'ultimo stato pubblicato."""
+        known = self._data.get(youtube_id) or {}
+        return all(known.get(name) == digest for name, digest in self.fingerprint(fields).items())
+
+    def store(self, youtube_id: str, fields: dict) -> None:
+        self._data.setdefault(youtube_id, {}).update(self.fingerprint(fields))
+        self._dirty = True
+
+    def save(self) -> None:
+        """Scrive il file (atomico) se ci sono impronte nuove."""
+        if not self._dirty:
+            return
+        with atomic_write(self.path, 'w', encoding='utf-8') as f:
+            json.dump(self._data, f, sort_keys=True)
+        self._dirty = False
 
 
 def main():
@@ -135,46 +162,39 @@ def main():
     parser.add_argument('--update-license', action='store_true', help='Aggiorna la licenza YouTube secondo config')
     parser.add_argument('--update-recording-date', action='store_true', help='Aggiorna recordingDate secondo anagrafica')
     parser.add_argument('--update-audio-language', action='store_true', help='Aggiorna defaultAudioLanguage secondo config')
+    parser.add_argument('--refresh', action='store_true', help='Ignora le impronte locali e confronta tutti i video con YouTube')
     args = parser.parse_args()
 
     config = load_config()
-    anagrafica_path = config['logging']['anagrafica_file']
+    quota.configure(config, job=quota.JOB_DESCRIPTIONS)
 
-    if not Path(anagrafica_path).exists():
-        print(f"✗ Anagrafica non trovata: {anagrafica_path}")
+    # Sola lettura: stesse righe con backend CSV o SQLite
+    backend = storage.get_backend(config)
+    backend.init()
+    rows = backend.rows()
+    backend.close()
+
+    if not rows:
+        print(f"✗ Anagrafica vuota o non trovata (backend {backend.name})")
         return 1
 
-    rows = load_anagrafica(anagrafica_path)
     grouped = group_by_youtube_id(rows)
 
     if not grouped:
         print("✓ Nessun youtube_id trovato in anagrafica")
         return 0
 
-    youtube = None
-    if not args.dry_run:
-        print("🔐 Autenticazione YouTube...")
-        youtube = uploader.authenticate(
-            config['youtube']['credentials_file'],
-            config['youtube']['token_file']
-        )
+    snapshots = DescriptionSnapshots(
+        config.get('youtube', {}).get('description_snapshots', DEFAULT_SNAPSHOT_FILE)
+    )
 
     updated = 0
     skipped = 0
+    unchanged = 0
+    planned = []
 
     for youtube_id, row in grouped.items():
-        seduta_info = {
-            'numero_seduta': row.get('numero_seduta'),
-            'data_seduta': row.get('data_seduta'),
-            'url_pagina': row.get('url_pagina'),
-            'odg_url': row.get('odg_url'),
-            'resoconto_url': row.get('resoconto_url')
-        }
-        video_info = {
-            'id_video': row.get('id_video'),
-            'ora_video': row.get('ora_video'),
-            'data_video': row.get('data_video')
-        }
+        seduta_info, video_info = backlog.split_row(row)
 
         token = build_seduta_token(seduta_info)
         if not token:
@@ -182,32 +202,35 @@ def main():
             skipped += 1
             continue
 
-        new_description = build_description(seduta_info, video_info, config)
-        new_title = None
-        if args.update_titles:
-            from src.metadata import build_title
-            new_title = build_title(seduta_info, video_info)
-
-        desired_license = None
-        if args.update_license:
-            desired_license = config.get('youtube', {}).get('license', 'creativeCommon')
-        desired_audio_language = None
-        if args.update_audio_language:
-            desired_audio_language = config.get('youtube', {}).get('audio_language', 'it-IT')
         recording_date = build_recording_date(
             video_info,
             timezone=config.get('youtube', {}).get('timezone', 'Europe/Rome')
         )
 
+        # Metadati desiderati, calcolati offline dall'anagrafica
+        desired = {'description': build_description(seduta_info, video_info, config)}
+        if args.update_titles:
+            desired['title'] = build_title(seduta_info, video_info)
+        if args.update_license:
+            desired['license'] = config.get('youtube', {}).get('license', 'creativeCommon')
+        if args.update_recording_date and recording_date:
+            desired['recordingDate'] = recording_date
+        if args.update_audio_language:
+            desired['defaultAudioLanguage'] = config.get('youtube', {}).get('audio_language', 'it-IT')
+
+        if not args.refresh and snapshots.unchanged(youtube_id, desired):
+            unchanged += 1
+            continue
+
         if args.dry_run:
-            extra = f", license={desired_license}" if desired_license else ""
-            if args.update_recording_date:
-                extra += f", recordingDate={recording_date}"
-            if desired_audio_language:
-                extra += f", audioLanguage={desired_audio_language}"
+            extra = f", license={desired['license']}" if 'license' in desired else ""
+            if 'recordingDate' in desired:
+                extra += f", recordingDate={desired['recordingDate']}"
+            if 'defaultAudioLanguage' in desired:
+                extra += f", audioLanguage={desired['defaultAudioLanguage']}"
             print(f"[DRY] {youtube_id}: aggiungere token {token}{extra}")
             print("  " + "-" * 66)
-            for line in new_description.split('\n'):
+            for line in desired['description'].split('\n'):
                 print(f"  {line}")
             print("  " + "-" * 66)
             updated += 1
@@ -215,54 +238,100 @@ def main():
                 break
             continue
 
-        current = get_video_snippet(youtube, youtube_id)
-        if not current:
-            skipped += 1
-            continue
+        planned.append((youtube_id, desired, token))
 
-        current_desc = current.get('snippet', {}).get('description', '')
-        current_title = current.get('snippet', {}).get('title', '')
-        current_license = current.get('status', {}).get('license')
-        current_audio_language = current.get('snippet', {}).get('defaultAudioLanguage')
-        current_recording_date = current.get('recordingDetails', {}).get('recordingDate')
-
-        needs_update = False
-        if token not in current_desc or current_desc != new_description:
-            needs_update = True
-        if new_title and current_title != new_title:
-            needs_update = True
-        if desired_license and current_license != desired_license:
-            needs_update = True
-        if args.update_recording_date and recording_date and current_recording_date != recording_date:
-            needs_update = True
-        if desired_audio_language and current_audio_language != desired_audio_language:
-            needs_update = True
-
-        if not needs_update:
-            skipped += 1
-            continue
+    print(f"Metadati invariati dall'ultimo aggiornamento: {unchanged} video (nessuna chiamata API)")
+
+    if args.dry_run or not planned:
+        print(f"\nRiepilogo: aggiornati={updated}, invariati={unchanged}, skip={skipped}")
+        return 0
+
+    print("🔐 Autenticazione YouTube...")
+    youtube = uploader.authenticate(
+        config['youtube']['credentials_file'],
+        config['youtube']['token_file']
+    )
 
-        print(f"Aggiorno {youtube_id}...")
-        if new_title:
-            current['snippet']['title'] = new_title
-        ok = update_video_description(
+    # Stato corrente dei soli video cambiati: una videos.list ogni 50 id
+    list_calls = -(-len(planned) // youtube_api.MAX_IDS_PER_LIST)
+    if not quota.can_spend('videos.list', list_calls):
+        print(f"⚠ Quota YouTube esaurita per gli aggiornamenti ({quota.allowance()} unità), stop")
+        return 0
+    try:
+        currents = youtube_api.list_videos(
             youtube,
-            youtube_id,
-            new_description,
-            current,
-            recording_date if args.update_recording_date else None,
-            desired_license,
-            desired_audio_language
+            [youtube_id for youtube_id, _, _ in planned],
+            part='snippet,status,recordingDetails'
         )
-        if ok:
-            updated += 1
-        else:
-            skipped += 1
+    except Exception as e:
+        print(f"  ✗ Errore fetch video: {e}")
+        return 1
+
+    updates = []
+    desired_by_id = {}
+    try:
+        for youtube_id, desired, token in planned:
+            current = currents.get(youtube_id)
+            if not current:
+                print(f"  ✗ Video {youtube_id} non trovato su YouTube")
+                skipped += 1
+                continue
+
+            published = {
+                'description': current.get('snippet', {}).get('description', ''),
+                'title': current.get('snippet', {}).get('title', ''),
+                'license': current.get('status', {}).get('license'),
+                'recordingDate': current.get('recordingDetails', {}).get('recordingDate'),
+                'defaultAudioLanguage': current.get('snippet', {}).get('defaultAudioLanguage')
+            }
+            needs_update = token not in published['description'] or any(
+                published[name] != value for name, value in desired.items()
+            )
+
+            if not needs_update:
+                # Già allineato (es. aggiornato a mano): la prossima volta niente API
+                snapshots.store(youtube_id, desired)
+                skipped += 1
+                continue
 
-        if args.limit and updated >= args.limit:
-            break
+            if args.limit and len(updates) >= args.limit:
+                break
 
-    print(f"\nRiepilogo: aggiornati={updated}, skip={skipped}")
+            if 'title' in desired:
+                current['snippet']['title'] = desired['title']
+            desired_by_id[youtube_id] = desired
+            updates.append((youtube_id, 'videos.update', build_update_request(
+                youtube,
+                youtube_id,
+                desired['description'],
+                current,
+                desired.get('recordingDate'),
+                desired.get('license'),
+                desired.get('defaultAudioLanguage')
+            )))
+
+        # Quota condivisa con gli upload: ci si ferma prima di intaccare la loro riserva
+        affordable = quota.allowance() // quota.COSTS['videos.update']
+        if len(updates) > affordable:
+            print(f"⚠ Quota YouTube sufficiente per {affordable} aggiornamenti su {len(updates)}")
+            skipped += len(updates) - affordable
+            updates = updates[:affordable]
+
+        if updates:
+            print(f"Aggiorno {len(updates)} video (batch da {youtube_api.DEFAULT_BATCH_SIZE})...")
+            responses, errors = youtube_api.execute_batch(youtube, updates)
+            for youtube_id, _, _ in updates:
+                if youtube_id in responses:
+                    print(f"  ✓ {youtube_id}")
+                    snapshots.store(youtube_id, desired_by_id[youtube_id])
+                    updated += 1
+                else:
+                    print(f"  ✗ Errore update video {youtube_id}: {errors.get(youtube_id)}")
+                    skipped += 1
+    finally:
+        snapshots.save()
+
+    print(f"\nRiepilogo: aggiornati={updated}, invariati={unchanged}, skip={skipped}")
     return 0
 
 
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Manutenzione del log upload (data/logs/upload_log.csv).
+
+Usage:
+    python3 upload_log.py stats      # Statistiche dal journal (snapshot + coda)
+    python3 upload_log.py compact    # Compatta: una sola entry per video
+"""
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+
+import argparse
+import yaml
+
+from src.upload_journal import get_journal
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+
+
+def load_config(config_path: str = None) -> dict:
+    """Carica configurazione."""
+    if not config_path:
+        config_path = str(REPO_ROOT / 'config' / 'config.yaml')
+    with open(config_path, 'r', encoding='utf-8') as f:
+        return yaml.safe_load(f)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Manutenzione log upload')
+    parser.add_argument('command', choices=('stats', 'compact'))
+    parser.add_argument('--log-file', help='Path log upload (default: config logging.log_file)')
+    args = parser.parse_args()
+
+    log_file = args.log_file or load_config()['logging']['log_file']
+    if not Path(log_file).exists():
+        print(f"✗ Log non trovato: {log_file}")
+        return 1
+
+    journal = get_journal(log_file)
+
+    if args.command == 'compact':
+        before, after = journal.compact()
+        print(f"✓ Log compattato: {before} → {after} entry")
+
+    stats = journal.get_stats()
+    print(f"  Upload riusciti:  {stats['success']}")
+    print(f"  Upload falliti:   {stats['failed']}")
+    print(f"  Totale entry:     {stats['total']}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -14,23 +14,20 @@ from pathlib import Path
 sys.path.append(str(Path(__file__).resolve().parents[1]))
 
 
-import csv
 import sys
 import yaml
 import argparse
 import time
 import ssl
 from pathlib import Path
-from datetime import datetime
 from typing import Optional, Callable, Any
 
-from src import scraper, downloader, uploader
+from src import scraper, downloader, quota, uploader, storage, streaming
 from src.metadata import build_youtube_metadata
 from src.utils import extract_year
 
 
 REPO_ROOT = Path(__file__).resolve().parents[1]
-ANAGRAFICA_EXTRA_FIELDS = ['status', 'failure_reason']
 
 
 def is_temporary_error(error: Exception) -> bool:
@@ -118,16 +115,6 @@ def retry_with_backoff(
         raise last_error
 
 
-def _ensure_anagrafica_fields(fieldnames: list) -> list:
-    """Garantisce che i campi aggiuntivi siano presenti nell'anagrafica."""
-    if not fieldnames:
-        fieldnames = []
-    for field in ANAGRAFICA_EXTRA_FIELDS:
-        if field not in fieldnames:
-            fieldnames.append(field)
-    return fieldnames
-
-
 def load_config(config_path: str = None) -> dict:
     """Carica configurazione."""
     if not config_path:
@@ -136,35 +123,33 @@ def load_config(config_path: str = None) -> dict:
         return yaml.safe_load(f)
 
 
-def get_first_unuploaded_video(anagrafica_path: str) -> Optional[dict]:
+def get_first_unuploaded_video(backend) -> Optional[dict]:
     """
     Trova primo video senza youtube_id in anagrafica.
     
     Args:
-        anagrafica_path: Path al CSV anagrafica
+        backend: Backend storage (CSV o SQLite)
         
     Returns:
         Dict con dati video o None
     """
     try:
         failed_candidate = None
-        with open(anagrafica_path, 'r', newline='', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                # Salta video già uploadati
-                if row.get('youtube_id'):
-                    continue
+        for row in backend.rows():
+            # Salta video già uploadati
+            if row.get('youtube_id'):
+                continue
 
-                # Verifica che abbia dati essenziali
-                if not (row.get('id_video') and row.get('ora_video')):
-                    continue
+            # Verifica che abbia dati essenziali
+            if not (row.get('id_video') and row.get('ora_video')):
+                continue
 
-                status = (row.get('status') or '').lower()
-                if status == 'failed':
-                    return row
+            status = (row.get('status') or '').lower()
+            if status == 'failed':
+                return row
 
-                if failed_candidate is None:
-                    failed_candidate = row
+            if failed_candidate is None:
+                failed_candidate = row
 
         return failed_candidate
         
@@ -173,105 +158,6 @@ def get_first_unuploaded_video(anagrafica_path: str) -> Optional[dict]:
         return None
 
 
-def update_anagrafica_youtube_id(
-    anagrafica_path: str,
-    id_video: str,
-    youtube_id: str,
-    numero_seduta: str | None = None,
-    data_seduta: str | None = None,
-    duration_minutes: int | None = None
-) -> bool:
-    """
-    Aggiorna youtube_id per video in anagrafica.
-    
-    Args:
-        anagrafica_path: Path al CSV anagrafica
-        id_video: ID video ARS
-        youtube_id: ID video YouTube
-        
-    Returns:
-        True se aggiornato
-    """
-    try:
-        # Leggi anagrafica
-        rows = []
-        with open(anagrafica_path, 'r', newline='', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            fieldnames = _ensure_anagrafica_fields(reader.fieldnames or [])
-            
-            for row in reader:
-                # Aggiorna youtube_id se match
-                match = row['id_video'] == id_video
-                if numero_seduta and data_seduta:
-                    match = (
-                        match
-                        and row.get('numero_seduta') == numero_seduta
-                        and row.get('data_seduta') == data_seduta
-                    )
-                if match:
-                    row['youtube_id'] = youtube_id
-                    row['last_check'] = datetime.now().isoformat()
-                    row['status'] = 'success'
-                    row['failure_reason'] = ''
-                    if duration_minutes is not None:
-                        row['duration_minutes'] = str(duration_minutes)
-                rows.append(row)
-        
-        # Riscrivi anagrafica
-        with open(anagrafica_path, 'w', newline='', encoding='utf-8') as f:
-            writer = csv.DictWriter(f, fieldnames=fieldnames)
-            writer.writeheader()
-            writer.writerows(rows)
-            
-        return True
-        
-    except Exception as e:
-        print(f"✗ Errore aggiornamento anagrafica: {e}")
-        return False
-
-
-def update_anagrafica_failure(
-    anagrafica_path: str,
-    id_video: str,
-    error: str,
-    numero_seduta: str | None = None,
-    data_seduta: str | None = None
-) -> bool:
-    """
-    Registra fallimento upload in anagrafica.
-    """
-    try:
-        rows = []
-        with open(anagrafica_path, 'r', newline='', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            fieldnames = _ensure_anagrafica_fields(reader.fieldnames or [])
-
-            for row in reader:
-                match = row.get('id_video') == id_video
-                if numero_seduta and data_seduta:
-                    match = (
-                        match
-                        and row.get('numero_seduta') == numero_seduta
-                        and row.get('data_seduta') == data_seduta
-                    )
-                if match:
-                    row['status'] = 'failed'
-                    row['failure_reason'] = (error or '').replace('\n', ' ').strip()
-                    row['last_check'] = datetime.now().isoformat()
-                rows.append(row)
-
-        with open(anagrafica_path, 'w', newline='', encoding='utf-8') as f:
-            writer = csv.DictWriter(f, fieldnames=fieldnames)
-            writer.writeheader()
-            writer.writerows(rows)
-
-        return True
-
-    except Exception as e:
-        print(f"✗ Errore aggiornamento anagrafica (failed): {e}")
-        return False
-
-
 def main():
     """Test upload singolo video."""
     # Parse argomenti
@@ -297,11 +183,34 @@ def main():
 
     # Carica config
     config = load_config()
+    backend = storage.get_backend(config)
+    backend.init()
+    quota.configure(config, job=quota.JOB_UPLOAD)
+
+    try:
+        return upload_first_video(args, config, backend)
+    finally:
+        # Con backend SQLite la chiusura rigenera il CSV anagrafica
+        backend.close()
+
+
+def upload_first_video(args, config: dict, backend) -> int:
+    """
+    Uploada il primo video non ancora presente su YouTube.
+
+    Args:
+        args: Argomenti CLI (dry_run, yes)
+        config: Configurazione
+        backend: Backend storage
+
+    Returns:
+        Exit code
+    """
     anagrafica_path = config['logging']['anagrafica_file']
 
     # Trova primo video non uploadato
     print(f"📋 Ricerca primo video non uploadato in {anagrafica_path}...")
-    video_row = get_first_unuploaded_video(anagrafica_path)
+    video_row = get_first_unuploaded_video(backend)
 
     if not video_row:
         print("✓ Nessun video da uploadare (tutti già su YouTube)")
@@ -344,6 +253,11 @@ def main():
         'video_page_url': video_row['video_page_url']
     }
     
+    # Quota giornaliera condivisa con descrizioni e sottotitoli (src/quota.py)
+    if not args.dry_run and not quota.can_spend('videos.insert'):
+        print(f"\n⚠ Quota YouTube insufficiente per un upload ({quota.allowance()} unità disponibili), rimandato")
+        return 0
+
     # Autenticazione YouTube (skip in dry-run)
     youtube = None
     if not args.dry_run:
@@ -365,9 +279,25 @@ def main():
     else:
         print(f"\n🔐 [DRY-RUN] Autenticazione YouTube saltata")
 
-    # Download video (skip in dry-run)
+    # Upload in streaming (download.streaming): nessun file su disco
     video_path = None
-    if not args.dry_run:
+    stream_url = None
+    duration_mins = None
+    streaming_cfg = config['download'].get('streaming') or {}
+    if not args.dry_run and streaming_cfg.get('enabled'):
+        stream_url, info = downloader.get_hls_stream(
+            video_row['video_page_url'],
+            config['download'].get('max_height')
+        )
+        if stream_url:
+            print(f"\n⬇️  Streaming HLS: download su disco saltato")
+            if info.get('duration'):
+                duration_mins = round(info['duration'] / 60)
+        else:
+            print(f"\n⚠ Stream HLS non disponibile, download su disco")
+
+    # Download video (skip in dry-run)
+    if not args.dry_run and not stream_url:
         print(f"\n⬇️  Download video...")
         temp_dir = Path(config['download']['temp_dir'])
         temp_dir.mkdir(parents=True, exist_ok=True)
@@ -377,14 +307,23 @@ def main():
 
         try:
             # Download con retry automatico
-            duration_mins = None
+            hls_cfg = config['download'].get('hls') or {}
+
             def do_download():
                 nonlocal duration_mins
+                if uploader.load_upload_session(str(video_path)):
+                    # Upload interrotto in un'esecuzione precedente: il file serve così com'è
+                    print(f"  ↻ File già scaricato con upload in sospeso")
+                    duration_mins = video_row.get('duration_minutes') or None
+                    return True
                 success, duration_mins = downloader.download_video(
                     video_row['video_page_url'],
                     str(video_path),
                     retries=config['download'].get('max_retries', 3),
-                    max_height=config['download'].get('max_height')
+                    max_height=config['download'].get('max_height'),
+                    timeout=config['download'].get('timeout', 3600),
+                    hls_workers=hls_cfg.get('workers', 0),
+                    segment_dir=hls_cfg.get('segment_dir', downloader.hls.DEFAULT_STORE_DIR)
                 )
                 if not success or not video_path.exists():
                     raise Exception("Download fallito (nessun file creato)")
@@ -402,8 +341,7 @@ def main():
 
         except Exception as e:
             print(f"  ✗ Errore download: {e}")
-            update_anagrafica_failure(
-                anagrafica_path,
+            backend.mark_failed(
                 video_row['id_video'],
                 f"Download fallito: {e}",
                 numero_seduta=video_row.get('numero_seduta'),
@@ -454,12 +392,24 @@ def main():
         try:
             # Upload con retry automatico (più aggressivo: 5 tentativi)
             def do_upload():
-                result = uploader.upload_video(
-                    youtube,
-                    str(video_path),
-                    metadata,
-                    playlist_id=playlist_id
-                )
+                if stream_url:
+                    result = uploader.upload_video_stream(
+                        youtube,
+                        stream_url,
+                        metadata,
+                        playlist_id=playlist_id,
+                        chunk_mb=streaming_cfg.get('chunk_mb', 8),
+                        buffer_chunks=streaming_cfg.get('buffer_chunks', 4),
+                        max_restart_mb=streaming_cfg.get('max_restart_mb', streaming.DEFAULT_MAX_RESTART_MB)
+                    )
+                else:
+                    result = uploader.upload_video(
+                        youtube,
+                        str(video_path),
+                        metadata,
+                        playlist_id=playlist_id,
+                        chunk_mb=config['youtube'].get('upload_chunk_mb', uploader.DEFAULT_UPLOAD_CHUNK_MB)
+                    )
                 if not result:
                     raise Exception("Upload fallito (nessun ID restituito)")
                 return result
@@ -478,8 +428,7 @@ def main():
 
         except Exception as e:
             print(f"  ✗ Errore upload: {e}")
-            update_anagrafica_failure(
-                anagrafica_path,
+            backend.mark_failed(
                 video_row['id_video'],
                 f"Upload fallito: {e}",
                 numero_seduta=video_row.get('numero_seduta'),
@@ -488,16 +437,15 @@ def main():
             return 1
 
         finally:
-            # Cleanup video temporaneo
+            # Cleanup video temporaneo (tenuto se l'upload è da riprendere)
             if config['download'].get('cleanup_after_upload', True):
-                if video_path and video_path.exists():
+                if video_path and video_path.exists() and not uploader.load_upload_session(str(video_path)):
                     video_path.unlink()
                     print(f"\n🗑️  File temporaneo eliminato: {video_path.name}")
 
         # Aggiorna anagrafica
         print(f"\n💾 Aggiornamento anagrafica...")
-        if update_anagrafica_youtube_id(
-            anagrafica_path,
+        if backend.mark_uploaded(
             video_row['id_video'],
             youtube_id,
             numero_seduta=video_row.get('numero_seduta'),
@@ -0,0 +1,288 @@
+"""Anagrafica video in memoria con indice per chiave video."""
+
+import csv
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Optional
+
+from .utils import atomic_write
+
+
+ANAGRAFICA_EXTRA_FIELDS = ['status', 'failure_reason']
+
+
+def _ensure_anagrafica_fields(fieldnames: list) -> list:
+    """
+    Garantisce che i campi aggiuntivi siano presenti nell'anagrafica.
+    """
+    if not fieldnames:
+        fieldnames = []
+    for field in ANAGRAFICA_EXTRA_FIELDS:
+        if field not in fieldnames:
+            fieldnames.append(field)
+    return fieldnames
+
+
+def _file_signature(path: Path) -> Optional[tuple]:
+    """Ritorna (mtime_ns, size) del file o None se non esiste."""
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+class AnagraficaStore:
+    """
+    Anagrafica CSV caricata una volta e indicizzata in memoria.
+
+    Le righe sono indicizzate per (id_video, numero_seduta, data_seduta) e per
+    id_video, così le verifiche costano O(1) invece di una scansione del file.
+    Le modifiche restano in memoria finché non si chiama flush(), che riscrive
+    il CSV in un'unica scrittura atomica (file temporaneo univoco + os.replace).
+    """
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.fieldnames: list = []
+        self.rows: list = []
+        self._by_key: dict = {}
+        self._by_id: dict = {}
+        self._signature: Optional[tuple] = None
+        self._pending: list = []
+        self.load()
+
+    @property
+    def dirty(self) -> bool:
+        """True se ci sono modifiche non ancora scritte su disco."""
+        return bool(self._pending)
+
+    def load(self) -> None:
+        """(Ri)carica il CSV da disco e ricostruisce gli indici."""
+        self.fieldnames = []
+        self.rows = []
+        self._signature = _file_signature(self.path)
+
+        if self._signature is not None:
+            with open(self.path, 'r', newline='', encoding='utf-8') as f:
+                reader = csv.DictReader(f)
+                self.fieldnames = list(reader.fieldnames or [])
+                self.rows = list(reader)
+
+        self.fieldnames = _ensure_anagrafica_fields(self.fieldnames)
+        self._reindex()
+
+    def _reindex(self) -> None:
+        self._by_key = {}
+        self._by_id = {}
+        for row in self.rows:
+            id_video = row.get('id_video')
+            key = (id_video, row.get('numero_seduta'), row.get('data_seduta'))
+            self._by_key.setdefault(key, []).append(row)
+            self._by_id.setdefault(id_video, []).append(row)
+
+    def is_stale(self) -> bool:
+        """True se il file su disco è cambiato dall'ultimo load/flush."""
+        return _file_signature(self.path) != self._signature
+
+    def refresh(self) -> None:
+        """
+        Ricarica il file se modificato da altri processi.
+
+        Le modifiche non ancora scritte vengono riapplicate sulle righe ricaricate.
+        """
+        if not self.is_stale():
+            return
+        pending = self._pending
+        self.load()
+        self._pending = []
+        for method, args in pending:
+            getattr(self, method)(*args)
+
+    def find(
+        self,
+        id_video: str,
+        numero_seduta: Optional[str] = None,
+        data_seduta: Optional[str] = None
+    ) -> list:
+        """
+        Righe corrispondenti al video.
+
+        Con numero_seduta e data_seduta il match è sulla chiave completa,
+        altrimenti solo su id_video (stessa semantica delle funzioni in logger).
+        """
+        if numero_seduta and data_seduta:
+            return self._by_key.get((id_video, numero_seduta, data_seduta), [])
+        return self._by_id.get(id_video, [])
+
+    def is_uploaded(
+        self,
+        id_video: str,
+        numero_seduta: Optional[str] = None,
+        data_seduta: Optional[str] = None
+    ) -> bool:
+        """True se almeno una riga del video ha youtube_id."""
+        return any(row.get('youtube_id') for row in self.find(id_video, numero_seduta, data_seduta))
+
+    def mark_uploaded(
+        self,
+        id_video: str,
+        youtube_id: str,
+        numero_seduta: Optional[str] = None,
+        data_seduta: Optional[str] = None,
+        duration_minutes: Optional[int] = None
+    ) -> int:
+        """
+        Imposta youtube_id e status success sulle righe del video.
+
+        Returns:
+            Numero righe aggiornate
+        """
+        if duration_minutes is not None and 'duration_minutes' not in self.fieldnames:
+            self.fieldnames.append('duration_minutes')
+        rows = self.find(id_video, numero_seduta, data_seduta)
+        timestamp = datetime.now().isoformat()
+        for row in rows:
+            row['youtube_id'] = youtube_id
+            row['last_check'] = timestamp
+            row['status'] = 'success'
+            row['failure_reason'] = ''
+            if duration_minutes is not None:
+                row['duration_minutes'] = str(duration_minutes)
+        self._pending.append((
+            'mark_uploaded',
+            (id_video, youtube_id, numero_seduta, data_seduta, duration_minutes)
+        ))
+        return len(rows)
+
+    def mark_failed(
+        self,
+        id_video: str,
+        error: str,
+        numero_seduta: Optional[str] = None,
+        data_seduta: Optional[str] = None
+    ) -> int:
+        """
+        Registra status failed e motivo sulle righe del video.
+
+        Returns:
+            Numero righe aggiornate
+        """
+        rows = self.find(id_video, numero_seduta, data_seduta)
+        timestamp = datetime.now().isoformat()
+        reason = (error or '').replace('\n', ' ').strip()
+        for row in rows:
+            row['status'] = 'failed'
+            row['failure_reason'] = reason
+            row['last_check'] = timestamp
+        self._pending.append(('mark_failed', (id_video, error, numero_seduta, data_seduta)))
+        return len(rows)
+
+    def mark_no_transcript(self, youtube_id: str, value: str = 'true') -> int:
+        """
+        Imposta no_transcript sulle righe del video YouTube (nessun sottotitolo disponibile).
+
+        Returns:
+            Numero righe aggiornate
+        """
+        if 'no_transcript' not in self.fieldnames:
+            self.fieldnames.append('no_transcript')
+        rows = [row for row in self.rows if row.get('youtube_id') == youtube_id]
+        for row in rows:
+            row['no_transcript'] = value
+        self._pending.append(('mark_no_transcript', (youtube_id, value)))
+        return len(rows)
+
+    def upsert_seduta(
+        self,
+        numero_seduta: str,
+        build_rows: Callable[[dict], list],
+        replace: bool = True
+    ) -> int:
+        """
+        Sostituisce in memoria le righe di una seduta con quelle appena scaricate.
+
+        build_rows riceve le righe esistenti della seduta per chiave
+        (data_video, ora_video) e ritorna le righe nuove, già unite ai campi
+        da preservare (youtube_id, status, durata, ...). Le righe nuove prendono
+        il posto di quelle vecchie; una seduta nuova va in coda. Al flush le
+        righe vengono ordinate (stabilmente) per data seduta.
+
+        Args:
+            numero_seduta: Numero seduta
+            build_rows: Funzione righe esistenti -> righe nuove
+            replace: Se False la seduta è nuova e le righe vengono solo aggiunte
+
+        Returns:
+            Numero righe scritte
+        """
+        existing = {}
+        kept = self.rows
+        position = None
+        if replace:
+            kept = []
+            for row in self.rows:
+                if row.get('numero_seduta') == numero_seduta:
+                    if position is None:
+                        position = len(kept)
+                    existing[(row.get('data_video'), row.get('ora_video'))] = row
+                else:
+                    kept.append(row)
+        if position is None:
+            position = len(kept)
+
+        new_rows = build_rows(existing)
+        for row in new_rows:
+            for field in row:
+                if field not in self.fieldnames:
+                    self.fieldnames.append(field)
+
+        self.rows = kept[:position] + new_rows + kept[position:]
+        self._reindex()
+        self._pending.append(('upsert_seduta', (numero_seduta, build_rows, replace)))
+        return len(new_rows)
+
+    def flush(self) -> bool:
+        """
+        Scrive le modifiche pendenti con un'unica scrittura atomica.
+
+        Returns:
+            True se scritto (o nulla da scrivere)
+        """
+        if not self._pending:
+            return True
+
+        self.refresh()
+
+        # Sedute aggiornate al loro posto, nuove in coda: il file resta in ordine
+        # di data (stesso ordine dell'export del backend SQLite)
+        self.rows.sort(key=lambda row: row.get('data_seduta') or '')
+
+        with atomic_write(self.path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=self.fieldnames)
+            writer.writeheader()
+            writer.writerows(self.rows)
+
+        self._signature = _file_signature(self.path)
+        self._pending = []
+        return True
+
+
+_STORES: dict = {}
+
+
+def get_store(path: str) -> AnagraficaStore:
+    """
+    Store condiviso per path, caricato una sola volta per processo.
+
+    Se il file è stato modificato da un altro processo viene ricaricato
+    (riapplicando eventuali modifiche pendenti).
+    """
+    key = str(Path(path).resolve())
+    store = _STORES.get(key)
+    if store is None:
+        store = AnagraficaStore(path)
+        _STORES[key] = store
+    else:
+        store.refresh()
+    return store
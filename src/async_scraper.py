@@ -0,0 +1,209 @@
+"""Motore di scraping asyncio: rate limit a token bucket per host e retry con backoff."""
+
+import asyncio
+import random
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Iterable, Optional
+
+import requests
+from bs4 import BeautifulSoup
+
+from . import http_client
+from .html_parser import parse_html
+
+
+DEFAULT_CONCURRENCY = 8
+DEFAULT_BACKOFF_MAX = 120  # Come urllib3 Retry.DEFAULT_BACKOFF_MAX
+RETRY_AFTER_STATUS = (413, 429, 503)  # Come urllib3 Retry.RETRY_AFTER_STATUS_CODES
+
+# Callback di parsing: (soup, url) -> risultato (es. scraper.extract_seduta_info)
+ParseCallback = Callable[[BeautifulSoup, str], Any]
+
+
+class TokenBucket:
+    """
+    Token bucket asincrono: rate token/secondo, al più burst accumulati.
+
+    Con rate <= 0 acquire() ritorna subito (nessun limite).
+    """
+
+    def __init__(self, rate: float, burst: float = 1):
+        self.rate = rate
+        self.capacity = max(1.0, float(burst))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        if self.rate <= 0:
+            return
+        # Il lock serializza l'attesa: i token vengono assegnati in ordine di arrivo
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+def _retry_after(response: requests.Response) -> Optional[float]:
+    """Secondi indicati dall'header Retry-After (numero o data HTTP), se presente."""
+    value = response.headers.get('Retry-After')
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class AsyncScraper:
+    """
+    Scarica pagine in parallelo in un event loop e le passa agli estrattori.
+
+    L'I/O usa le sessioni keep-alive di http_client (senza retry automatici)
+    eseguite in thread; i tentativi li gestisce il motore: su status in
+    status_forcelist (429, 5xx) o errore di connessione riprova fino a
+    `retries` volte con backoff esponenziale (backoff_factor * 2^(n-1), come
+    urllib3 Retry) più jitter casuale, rispettando Retry-After. Ogni host ha
+    un token bucket (rate_limit_per_host richieste/secondo) e al più
+    `concurrency` richieste sono in volo contemporaneamente.
+
+    Gli estrattori esistenti si usano come callback di parsing (soup, url):
+    es. scraper.extract_seduta_info o una partial di
+    extract_records_for_category.
+    """
+
+    def __init__(
+        self,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        rate_per_host: Optional[float] = None,
+        burst: Optional[float] = None,
+        parser: Optional[str] = None
+    ):
+        settings = http_client.get_settings()
+        self.concurrency = max(1, concurrency)
+        self.rate_per_host = settings['rate_limit_per_host'] if rate_per_host is None else rate_per_host
+        self.burst = burst if burst is not None else max(1, self.rate_per_host or 1)
+        self.retries = settings['retries']
+        self.backoff_factor = settings['backoff_factor']
+        self.status_forcelist = frozenset(settings['status_forcelist'])
+        self.timeout = settings['timeout']
+        self.parser = parser
+        self._buckets: dict = {}
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    def _bucket(self, url: str) -> TokenBucket:
+        key = http_client.host_key(url)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = TokenBucket(self.rate_per_host, self.burst)
+            self._buckets[key] = bucket
+        return bucket
+
+    def _backoff(self, attempt: int, response: Optional[requests.Response] = None) -> float:
+        """Attesa prima del tentativo attempt+1 (attempt parte da 1)."""
+        if response is not None and response.status_code in RETRY_AFTER_STATUS:
+            retry_after = _retry_after(response)
+            if retry_after is not None:
+                return min(retry_after, DEFAULT_BACKOFF_MAX)
+        base = 0.0 if attempt <= 1 else self.backoff_factor * (2 ** (attempt - 1))
+        # Jitter: evita che richieste fallite insieme riprovino insieme
+        return min(DEFAULT_BACKOFF_MAX, base + random.uniform(0, self.backoff_factor))
+
+    def _get(self, url: str, timeout: float) -> requests.Response:
+        session = http_client.get_session(url, auto_retry=False)
+        response = session.get(url, timeout=timeout)
+        # Il corpo va letto nel thread: nel loop non si fa I/O bloccante
+        response.content
+        return response
+
+    async def fetch(self, url: str, timeout: Optional[float] = None) -> bytes:
+        """
+        Scarica un URL con rate limit, retry e timeout.
+
+        Il timeout vale per ogni tentativo (connessione + lettura del corpo).
+        Se il task viene cancellato, la cancellazione si propaga subito: il
+        thread in corso termina da solo entro il timeout di requests e la sua
+        risposta viene scartata.
+
+        Args:
+            url: URL da scaricare
+            timeout: Secondi per tentativo (default: timeout di http_client)
+
+        Returns:
+            Corpo della risposta
+
+        Raises:
+            requests.RequestException: Se tutti i tentativi falliscono
+            asyncio.TimeoutError: Se l'ultimo tentativo supera il timeout
+        """
+        timeout = timeout or self.timeout
+        attempt = 0
+        while True:
+            attempt += 1
+            await self._bucket(url).acquire()
+            response = None
+            if self._semaphore is None:
+                self._semaphore = asyncio.Semaphore(self.concurrency)
+            try:
+                async with self._semaphore:
+                    response = await asyncio.wait_for(asyncio.to_thread(self._get, url, timeout), timeout)
+            except (requests.ConnectionError, requests.Timeout, asyncio.TimeoutError):
+                if attempt > self.retries:
+                    raise
+
+            if response is not None:
+                if response.status_code not in self.status_forcelist or attempt > self.retries:
+                    response.raise_for_status()
+                    return response.content
+
+            await asyncio.sleep(self._backoff(attempt, response))
+
+    async def scrape(self, url: str, parse: ParseCallback, timeout: Optional[float] = None) -> Any:
+        """Scarica url e ritorna parse(soup, url)."""
+        body = await self.fetch(url, timeout)
+        return parse(parse_html(body, self.parser), url)
+
+    async def scrape_all(self, jobs: Iterable[tuple[str, ParseCallback]]) -> list:
+        """
+        Esegue tutti i job (url, parse) in parallelo.
+
+        Returns:
+            Lista dei risultati nell'ordine dei job; per i job falliti
+            l'eccezione sollevata al posto del risultato
+        """
+        tasks = [asyncio.create_task(self.scrape(url, parse)) for url, parse in jobs]
+        try:
+            return await asyncio.gather(*tasks, return_exceptions=True)
+        finally:
+            # Uscita anticipata (es. Ctrl+C): nessun task resta appeso al loop
+            for task in tasks:
+                task.cancel()
+
+    def run(self, jobs: Iterable[tuple[str, ParseCallback]]) -> list:
+        """Versione sincrona di scrape_all (crea ed esegue un event loop)."""
+        self._semaphore = None
+        self._buckets = {}
+        return asyncio.run(self.scrape_all(list(jobs)))
+
+
+def scrape_one(url: str, parse: ParseCallback, parser: Optional[str] = None) -> Any:
+    """
+    Scarica ed estrae una singola pagina con il motore asincrono.
+
+    Raises:
+        Eccezione del download o del parsing
+    """
+    result = AsyncScraper(concurrency=1, parser=parser).run([(url, parse)])[0]
+    if isinstance(result, BaseException):
+        raise result
+    return result
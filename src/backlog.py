@@ -0,0 +1,191 @@
+"""Coda di lavoro per il recupero dei video non ancora su YouTube (modalità backlog)."""
+
+import heapq
+import time
+from datetime import datetime
+from typing import Iterator, Optional
+
+from . import quota
+
+
+DEFAULT_QUOTA_BUDGET = quota.DEFAULT_DAILY_LIMIT
+DEFAULT_UPLOAD_COST = quota.COSTS['videos.insert']
+
+# Campi della seduta ricostruiti da una riga di anagrafica
+SEDUTA_FIELDS = [
+    'numero_seduta',
+    'data_seduta',
+    'url_pagina',
+    'odg_url',
+    'resoconto_url',
+    'resoconto_provvisorio_url',
+    'resoconto_stenografico_url',
+    'allegato_url'
+]
+
+VIDEO_FIELDS = [
+    'id_video',
+    'ora_video',
+    'data_video',
+    'stream_url',
+    'video_page_url',
+    'duration_minutes'
+]
+
+
+def _duration(row: dict) -> float:
+    try:
+        return float(row.get('duration_minutes') or 'inf')
+    except ValueError:
+        return float('inf')
+
+
+def _day(row: dict) -> int:
+    """Giorno del video (ordinale), 0 se non interpretabile."""
+    day = row.get('data_video') or row.get('data_seduta') or ''
+    try:
+        return datetime.strptime(day, '%Y-%m-%d').toordinal()
+    except ValueError:
+        return 0
+
+
+def _minutes(row: dict) -> int:
+    """Ora del video in minuti dalla mezzanotte, 0 se non interpretabile."""
+    try:
+        clock = datetime.strptime(row.get('ora_video') or '', '%H:%M')
+    except ValueError:
+        return 0
+    return clock.hour * 60 + clock.minute
+
+
+def priority(row: dict) -> tuple:
+    """
+    Chiave di priorità di una riga (minore = prima).
+
+    Ordine: video mai falliti prima di quelli già falliti, poi i giorni
+    più recenti; nello stesso giorno i video più brevi (durata ignota per
+    ultima) e, a parità di durata, quelli più tardi.
+    """
+    failed = (row.get('status') or '').lower() == 'failed'
+    return (failed, -_day(row), _duration(row), -_minutes(row))
+
+
+class WorkQueue:
+    """Coda a priorità (heap) delle righe di anagrafica da caricare."""
+
+    def __init__(self, rows: Optional[list] = None):
+        self._heap: list = []
+        self._seq = 0
+        for row in rows or []:
+            self.push(row)
+
+    def push(self, row: dict) -> None:
+        # Il contatore mantiene stabile l'ordine a parità di priorità
+        heapq.heappush(self._heap, (priority(row), self._seq, row))
+        self._seq += 1
+
+    def pop(self) -> dict:
+        return heapq.heappop(self._heap)[2]
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+
+def build_queue(rows: list) -> WorkQueue:
+    """
+    Coda dei video senza youtube_id (con id_video e ora_video valorizzati).
+
+    Args:
+        rows: Righe di anagrafica (lette una volta sola)
+
+    Returns:
+        WorkQueue ordinata per priorità
+    """
+    return WorkQueue([
+        row for row in rows
+        if not row.get('youtube_id') and row.get('id_video') and row.get('ora_video')
+    ])
+
+
+def split_row(row: dict) -> tuple[dict, dict]:
+    """
+    Dati seduta e video (come da scraper) da una riga di anagrafica.
+
+    Returns:
+        Tuple (seduta_info, video)
+    """
+    seduta_info = {field: row.get(field) or '' for field in SEDUTA_FIELDS}
+    video = {field: row.get(field) or '' for field in VIDEO_FIELDS}
+    video['duration_minutes'] = int(_duration(row)) if _duration(row) != float('inf') else None
+    return seduta_info, video
+
+
+class QuotaBudget:
+    """
+    Unità di quota YouTube spendibili in un'esecuzione.
+
+    Con un registro (quota.QuotaLedger) un upload è permesso solo se anche
+    la quota giornaliera condivisa con gli altri job lo consente.
+    """
+
+    def __init__(
+        self,
+        units: int = DEFAULT_QUOTA_BUDGET,
+        cost: int = DEFAULT_UPLOAD_COST,
+        ledger: Optional[quota.QuotaLedger] = None,
+        job: str = quota.JOB_UPLOAD
+    ):
+        self.units = units
+        self.cost = cost
+        self.ledger = ledger
+        self.job = job
+        self.spent = 0
+
+    @property
+    def remaining(self) -> int:
+        return self.units - self.spent
+
+    def can_afford(self) -> bool:
+        if self.remaining < self.cost:
+            return False
+        return self.ledger is None or self.ledger.allowance(self.job) >= self.cost
+
+    def charge(self) -> bool:
+        """Scala il costo di un upload; False (senza scalare) se non c'è quota."""
+        if not self.can_afford():
+            return False
+        self.spent += self.cost
+        return True
+
+
+def drain(
+    queue: WorkQueue,
+    budget: QuotaBudget,
+    deadline: Optional[float] = None
+) -> Iterator[dict]:
+    """
+    Estrae righe dalla coda finché bastano quota e tempo.
+
+    Chi consuma la coda chiama budget.charge() quando avvia davvero un
+    upload (un upload avviato consuma quota anche se poi fallisce; un video
+    saltato no). Dopo la scadenza (time.monotonic()) non si avviano nuovi
+    upload.
+
+    Args:
+        queue: Coda di lavoro
+        budget: Quota disponibile
+        deadline: Istante monotonic oltre il quale fermarsi (None = nessuno)
+
+    Yields:
+        Righe di anagrafica in ordine di priorità
+    """
+    while queue:
+        if not budget.can_afford():
+            daily = f", residuo giornaliero {budget.ledger.allowance(budget.job)}" if budget.ledger else ""
+            print(f"  ⚠ Quota esaurita ({budget.spent}/{budget.units} unità in questa esecuzione{daily}), "
+                  f"{len(queue)} video rimandati")
+            return
+        if deadline is not None and time.monotonic() >= deadline:
+            print(f"  ⚠ Tempo esaurito, {len(queue)} video rimandati")
+            return
+        yield queue.pop()
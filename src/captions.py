@@ -0,0 +1,78 @@
+"""Sottotitoli YouTube via API ufficiali (captions.list + captions.download) e testo derivato."""
+
+from typing import Optional
+
+from googleapiclient.errors import HttpError
+
+from . import quota, srt_parser
+
+
+DEFAULT_LANGUAGE = 'it'
+# Costo di un video con sottotitoli (lista tracce + download)
+CAPTION_COST = quota.COSTS['captions.list'] + quota.COSTS['captions.download']
+
+
+def select_caption_id(items: list, language: str) -> Optional[str]:
+    """
+    ID della traccia nella lingua richiesta, preferendo quelle manuali alle ASR.
+
+    Args:
+        items: Risorse caption da captions.list
+        language: Codice lingua (es. 'it')
+
+    Returns:
+        ID traccia o None se non ce n'è una nella lingua
+    """
+    lang_matches = [item for item in items if item.get('snippet', {}).get('language') == language]
+    if not lang_matches:
+        return None
+
+    # Prefer manually curated captions over ASR when both are available.
+    lang_matches.sort(key=lambda item: item.get('snippet', {}).get('trackKind') == 'asr')
+    return lang_matches[0].get('id')
+
+
+def fetch_srt(youtube, youtube_id: str, language: str = DEFAULT_LANGUAGE, http=None) -> Optional[bytes]:
+    """
+    Scarica la traccia sottotitoli di un video in formato SRT.
+
+    Args:
+        youtube: YouTube API client
+        youtube_id: ID video YouTube
+        language: Codice lingua
+        http: Http da usare per le richieste (uno per thread: httplib2 non è thread-safe)
+
+    Returns:
+        Contenuto SRT o None se il video non ha sottotitoli nella lingua
+
+    Raises:
+        HttpError: Errori API (404 video inesistente, quotaExceeded registrato nel registro quota)
+    """
+    try:
+        try:
+            response = youtube.captions().list(part='id,snippet', videoId=youtube_id).execute(http=http)
+        finally:
+            quota.record('captions.list')
+        caption_id = select_caption_id(response.get('items', []), language)
+        if not caption_id:
+            return None
+
+        try:
+            payload = youtube.captions().download(id=caption_id, tfmt='srt').execute(http=http)
+        finally:
+            quota.record('captions.download')
+    except HttpError as e:
+        quota.note_error(e)
+        raise
+
+    return payload if isinstance(payload, bytes) else str(payload).encode('utf-8')
+
+
+def srt_to_text(srt: str) -> str:
+    """
+    Testo puro di un SRT: le righe di testo dei cue, senza numeri di sequenza e timestamp.
+
+    Returns:
+        Una riga per riga di testo, con newline finale
+    """
+    return srt_parser.parse_text(srt).to_text()
@@ -0,0 +1,190 @@
+"""Crawler concorrente delle pagine seduta: frontiera di URL e pool di worker."""
+
+import heapq
+import json
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Iterable, Optional
+
+from . import scraper
+from .utils import atomic_write
+
+
+DEFAULT_WORKERS = 4
+DEFAULT_CHECKPOINT_FILE = './data/cache/crawl_checkpoint.json'
+
+
+def _accept_link(url: str, start_date: Optional[str]) -> bool:
+    """Link scoperti: solo pagine seduta con data (dall'URL) >= start_date."""
+    url_date = scraper.seduta_date_from_url(url)
+    if url_date is None:
+        return False
+    return start_date is None or url_date >= start_date
+
+
+def crawl_sedute_frontier(
+    start_url: str,
+    start_date: Optional[str] = None,
+    listing_urls: Iterable[str] = (),
+    parser: Optional[str] = None,
+    cache=None,
+    max_workers: int = DEFAULT_WORKERS,
+    seed_urls: Iterable[str] = (),
+    on_page: Optional[Callable[[str, dict, list], None]] = None
+) -> dict:
+    """
+    Scarica le pagine seduta raggiungibili da start_url con più worker.
+
+    La frontiera parte da start_url e dai link seduta trovati nelle pagine
+    elenco (es. /agenda/lavori-aula). Ogni pagina scaricata aggiunge la
+    seduta successiva (div.next_link, come il crawler seriale) e le altre
+    sedute linkate con data >= start_date. Al più max_workers pagine sono
+    in volo contemporaneamente; il ritmo verso il server è limitato da
+    http_client (rate_limit_per_host).
+
+    Le pagine completate vengono consegnate a on_page in ordine cronologico
+    appena nessuna pagina in volo può precederle (data della seduta minore
+    della data più vecchia tra gli URL in volo), mentre il download
+    prosegue: il chiamante può salvare e fare checkpoint del prefisso già
+    ordinato senza attendere la fine del crawl. Un link a una seduta più
+    vecchia scoperto dopo la consegna arriva in ritardo, fuori ordine.
+
+    Args:
+        start_url: URL seduta di partenza
+        start_date: Data minima (YYYY-MM-DD) per i link scoperti
+        listing_urls: Pagine elenco da cui raccogliere URL seduta
+        parser: Parser HTML
+        cache: HttpCache o None
+        max_workers: Numero massimo di richieste parallele
+        seed_urls: Altri URL seduta da scaricare (es. frontiera di un checkpoint)
+        on_page: Funzione (url, seduta_info, frontiera) chiamata per ogni
+            pagina consegnata; frontiera = URL non ancora consegnati (in
+            volo, in attesa di ordine o falliti), da cui riprendere
+
+    Returns:
+        Dict con:
+        - pages: lista (url, seduta_info) in ordine cronologico di seduta
+        - errors: lista (url, errore)
+    """
+    seen = set()
+    ready = []      # heap (chiave cronologica, url, seduta_info) in attesa di consegna
+    delivered = []
+    numeri = set()
+    errors = []
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        pending = {}
+
+        def enqueue(url: Optional[str]) -> None:
+            if not url:
+                return
+            url = scraper.normalize_seduta_url(url)
+            if url in seen:
+                return
+            seen.add(url)
+            pending[executor.submit(scraper.fetch_seduta, url, parser, cache)] = url
+
+        def release() -> None:
+            # Consegna le pagine che nessun URL in volo può precedere
+            in_flight = [scraper.seduta_date_from_url(url) for url in pending.values()]
+            if None in in_flight:
+                return
+            floor = min(in_flight, default=None)
+            while ready and (floor is None or ready[0][0][0] < floor):
+                _, url, seduta_info = heapq.heappop(ready)
+                # Una pagina per seduta (stesso numero raggiungibile da URL diversi)
+                numero = seduta_info.get('numero_seduta') or url
+                if numero in numeri:
+                    continue
+                numeri.add(numero)
+                delivered.append((url, seduta_info))
+                if on_page is not None:
+                    frontier = list(pending.values()) + [item[1] for item in ready] + [url for url, _ in errors]
+                    on_page(url, seduta_info, frontier)
+
+        try:
+            enqueue(start_url)
+            for url in seed_urls:
+                enqueue(url)
+
+            for listing_url in listing_urls:
+                try:
+                    html = scraper.get_seduta_page(listing_url, parser=parser)
+                    for link in scraper.extract_seduta_links(html):
+                        if _accept_link(link, start_date):
+                            enqueue(link)
+                except Exception as e:
+                    print(f"  ⚠ Elenco sedute non disponibile ({listing_url}): {e}")
+
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    url = pending.pop(future)
+                    try:
+                        page = future.result()
+                    except Exception as e:
+                        errors.append((url, e))
+                        continue
+
+                    seduta_info = page['seduta_info']
+                    heapq.heappush(ready, (scraper.seduta_sort_key(seduta_info), url, seduta_info))
+                    enqueue(page['next_url'])
+                    for link in page['links']:
+                        if _accept_link(link, start_date):
+                            enqueue(link)
+                release()
+        except BaseException:
+            # Interruzione (anche da on_page): niente nuovi download, solo quelli già partiti
+            for future in pending:
+                future.cancel()
+            raise
+
+    pages = sorted(delivered, key=lambda item: scraper.seduta_sort_key(item[1]))
+    return {'pages': pages, 'errors': errors}
+
+
+class CrawlCheckpoint:
+    """
+    Punto di ripresa del crawl in un file JSON.
+
+    Registra l'ultima seduta (in ordine cronologico) già scritta in
+    anagrafica e la frontiera: URL scaricati senza successo o non ancora
+    salvati, da riprovare. Un run successivo riparte da lì invece che da
+    start_url, senza ripercorrere tutta la catena di sedute (next_link).
+    """
+
+    def __init__(self, path: str = DEFAULT_CHECKPOINT_FILE):
+        self.path = Path(path)
+        try:
+            self._data = json.loads(self.path.read_text(encoding='utf-8'))
+        except (FileNotFoundError, ValueError):
+            self._data = {}
+
+    @property
+    def last_url(self) -> Optional[str]:
+        return self._data.get('last_url')
+
+    @property
+    def last_numero(self) -> Optional[str]:
+        return self._data.get('numero_seduta')
+
+    @property
+    def frontier(self) -> list:
+        return list(self._data.get('frontier', []))
+
+    def commit(self, url: str, seduta_info: dict, frontier: Iterable[str] = ()) -> None:
+        """
+        Salva (atomico) l'ultima seduta scritta in anagrafica e la frontiera.
+
+        Da chiamare solo dopo che l'anagrafica è su disco.
+        """
+        self._data = {
+            'last_url': url,
+            'numero_seduta': seduta_info.get('numero_seduta'),
+            'data_seduta': seduta_info.get('data_seduta'),
+            'frontier': sorted(set(frontier)),
+            'updated': datetime.now().isoformat(timespec='seconds')
+        }
+        with atomic_write(self.path, 'w', encoding='utf-8') as f:
+            json.dump(self._data, f, indent=2, sort_keys=True)
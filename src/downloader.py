@@ -1,168 +1,309 @@
-"""Downloader video HLS usando yt-dlp."""
+"""Downloader video HLS usando yt-dlp (API Python, in-process)."""
 
-import json
 import subprocess
 import time
 from pathlib import Path
-from typing import Optional
+from typing import Callable, Optional
+
+import yt_dlp
+
+from . import hls
+
+
+class DownloadTimeout(Exception):
+    """Download oltre il tempo massimo consentito."""
+
+
+class _QuietLogger:
+    """Logger yt-dlp silenzioso: gli errori arrivano come eccezioni e li stampa chi chiama."""
+
+    def debug(self, msg: str) -> None:
+        pass
+
+    info = warning = error = debug
+
+
+def _format_selector(max_height: int | None = None) -> str:
+    if max_height:
+        return (
+            f'bestvideo[height<={max_height}]+bestaudio/'
+            f'best[height<={max_height}]/best'
+        )
+    return 'best'
+
+
+class ProgressPrinter:
+    """Callback di progresso di default: una riga ogni `step`% e a fine download."""
+
+    def __init__(self, step: int = 10, label: str = ''):
+        self.step = step
+        self.label = f" {label}" if label else ''
+        self.last = 0
+
+    def __call__(self, status: dict) -> None:
+        """
+        Args:
+            status: Dict dei progress hook di yt-dlp (status, downloaded_bytes,
+                total_bytes/total_bytes_estimate, speed, eta, ...)
+        """
+        if status.get('status') == 'finished':
+            print(f"  Download{self.label} 100%: {status.get('downloaded_bytes', 0) / 1024 / 1024:.1f} MB")
+            return
+
+        total = status.get('total_bytes') or status.get('total_bytes_estimate')
+        if status.get('status') != 'downloading' or not total:
+            return
+        percent = int(status.get('downloaded_bytes', 0) * 100 / total) // self.step * self.step
+        if percent <= self.last or percent >= 100:
+            return
+        self.last = percent
+
+        speed = status.get('speed') or 0
+        eta = status.get('eta')
+        eta_text = f", ETA {int(eta) // 60}:{int(eta) % 60:02d}" if eta is not None else ''
+        print(f"  Download{self.label} {percent}%: {speed / 1024 / 1024:.1f} MB/s{eta_text}")
+
+
+def _progress_hook(callback: Callable[[dict], None], deadline: float) -> Callable[[dict], None]:
+    """Hook yt-dlp che inoltra al callback e interrompe il download oltre deadline."""
+    def hook(status: dict) -> None:
+        if time.monotonic() > deadline:
+            raise DownloadTimeout("tempo massimo superato")
+        callback(status)
+
+    return hook
+
+
+def extract_info(video_url: str, max_height: int | None = None) -> Optional[dict]:
+    """
+    Estrae i metadati del video (formati, durata) senza scaricare.
+
+    Args:
+        video_url: URL video (m3u8 o pagina video ARS)
+        max_height: Altezza massima per la selezione del formato
+
+    Returns:
+        Info dict di yt-dlp (con formato già selezionato) o None
+    """
+    options = {
+        'format': _format_selector(max_height),
+        'noplaylist': True,
+        'quiet': True,
+        'no_warnings': True,
+        'logger': _QuietLogger(),
+    }
+    try:
+        with yt_dlp.YoutubeDL(options) as ydl:
+            return ydl.sanitize_info(ydl.extract_info(video_url, download=False))
+    except yt_dlp.utils.DownloadError as e:
+        print(f"  Errore estrazione info: {e}")
+        return None
 
 
 def download_video(
     video_url: str,
     output_path: str,
     retries: int = 3,
-    max_height: int | None = None
+    max_height: int | None = None,
+    timeout: float = 3600,
+    progress_callback: Optional[Callable[[dict], None]] = None,
+    hls_workers: int = 0,
+    segment_dir: str = hls.DEFAULT_STORE_DIR
 ) -> tuple[bool, Optional[int]]:
     """
-    Download video HLS usando yt-dlp.
+    Download video HLS con l'API Python di yt-dlp.
+
+    I metadati vengono estratti una sola volta (anche tra i tentativi) e lo
+    stesso info dict fornisce formato da scaricare e durata; ffprobe resta
+    solo come ripiego se la durata manca.
+
+    Con hls_workers > 0 e formato HLS, i segmenti vengono scaricati dal
+    downloader nativo (src/hls.py) in parallelo e salvati in segment_dir:
+    dopo un timeout o un crash il tentativo successivo (o la prossima
+    esecuzione) scarica solo i segmenti mancanti. Stream cifrati o ffmpeg
+    assente: si ripiega su yt-dlp.
+
+    timeout è un'unica scadenza per tutti i tentativi (attese di backoff
+    comprese): superata, il download termina senza altri tentativi.
 
     Args:
         video_url: URL video (m3u8 o pagina video ARS)
         output_path: Path dove salvare il video MP4
         retries: Numero di tentativi
+        max_height: Altezza massima (es. 720)
+        timeout: Secondi massimi per l'intero download (tutti i tentativi)
+        progress_callback: Riceve i dict di progresso di yt-dlp
+            (default: ProgressPrinter, una riga ogni 10%)
+        hls_workers: Segmenti HLS in parallelo (0 = download con yt-dlp)
+        segment_dir: Directory dello store segmenti riprendibile
 
     Returns:
         Tuple (success, duration_minutes)
         - success: True se download riuscito, False altrimenti
         - duration_minutes: durata in minuti (arrotondata), None se non estratta
     """
+    Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+    info = None
+    deadline = time.monotonic() + timeout
+
     for attempt in range(retries):
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            print(f"  Timeout download (>{timeout / 60:.0f} min)")
+            return False, None
+        print(f"  Download tentativo {attempt + 1}/{retries}...")
+        callback = progress_callback or ProgressPrinter()
+
+        options = {
+            'format': _format_selector(max_height),
+            'noplaylist': True,
+            'outtmpl': output_path,
+            'quiet': True,
+            'no_warnings': True,
+            'noprogress': True,
+            'logger': _QuietLogger(),
+            'progress_hooks': [_progress_hook(callback, deadline)],
+        }
+
         try:
-            print(f"  Download tentativo {attempt + 1}/{retries}...")
-
-            Path(output_path).parent.mkdir(parents=True, exist_ok=True)
-
-            format_selector = 'best'
-            if max_height:
-                format_selector = (
-                    f'bestvideo[height<={max_height}]+bestaudio/'
-                    f'best[height<={max_height}]/best'
-                )
-
-            cmd = [
-                'yt-dlp',
-                '-f', format_selector,
-                '--no-playlist',
-                '--progress',  # Mostra barra progresso
-                '--newline',   # Una linea per update
-                '-o', output_path,
-                video_url
-            ]
-
-            # Non catturare output per mostrare progresso in tempo reale
-            result = subprocess.run(
-                cmd,
-                timeout=3600  # 1 ora max per video
-            )
-
-            if result.returncode == 0:
-                # Verifica che il file esista
-                if Path(output_path).exists():
-                    file_size = Path(output_path).stat().st_size
-                    print(f"  ✓ Download completato: {file_size / 1024 / 1024:.1f} MB")
-
-                    # Estrai durata da metadata
-                    duration_mins = None
-                    try:
-                        print(f"  Estrazione metadata durata...")
-                        metadata_result = subprocess.run(
-                            ['yt-dlp', '--dump-json', '--no-download', video_url],
-                            capture_output=True,
-                            text=True,
-                            timeout=30
-                        )
-                        if metadata_result.returncode == 0:
-                            metadata = json.loads(metadata_result.stdout)
-                            duration_secs = metadata.get('duration')
-                            if duration_secs:
-                                duration_mins = round(duration_secs / 60)
-                                print(f"  ✓ Durata: {duration_mins} minuti")
-                            else:
-                                print(f"  ⚠ Durata non trovata in metadata")
-                        else:
-                            print(f"  ⚠ Metadata extraction failed")
-                    except Exception as e:
-                        print(f"  ⚠ Duration extraction failed: {e}")
-
-                    # Se durata non estratta da metadata, usa ffprobe sul file
-                    if duration_mins is None:
-                        try:
-                            print(f"  Estrazione durata da file MP4...")
-                            duration_secs = get_video_duration(output_path)
-                            if duration_secs:
-                                duration_mins = round(duration_secs / 60)
-                                print(f"  ✓ Durata (ffprobe): {duration_mins} minuti")
-                            else:
-                                print(f"  ⚠ Impossibile estrarre durata dal file")
-                        except Exception as e:
-                            print(f"  ⚠ ffprobe extraction failed: {e}")
-
-                    return True, duration_mins
-                else:
-                    print(f"  ✗ Errore: file non trovato dopo download")
-                    return False, None
-            else:
-                print(f"  ✗ Download fallito (exit code {result.returncode})")
-
-                # Se ultimo tentativo fallito
-                if attempt == retries - 1:
-                    return False, None
-
-                # Backoff esponenziale
-                wait_time = 2 ** attempt
-                print(f"  Attendo {wait_time}s prima di riprovare...")
-                time.sleep(wait_time)
-
-        except subprocess.TimeoutExpired:
-            print(f"  Timeout download (>1h)")
+            with yt_dlp.YoutubeDL(options) as ydl:
+                if info is None:
+                    info = ydl.extract_info(video_url, download=False)
+                stream_url = _hls_stream_url(info) if hls_workers else None
+                if not stream_url or not _download_segments(
+                    stream_url, output_path, info, hls_workers, segment_dir, remaining, callback
+                ):
+                    ydl.process_ie_result(info, download=True)
+
+            if not Path(output_path).exists():
+                print(f"  ✗ Errore: file non trovato dopo download")
+                return False, None
+
+            file_size = Path(output_path).stat().st_size
+            print(f"  ✓ Download completato: {file_size / 1024 / 1024:.1f} MB")
+            return True, _duration_minutes(info, output_path)
+
+        except DownloadTimeout:
+            print(f"  Timeout download (>{timeout / 60:.0f} min)")
+            return False, None
+        except hls.HlsTimeout:
+            # Scadenza complessiva superata: i segmenti scaricati restano per la prossima esecuzione
+            print(f"  Timeout download (>{timeout / 60:.0f} min), segmenti salvati in {segment_dir}")
             return False, None
         except Exception as e:
-            print(f"  Errore download: {e}")
+            print(f"  ✗ Download fallito: {e}")
+
+            # Se ultimo tentativo fallito
             if attempt == retries - 1:
                 return False, None
-            time.sleep(2 ** attempt)
+
+            # Backoff esponenziale (entro la scadenza complessiva)
+            wait_time = min(2 ** attempt, max(0.0, deadline - time.monotonic()))
+            print(f"  Attendo {wait_time:.0f}s prima di riprovare...")
+            time.sleep(wait_time)
 
     return False, None
 
 
-def get_video_stream_url(video_page_url: str) -> Optional[str]:
-    """
-    Estrae URL stream m3u8 da pagina video ARS.
+def _hls_stream_url(info: dict) -> Optional[str]:
+    """URL della playlist HLS del formato scelto da yt-dlp (None se non HLS o video+audio separati)."""
+    if info.get('requested_formats'):
+        return None
+    if str(info.get('protocol', '')).startswith('m3u8'):
+        return info.get('url')
+    return None
 
-    Args:
-        video_page_url: URL pagina video (es. https://...
 
-/video/2484769)
+def _download_segments(
+    stream_url: str,
+    output_path: str,
+    info: dict,
+    workers: int,
+    segment_dir: str,
+    timeout: float,
+    callback: Callable[[dict], None]
+) -> bool:
+    """
+    Download con il downloader HLS nativo.
 
     Returns:
-        URL stream m3u8 o None
+        True se completato, False se lo stream non è supportato (usare yt-dlp)
+
+    Raises:
+        hls.HlsTimeout: Tempo massimo superato (riprendibile)
+        hls.HlsError / requests.RequestException: Download fallito
     """
     try:
-        # Usa yt-dlp per estrarre URL stream senza scaricare
-        cmd = [
-            'yt-dlp',
-            '--get-url',
-            '-f', 'best',
-            video_page_url
-        ]
-
-        result = subprocess.run(
-            cmd,
-            capture_output=True,
-            text=True,
-            timeout=30
+        result = hls.download_hls(
+            stream_url,
+            output_path,
+            workers=workers,
+            store_dir=segment_dir,
+            timeout=timeout,
+            progress_callback=callback
         )
+    except hls.HlsUnsupported as e:
+        print(f"  ⚠ Downloader HLS nativo non utilizzabile ({e}), uso yt-dlp")
+        return False
+
+    print(f"  ✓ Segmenti HLS: {result['segments']} ({result['fetched']} scaricati ora)")
+    if not info.get('duration'):
+        info['duration'] = result['duration']
+    return True
 
-        if result.returncode == 0:
-            stream_url = result.stdout.strip()
-            return stream_url if stream_url else None
-        else:
-            print(f"  Errore estrazione URL: {result.stderr}")
-            return None
 
+def get_hls_stream(video_url: str, max_height: int | None = None) -> tuple[Optional[str], dict]:
+    """
+    URL della playlist HLS del formato che download_video scaricherebbe.
+
+    Returns:
+        Tuple (URL playlist o None se il formato non è HLS, info dict di yt-dlp)
+    """
+    info = extract_info(video_url, max_height) or {}
+    return _hls_stream_url(info), info
+
+
+def _duration_minutes(info: Optional[dict], output_path: str) -> Optional[int]:
+    """Durata in minuti dall'info dict di yt-dlp, altrimenti con ffprobe sul file."""
+    duration_secs = (info or {}).get('duration')
+    if duration_secs:
+        duration_mins = round(duration_secs / 60)
+        print(f"  ✓ Durata: {duration_mins} minuti")
+        return duration_mins
+
+    print(f"  ⚠ Durata non trovata in metadata, estrazione da file MP4...")
+    try:
+        duration_secs = get_video_duration(output_path)
+        if duration_secs:
+            duration_mins = round(duration_secs / 60)
+            print(f"  ✓ Durata (ffprobe): {duration_mins} minuti")
+            return duration_mins
+        print(f"  ⚠ Impossibile estrarre durata dal file")
     except Exception as e:
-        print(f"  Errore get_video_stream_url: {e}")
+        print(f"  ⚠ ffprobe extraction failed: {e}")
+    return None
+
+
+def get_video_stream_url(video_page_url: str) -> Optional[str]:
+    """
+    Estrae URL stream m3u8 da pagina video ARS.
+
+    Args:
+        video_page_url: URL pagina video (es. https://.../video/2484769)
+
+    Returns:
+        URL stream m3u8 o None
+    """
+    info = extract_info(video_page_url)
+    if not info:
         return None
+    if info.get('url'):
+        return info['url']
+    # Formati separati video+audio: URL del primo
+    for requested in info.get('requested_formats') or []:
+        if requested.get('url'):
+            return requested['url']
+    return None
 
 
 def cleanup_video(file_path: str) -> bool:
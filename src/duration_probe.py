@@ -0,0 +1,126 @@
+"""Durata dei video dal manifest HLS (somma #EXTINF), senza scaricare né analizzare i file."""
+
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Iterable, Optional
+
+from . import downloader, hls
+from .utils import atomic_write
+
+
+DEFAULT_CACHE_FILE = './data/cache/durations.json'
+DEFAULT_WORKERS = 4
+
+
+class DurationCache:
+    """
+    Durate già calcolate (id_video -> secondi) in un file JSON.
+
+    La registrazione di una seduta non cambia: il manifest di un id_video
+    va letto una volta sola.
+    """
+
+    def __init__(self, path: str = DEFAULT_CACHE_FILE):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._dirty = False
+        try:
+            self._data = json.loads(self.path.read_text(encoding='utf-8'))
+        except (FileNotFoundError, ValueError):
+            self._data = {}
+
+    def get(self, id_video: str) -> Optional[float]:
+        with self._lock:
+            return self._data.get(id_video)
+
+    def put(self, id_video: str, seconds: float) -> None:
+        with self._lock:
+            self._data[id_video] = seconds
+            self._dirty = True
+
+    def save(self) -> None:
+        """Scrive il file (atomico) se ci sono durate nuove."""
+        with self._lock:
+            if not self._dirty:
+                return
+            with atomic_write(self.path, 'w', encoding='utf-8') as f:
+                json.dump(self._data, f, sort_keys=True)
+            self._dirty = False
+
+
+def probe_duration(video: dict, cache: Optional[DurationCache] = None) -> Optional[float]:
+    """
+    Durata di un video (secondi) dal suo manifest HLS.
+
+    Usa stream_url se presente. Lo scraper però non lo valorizza
+    (scraper.build_video_stream_url ritorna None: l'URL vodsed contiene
+    l'orario al secondo, che la pagina seduta non riporta), quindi di fatto
+    l'URL della playlist si ricava dalla pagina video con un'estrazione
+    yt-dlp completa (pagina video + playlist, nessun segmento): circa 1-2 s
+    per video. Per questo il risultato è in cache per id_video e il probe
+    va fatto una volta sola per video.
+
+    Args:
+        video: Dict video (id_video, stream_url, video_page_url)
+        cache: DurationCache o None
+
+    Returns:
+        Durata in secondi o None se non ricavabile
+    """
+    id_video = video.get('id_video')
+    if cache is not None and id_video:
+        cached = cache.get(id_video)
+        if cached is not None:
+            return cached
+
+    playlist_url = video.get('stream_url')
+    if not playlist_url and video.get('video_page_url'):
+        playlist_url = downloader.get_video_stream_url(video['video_page_url'])
+    if not playlist_url:
+        return None
+
+    try:
+        seconds = hls.manifest_duration(playlist_url)
+    except Exception as e:
+        print(f"  ⚠ Durata non ricavabile dal manifest ({id_video}): {e}")
+        return None
+
+    if cache is not None and id_video:
+        cache.put(id_video, seconds)
+    return seconds
+
+
+def fill_durations(
+    videos: Iterable[dict],
+    cache: Optional[DurationCache] = None,
+    max_workers: int = DEFAULT_WORKERS
+) -> int:
+    """
+    Imposta duration_minutes (arrotondata) sui video che non la hanno.
+
+    Chi chiama copia prima sui video le durate già note (es. dall'anagrafica):
+    il probe parte solo per quelli ancora senza durata e non in cache.
+
+    Args:
+        videos: Dict video (modificati in place)
+        cache: DurationCache o None
+        max_workers: Manifest letti in parallelo
+
+    Returns:
+        Numero di video con durata impostata
+    """
+    pending = [video for video in videos if not video.get('duration_minutes')]
+    if not pending:
+        return 0
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        durations = list(executor.map(lambda video: probe_duration(video, cache), pending))
+
+    filled = 0
+    for video, seconds in zip(pending, durations):
+        if seconds:
+            video['duration_minutes'] = round(seconds / 60)
+            filled += 1
+    return filled
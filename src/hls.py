@@ -0,0 +1,354 @@
+"""Download HLS nativo: segmenti in parallelo, store su disco riprendibile, remux senza ricodifica."""
+
+import json
+import os
+import re
+import shutil
+import subprocess
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Callable, Optional
+from urllib.parse import urljoin
+
+from . import http_client
+
+
+DEFAULT_WORKERS = 8
+DEFAULT_STORE_DIR = './data/videos/segments'
+ATTRIBUTE_RE = re.compile(r'([A-Z0-9-]+)=("[^"]*"|[^,]*)')
+
+
+class HlsError(Exception):
+    """Playlist non supportata o download dei segmenti fallito."""
+
+
+class HlsUnsupported(HlsError):
+    """Stream non gestibile dal downloader nativo (usare yt-dlp)."""
+
+
+class HlsTimeout(HlsError):
+    """Tempo massimo superato: i segmenti già scaricati restano nello store."""
+
+
+def _attributes(line: str) -> dict:
+    """Attributi di un tag (es. BANDWIDTH=...,RESOLUTION=1280x720)."""
+    return {key: value.strip('"') for key, value in ATTRIBUTE_RE.findall(line.split(':', 1)[1])}
+
+
+def parse_playlist(text: str, base_url: str) -> dict:
+    """
+    Analizza una playlist m3u8 (master o media).
+
+    Args:
+        text: Contenuto della playlist
+        base_url: URL della playlist (per risolvere gli URI relativi)
+
+    Returns:
+        Dict con:
+        - variants: lista {'url', 'bandwidth', 'height'} (playlist master)
+        - segments: lista {'url', 'duration'} (playlist media)
+        - init_url: URL di EXT-X-MAP (segmenti fMP4) o None
+        - encrypted: True se i segmenti sono cifrati (EXT-X-KEY)
+
+    Raises:
+        HlsError: Se il contenuto non è una playlist m3u8
+    """
+    lines = [line.strip() for line in text.splitlines() if line.strip()]
+    if not lines or lines[0] != '#EXTM3U':
+        raise HlsError("Playlist m3u8 non valida")
+
+    playlist = {'variants': [], 'segments': [], 'init_url': None, 'encrypted': False}
+    pending_variant = None
+    pending_duration = None
+
+    for line in lines[1:]:
+        if line.startswith('#EXT-X-STREAM-INF:'):
+            attrs = _attributes(line)
+            resolution = attrs.get('RESOLUTION', '')
+            pending_variant = {
+                'bandwidth': int(attrs.get('BANDWIDTH', 0) or 0),
+                'height': int(resolution.split('x')[1]) if 'x' in resolution else None
+            }
+        elif line.startswith('#EXTINF:'):
+            pending_duration = float(line.split(':', 1)[1].split(',', 1)[0] or 0)
+        elif line.startswith('#EXT-X-MAP:'):
+            playlist['init_url'] = urljoin(base_url, _attributes(line)['URI'])
+        elif line.startswith('#EXT-X-KEY:'):
+            if _attributes(line).get('METHOD', 'NONE') != 'NONE':
+                playlist['encrypted'] = True
+        elif not line.startswith('#'):
+            url = urljoin(base_url, line)
+            if pending_variant is not None:
+                playlist['variants'].append(dict(pending_variant, url=url))
+                pending_variant = None
+            elif pending_duration is not None:
+                playlist['segments'].append({'url': url, 'duration': pending_duration})
+                pending_duration = None
+
+    return playlist
+
+
+def _fetch_text(url: str) -> str:
+    response = http_client.get(url)
+    response.raise_for_status()
+    return response.text
+
+
+def resolve_media_playlist(playlist_url: str, max_height: Optional[int] = None) -> tuple[str, dict]:
+    """
+    Scarica la playlist e, se master, sceglie la variante migliore entro max_height.
+
+    Returns:
+        Tuple (URL playlist media, playlist analizzata)
+
+    Raises:
+        HlsError: Playlist non valida o senza segmenti
+        requests.RequestException: Se il download fallisce
+    """
+    playlist = parse_playlist(_fetch_text(playlist_url), playlist_url)
+    if playlist['variants']:
+        variants = playlist['variants']
+        if max_height:
+            fitting = [v for v in variants if v['height'] is None or v['height'] <= max_height]
+            variants = fitting or [min(variants, key=lambda v: v['height'] or 0)]
+        playlist_url = max(variants, key=lambda v: (v['height'] or 0, v['bandwidth']))['url']
+        playlist = parse_playlist(_fetch_text(playlist_url), playlist_url)
+
+    if not playlist['segments']:
+        raise HlsError("Playlist senza segmenti")
+    return playlist_url, playlist
+
+
+def manifest_duration(playlist_url: str) -> float:
+    """
+    Durata dello stream (secondi) come somma dei #EXTINF della playlist media.
+
+    Scarica solo le playlist (master + una variante, pochi KB), nessun
+    segmento: le varianti hanno tutte la stessa durata, basta la prima.
+
+    Raises:
+        HlsError: Playlist non valida o senza segmenti
+        requests.RequestException: Se il download fallisce
+    """
+    playlist = parse_playlist(_fetch_text(playlist_url), playlist_url)
+    if playlist['variants']:
+        variant_url = playlist['variants'][0]['url']
+        playlist = parse_playlist(_fetch_text(variant_url), variant_url)
+    if not playlist['segments']:
+        raise HlsError("Playlist senza segmenti")
+    return sum(segment['duration'] for segment in playlist['segments'])
+
+
+class SegmentStore:
+    """
+    Segmenti scaricati su disco (uno per file), riprendibili tra esecuzioni.
+
+    manifest.json registra le durate dei segmenti: se la playlist cambia
+    (numero o durate diverse) lo store viene svuotato. Gli URL non entrano nel
+    confronto perché possono contenere token di sessione diversi a ogni run.
+    """
+
+    def __init__(self, directory: str, segments: list, init_url: Optional[str] = None):
+        self.directory = Path(directory)
+        self.count = len(segments)
+        self.has_init = init_url is not None
+        manifest = {
+            'durations': [segment['duration'] for segment in segments],
+            'init': self.has_init
+        }
+
+        manifest_path = self.directory / 'manifest.json'
+        try:
+            previous = json.loads(manifest_path.read_text(encoding='utf-8'))
+        except (FileNotFoundError, ValueError):
+            previous = None
+        if previous != manifest:
+            shutil.rmtree(self.directory, ignore_errors=True)
+            self.directory.mkdir(parents=True, exist_ok=True)
+            manifest_path.write_text(json.dumps(manifest), encoding='utf-8')
+
+    def path(self, index: int) -> Path:
+        """File del segmento index (-1 = segmento di inizializzazione EXT-X-MAP)."""
+        return self.directory / ('init.mp4' if index < 0 else f"{index:06d}.seg")
+
+    def missing(self) -> list:
+        """Indici dei segmenti non ancora scaricati."""
+        indices = ([-1] if self.has_init else []) + list(range(self.count))
+        return [index for index in indices if not self.path(index).exists()]
+
+    def save(self, index: int, response) -> int:
+        """Scrive un segmento (atomico: tmp + rename). Ritorna i byte scritti."""
+        path = self.path(index)
+        tmp_path = path.with_suffix('.tmp')
+        size = 0
+        with open(tmp_path, 'wb') as f:
+            for chunk in response.iter_content(chunk_size=256 * 1024):
+                f.write(chunk)
+                size += len(chunk)
+        os.replace(tmp_path, path)
+        return size
+
+    def ordered_paths(self) -> list:
+        indices = ([-1] if self.has_init else []) + list(range(self.count))
+        return [self.path(index) for index in indices]
+
+    def clear(self) -> None:
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+def _fetch_segment(url: str, store: SegmentStore, index: int, deadline: float) -> int:
+    if time.monotonic() > deadline:
+        raise HlsTimeout("tempo massimo superato")
+    response = http_client.get(url, stream=True)
+    try:
+        response.raise_for_status()
+        return store.save(index, response)
+    finally:
+        response.close()
+
+
+def remux(store: SegmentStore, output_path: str, fmp4: bool = False) -> None:
+    """
+    Concatena i segmenti e li rimuxa in MP4 senza ricodifica (ffmpeg -c copy).
+
+    I segmenti TS (o init + fMP4) sono concatenabili byte per byte: vengono
+    passati a ffmpeg su stdin, senza un file intermedio.
+
+    Raises:
+        HlsUnsupported: Se ffmpeg manca
+        HlsError: Se ffmpeg fallisce
+    """
+    tmp_output = f"{output_path}.part.mp4"
+    cmd = ['ffmpeg', '-y', '-loglevel', 'error']
+    if not fmp4:
+        cmd += ['-f', 'mpegts']
+    cmd += ['-i', 'pipe:0', '-map', '0', '-c', 'copy']
+    if not fmp4:
+        cmd += ['-bsf:a', 'aac_adtstoasc']
+    cmd += ['-movflags', '+faststart', tmp_output]
+
+    try:
+        process = subprocess.Popen(cmd, stdin=subprocess.PIPE)
+    except FileNotFoundError:
+        raise HlsUnsupported("ffmpeg non trovato (necessario per il remux)")
+
+    try:
+        for path in store.ordered_paths():
+            with open(path, 'rb') as f:
+                shutil.copyfileobj(f, process.stdin, 1024 * 1024)
+        process.stdin.close()
+    except BrokenPipeError:
+        pass
+    if process.wait() != 0:
+        Path(tmp_output).unlink(missing_ok=True)
+        raise HlsError(f"Remux ffmpeg fallito (exit code {process.returncode})")
+    os.replace(tmp_output, output_path)
+
+
+def download_hls(
+    playlist_url: str,
+    output_path: str,
+    workers: int = DEFAULT_WORKERS,
+    max_height: Optional[int] = None,
+    store_dir: str = DEFAULT_STORE_DIR,
+    timeout: float = 3600,
+    progress_callback: Optional[Callable[[dict], None]] = None
+) -> dict:
+    """
+    Scarica uno stream HLS segmento per segmento e lo salva come MP4.
+
+    I segmenti vanno in store_dir/<nome file output>/ e sopravvivono a
+    timeout e crash: la chiamata successiva scarica solo quelli mancanti.
+    Lo store viene eliminato dopo il remux riuscito.
+
+    Args:
+        playlist_url: URL playlist m3u8 (master o media)
+        output_path: Path MP4 di destinazione
+        workers: Segmenti scaricati in parallelo
+        max_height: Altezza massima della variante (playlist master)
+        store_dir: Directory base dello store segmenti
+        timeout: Secondi massimi per questa chiamata
+        progress_callback: Riceve dict nel formato dei progress hook di
+            yt-dlp (status, downloaded_bytes, total_bytes_estimate, ...)
+
+    Returns:
+        Dict con duration (secondi, somma EXTINF), segments, fetched (scaricati
+        in questa chiamata), bytes
+
+    Raises:
+        HlsTimeout: Tempo massimo superato (riprendibile)
+        HlsUnsupported: Segmenti cifrati o ffmpeg assente
+        HlsError: Playlist non valida, segmenti o remux falliti
+        requests.RequestException: Se la playlist non è scaricabile
+    """
+    if not shutil.which('ffmpeg'):
+        raise HlsUnsupported("ffmpeg non trovato (necessario per il remux)")
+
+    deadline = time.monotonic() + timeout
+    media_url, playlist = resolve_media_playlist(playlist_url, max_height)
+    if playlist['encrypted']:
+        raise HlsUnsupported("Segmenti cifrati (EXT-X-KEY) non supportati")
+
+    segments = playlist['segments']
+    store = SegmentStore(Path(store_dir) / Path(output_path).stem, segments, playlist['init_url'])
+    missing = store.missing()
+    duration = sum(segment['duration'] for segment in segments)
+    done = len(segments) + store.has_init - len(missing)
+    if done:
+        print(f"  Ripresa download: {done} segmenti già presenti, {len(missing)} mancanti")
+
+    urls = {index: segments[index]['url'] for index in range(len(segments))}
+    if store.has_init:
+        urls[-1] = playlist['init_url']
+
+    total = len(urls)
+    downloaded_bytes = 0
+    start = time.monotonic()
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        pending = {executor.submit(_fetch_segment, urls[index], store, index, deadline): index for index in missing}
+        try:
+            while pending:
+                finished, _ = wait(pending, timeout=max(0.0, deadline - time.monotonic()), return_when=FIRST_COMPLETED)
+                if not finished:
+                    raise HlsTimeout("tempo massimo superato")
+                for future in finished:
+                    index = pending.pop(future)
+                    try:
+                        size = future.result()
+                    except HlsError:
+                        raise
+                    except Exception as e:
+                        raise HlsError(f"Segmento {index} non scaricato: {e}")
+                    done += 1
+                    downloaded_bytes += size
+                    if progress_callback:
+                        elapsed = time.monotonic() - start
+                        fetched = total - len(pending) - (total - len(missing))
+                        progress_callback({
+                            'status': 'downloading',
+                            'downloaded_bytes': downloaded_bytes,
+                            # Stima: media dei segmenti scaricati finora
+                            'total_bytes_estimate': downloaded_bytes / fetched * len(missing),
+                            'speed': downloaded_bytes / elapsed if elapsed else None,
+                            'eta': elapsed / fetched * len(pending) if fetched else None,
+                            'fragment_index': done,
+                            'fragment_count': total
+                        })
+        finally:
+            # Timeout/errore: i segmenti non ancora avviati non partono
+            for future in pending:
+                future.cancel()
+
+    if progress_callback:
+        progress_callback({'status': 'finished', 'downloaded_bytes': downloaded_bytes})
+
+    remux(store, output_path, fmp4=store.has_init)
+    store.clear()
+    return {
+        'duration': duration,
+        'segments': len(segments),
+        'fetched': len(missing),
+        'bytes': downloaded_bytes
+    }
@@ -0,0 +1,71 @@
+"""Scelta del parser HTML usato da BeautifulSoup (lxml se installato, altrimenti html.parser)."""
+
+import importlib.util
+import os
+from typing import Optional, Union
+
+from bs4 import BeautifulSoup
+
+
+# Parser in ordine di preferenza per "auto": nome -> modulo richiesto
+PARSER_BACKENDS = {
+    'lxml': 'lxml',
+    'html.parser': None,
+}
+
+DEFAULT_PARSER = 'auto'
+FALLBACK_PARSER = 'html.parser'
+
+_warned: set = set()
+
+
+def is_available(name: str) -> bool:
+    """True se il parser è supportato e la sua dipendenza è installata."""
+    if name not in PARSER_BACKENDS:
+        return False
+    module = PARSER_BACKENDS[name]
+    return module is None or importlib.util.find_spec(module) is not None
+
+
+def available_parsers() -> list:
+    """Parser utilizzabili in questo ambiente, in ordine di preferenza."""
+    return [name for name in PARSER_BACKENDS if is_available(name)]
+
+
+def resolve_parser(name: Optional[str] = None) -> str:
+    """
+    Risolve il nome del parser da usare.
+
+    Priorità: argomento, variabile ARS_HTML_PARSER, "auto". Con "auto" si
+    usa il primo parser disponibile (lxml se installato). Un parser
+    richiesto ma non disponibile ricade su html.parser con un avviso.
+
+    Args:
+        name: auto|lxml|html.parser (None = ARS_HTML_PARSER o auto)
+
+    Returns:
+        Nome del parser per BeautifulSoup
+    """
+    name = name or os.environ.get('ARS_HTML_PARSER') or DEFAULT_PARSER
+    if name == 'auto':
+        return available_parsers()[0]
+    if is_available(name):
+        return name
+    if name not in _warned:
+        _warned.add(name)
+        print(f"⚠ Parser HTML '{name}' non disponibile, uso {FALLBACK_PARSER}")
+    return FALLBACK_PARSER
+
+
+def parse_html(markup: Union[str, bytes], parser: Optional[str] = None) -> BeautifulSoup:
+    """
+    Parsa HTML con il parser configurato.
+
+    Args:
+        markup: HTML (bytes o str)
+        parser: auto|lxml|html.parser (None = ARS_HTML_PARSER o auto)
+
+    Returns:
+        BeautifulSoup object
+    """
+    return BeautifulSoup(markup, resolve_parser(parser))
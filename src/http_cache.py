@@ -0,0 +1,227 @@
+"""Cache HTTP su disco con GET condizionali (ETag / Last-Modified)."""
+
+import hashlib
+import json
+import threading
+import time
+from pathlib import Path
+from typing import Any, Optional
+
+from . import http_client
+from .utils import atomic_write
+
+
+DEFAULT_CACHE_DIR = './data/cache/http'
+DEFAULT_MAX_AGE_DAYS = 60
+DEFAULT_MAX_SIZE_MB = 200
+
+
+class CachedPage:
+    """Risposta di HttpCache.fetch: corpo della pagina e provenienza."""
+
+    def __init__(self, url: str, body: bytes, not_modified: bool, entry: dict):
+        self.url = url
+        self.body = body
+        self.not_modified = not_modified
+        self._entry = entry
+
+    def get_result(self, kind: str, version: str) -> Optional[Any]:
+        """
+        Risultato di parsing salvato per questo corpo, se ancora valido.
+
+        Args:
+            kind: Tipo di risultato (es. "seduta")
+            version: Versione dell'estrattore che l'ha prodotto
+
+        Returns:
+            Dato salvato o None
+        """
+        stored = self._entry.get('results', {}).get(kind)
+        if stored and stored.get('version') == version and stored.get('sha1') == self._entry.get('sha1'):
+            return stored['data']
+        return None
+
+
+class HttpCache:
+    """
+    Cache su disco delle pagine scaricate (default data/cache/http/).
+
+    Per ogni URL salva il corpo (<sha1 url>.body) e i metadati
+    (<sha1 url>.json: ETag, Last-Modified, hash del corpo, ultimo uso e
+    risultati di parsing derivati). Le richieste successive inviano
+    If-None-Match / If-Modified-Since: con un 304 si riusa il corpo in cache
+    e, se presente, il risultato di parsing già calcolato. Le voci non usate
+    da max_age_days vengono eliminate, poi le meno recenti finché la cache
+    non rientra in max_size_mb.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str = DEFAULT_CACHE_DIR,
+        max_age_days: float = DEFAULT_MAX_AGE_DAYS,
+        max_size_mb: float = DEFAULT_MAX_SIZE_MB
+    ):
+        self.cache_dir = Path(cache_dir)
+        self.max_age = max_age_days * 86400
+        self.max_size = int(max_size_mb * 1024 * 1024)
+        self.stats = {'not_modified': 0, 'downloaded': 0, 'bytes_downloaded': 0, 'parse_reused': 0}
+        self._lock = threading.Lock()
+
+    def count(self, key: str, amount: int = 1) -> None:
+        """Incrementa un contatore (thread-safe, fetch può girare in parallelo)."""
+        with self._lock:
+            self.stats[key] += amount
+
+    # --- file ----------------------------------------------------------------
+
+    def _paths(self, url: str) -> tuple[Path, Path]:
+        key = hashlib.sha1(url.encode('utf-8')).hexdigest()
+        return self.cache_dir / f"{key}.json", self.cache_dir / f"{key}.body"
+
+    @staticmethod
+    def _write_atomic(path: Path, data: bytes) -> None:
+        with atomic_write(path, 'wb') as f:
+            f.write(data)
+
+    def _load_entry(self, url: str) -> Optional[tuple[dict, bytes]]:
+        meta_path, body_path = self._paths(url)
+        try:
+            entry = json.loads(meta_path.read_text(encoding='utf-8'))
+            body = body_path.read_bytes()
+        except (FileNotFoundError, ValueError):
+            return None
+        if entry.get('url') != url or hashlib.sha1(body).hexdigest() != entry.get('sha1'):
+            return None
+        return entry, body
+
+    def _save_entry(self, entry: dict, body: Optional[bytes] = None) -> None:
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        meta_path, body_path = self._paths(entry['url'])
+        if body is not None:
+            self._write_atomic(body_path, body)
+        self._write_atomic(meta_path, json.dumps(entry, ensure_ascii=False).encode('utf-8'))
+
+    # --- richieste -----------------------------------------------------------
+
+    def fetch(self, url: str, headers: Optional[dict] = None, timeout: Optional[float] = None) -> CachedPage:
+        """
+        Scarica l'URL con GET condizionale.
+
+        Args:
+            url: URL da scaricare
+            headers: Header aggiuntivi
+            timeout: Timeout (default: quello di http_client)
+
+        Returns:
+            CachedPage (not_modified=True se il server ha risposto 304)
+
+        Raises:
+            requests.RequestException: Se download fallisce
+        """
+        cached = self._load_entry(url)
+        request_headers = dict(headers or {})
+        if cached:
+            entry, _ = cached
+            if entry.get('etag'):
+                request_headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                request_headers['If-Modified-Since'] = entry['last_modified']
+
+        response = http_client.get(url, headers=request_headers, timeout=timeout)
+        now = time.time()
+
+        if response.status_code == 304 and cached:
+            entry, body = cached
+            entry['last_used'] = now
+            entry['validated_at'] = now
+            self._save_entry(entry)
+            self.count('not_modified')
+            return CachedPage(url, body, True, entry)
+
+        response.raise_for_status()
+        body = response.content
+        sha1 = hashlib.sha1(body).hexdigest()
+        self.count('downloaded')
+        self.count('bytes_downloaded', len(body))
+
+        entry = {
+            'url': url,
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'sha1': sha1,
+            'size': len(body),
+            'fetched_at': now,
+            'validated_at': now,
+            'last_used': now,
+            # Corpo identico (server senza validatori): i risultati restano validi
+            'results': cached[0].get('results', {}) if cached and cached[0].get('sha1') == sha1 else {}
+        }
+        self._save_entry(entry, body)
+        return CachedPage(url, body, False, entry)
+
+    def put_result(self, page: CachedPage, kind: str, version: str, data: Any) -> None:
+        """Salva il risultato di parsing del corpo della pagina (dati JSON)."""
+        entry = page._entry
+        entry.setdefault('results', {})[kind] = {'version': version, 'sha1': entry['sha1'], 'data': data}
+        self._save_entry(entry)
+
+    # --- manutenzione --------------------------------------------------------
+
+    def evict(self) -> tuple[int, int]:
+        """
+        Elimina voci scadute (per età) e le meno usate oltre la dimensione massima.
+
+        Returns:
+            Tuple (voci eliminate, byte liberati)
+        """
+        if not self.cache_dir.exists():
+            return 0, 0
+
+        entries = []
+        for meta_path in self.cache_dir.glob('*.json'):
+            body_path = meta_path.with_suffix('.body')
+            try:
+                last_used = json.loads(meta_path.read_text(encoding='utf-8')).get('last_used', 0)
+            except ValueError:
+                last_used = 0
+            size = meta_path.stat().st_size + (body_path.stat().st_size if body_path.exists() else 0)
+            entries.append((last_used, size, meta_path, body_path))
+
+        entries.sort(key=lambda item: item[0])
+        total = sum(item[1] for item in entries)
+        cutoff = time.time() - self.max_age
+        removed = 0
+        freed = 0
+
+        for last_used, size, meta_path, body_path in entries:
+            if last_used >= cutoff and total <= self.max_size:
+                break
+            meta_path.unlink(missing_ok=True)
+            body_path.unlink(missing_ok=True)
+            total -= size
+            removed += 1
+            freed += size
+
+        return removed, freed
+
+    def print_stats(self) -> None:
+        """Stampa il riepilogo della cache per questa esecuzione."""
+        print(
+            f"  Cache HTTP: {self.stats['not_modified']} non modificate (304), "
+            f"{self.stats['downloaded']} scaricate ({self.stats['bytes_downloaded'] / 1024:.0f} KB), "
+            f"{self.stats['parse_reused']} parsing riusati"
+        )
+
+
+def get_cache(scraping_cfg: dict) -> Optional[HttpCache]:
+    """
+    Cache HTTP da config (sezione scraping.http_cache), None se disabilitata.
+    """
+    cache_cfg = scraping_cfg.get('http_cache') or {}
+    if not cache_cfg.get('enabled', True):
+        return None
+    return HttpCache(
+        cache_cfg.get('dir', DEFAULT_CACHE_DIR),
+        max_age_days=cache_cfg.get('max_age_days', DEFAULT_MAX_AGE_DAYS),
+        max_size_mb=cache_cfg.get('max_size_mb', DEFAULT_MAX_SIZE_MB)
+    )
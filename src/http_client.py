@@ -0,0 +1,208 @@
+"""Client HTTP condiviso: una sessione keep-alive con pool di connessioni per host."""
+
+import threading
+import time
+from typing import Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.util.retry import Retry
+
+
+DEFAULT_SETTINGS = {
+    'user_agent': 'ARS-YouTube-Bot/1.0',
+    'timeout': 30,
+    'retries': 3,
+    'backoff_factor': 0.5,
+    'status_forcelist': (429, 500, 502, 503, 504),
+    'pool_maxsize': 10,
+    'rate_limit_per_host': 0,  # Richieste/secondo per host (0 = nessun limite)
+}
+
+_settings = dict(DEFAULT_SETTINGS)
+_sessions: dict = {}
+_stats: dict = {}
+_next_slot: dict = {}
+_lock = threading.Lock()
+
+
+def _count(host: str, key: str) -> None:
+    with _lock:
+        counters = _stats.setdefault(host, {'opened': 0, 'requests': 0})
+        counters[key] += 1
+
+
+class _CountingPoolMixin:
+    """Conta connessioni aperte e richieste inviate per host."""
+
+    def _new_conn(self):
+        _count(self.host, 'opened')
+        return super()._new_conn()
+
+    def _make_request(self, *args, **kwargs):
+        _count(self.host, 'requests')
+        return super()._make_request(*args, **kwargs)
+
+
+class _CountingHTTPConnectionPool(_CountingPoolMixin, HTTPConnectionPool):
+    pass
+
+
+class _CountingHTTPSConnectionPool(_CountingPoolMixin, HTTPSConnectionPool):
+    pass
+
+
+class _CountingAdapter(HTTPAdapter):
+    """HTTPAdapter che usa i pool con contatori."""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': _CountingHTTPConnectionPool,
+            'https': _CountingHTTPSConnectionPool,
+        }
+
+
+def configure(scraping_cfg: Optional[dict] = None) -> dict:
+    """
+    Imposta user agent, timeout, retry e dimensione pool.
+
+    Le chiavi sono quelle della sezione `scraping` di config.yaml
+    (user_agent, timeout, retries, backoff_factor, pool_maxsize,
+    rate_limit_per_host, status_forcelist). Le sessioni già aperte vengono chiuse e ricreate
+    alla richiesta successiva con le nuove impostazioni.
+
+    Args:
+        scraping_cfg: Sezione scraping della configurazione
+
+    Returns:
+        Impostazioni effettive
+    """
+    scraping_cfg = scraping_cfg or {}
+    close_sessions()
+    with _lock:
+        _settings.clear()
+        _settings.update(DEFAULT_SETTINGS)
+        _settings.update({k: v for k, v in scraping_cfg.items() if k in DEFAULT_SETTINGS and v is not None})
+        return dict(_settings)
+
+
+def get_settings() -> dict:
+    """Copia delle impostazioni correnti (vedi configure)."""
+    with _lock:
+        return dict(_settings)
+
+
+def get_timeout() -> float:
+    """Timeout di default delle richieste (secondi)."""
+    return _settings['timeout']
+
+
+def host_key(url: str) -> str:
+    """Chiave host (schema://host:porta) usata per sessioni e rate limit."""
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}".lower()
+
+
+def _build_session(auto_retry: bool = True) -> requests.Session:
+    session = requests.Session()
+    session.headers['User-Agent'] = _settings['user_agent']
+    retry = Retry(
+        total=_settings['retries'] if auto_retry else 0,
+        backoff_factor=_settings['backoff_factor'],
+        status_forcelist=list(_settings['status_forcelist']),
+        allowed_methods=frozenset(["GET", "HEAD"]),
+        raise_on_status=False
+    )
+    adapter = _CountingAdapter(
+        pool_connections=1,
+        pool_maxsize=_settings['pool_maxsize'],
+        max_retries=retry
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def get_session(url: str, auto_retry: bool = True) -> requests.Session:
+    """
+    Sessione condivisa per l'host dell'URL (creata alla prima richiesta).
+
+    Args:
+        url: URL (o base URL) dell'host
+        auto_retry: False per una sessione senza retry automatici (i
+            tentativi li gestisce chi chiama, es. async_scraper)
+
+    Returns:
+        requests.Session con pool keep-alive e retry configurati
+    """
+    key = (host_key(url), auto_retry)
+    with _lock:
+        session = _sessions.get(key)
+        if session is None:
+            session = _build_session(auto_retry)
+            _sessions[key] = session
+        return session
+
+
+def throttle(url: str) -> None:
+    """
+    Attende il turno per l'host dell'URL secondo rate_limit_per_host.
+
+    Le richieste verso lo stesso host vengono distanziate di almeno
+    1/rate secondi anche quando arrivano da più thread.
+    """
+    rate = _settings['rate_limit_per_host']
+    if not rate:
+        return
+    key = host_key(url)
+    with _lock:
+        now = time.monotonic()
+        slot = max(now, _next_slot.get(key, now))
+        _next_slot[key] = slot + 1.0 / rate
+    if slot > now:
+        time.sleep(slot - now)
+
+
+def get(url: str, timeout: Optional[float] = None, **kwargs) -> requests.Response:
+    """GET tramite la sessione condivisa dell'host (rispettando il rate limit)."""
+    throttle(url)
+    return get_session(url).get(url, timeout=timeout or get_timeout(), **kwargs)
+
+
+def connection_stats() -> dict:
+    """
+    Contatori per host: connessioni aperte, riusate e richieste totali.
+
+    Returns:
+        Dict host -> {'opened', 'reused', 'requests'}
+    """
+    with _lock:
+        return {
+            host: {
+                'opened': counters['opened'],
+                'reused': max(0, counters['requests'] - counters['opened']),
+                'requests': counters['requests']
+            }
+            for host, counters in _stats.items()
+        }
+
+
+def print_connection_stats() -> None:
+    """Stampa i contatori connessioni per host."""
+    for host, counters in sorted(connection_stats().items()):
+        print(
+            f"  {host}: {counters['requests']} richieste, "
+            f"{counters['opened']} connessioni aperte, {counters['reused']} riusate"
+        )
+
+
+def close_sessions() -> None:
+    """Chiude tutte le sessioni (e le connessioni keep-alive)."""
+    with _lock:
+        sessions = list(_sessions.values())
+        _sessions.clear()
+    for session in sessions:
+        session.close()
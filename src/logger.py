@@ -1,24 +1,12 @@
 """Gestione log CSV upload."""
 
 import csv
-from datetime import datetime
 from pathlib import Path
 from typing import Optional
 
-
-ANAGRAFICA_EXTRA_FIELDS = ['status', 'failure_reason']
-
-
-def _ensure_anagrafica_fields(fieldnames: list) -> list:
-    """
-    Garantisce che i campi aggiuntivi siano presenti nell'anagrafica.
-    """
-    if not fieldnames:
-        fieldnames = []
-    for field in ANAGRAFICA_EXTRA_FIELDS:
-        if field not in fieldnames:
-            fieldnames.append(field)
-    return fieldnames
+from .anagrafica import get_store
+from .upload_journal import LOG_FIELDS, get_journal
+from .utils import atomic_write
 
 
 def init_log_file(log_path: str) -> bool:
@@ -40,17 +28,7 @@ def init_log_file(log_path: str) -> bool:
         if not path.exists():
             with open(log_path, 'w', newline='', encoding='utf-8') as f:
                 writer = csv.writer(f)
-                writer.writerow([
-                    'id_video',
-                    'numero_seduta',
-                    'data_seduta',
-                    'data_video',
-                    'ora_video',
-                    'video_id_youtube',
-                    'upload_timestamp',
-                    'status',
-                    'error_message'
-                ])
+                writer.writerow(LOG_FIELDS)
             print(f"Log file creato: {log_path}")
 
         return True
@@ -77,27 +55,7 @@ def is_video_uploaded(
         True se video già uploadato con successo
     """
     try:
-        path = Path(log_path)
-        if not path.exists():
-            return False
-
-        with open(log_path, 'r', newline='', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                if row['status'] != 'success':
-                    continue
-                if numero_seduta and data_seduta:
-                    if (
-                        row.get('id_video') == id_video
-                        and row.get('numero_seduta') == numero_seduta
-                        and row.get('data_seduta') == data_seduta
-                    ):
-                        return True
-                else:
-                    if row.get('id_video') == id_video:
-                        return True
-
-        return False
+        return get_journal(log_path).is_uploaded(id_video, numero_seduta, data_seduta)
 
     except Exception as e:
         print(f"Errore verifica video uploadato: {e}")
@@ -125,20 +83,7 @@ def is_video_uploaded_in_anagrafica(
         if not path.exists():
             return False
 
-        with open(anagrafica_path, 'r', newline='', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                match = row.get('id_video') == id_video
-                if numero_seduta and data_seduta:
-                    match = (
-                        match
-                        and row.get('numero_seduta') == numero_seduta
-                        and row.get('data_seduta') == data_seduta
-                    )
-                if match and row.get('youtube_id'):
-                    return True
-
-        return False
+        return get_store(anagrafica_path).is_uploaded(id_video, numero_seduta, data_seduta)
 
     except Exception as e:
         print(f"Errore verifica anagrafica: {e}")
@@ -151,7 +96,8 @@ def update_anagrafica_youtube_id(
     youtube_id: str,
     numero_seduta: Optional[str] = None,
     data_seduta: Optional[str] = None,
-    duration_minutes: Optional[int] = None
+    duration_minutes: Optional[int] = None,
+    flush: bool = True
 ) -> bool:
     """
     Aggiorna youtube_id per video in anagrafica.
@@ -163,38 +109,19 @@ def update_anagrafica_youtube_id(
         numero_seduta: Numero seduta (opzionale per matching forte)
         data_seduta: Data seduta (opzionale per matching forte)
         duration_minutes: Durata video in minuti (opzionale)
+        flush: Se False la modifica resta in memoria fino a flush_anagrafica()
 
     Returns:
         True se aggiornato
     """
     try:
-        rows = []
-        with open(anagrafica_path, 'r', newline='', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            fieldnames = _ensure_anagrafica_fields(reader.fieldnames or [])
-
-            for row in reader:
-                match = row.get('id_video') == id_video
-                if numero_seduta and data_seduta:
-                    match = (
-                        match
-                        and row.get('numero_seduta') == numero_seduta
-                        and row.get('data_seduta') == data_seduta
-                    )
-                if match:
-                    row['youtube_id'] = youtube_id
-                    row['last_check'] = datetime.now().isoformat()
-                    row['status'] = 'success'
-                    row['failure_reason'] = ''
-                    if duration_minutes is not None:
-                        row['duration_minutes'] = str(duration_minutes)
-                rows.append(row)
-
-        with open(anagrafica_path, 'w', newline='', encoding='utf-8') as f:
-            writer = csv.DictWriter(f, fieldnames=fieldnames)
-            writer.writeheader()
-            writer.writerows(rows)
+        if not Path(anagrafica_path).exists():
+            raise FileNotFoundError(anagrafica_path)
 
+        store = get_store(anagrafica_path)
+        store.mark_uploaded(id_video, youtube_id, numero_seduta, data_seduta, duration_minutes)
+        if flush:
+            return store.flush()
         return True
 
     except Exception as e:
@@ -207,7 +134,8 @@ def update_anagrafica_failure(
     id_video: str,
     error: str,
     numero_seduta: Optional[str] = None,
-    data_seduta: Optional[str] = None
+    data_seduta: Optional[str] = None,
+    flush: bool = True
 ) -> bool:
     """
     Registra fallimento upload in anagrafica.
@@ -218,35 +146,19 @@ def update_anagrafica_failure(
         error: Motivo fallimento
         numero_seduta: Numero seduta (opzionale per matching forte)
         data_seduta: Data seduta (opzionale per matching forte)
+        flush: Se False la modifica resta in memoria fino a flush_anagrafica()
 
     Returns:
         True se aggiornato
     """
     try:
-        rows = []
-        with open(anagrafica_path, 'r', newline='', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            fieldnames = _ensure_anagrafica_fields(reader.fieldnames or [])
-
-            for row in reader:
-                match = row.get('id_video') == id_video
-                if numero_seduta and data_seduta:
-                    match = (
-                        match
-                        and row.get('numero_seduta') == numero_seduta
-                        and row.get('data_seduta') == data_seduta
-                    )
-                if match:
-                    row['status'] = 'failed'
-                    row['failure_reason'] = (error or '').replace('\n', ' ').strip()
-                    row['last_check'] = datetime.now().isoformat()
-                rows.append(row)
-
-        with open(anagrafica_path, 'w', newline='', encoding='utf-8') as f:
-            writer = csv.DictWriter(f, fieldnames=fieldnames)
-            writer.writeheader()
-            writer.writerows(rows)
+        if not Path(anagrafica_path).exists():
+            raise FileNotFoundError(anagrafica_path)
 
+        store = get_store(anagrafica_path)
+        store.mark_failed(id_video, error, numero_seduta, data_seduta)
+        if flush:
+            return store.flush()
         return True
 
     except Exception as e:
@@ -254,6 +166,54 @@ def update_anagrafica_failure(
         return False
 
 
+def update_anagrafica_no_transcript(
+    anagrafica_path: str,
+    youtube_id: str,
+    flush: bool = True
+) -> bool:
+    """
+    Marca no_transcript=true per il video YouTube in anagrafica.
+
+    Args:
+        anagrafica_path: Path al CSV anagrafica
+        youtube_id: ID video YouTube
+        flush: Se False la modifica resta in memoria fino a flush_anagrafica()
+
+    Returns:
+        True se aggiornato
+    """
+    try:
+        if not Path(anagrafica_path).exists():
+            raise FileNotFoundError(anagrafica_path)
+
+        store = get_store(anagrafica_path)
+        store.mark_no_transcript(youtube_id)
+        if flush:
+            return store.flush()
+        return True
+
+    except Exception as e:
+        print(f"Errore aggiornamento anagrafica (no_transcript): {e}")
+        return False
+
+
+def flush_anagrafica(anagrafica_path: str) -> bool:
+    """
+    Scrive su disco le modifiche pendenti dell'anagrafica (checkpoint).
+
+    Args:
+        anagrafica_path: Path al CSV anagrafica
+
+    Returns:
+        True se scritto (o nulla da scrivere)
+    """
+    try:
+        return get_store(anagrafica_path).flush()
+    except Exception as e:
+        print(f"Errore scrittura anagrafica: {e}")
+        return False
+
+
 def log_upload(
     log_path: str,
     video_info: dict,
@@ -275,23 +235,7 @@ def log_upload(
         True se log scritto con successo
     """
     try:
-        # Assicurati che log esista
-        init_log_file(log_path)
-
-        with open(log_path, 'a', newline='', encoding='utf-8') as f:
-            writer = csv.writer(f)
-            writer.writerow([
-                video_info.get('id_video', ''),
-                video_info.get('numero_seduta', ''),
-                video_info.get('data_seduta', ''),
-                video_info.get('data_video', ''),
-                video_info.get('ora_video', ''),
-                youtube_id,
-                datetime.now().isoformat(),
-                status,
-                error
-            ])
-
+        get_journal(log_path).append(video_info, youtube_id, status, error)
         return True
 
     except Exception as e:
@@ -310,18 +254,7 @@ def get_failed_uploads(log_path: str) -> list:
         Lista dict con entry fallite
     """
     try:
-        path = Path(log_path)
-        if not path.exists():
-            return []
-
-        failed = []
-        with open(log_path, 'r', newline='', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                if row['status'] == 'failed':
-                    failed.append(row)
-
-        return failed
+        return get_journal(log_path).failed_uploads()
 
     except Exception as e:
         print(f"Errore lettura failed uploads: {e}")
@@ -363,8 +296,8 @@ def update_index(index_path: str, seduta_info: dict, videos_uploaded: list) -> b
             'video_count': len(videos_uploaded)
         }
 
-        # Scrivi indice aggiornato
-        with open(index_path, 'w', newline='', encoding='utf-8') as f:
+        # Scrivi indice aggiornato (atomico)
+        with atomic_write(path, 'w', newline='', encoding='utf-8') as f:
             writer = csv.DictWriter(f, fieldnames=[
                 'numero_seduta', 'data_seduta', 'url_pagina', 'video_count'
             ])
@@ -397,31 +330,7 @@ def get_upload_stats(log_path: str) -> dict:
         Dict con statistiche
     """
     try:
-        path = Path(log_path)
-        if not path.exists():
-            return {
-                'total': 0,
-                'success': 0,
-                'failed': 0,
-                'pending': 0
-            }
-
-        stats = {
-            'total': 0,
-            'success': 0,
-            'failed': 0,
-            'pending': 0
-        }
-
-        with open(log_path, 'r', newline='', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                stats['total'] += 1
-                status = row.get('status', '').lower()
-                if status in stats:
-                    stats[status] += 1
-
-        return stats
+        return get_journal(log_path).get_stats()
 
     except Exception as e:
         print(f"Errore calcolo statistiche: {e}")
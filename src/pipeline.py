@@ -0,0 +1,163 @@
+"""Pipeline download → upload: i download proseguono mentre si carica su YouTube."""
+
+import queue
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Iterable, Optional
+
+
+DEFAULT_WORKERS = 2
+DEFAULT_QUEUE_SIZE = 2
+DISK_POLL_SECONDS = 5
+
+
+class StageTimer:
+    """Tempo speso per stadio (somma delle durate, thread-safe)."""
+
+    def __init__(self):
+        self.totals: dict = {}
+        self.counts: dict = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def measure(self, stage: str):
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            elapsed = time.monotonic() - start
+            with self._lock:
+                self.totals[stage] = self.totals.get(stage, 0.0) + elapsed
+                self.counts[stage] = self.counts.get(stage, 0) + 1
+
+
+def free_disk_mb(path: str) -> float:
+    """Spazio libero (MB) sul filesystem che contiene path."""
+    target = Path(path)
+    target.mkdir(parents=True, exist_ok=True)
+    return shutil.disk_usage(target).free / 1024 / 1024
+
+
+def run_pipeline(
+    items: Iterable,
+    download: Callable[[Any], Any],
+    upload: Callable[[Any, Any, Optional[Exception]], None],
+    workers: int = DEFAULT_WORKERS,
+    queue_size: int = DEFAULT_QUEUE_SIZE,
+    temp_dir: Optional[str] = None,
+    min_free_mb: float = 0,
+    discard: Optional[Callable[[Any, Any], None]] = None
+) -> dict:
+    """
+    Esegue download in parallelo e upload in sequenza, sovrapponendo gli stadi.
+
+    Un pool di `workers` thread esegue download(item) e mette i risultati in
+    una coda limitata a `queue_size` file pronti: se l'upload è più lento i
+    download si fermano invece di riempire il disco. Prima di ogni download
+    si attende che temp_dir abbia almeno min_free_mb liberi (finché ci sono
+    file in attesa di upload che, una volta caricati, liberano spazio).
+
+    upload(item, risultato, errore) gira nel thread chiamante, nell'ordine in
+    cui i download terminano: storage e client YouTube restano su un solo
+    thread. Con download fallito risultato è None ed errore l'eccezione.
+
+    Args:
+        items: Elementi da processare
+        download: Funzione di download (eseguita nei worker)
+        upload: Funzione di upload (eseguita nel thread chiamante)
+        workers: Download paralleli
+        queue_size: File scaricati in attesa di upload (massimo)
+        temp_dir: Directory dei download (per il controllo spazio disco)
+        min_free_mb: Spazio libero minimo per avviare un download
+        discard: Chiamata su risultati scaricati ma non caricati (interruzione)
+
+    Returns:
+        Dict con tempi per stadio (secondi): download, upload,
+        attesa_download (upload fermo in attesa di file), totale
+    """
+    items = list(items)
+    ready = queue.Queue(maxsize=max(1, queue_size))
+    stop = threading.Event()
+    timer = StageTimer()
+    in_flight = {'files': 0}  # Scaricati e non ancora caricati
+    lock = threading.Lock()
+
+    def wait_for_disk() -> None:
+        if not temp_dir or not min_free_mb:
+            return
+        warned = False
+        while not stop.is_set() and free_disk_mb(temp_dir) < min_free_mb:
+            with lock:
+                if in_flight['files'] == 0:
+                    # Nessun upload libererà spazio: tanto vale provare
+                    return
+            if not warned:
+                print(f"  ⚠ Spazio disco sotto {min_free_mb:.0f} MB in {temp_dir}, download in attesa...")
+                warned = True
+            stop.wait(DISK_POLL_SECONDS)
+
+    def worker(item) -> None:
+        result, error = None, None
+        try:
+            wait_for_disk()
+            if stop.is_set():
+                return
+            with timer.measure('download'):
+                result = download(item)
+        except Exception as e:
+            error = e
+
+        with lock:
+            in_flight['files'] += 1
+        while not stop.is_set():
+            try:
+                ready.put((item, result, error), timeout=0.5)
+                return
+            except queue.Full:
+                continue
+        if discard and error is None:
+            discard(item, result)
+
+    start = time.monotonic()
+    executor = ThreadPoolExecutor(max_workers=max(1, workers))
+    try:
+        for item in items:
+            executor.submit(worker, item)
+
+        for _ in items:
+            with timer.measure('attesa_download'):
+                item, result, error = ready.get()
+            try:
+                with timer.measure('upload'):
+                    upload(item, result, error)
+            finally:
+                with lock:
+                    in_flight['files'] -= 1
+    finally:
+        stop.set()
+        executor.shutdown(wait=False, cancel_futures=True)
+        while True:
+            try:
+                item, result, error = ready.get_nowait()
+            except queue.Empty:
+                break
+            if discard and error is None:
+                discard(item, result)
+
+    timings = {stage: timer.totals.get(stage, 0.0) for stage in ('download', 'upload', 'attesa_download')}
+    timings['totale'] = time.monotonic() - start
+    return timings
+
+
+def print_timings(timings: dict) -> None:
+    """Stampa il riepilogo tempi della pipeline."""
+    sequential = timings['download'] + timings['upload']
+    print(f"  Tempi pipeline:")
+    print(f"    Download (somma):  {timings['download']:.0f}s")
+    print(f"    Upload (somma):    {timings['upload']:.0f}s")
+    print(f"    Upload in attesa:  {timings['attesa_download']:.0f}s")
+    print(f"    Totale:            {timings['totale']:.0f}s (sequenziale ~{sequential:.0f}s)")
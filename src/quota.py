@@ -0,0 +1,259 @@
+"""Registro persistente della quota YouTube Data API e ripartizione tra i job."""
+
+import fcntl
+import json
+import os
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+from zoneinfo import ZoneInfo
+
+from googleapiclient.errors import HttpError
+
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+DEFAULT_LEDGER_FILE = './data/quota_ledger.json'
+DEFAULT_DAILY_LIMIT = 10000
+# La quota giornaliera si azzera a mezzanotte, ora del Pacifico
+QUOTA_TIMEZONE = ZoneInfo('America/Los_Angeles')
+
+# Costo in unità per chiamata (https://developers.google.com/youtube/v3/determine_quota_cost)
+COSTS = {
+    'videos.insert': 1600,
+    'videos.list': 1,
+    'videos.update': 50,
+    'playlists.insert': 50,
+    'playlists.list': 1,
+    'playlistItems.insert': 50,
+    'playlistItems.list': 1,
+    'channels.list': 1,
+    'captions.list': 50,
+    'captions.download': 200,
+    'search.list': 100,
+}
+
+# Job che attingono alla stessa quota di progetto
+JOB_UPLOAD = 'upload'
+JOB_DESCRIPTIONS = 'descriptions'
+JOB_CAPTIONS = 'captions'
+
+
+def quota_day(now: Optional[datetime] = None) -> str:
+    """Giorno di quota corrente (data ISO, ora del Pacifico)."""
+    now = now or datetime.now(QUOTA_TIMEZONE)
+    return now.astimezone(QUOTA_TIMEZONE).date().isoformat()
+
+
+def is_quota_exceeded(error: Exception) -> bool:
+    """True se l'errore è un 403 quotaExceeded/dailyLimitExceeded dell'API."""
+    if not isinstance(error, HttpError) or error.resp.status != 403:
+        return False
+    try:
+        reasons = {d.get('reason') for d in error.error_details or []}
+    except Exception:
+        reasons = set()
+    content = error.content.decode('utf-8', 'replace') if isinstance(error.content, bytes) else str(error.content)
+    return bool(reasons & {'quotaExceeded', 'dailyLimitExceeded'}) or 'quotaExceeded' in content
+
+
+class QuotaLedger:
+    """
+    Unità di quota spese nel giorno corrente, per job e per tipo di chiamata.
+
+    Il file JSON è condiviso tra processi (upload, aggiornamento descrizioni,
+    sottotitoli): ogni registrazione lo rilegge e riscrive sotto lock
+    (fcntl), e al cambio del giorno di quota (ora del Pacifico) riparte da
+    zero. Le riserve (`reserve`, job -> unità) garantiscono a un job una
+    parte della quota giornaliera: gli altri job non possono intaccarla
+    finché il titolare non l'ha spesa. Così gli upload non restano a secco
+    per colpa dei sottotitoli.
+    """
+
+    def __init__(
+        self,
+        path: str = DEFAULT_LEDGER_FILE,
+        daily_limit: int = DEFAULT_DAILY_LIMIT,
+        reserve: Optional[dict] = None
+    ):
+        # Percorsi relativi alla root del repo: i job possono partire da directory diverse
+        self.path = REPO_ROOT / path
+        self.daily_limit = daily_limit
+        self.reserve = dict(reserve or {})
+        self._lock = threading.Lock()
+
+    # --- persistenza ---------------------------------------------------------
+
+    def _empty(self) -> dict:
+        return {'day': quota_day(), 'exhausted': False, 'jobs': {}}
+
+    def _read(self) -> dict:
+        try:
+            data = json.loads(self.path.read_text(encoding='utf-8'))
+        except (FileNotFoundError, ValueError):
+            return self._empty()
+        if data.get('day') != quota_day():
+            return self._empty()
+        data.setdefault('jobs', {})
+        return data
+
+    def _write(self, data: dict) -> None:
+        tmp_path = self.path.with_suffix(self.path.suffix + '.tmp')
+        tmp_path.write_text(json.dumps(data, indent=2, sort_keys=True), encoding='utf-8')
+        os.replace(tmp_path, self.path)
+
+    @contextmanager
+    def _locked(self):
+        """Lock tra thread e tra processi sul file del registro."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._lock, open(self.path.with_suffix(self.path.suffix + '.lock'), 'w') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    # --- registrazione -------------------------------------------------------
+
+    def record(self, method: str, job: str, calls: int = 1, units: Optional[int] = None) -> int:
+        """
+        Registra chiamate API spese da un job.
+
+        Args:
+            method: Tipo di chiamata (es. 'videos.insert', vedi COSTS)
+            job: Job che ha speso la quota (es. JOB_UPLOAD)
+            calls: Numero di chiamate
+            units: Unità totali (default: COSTS[method] × calls)
+
+        Returns:
+            Unità registrate
+        """
+        if units is None:
+            units = COSTS.get(method, 1) * calls
+        with self._locked():
+            data = self._read()
+            entry = data['jobs'].setdefault(job, {}).setdefault(method, {'calls': 0, 'units': 0})
+            entry['calls'] += calls
+            entry['units'] += units
+            self._write(data)
+        return units
+
+    def mark_exhausted(self) -> None:
+        """La API ha risposto quotaExceeded: nessun job spende altro fino a domani."""
+        with self._locked():
+            data = self._read()
+            data['exhausted'] = True
+            self._write(data)
+
+    # --- consultazione -------------------------------------------------------
+
+    def snapshot(self) -> dict:
+        """Stato del giorno corrente (copia del file)."""
+        with self._locked():
+            return self._read()
+
+    @staticmethod
+    def _job_units(data: dict, job: str) -> int:
+        return sum(entry['units'] for entry in data['jobs'].get(job, {}).values())
+
+    def used(self, job: Optional[str] = None) -> int:
+        """Unità spese oggi (da un job o in totale)."""
+        data = self.snapshot()
+        if job is not None:
+            return self._job_units(data, job)
+        return sum(self._job_units(data, name) for name in data['jobs'])
+
+    def remaining(self) -> int:
+        """Unità ancora disponibili oggi (0 se l'API ha segnalato quotaExceeded)."""
+        data = self.snapshot()
+        if data.get('exhausted'):
+            return 0
+        used = sum(self._job_units(data, name) for name in data['jobs'])
+        return max(0, self.daily_limit - used)
+
+    def allowance(self, job: str) -> int:
+        """
+        Unità che un job può spendere ora.
+
+        È la quota residua meno le riserve degli altri job non ancora spese.
+        """
+        data = self.snapshot()
+        if data.get('exhausted'):
+            return 0
+        used = sum(self._job_units(data, name) for name in data['jobs'])
+        reserved = sum(
+            max(0, units - self._job_units(data, other))
+            for other, units in self.reserve.items()
+            if other != job
+        )
+        return max(0, self.daily_limit - used - reserved)
+
+    def can_spend(self, job: str, method: str, calls: int = 1) -> bool:
+        """True se il job può permettersi `calls` chiamate di tipo method."""
+        return self.allowance(job) >= COSTS.get(method, 1) * calls
+
+
+_ledger: Optional[QuotaLedger] = None
+_job = JOB_UPLOAD
+
+
+def configure(config: Optional[dict] = None, job: str = JOB_UPLOAD) -> QuotaLedger:
+    """
+    Crea il registro condiviso dalla sezione youtube.quota della configurazione.
+
+    Args:
+        config: Dict configurazione completo
+        job: Job del processo corrente (usato da record())
+
+    Returns:
+        Il registro configurato
+    """
+    global _ledger, _job
+    quota_cfg = ((config or {}).get('youtube') or {}).get('quota') or {}
+    _ledger = QuotaLedger(
+        quota_cfg.get('ledger_file', DEFAULT_LEDGER_FILE),
+        quota_cfg.get('daily_limit', DEFAULT_DAILY_LIMIT),
+        quota_cfg.get('reserve')
+    )
+    _job = job
+    return _ledger
+
+
+def get_ledger() -> QuotaLedger:
+    """Registro condiviso (con i valori di default se configure() non è stato chiamato)."""
+    global _ledger
+    if _ledger is None:
+        _ledger = QuotaLedger()
+    return _ledger
+
+
+def current_job() -> str:
+    return _job
+
+
+def record(method: str, calls: int = 1) -> None:
+    """Registra chiamate del job corrente nel registro condiviso (errori solo segnalati)."""
+    try:
+        get_ledger().record(method, _job, calls)
+    except OSError as e:
+        print(f"  ⚠ Impossibile aggiornare registro quota: {e}")
+
+
+def allowance() -> int:
+    """Unità spendibili ora dal job corrente."""
+    return get_ledger().allowance(_job)
+
+
+def can_spend(method: str, calls: int = 1) -> bool:
+    """True se il job corrente può permettersi `calls` chiamate di tipo method."""
+    return get_ledger().can_spend(_job, method, calls)
+
+
+def note_error(error: Exception) -> bool:
+    """Se l'errore è quotaExceeded lo registra (quota finita per tutti) e ritorna True."""
+    if is_quota_exceeded(error):
+        print("  ⚠ Quota YouTube esaurita (quotaExceeded): stop fino al reset (mezzanotte ora del Pacifico)")
+        get_ledger().mark_exhausted()
+        return True
+    return False
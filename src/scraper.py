@@ -1,28 +1,55 @@
 """Scraper per pagine sedute ARS."""
 
-import requests
-from requests.adapters import HTTPAdapter
-from urllib3.util.retry import Retry
 from bs4 import BeautifulSoup
+from bs4.element import CData, NavigableString, Tag
+from bisect import bisect_left, bisect_right
+from datetime import datetime
 import re
-from typing import Optional, Iterable
+from typing import Optional
+from . import http_client
+from .html_parser import parse_html
 from .utils import parse_italian_date, parse_time_from_text
 
 
+# Testo cercato per ogni tipo di documento della seduta
+DOCUMENT_PATTERNS = {
+    'odg_url': 'OdG e Comunicazioni',
+    'resoconto_provvisorio_url': 'Resoconto provvisorio',
+    'resoconto_stenografico_url': 'Resoconto stenografico',
+    'allegato_url': 'Allegato alla seduta'
+}
+
+DOCUMENT_CONTAINER_TAGS = frozenset(('p', 'h3', 'h4', 'div'))
+
+# Stessi tipi di stringa considerati da get_text() (niente commenti, script, style)
+TEXT_STRING_TYPES = frozenset((NavigableString, CData))
+
+# Versione dei risultati di parsing salvati in cache: incrementare quando
+# cambia l'estrazione, così i risultati vecchi vengono ricalcolati
+SEDUTA_PARSE_VERSION = '2'
+
+DATE_HEADING_RE = re.compile(r'\d{1,2}\s+\w+\s+\d{4}')
+
+SEDUTA_URL_DATE_RE = re.compile(r'seduta-numero-.*-del-(\d{8})')
+
+
 def get_seduta_page(
     seduta_url: str,
-    user_agent: str = "ARS-YouTube-Bot/1.0",
-    timeout: int = 30,
-    retries: int = 3,
-    backoff_factor: float = 0.5,
-    status_forcelist: Iterable[int] = (429, 500, 502, 503, 504),
+    user_agent: Optional[str] = None,
+    timeout: Optional[int] = None,
+    parser: Optional[str] = None,
 ) -> BeautifulSoup:
     """
     Scarica HTML pagina seduta.
 
+    Usa la sessione condivisa di http_client (keep-alive, retry e pool
+    configurati con http_client.configure dalla sezione scraping).
+
     Args:
         seduta_url: URL della pagina seduta
-        user_agent: User agent per la richiesta HTTP
+        user_agent: User agent per la richiesta HTTP (default: quello del client)
+        timeout: Timeout in secondi (default: quello del client)
+        parser: Parser HTML (auto|lxml|html.parser, vedi html_parser)
 
     Returns:
         BeautifulSoup object con HTML parsato
@@ -30,21 +57,97 @@ def get_seduta_page(
     Raises:
         requests.RequestException: Se download fallisce
     """
-    headers = {'User-Agent': user_agent}
-    session = requests.Session()
-    retry = Retry(
-        total=retries,
-        backoff_factor=backoff_factor,
-        status_forcelist=list(status_forcelist),
-        allowed_methods=frozenset(["GET"]),
-        raise_on_status=False
-    )
-    adapter = HTTPAdapter(max_retries=retry)
-    session.mount("http://", adapter)
-    session.mount("https://", adapter)
-    response = session.get(seduta_url, headers=headers, timeout=timeout)
+    headers = {'User-Agent': user_agent} if user_agent else None
+    response = http_client.get(seduta_url, headers=headers, timeout=timeout)
     response.raise_for_status()
-    return BeautifulSoup(response.content, 'html.parser')
+    return parse_html(response.content, parser)
+
+
+def fetch_seduta(seduta_url: str, parser: Optional[str] = None, cache=None) -> dict:
+    """
+    Scarica ed estrae una pagina seduta, con cache HTTP opzionale.
+
+    Con cache (http_cache.HttpCache) la richiesta è condizionale: se la pagina
+    non è cambiata si riusa il risultato di parsing salvato senza riparsare.
+
+    Args:
+        seduta_url: URL della pagina seduta
+        parser: Parser HTML (auto|lxml|html.parser)
+        cache: HttpCache o None
+
+    Returns:
+        Dict con seduta_info (come extract_seduta_info), next_url (seduta
+        successiva o None) e links (URL sedute linkate nella pagina)
+
+    Raises:
+        requests.RequestException: Se download fallisce
+    """
+    if cache is None:
+        return _parse_seduta_page(get_seduta_page(seduta_url, parser=parser), seduta_url)
+
+    page = cache.fetch(seduta_url)
+    cached = page.get_result('seduta', SEDUTA_PARSE_VERSION)
+    if cached is not None:
+        cache.count('parse_reused')
+        return cached
+
+    result = _parse_seduta_page(parse_html(page.body, parser), seduta_url)
+    cache.put_result(page, 'seduta', SEDUTA_PARSE_VERSION, result)
+    return result
+
+
+def _parse_seduta_page(html: BeautifulSoup, seduta_url: str) -> dict:
+    return {
+        'seduta_info': extract_seduta_info(html, seduta_url),
+        'next_url': get_next_seduta_url(html, go_forward=True),
+        'links': extract_seduta_links(html)
+    }
+
+
+def normalize_seduta_url(href: str) -> str:
+    """URL assoluto senza frammento né slash finale."""
+    href = href if href.startswith('http') else f"https://www.ars.sicilia.it{href}"
+    return href.split('#', 1)[0].rstrip('/')
+
+
+def extract_seduta_links(html: BeautifulSoup) -> list:
+    """
+    URL di tutte le pagine seduta linkate (ordine di pagina, senza duplicati).
+
+    Args:
+        html: BeautifulSoup object (pagina seduta o elenco come /agenda/lavori-aula)
+
+    Returns:
+        Lista URL assoluti
+    """
+    links = []
+    for link in html.find_all('a', href=True):
+        if 'seduta-numero-' in link['href']:
+            links.append(normalize_seduta_url(link['href']))
+    return list(dict.fromkeys(links))
+
+
+def seduta_date_from_url(url: str) -> Optional[str]:
+    """
+    Estrae data seduta da URL tipo .../seduta-numero-219-del-10122025.
+
+    Returns:
+        Data in formato YYYY-MM-DD o None
+    """
+    match = SEDUTA_URL_DATE_RE.search(url)
+    if not match:
+        return None
+    try:
+        return datetime.strptime(match.group(1), "%d%m%Y").date().isoformat()
+    except ValueError:
+        return None
+
+
+def seduta_sort_key(seduta_info: dict) -> tuple:
+    """Chiave di ordinamento cronologico: data seduta, poi numero (219 < 219/A < 220)."""
+    numero = seduta_info.get('numero_seduta') or ''
+    match = re.match(r'(\d+)', numero)
+    return (seduta_info.get('data_seduta') or '', int(match.group(1)) if match else 0, numero)
 
 
 def extract_seduta_number(html: BeautifulSoup) -> Optional[str]:
@@ -130,12 +233,7 @@ def extract_document_urls(html: BeautifulSoup) -> dict:
     }
 
     # Pattern di ricerca per ogni tipo di documento
-    patterns = {
-        'odg_url': 'OdG e Comunicazioni',
-        'resoconto_provvisorio_url': 'Resoconto provvisorio',
-        'resoconto_stenografico_url': 'Resoconto stenografico',
-        'allegato_url': 'Allegato alla seduta'
-    }
+    patterns = DOCUMENT_PATTERNS
 
     # Trova tutti gli elementi che potrebbero contenere documenti
     elements = html.find_all(['p', 'h3', 'h4', 'div'])
@@ -158,19 +256,24 @@ def extract_document_urls(html: BeautifulSoup) -> dict:
                     link = el.parent.find('a', href=True)
 
                 if link and link.get('href'):
-                    href = link['href']
-                    # Normalizza URL (converti relativi in assoluti)
-                    if not href.startswith('http'):
-                        href = f"https://www.ars.sicilia.it{href}" if href.startswith('/') else f"https://www.ars.sicilia.it/{href}"
-                    result[key] = href
-
-    # Popola resoconto_url per backward compatibility
-    # Preferenza: stenografico > provvisorio
+                    result[key] = _normalize_document_url(link['href'])
+
+    return _with_resoconto_url(result)
+
+
+def _normalize_document_url(href: str) -> str:
+    """Converte URL documento relativi in assoluti."""
+    if not href.startswith('http'):
+        href = f"https://www.ars.sicilia.it{href}" if href.startswith('/') else f"https://www.ars.sicilia.it/{href}"
+    return href
+
+
+def _with_resoconto_url(result: dict) -> dict:
+    """Popola resoconto_url per backward compatibility (stenografico > provvisorio)."""
     if result['resoconto_stenografico_url']:
         result['resoconto_url'] = result['resoconto_stenografico_url']
     elif result['resoconto_provvisorio_url']:
         result['resoconto_url'] = result['resoconto_provvisorio_url']
-
     return result
 
 
@@ -317,6 +420,181 @@ def get_next_seduta_url(html: BeautifulSoup, current_number: str = None, go_forw
     return None
 
 
+def _is_video_box(tag: Tag) -> bool:
+    """Stesso criterio di find_video_elements (div.video_box con data-src)."""
+    if tag.name != 'div' or tag.get('data-src') is None:
+        return False
+    classes = tag.get('class')
+    if isinstance(classes, str):
+        return classes == 'video_box'
+    return bool(classes) and ('video_box' in classes or ' '.join(classes) == 'video_box')
+
+
+def scan_seduta_page(html: BeautifulSoup) -> dict:
+    """
+    Visita l'albero della pagina seduta una sola volta.
+
+    Ogni tag riceve un indice in ordine di documento e il range che il suo
+    testo occupa nel testo completo della pagina (il testo di un sottoalbero
+    è contiguo). Durante la visita si raccolgono title, h1, heading h4, link,
+    contenitori documento e video box; al termine numero, data, documenti e
+    data di ogni video si ricavano dagli indici con ricerche binarie, senza
+    rileggere l'albero. Il risultato coincide con quello di
+    extract_seduta_number, extract_seduta_date, extract_document_urls e
+    della ricerca dell'h4 precedente su ogni video box.
+
+    Args:
+        html: BeautifulSoup object
+
+    Returns:
+        Dict con numero_seduta, data_seduta, documenti (come
+        extract_document_urls) e video_boxes: lista (tag, data heading h4)
+    """
+    parts = []
+    text_len = 0
+    tags = []           # tag in ordine di documento
+    positions = {}      # id(tag) -> indice
+    last_desc = []      # indice dell'ultimo discendente
+    text_start = []
+    text_end = []
+    links = []          # indici dei tag <a href>
+    containers = []     # indici dei tag p/h3/h4/div
+    headings = []       # indici dei tag h4
+    boxes = []          # indici dei video box
+    title_index = None
+    h1_index = None
+
+    # Visita iterativa in profondità: apertura tag, testo, chiusura tag
+    open_tags = []
+    stack = [iter(html.contents)]
+    while stack:
+        child = next(stack[-1], None)
+        if child is None:
+            stack.pop()
+            if open_tags:
+                index = open_tags.pop()
+                last_desc[index] = len(tags) - 1
+                text_end[index] = text_len
+            continue
+
+        if isinstance(child, Tag):
+            index = len(tags)
+            tags.append(child)
+            positions[id(child)] = index
+            last_desc.append(index)
+            text_start.append(text_len)
+            text_end.append(text_len)
+
+            name = child.name
+            if name == 'a' and child.get('href') is not None:
+                links.append(index)
+            if name in DOCUMENT_CONTAINER_TAGS:
+                containers.append(index)
+            if name == 'h4':
+                headings.append(index)
+            elif name == 'title' and title_index is None:
+                title_index = index
+            elif name == 'h1' and h1_index is None:
+                h1_index = index
+            if _is_video_box(child):
+                boxes.append(index)
+
+            open_tags.append(index)
+            stack.append(iter(child.contents))
+        elif type(child) in TEXT_STRING_TYPES:
+            parts.append(child)
+            text_len += len(child)
+
+    text = ''.join(parts)
+
+    def tag_range(index: int) -> tuple:
+        return text_start[index], text_end[index]
+
+    def first_link(index: Optional[int]) -> Optional[Tag]:
+        """Primo <a href> discendente del tag (come tag.find('a', href=True))."""
+        if index is None:
+            # Radice del documento
+            return tags[links[0]] if links else None
+        pos = bisect_right(links, index)
+        if pos < len(links) and links[pos] <= last_desc[index]:
+            return tags[links[pos]]
+        return None
+
+    # Numero seduta: title, poi h1, poi testo completo
+    numero_seduta = None
+    match = None
+    if title_index is not None:
+        match = re.search(
+            r'Seduta numero\s+(\d+/?\w*)', text[slice(*tag_range(title_index))], re.IGNORECASE
+        )
+    if not match and h1_index is not None:
+        match = re.search(
+            r'Seduta\s+(?:numero|n\.)\s+(\d+/?\w*)', text[slice(*tag_range(h1_index))], re.IGNORECASE
+        )
+    if not match:
+        match = re.search(r'Seduta numero\s+(\d+/?\w*)', text, re.IGNORECASE)
+    if match:
+        numero_seduta = match.group(1)
+
+    # Data seduta: "DEL 10 DICEMBRE 2025"
+    data_seduta = None
+    match = re.search(r'DEL\s+(\d{1,2}\s+\w+\s+\d{4})', text, re.IGNORECASE)
+    if match:
+        data_seduta = parse_italian_date(match.group(1))
+
+    # Documenti: vince l'ultimo contenitore (in ordine di documento) che
+    # contiene il testo e ha un link utilizzabile
+    documents = {key: None for key in DOCUMENT_PATTERNS}
+    documents['resoconto_url'] = None
+    for key, pattern in DOCUMENT_PATTERNS.items():
+        occurrences = []
+        found = text.find(pattern)
+        while found != -1:
+            occurrences.append(found)
+            found = text.find(pattern, found + 1)
+        if not occurrences:
+            continue
+
+        for index in reversed(containers):
+            start, end = tag_range(index)
+            pos = bisect_left(occurrences, start)
+            if pos == len(occurrences) or occurrences[pos] + len(pattern) > end:
+                continue
+
+            tag = tags[index]
+            link = first_link(index)
+            if not link and tag.next_sibling is not None and isinstance(tag.next_sibling, Tag):
+                link = first_link(positions[id(tag.next_sibling)])
+            if not link and tag.parent is not None:
+                link = first_link(positions.get(id(tag.parent)))
+
+            if link and link.get('href'):
+                documents[key] = _normalize_document_url(link['href'])
+                break
+    _with_resoconto_url(documents)
+
+    # Data di ogni video dall'ultimo h4 con data che lo precede
+    dated_headings = []
+    for index in headings:
+        heading_text = text[slice(*tag_range(index))].strip()
+        if DATE_HEADING_RE.match(heading_text):
+            dated_headings.append((index, parse_italian_date(heading_text)))
+    heading_positions = [index for index, _ in dated_headings]
+
+    video_boxes = []
+    for index in boxes:
+        pos = bisect_left(heading_positions, index)
+        video_date = dated_headings[pos - 1][1] if pos else None
+        video_boxes.append((tags[index], video_date))
+
+    return {
+        'numero_seduta': numero_seduta,
+        'data_seduta': data_seduta,
+        'documents': documents,
+        'video_boxes': video_boxes
+    }
+
+
 def extract_seduta_info(html: BeautifulSoup, seduta_url: str) -> dict:
     """
     Estrae tutte le informazioni da una pagina seduta.
@@ -328,32 +606,15 @@ def extract_seduta_info(html: BeautifulSoup, seduta_url: str) -> dict:
     Returns:
         Dict con tutte le informazioni seduta
     """
-    seduta_number = extract_seduta_number(html)
-    seduta_date = extract_seduta_date(html)
-    documents = extract_document_urls(html)
+    page = scan_seduta_page(html)
+    seduta_number = page['numero_seduta']
+    seduta_date = page['data_seduta']
+    documents = page['documents']
 
-    # Estrai video
+    # Estrai video (data dall'h4 precedente, fallback data seduta)
     videos = []
-    video_elements = find_video_elements(html)
-
-    # Processa ogni elemento video trovando la data dall'h4 precedente
-    for video_el in video_elements:
-        # Trova l'heading h4 con data più vicino che precede questo video
-        video_date = None
-        previous_h4_list = video_el.find_all_previous('h4')
-
-        # Cerca il primo h4 (più vicino) con pattern data italiana
-        for h4 in previous_h4_list:
-            h4_text = h4.get_text().strip()
-            if re.match(r'\d{1,2}\s+\w+\s+\d{4}', h4_text):
-                video_date = parse_italian_date(h4_text)
-                break
-
-        # Se non trovato, usa data seduta come fallback
-        if not video_date:
-            video_date = seduta_date
-
-        video_data = extract_video_metadata(video_el, video_date)
+    for video_el, video_date in page['video_boxes']:
+        video_data = extract_video_metadata(video_el, video_date or seduta_date)
         if video_data:
             video_data['numero_seduta'] = seduta_number
             video_data['data_seduta'] = seduta_date
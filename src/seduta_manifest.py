@@ -0,0 +1,149 @@
+"""Impronte delle sedute già salvate in anagrafica, per saltare quelle invariate."""
+
+import hashlib
+import json
+from pathlib import Path
+from typing import Optional
+
+from .utils import atomic_write
+
+
+DEFAULT_MANIFEST_FILE = './data/cache/sedute_manifest.json'
+
+# Campi documento della seduta che entrano nell'impronta
+DOCUMENT_FIELDS = [
+    'data_seduta',
+    'url_pagina',
+    'odg_url',
+    'resoconto_url',
+    'resoconto_provvisorio_url',
+    'resoconto_stenografico_url',
+    'allegato_url'
+]
+
+# Campi video che entrano nell'impronta (chiave: data_video + ora_video)
+VIDEO_FIELDS = ['id_video', 'stream_url', 'video_page_url']
+
+
+def structure(seduta_info: dict) -> dict:
+    """
+    Struttura estratta di una seduta: URL documenti e video per (data, ora).
+
+    Returns:
+        Dict {'documents': {campo: url}, 'videos': {"data ora": {campo: valore}}}
+    """
+    data_seduta = seduta_info.get('data_seduta') or ''
+    videos = {}
+    for video in seduta_info.get('videos', []):
+        key = f"{video.get('data_video') or data_seduta} {video.get('ora_video') or ''}"
+        videos[key] = {field: video.get(field) or '' for field in VIDEO_FIELDS}
+    return {
+        'documents': {field: seduta_info.get(field) or '' for field in DOCUMENT_FIELDS},
+        'videos': videos
+    }
+
+
+def fingerprint(seduta_structure: dict) -> str:
+    """Hash SHA-256 della struttura (JSON con chiavi ordinate)."""
+    payload = json.dumps(seduta_structure, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def diff(old: dict, new: dict) -> dict:
+    """
+    Differenze tra due strutture di seduta.
+
+    Returns:
+        Dict con 'added' e 'removed' (chiavi video), 'changed'
+        (chiave video -> {campo: (vecchio, nuovo)}) e 'documents'
+        (campo -> (vecchio, nuovo))
+    """
+    old_videos = old.get('videos', {})
+    new_videos = new.get('videos', {})
+    changed = {}
+    for key in sorted(old_videos.keys() & new_videos.keys()):
+        fields = {
+            field: (old_videos[key].get(field, ''), new_videos[key].get(field, ''))
+            for field in VIDEO_FIELDS
+            if old_videos[key].get(field, '') != new_videos[key].get(field, '')
+        }
+        if fields:
+            changed[key] = fields
+    old_docs = old.get('documents', {})
+    new_docs = new.get('documents', {})
+    return {
+        'added': sorted(new_videos.keys() - old_videos.keys()),
+        'removed': sorted(old_videos.keys() - new_videos.keys()),
+        'changed': changed,
+        'documents': {
+            field: (old_docs.get(field, ''), new_docs.get(field, ''))
+            for field in DOCUMENT_FIELDS
+            if old_docs.get(field, '') != new_docs.get(field, '')
+        }
+    }
+
+
+def format_diff(changes: dict, new: Optional[dict] = None) -> list:
+    """Righe di log leggibili per un diff (video aggiunti, rimossi, cambiati, documenti)."""
+    new_videos = (new or {}).get('videos', {})
+    lines = []
+    for key in changes['added']:
+        lines.append(f"+ video {key} (id {new_videos.get(key, {}).get('id_video', '?')})")
+    for key in changes['removed']:
+        lines.append(f"- video {key}")
+    for key, fields in changes['changed'].items():
+        for field, (before, after) in fields.items():
+            lines.append(f"~ video {key} {field}: {before or '-'} → {after or '-'}")
+    for field, (before, after) in changes['documents'].items():
+        lines.append(f"~ {field}: {before or '-'} → {after or '-'}")
+    return lines
+
+
+class SedutaManifest:
+    """
+    Impronte delle sedute salvate (numero_seduta -> impronta e struttura), in un file JSON.
+
+    Una seduta già salvata la cui impronta non è cambiata non richiede
+    lavoro di storage; se è cambiata, la struttura precedente permette di
+    registrare esattamente cosa è cambiato.
+    """
+
+    def __init__(self, path: str = DEFAULT_MANIFEST_FILE):
+        self.path = Path(path)
+        self._dirty = False
+        try:
+            self._data = json.loads(self.path.read_text(encoding='utf-8'))
+        except (FileNotFoundError, ValueError):
+            self._data = {}
+
+    def __contains__(self, numero_seduta: str) -> bool:
+        return numero_seduta in self._data
+
+    def unchanged(self, seduta_info: dict) -> bool:
+        """True se la seduta ha un'impronta salvata identica a quella attuale."""
+        entry = self._data.get(seduta_info['numero_seduta'])
+        return entry is not None and entry.get('fingerprint') == fingerprint(structure(seduta_info))
+
+    def diff(self, seduta_info: dict) -> Optional[dict]:
+        """Differenze rispetto alla struttura salvata (None se la seduta non ha impronta)."""
+        entry = self._data.get(seduta_info['numero_seduta'])
+        if entry is None:
+            return None
+        return diff(entry.get('structure', {}), structure(seduta_info))
+
+    def update(self, seduta_info: dict) -> None:
+        """Registra l'impronta della seduta appena salvata in anagrafica."""
+        seduta_structure = structure(seduta_info)
+        self._data[seduta_info['numero_seduta']] = {
+            'fingerprint': fingerprint(seduta_structure),
+            'structure': seduta_structure
+        }
+        self._dirty = True
+
+    def save(self) -> None:
+        """Scrive il file (atomico) se ci sono impronte nuove."""
+        if not self._dirty:
+            return
+        with atomic_write(self.path, 'w', encoding='utf-8') as f:
+            json.dump(self._data, f, sort_keys=True, ensure_ascii=False)
+        self._dirty = False
@@ -0,0 +1,243 @@
+"""Parser SRT in streaming e archivio compatto dei cue, con sidecar binario caricabile via mmap."""
+
+import io
+import mmap
+import os
+import re
+import struct
+import sys
+from array import array
+from pathlib import Path
+from typing import Iterable, Iterator, NamedTuple, Optional, Union
+
+from .utils import atomic_write
+
+
+DEFAULT_CUE_CACHE_DIR = './data/cache/srt_cues'
+SIDECAR_SUFFIX = '.cues'
+
+_TIMESTAMP_LINE = re.compile(
+    r'^\s*(\d{1,2}:\d{2}:\d{2}[,.]\d{3})\s*-->\s*(\d{1,2}:\d{2}:\d{2}[,.]\d{3})'
+)
+
+# Sidecar: header + start[n] + end[n] + offset[n+1] (uint32, ordine nativo) + testo UTF-8.
+# Il file SRT di origine è identificato da dimensione e mtime_ns.
+_MAGIC = b'SRTC'
+_VERSION = 1
+_HEADER = struct.Struct('<4sHcxIIQQ')  # magic, versione, byteorder, count, text_len, size, mtime_ns
+_BYTEORDER = b'L' if sys.byteorder == 'little' else b'B'
+
+
+class Cue(NamedTuple):
+    start_ms: int
+    end_ms: int
+    text: str  # Righe di testo del cue separate da '\n'
+
+
+def iter_cues(lines: Iterable[str]) -> Iterator[Cue]:
+    """
+    Cue di un SRT, letti riga per riga senza caricare il file intero.
+
+    Un cue inizia alla riga timestamp e termina alla riga vuota successiva
+    (o al timestamp seguente); numeri di sequenza e righe fuori da un cue
+    vengono ignorati. I cue senza testo non vengono restituiti.
+
+    Args:
+        lines: Righe del file (file aperto in modalità testo, lista, ...)
+
+    Yields:
+        Cue(start_ms, end_ms, text)
+    """
+    # La fine di un cue è spesso l'inizio di uno successivo: conversioni memorizzate
+    timestamps_ms = {}
+
+    def to_ms(timestamp: str) -> int:
+        value = timestamps_ms.get(timestamp)
+        if value is None:
+            h, m, s = timestamp[:-4].split(':')
+            value = timestamps_ms[timestamp] = ((int(h) * 60 + int(m)) * 60 + int(s)) * 1000 + int(timestamp[-3:])
+        return value
+
+    start = end = None
+    text_lines = []
+    match = _TIMESTAMP_LINE.match
+    for line in lines:
+        line = line.strip()
+        if not line:
+            if start is not None and text_lines:
+                yield Cue(start, end, '\n'.join(text_lines))
+            start = None
+            text_lines = []
+            continue
+        m = match(line) if '-->' in line else None
+        if m is None:
+            if start is not None:
+                text_lines.append(line)
+            continue
+        if start is not None and text_lines:
+            yield Cue(start, end, '\n'.join(text_lines))
+        start = to_ms(m.group(1))
+        end = to_ms(m.group(2))
+        text_lines = []
+    if start is not None and text_lines:
+        yield Cue(start, end, '\n'.join(text_lines))
+
+
+class CueStore:
+    """
+    Cue di una trascrizione in forma compatta.
+
+    Tempi di inizio/fine (ms) in array uint32, testo di tutti i cue in un
+    unico buffer UTF-8 con gli offset di ciascun cue. Con load() gli array
+    sono viste sul file sidecar mappato in memoria: nessun parsing e nessuna
+    copia finché non si leggono i testi.
+    """
+
+    def __init__(self, starts=None, ends=None, offsets=None, text=None, source=None):
+        self._starts = starts if starts is not None else array('I')
+        self._ends = ends if ends is not None else array('I')
+        self._offsets = offsets if offsets is not None else array('I', [0])
+        self._text = text if text is not None else bytearray()
+        self._source = source  # mmap del sidecar (tenuto aperto finché servono le viste)
+
+    @classmethod
+    def from_cues(cls, cues: Iterable[Cue]) -> 'CueStore':
+        """Costruisce l'archivio consumando un iterabile di cue."""
+        starts = array('I')
+        ends = array('I')
+        offsets = array('I', [0])
+        chunks = []
+        size = 0
+        for start_ms, end_ms, text in cues:
+            starts.append(start_ms)
+            ends.append(end_ms)
+            chunk = text.encode('utf-8')
+            chunks.append(chunk)
+            size += len(chunk)
+            offsets.append(size)
+        return cls(starts, ends, offsets, bytearray(b''.join(chunks)))
+
+    def __len__(self) -> int:
+        return len(self._starts)
+
+    def __getitem__(self, index: int) -> Cue:
+        if index < 0:
+            index += len(self)
+        return Cue(self._starts[index], self._ends[index], self.text(index))
+
+    def __iter__(self) -> Iterator[Cue]:
+        for index in range(len(self)):
+            yield self[index]
+
+    def start_ms(self, index: int) -> int:
+        return self._starts[index]
+
+    def end_ms(self, index: int) -> int:
+        return self._ends[index]
+
+    def text(self, index: int) -> str:
+        """Testo del cue (righe separate da '\\n')."""
+        return str(self._text[self._offsets[index]:self._offsets[index + 1]], 'utf-8')
+
+    def to_text(self) -> str:
+        """Testo puro della trascrizione: una riga per riga di testo, con newline finale."""
+        if not len(self):
+            return ''
+        return '\n'.join(self.text(index) for index in range(len(self))) + '\n'
+
+    def save(self, path: Path, source_stat: Optional[os.stat_result] = None) -> None:
+        """
+        Scrive il sidecar binario (atomico).
+
+        Args:
+            path: Path del sidecar
+            source_stat: stat del file SRT di origine, per invalidare il sidecar se cambia
+        """
+        header = _HEADER.pack(
+            _MAGIC, _VERSION, _BYTEORDER, len(self), len(self._text),
+            source_stat.st_size if source_stat else 0,
+            source_stat.st_mtime_ns if source_stat else 0
+        )
+        with atomic_write(path, 'wb') as f:
+            f.write(header)
+            for values in (self._starts, self._ends, self._offsets):
+                f.write(values)
+            f.write(self._text)
+
+    @classmethod
+    def load(cls, path: Path, source_stat: Optional[os.stat_result] = None) -> Optional['CueStore']:
+        """
+        Carica un sidecar via mmap.
+
+        Args:
+            path: Path del sidecar
+            source_stat: stat del file SRT di origine (se dato, deve coincidere con quello salvato)
+
+        Returns:
+            CueStore con viste sul file, o None se il sidecar manca, è di un'altra
+            versione/architettura o non corrisponde più al file SRT
+        """
+        try:
+            with open(path, 'rb') as f:
+                if os.fstat(f.fileno()).st_size < _HEADER.size:
+                    return None
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except FileNotFoundError:
+            return None
+
+        magic, version, byteorder, count, text_len, size, mtime_ns = _HEADER.unpack_from(mapped)
+        expected = _HEADER.size + 4 * (3 * count + 1) + text_len
+        stale = source_stat is not None and (size, mtime_ns) != (source_stat.st_size, source_stat.st_mtime_ns)
+        if (magic, version, byteorder) != (_MAGIC, _VERSION, _BYTEORDER) or len(mapped) != expected or stale:
+            mapped.close()
+            return None
+
+        view = memoryview(mapped)
+        pos = _HEADER.size
+        starts = view[pos:pos + 4 * count].cast('I')
+        pos += 4 * count
+        ends = view[pos:pos + 4 * count].cast('I')
+        pos += 4 * count
+        offsets = view[pos:pos + 4 * (count + 1)].cast('I')
+        pos += 4 * (count + 1)
+        return cls(starts, ends, offsets, view[pos:pos + text_len], source=mapped)
+
+
+def parse_text(srt: str) -> CueStore:
+    """CueStore da un SRT già in memoria."""
+    return CueStore.from_cues(iter_cues(io.StringIO(srt)))
+
+
+def parse_file(path: Union[str, Path]) -> CueStore:
+    """CueStore da un file SRT, letto in streaming."""
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        return CueStore.from_cues(iter_cues(f))
+
+
+def sidecar_path(srt_path: Path, cache_dir: Union[str, Path] = DEFAULT_CUE_CACHE_DIR) -> Path:
+    """Path del sidecar di un file SRT (es. <id>.it.srt -> <cache_dir>/<id>.it.cues)."""
+    return Path(cache_dir) / (srt_path.stem + SIDECAR_SUFFIX)
+
+
+def load_cues(srt_path: Union[str, Path], cache_dir: Union[str, Path, None] = DEFAULT_CUE_CACHE_DIR) -> CueStore:
+    """
+    Cue di un file SRT, dal sidecar se è aggiornato, altrimenti parsando e salvando il sidecar.
+
+    Args:
+        srt_path: Path del file SRT
+        cache_dir: Directory dei sidecar (None = nessun sidecar, parsing diretto)
+
+    Returns:
+        CueStore
+    """
+    srt_path = Path(srt_path)
+    if cache_dir is None:
+        return parse_file(srt_path)
+
+    source_stat = srt_path.stat()
+    cue_path = sidecar_path(srt_path, cache_dir)
+    store = CueStore.load(cue_path, source_stat)
+    if store is None:
+        store = parse_file(srt_path)
+        store.save(cue_path, source_stat)
+    return store
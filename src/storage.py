@@ -0,0 +1,794 @@
+"""Storage pluggabile per anagrafica, log upload e indice (CSV o SQLite)."""
+
+import csv
+import json
+import os
+import sqlite3
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Optional, Set
+
+from . import logger
+from .upload_journal import LOG_FIELDS
+from .utils import atomic_write
+
+
+ANAGRAFICA_FIELDS = [
+    'numero_seduta',
+    'data_seduta',
+    'url_pagina',
+    'odg_url',
+    'resoconto_url',
+    'resoconto_provvisorio_url',
+    'resoconto_stenografico_url',
+    'allegato_url',
+    'id_video',
+    'ora_video',
+    'data_video',
+    'stream_url',
+    'video_page_url',
+    'youtube_id',
+    'last_check',
+    'status',
+    'failure_reason',
+    'duration_minutes',
+    'no_transcript'
+]
+
+INDEX_FIELDS = ['numero_seduta', 'data_seduta', 'url_pagina', 'video_count']
+
+# Campi preservati quando una seduta viene ri-scaricata
+PRESERVED_FIELDS = [
+    'youtube_id',
+    'last_check',
+    'status',
+    'failure_reason',
+    'duration_minutes',
+    'no_transcript'
+]
+
+DEFAULT_SQLITE_PATH = './data/ars.sqlite'
+
+
+def _write_csv_atomic(path: Path, fieldnames: list, rows: list) -> None:
+    """Scrive un CSV via file temporaneo univoco + os.replace (sicuro tra processi concorrenti)."""
+    with atomic_write(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def init_anagrafica_csv(file_path: str) -> bool:
+    """
+    Crea file CSV anagrafica se non esiste.
+
+    Args:
+        file_path: Path al file CSV
+
+    Returns:
+        True se creato o già esistente
+    """
+    try:
+        path = Path(file_path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        if not path.exists():
+            with open(file_path, 'w', newline='', encoding='utf-8') as f:
+                writer = csv.writer(f)
+                writer.writerow(ANAGRAFICA_FIELDS)
+            print(f"✓ Anagrafica creata: {file_path}")
+            return True
+
+        # File esistente: verifica schema e aggiungi colonne mancanti
+        with open(file_path, 'r', newline='', encoding='utf-8') as f:
+            reader = csv.DictReader(f)
+            fieldnames = reader.fieldnames or []
+            missing = [f for f in ANAGRAFICA_FIELDS if f not in fieldnames]
+            if not missing:
+                return True
+
+            rows = []
+            for row in reader:
+                for key in missing:
+                    row.setdefault(key, '')
+                rows.append(row)
+
+        # Riscrivi con header aggiornato
+        new_fieldnames = fieldnames + missing
+        with open(file_path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=new_fieldnames)
+            writer.writeheader()
+            writer.writerows(rows)
+        print(f"✓ Anagrafica aggiornata con nuove colonne: {', '.join(missing)}")
+
+        return True
+
+    except Exception as e:
+        print(f"✗ Errore creazione anagrafica: {e}")
+        return False
+
+
+def build_seduta_rows(seduta_info: dict, existing: dict = None, timestamp: str = None) -> list:
+    """
+    Costruisce le righe anagrafica di una seduta (una per video).
+
+    Args:
+        seduta_info: Dict con info seduta (da scraper)
+        existing: Dict opzionale (data_video, ora_video) -> campi da preservare
+        timestamp: last_check per i video senza youtube_id (default: adesso)
+
+    Returns:
+        Lista dict con chiavi ANAGRAFICA_FIELDS
+    """
+    if existing is None:
+        existing = {}
+    if timestamp is None:
+        timestamp = datetime.now().isoformat()
+
+    data_seduta = seduta_info['data_seduta']
+    rows = []
+    for video in seduta_info['videos']:
+        data_video = video.get('data_video', data_seduta)
+        ora_video = video['ora_video']
+
+        # Recupera campi esistenti se presenti (chiave: data_video + ora_video)
+        previous = existing.get((data_video, ora_video), {})
+        youtube_id = previous.get('youtube_id', '')
+
+        rows.append({
+            'numero_seduta': seduta_info['numero_seduta'],
+            'data_seduta': data_seduta,
+            'url_pagina': seduta_info['url_pagina'],
+            'odg_url': seduta_info.get('odg_url', ''),
+            'resoconto_url': seduta_info.get('resoconto_url', ''),
+            'resoconto_provvisorio_url': seduta_info.get('resoconto_provvisorio_url', ''),
+            'resoconto_stenografico_url': seduta_info.get('resoconto_stenografico_url', ''),
+            'allegato_url': seduta_info.get('allegato_url', ''),
+            'id_video': video['id_video'],
+            'ora_video': ora_video,
+            'data_video': data_video,
+            'stream_url': video.get('stream_url', ''),
+            'video_page_url': video.get('video_page_url', ''),
+            'youtube_id': youtube_id,
+            # Preserva last_check se youtube_id esiste (non aggiornare timestamp per video già uploadati)
+            'last_check': previous.get('last_check', '') if youtube_id else timestamp,
+            'status': previous.get('status', ''),
+            'failure_reason': previous.get('failure_reason', ''),
+            # Durata dal probe del manifest HLS se non ancora nota
+            'duration_minutes': previous.get('duration_minutes') or video.get('duration_minutes', ''),
+            'no_transcript': previous.get('no_transcript', '')
+        })
+    return rows
+
+
+def _csv_value(value) -> str:
+    """Valore come lo scriverebbe csv.writer (None -> stringa vuota)."""
+    return '' if value is None else str(value)
+
+
+class CsvBackend:
+    """
+    Backend CSV: anagrafica_video.csv, upload_log.csv e index.csv su disco.
+
+    È il comportamento storico; richiede il lock di run_daily.sh per
+    evitare scritture concorrenti. L'anagrafica è tenuta in memoria
+    (anagrafica.AnagraficaStore) e riscritta al flush.
+    """
+
+    name = 'csv'
+
+    def __init__(self, config: dict):
+        logging_cfg = config.get('logging', {})
+        self.anagrafica_path = logging_cfg.get('anagrafica_file')
+        self.log_path = logging_cfg.get('log_file')
+        self.index_path = logging_cfg.get('index_file')
+
+    def init(self) -> bool:
+        """Crea/migra il file anagrafica."""
+        if not self.anagrafica_path:
+            return False
+        return init_anagrafica_csv(self.anagrafica_path)
+
+    # --- anagrafica: sedute --------------------------------------------------
+
+    def load_summary(self) -> tuple[Set[str], Optional[str], dict]:
+        """
+        Carica anagrafica esistente con count video per seduta.
+
+        Il file viene letto una volta nello store condiviso (logger.get_store),
+        riusato poi da get_existing_youtube_ids e upsert_seduta.
+
+        Returns:
+            Tuple (set numeri sedute processate, numero ultima seduta, dict{seduta: video_count})
+        """
+        try:
+            if not self.anagrafica_path or not Path(self.anagrafica_path).exists():
+                return set(), None, {}
+
+            sedute_processate = set()
+            ultima_seduta = None
+            seduta_video_count = {}
+
+            for row in logger.get_store(self.anagrafica_path).rows:
+                numero = row['numero_seduta']
+                if numero:
+                    sedute_processate.add(numero)
+                    ultima_seduta = numero
+                    # Conta video per seduta
+                    seduta_video_count[numero] = seduta_video_count.get(numero, 0) + 1
+
+            return sedute_processate, ultima_seduta, seduta_video_count
+
+        except Exception as e:
+            print(f"⚠ Errore lettura anagrafica: {e}")
+            return set(), None, {}
+
+    def get_existing_youtube_ids(self, numero_seduta: str) -> dict:
+        """
+        Estrae i campi da preservare per una seduta usando chiave (data_video, ora_video).
+
+        Returns:
+            Dict con chiave (data_video, ora_video) -> dict con youtube_id, status, failure_reason, ...
+        """
+        existing_ids = {}
+        try:
+            if not self.anagrafica_path or not Path(self.anagrafica_path).exists():
+                return existing_ids
+
+            for row in logger.get_store(self.anagrafica_path).rows:
+                if row['numero_seduta'] == numero_seduta:
+                    key = (row['data_video'], row['ora_video'])
+                    existing_ids[key] = {field: row.get(field, '') for field in PRESERVED_FIELDS}
+
+        except Exception as e:
+            print(f"⚠ Errore lettura youtube_id esistenti: {e}")
+
+        return existing_ids
+
+    def upsert_seduta(self, seduta_info: dict, replace: bool = False) -> int:
+        """
+        Salva una seduta; con replace=True sostituisce le righe esistenti
+        (chiave numero_seduta, data_video, ora_video) preservando youtube_id,
+        status, durata e flag trascrizione.
+
+        L'unione avviene in memoria: il CSV viene scritto una sola volta,
+        ordinato per data seduta, al flush() (o close()) di fine run.
+
+        Returns:
+            Numero video salvati
+        """
+        try:
+            # Stesso last_check anche se l'unione viene riapplicata dopo un reload
+            timestamp = datetime.now().isoformat()
+            return logger.get_store(self.anagrafica_path).upsert_seduta(
+                seduta_info['numero_seduta'],
+                lambda existing: build_seduta_rows(seduta_info, existing, timestamp),
+                replace=replace
+            )
+
+        except Exception as e:
+            print(f"✗ Errore salvataggio seduta: {e}")
+            return 0
+
+    def rows(self) -> list:
+        """Tutte le righe dell'anagrafica, ordinate (stabilmente) per data seduta come al flush."""
+        if not self.anagrafica_path or not Path(self.anagrafica_path).exists():
+            return []
+        rows = [dict(row) for row in logger.get_store(self.anagrafica_path).rows]
+        rows.sort(key=lambda row: row.get('data_seduta') or '')
+        return rows
+
+    # --- anagrafica: video ---------------------------------------------------
+
+    def is_uploaded(self, id_video: str, numero_seduta: str = None, data_seduta: str = None) -> bool:
+        if not self.anagrafica_path:
+            return False
+        return logger.is_video_uploaded_in_anagrafica(
+            self.anagrafica_path, id_video, numero_seduta=numero_seduta, data_seduta=data_seduta
+        )
+
+    def mark_uploaded(
+        self,
+        id_video: str,
+        youtube_id: str,
+        numero_seduta: str = None,
+        data_seduta: str = None,
+        duration_minutes: int = None,
+        flush: bool = True
+    ) -> bool:
+        if not self.anagrafica_path:
+            return False
+        return logger.update_anagrafica_youtube_id(
+            self.anagrafica_path,
+            id_video,
+            youtube_id,
+            numero_seduta=numero_seduta,
+            data_seduta=data_seduta,
+            duration_minutes=duration_minutes,
+            flush=flush
+        )
+
+    def mark_failed(
+        self,
+        id_video: str,
+        error: str,
+        numero_seduta: str = None,
+        data_seduta: str = None,
+        flush: bool = True
+    ) -> bool:
+        if not self.anagrafica_path:
+            return False
+        return logger.update_anagrafica_failure(
+            self.anagrafica_path,
+            id_video,
+            error,
+            numero_seduta=numero_seduta,
+            data_seduta=data_seduta,
+            flush=flush
+        )
+
+    def mark_no_transcript(self, youtube_id: str, flush: bool = True) -> bool:
+        if not self.anagrafica_path:
+            return False
+        return logger.update_anagrafica_no_transcript(self.anagrafica_path, youtube_id, flush=flush)
+
+    def flush(self) -> bool:
+        if not self.anagrafica_path:
+            return True
+        return logger.flush_anagrafica(self.anagrafica_path)
+
+    # --- log upload e indice -------------------------------------------------
+
+    def log_upload(self, video_info: dict, youtube_id: str, status: str, error: str = '') -> bool:
+        return logger.log_upload(self.log_path, video_info, youtube_id, status, error)
+
+    def is_logged_uploaded(self, id_video: str, numero_seduta: str = None, data_seduta: str = None) -> bool:
+        return logger.is_video_uploaded(
+            self.log_path, id_video, numero_seduta=numero_seduta, data_seduta=data_seduta
+        )
+
+    def failed_uploads(self) -> list:
+        return logger.get_failed_uploads(self.log_path)
+
+    def upload_stats(self) -> dict:
+        return logger.get_upload_stats(self.log_path)
+
+    def update_index(self, seduta_info: dict, videos: list) -> bool:
+        return logger.update_index(self.index_path, seduta_info, videos)
+
+    def close(self) -> None:
+        self.flush()
+
+
+class SqliteBackend:
+    """
+    Backend SQLite (WAL): anagrafica, log upload e indice in un unico database.
+
+    Ogni scrittura è una transazione, quindi crawler, uploader e job
+    trascrizioni possono girare in parallelo senza lock file. I CSV
+    (anagrafica_video.csv, index.csv) restano il formato di interscambio per
+    il sito statico e vengono rigenerati con export_csv(), in modo
+    deterministico e identico byte per byte a quanto scriverebbe il backend CSV.
+    """
+
+    name = 'sqlite'
+
+    def __init__(self, config: dict):
+        logging_cfg = config.get('logging', {})
+        storage_cfg = config.get('storage', {})
+        self.anagrafica_path = logging_cfg.get('anagrafica_file')
+        self.log_path = logging_cfg.get('log_file')
+        self.index_path = logging_cfg.get('index_file')
+        self.db_path = Path(storage_cfg.get('sqlite_path', DEFAULT_SQLITE_PATH))
+        self.export_on_close = storage_cfg.get('export_on_close', True)
+        self._dirty = False
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.db_path), timeout=30, isolation_level=None)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.execute('PRAGMA busy_timeout=30000')
+
+    @contextmanager
+    def _transaction(self):
+        self.conn.execute('BEGIN IMMEDIATE')
+        try:
+            yield self.conn
+        except BaseException:
+            self.conn.execute('ROLLBACK')
+            raise
+        self.conn.execute('COMMIT')
+
+    # --- schema --------------------------------------------------------------
+
+    def _columns(self, table: str) -> list:
+        return [row['name'] for row in self.conn.execute(f'PRAGMA table_info("{table}")')]
+
+    def _ensure_columns(self, fields: list) -> None:
+        present = set(self._columns('anagrafica'))
+        for field in fields:
+            if field not in present:
+                self.conn.execute(
+                    f'ALTER TABLE anagrafica ADD COLUMN "{field}" TEXT NOT NULL DEFAULT \'\''
+                )
+
+    def _get_meta(self, key: str) -> Optional[str]:
+        row = self.conn.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        return row['value'] if row else None
+
+    def _set_meta(self, key: str, value: str) -> None:
+        self.conn.execute(
+            'INSERT INTO meta(key, value) VALUES (?, ?) '
+            'ON CONFLICT(key) DO UPDATE SET value = excluded.value',
+            (key, value)
+        )
+
+    def _anagrafica_fields(self) -> list:
+        raw = self._get_meta('anagrafica_fields')
+        return json.loads(raw) if raw else list(ANAGRAFICA_FIELDS)
+
+    def init(self) -> bool:
+        """Crea lo schema e, al primo avvio, importa i CSV esistenti."""
+        try:
+            columns = ', '.join(f'"{f}" TEXT NOT NULL DEFAULT \'\'' for f in ANAGRAFICA_FIELDS)
+            log_columns = ', '.join(f'"{f}" TEXT NOT NULL DEFAULT \'\'' for f in LOG_FIELDS)
+            with self._transaction() as conn:
+                conn.execute('CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)')
+                conn.execute(f'CREATE TABLE IF NOT EXISTS anagrafica (pos INTEGER NOT NULL, {columns})')
+                conn.execute('CREATE INDEX IF NOT EXISTS idx_anagrafica_id_video ON anagrafica(id_video)')
+                conn.execute('CREATE INDEX IF NOT EXISTS idx_anagrafica_seduta ON anagrafica(numero_seduta)')
+                conn.execute('CREATE INDEX IF NOT EXISTS idx_anagrafica_youtube_id ON anagrafica(youtube_id)')
+                conn.execute('CREATE INDEX IF NOT EXISTS idx_anagrafica_pos ON anagrafica(pos)')
+                conn.execute(
+                    'CREATE TABLE IF NOT EXISTS sedute_index ('
+                    'pos INTEGER NOT NULL, numero_seduta TEXT PRIMARY KEY, '
+                    'data_seduta TEXT, url_pagina TEXT, video_count TEXT)'
+                )
+                conn.execute(f'CREATE TABLE IF NOT EXISTS upload_log ({log_columns})')
+                conn.execute(
+                    'CREATE INDEX IF NOT EXISTS idx_upload_log_video '
+                    'ON upload_log(id_video, numero_seduta, data_seduta)'
+                )
+
+                if self._get_meta('anagrafica_fields') is None:
+                    self._import_csv(conn)
+            return True
+
+        except Exception as e:
+            print(f"✗ Errore inizializzazione database: {e}")
+            return False
+
+    def _import_csv(self, conn) -> None:
+        """Importa anagrafica, indice e log upload dai CSV (migrazione iniziale)."""
+        fields = list(ANAGRAFICA_FIELDS)
+        if self.anagrafica_path and Path(self.anagrafica_path).exists():
+            with open(self.anagrafica_path, 'r', newline='', encoding='utf-8') as f:
+                reader = csv.DictReader(f)
+                fields = list(reader.fieldnames or ANAGRAFICA_FIELDS)
+                self._ensure_columns(fields)
+                self._insert_rows(conn, list(reader), fields, start_pos=0)
+            print(f"✓ Anagrafica importata in {self.db_path}")
+        # Stesse colonne aggiunte da init_anagrafica_csv sui file vecchi
+        fields += [f for f in ANAGRAFICA_FIELDS if f not in fields]
+        self._set_meta('anagrafica_fields', json.dumps(fields))
+
+        if self.index_path and Path(self.index_path).exists():
+            with open(self.index_path, 'r', newline='', encoding='utf-8') as f:
+                for pos, row in enumerate(csv.DictReader(f)):
+                    conn.execute(
+                        'INSERT OR REPLACE INTO sedute_index VALUES (?, ?, ?, ?, ?)',
+                        (pos, row['numero_seduta'], row['data_seduta'], row['url_pagina'], row['video_count'])
+                    )
+
+        if self.log_path and Path(self.log_path).exists():
+            with open(self.log_path, 'r', newline='', encoding='utf-8') as f:
+                placeholders = ', '.join('?' for _ in LOG_FIELDS)
+                conn.executemany(
+                    f'INSERT INTO upload_log VALUES ({placeholders})',
+                    ([row.get(field) or '' for field in LOG_FIELDS] for row in csv.DictReader(f))
+                )
+
+    def reimport_csv(self) -> bool:
+        """Sostituisce il contenuto del database con quello dei CSV attuali."""
+        try:
+            with self._transaction() as conn:
+                for table in ('meta', 'anagrafica', 'sedute_index', 'upload_log'):
+                    conn.execute(f'DELETE FROM {table}')
+                self._import_csv(conn)
+            self._dirty = False
+            return True
+        except Exception as e:
+            print(f"✗ Errore import CSV: {e}")
+            return False
+
+    def _insert_rows(self, conn, rows: list, fields: list, start_pos: int, step: int = 1) -> None:
+        # step=0: tutte le righe alla stessa pos, nell'ordine di inserimento (rowid)
+        columns = ', '.join(f'"{f}"' for f in fields)
+        placeholders = ', '.join('?' for _ in fields)
+        conn.executemany(
+            f'INSERT INTO anagrafica (pos, {columns}) VALUES (?, {placeholders})',
+            (
+                [start_pos + i * step] + [_csv_value(row.get(field)) for field in fields]
+                for i, row in enumerate(rows)
+            )
+        )
+
+    # --- anagrafica: sedute --------------------------------------------------
+
+    def load_summary(self) -> tuple[Set[str], Optional[str], dict]:
+        sedute_processate = set()
+        ultima_seduta = None
+        seduta_video_count = {}
+        for row in self.conn.execute(
+            "SELECT numero_seduta FROM anagrafica WHERE numero_seduta != '' ORDER BY pos, rowid"
+        ):
+            numero = row['numero_seduta']
+            sedute_processate.add(numero)
+            ultima_seduta = numero
+            seduta_video_count[numero] = seduta_video_count.get(numero, 0) + 1
+        return sedute_processate, ultima_seduta, seduta_video_count
+
+    def get_existing_youtube_ids(self, numero_seduta: str) -> dict:
+        columns = ', '.join(f'"{f}"' for f in PRESERVED_FIELDS)
+        existing = {}
+        for row in self.conn.execute(
+            f'SELECT data_video, ora_video, {columns} FROM anagrafica '
+            'WHERE numero_seduta = ? ORDER BY pos, rowid',
+            (numero_seduta,)
+        ):
+            existing[(row['data_video'], row['ora_video'])] = {
+                field: row[field] for field in PRESERVED_FIELDS
+            }
+        return existing
+
+    def upsert_seduta(self, seduta_info: dict, replace: bool = False) -> int:
+        """
+        Sostituisce le righe della seduta in un'unica transazione,
+        preservando i campi esistenti per (data_video, ora_video).
+
+        Come nel backend CSV le righe aggiornate restano al posto di quelle
+        vecchie (stessa pos, ordinate per rowid) e le sedute nuove vanno in coda.
+        """
+        try:
+            numero = seduta_info['numero_seduta']
+            with self._transaction() as conn:
+                existing = self.get_existing_youtube_ids(numero) if replace else {}
+                old_pos = None
+                if replace:
+                    old_pos = conn.execute(
+                        'SELECT MIN(pos) FROM anagrafica WHERE numero_seduta = ?', (numero,)
+                    ).fetchone()[0]
+                    conn.execute('DELETE FROM anagrafica WHERE numero_seduta = ?', (numero,))
+                rows = build_seduta_rows(seduta_info, existing)
+                if old_pos is not None:
+                    self._insert_rows(conn, rows, ANAGRAFICA_FIELDS, start_pos=old_pos, step=0)
+                else:
+                    next_pos = conn.execute('SELECT COALESCE(MAX(pos), -1) + 1 FROM anagrafica').fetchone()[0]
+                    self._insert_rows(conn, rows, ANAGRAFICA_FIELDS, start_pos=next_pos)
+            self._dirty = True
+            return len(rows)
+
+        except Exception as e:
+            print(f"✗ Errore salvataggio seduta: {e}")
+            return 0
+
+    def rows(self) -> list:
+        fields = self._anagrafica_fields()
+        columns = ', '.join(f'"{f}"' for f in fields)
+        return [
+            dict(zip(fields, row))
+            # Ordinamento stabile per data seduta, come il CSV scritto dal backend CSV
+            for row in self.conn.execute(
+                f'SELECT {columns} FROM anagrafica ORDER BY data_seduta, pos, rowid'
+            )
+        ]
+
+    # --- anagrafica: video ---------------------------------------------------
+
+    @staticmethod
+    def _video_filter(id_video: str, numero_seduta: str = None, data_seduta: str = None) -> tuple:
+        if numero_seduta and data_seduta:
+            return 'id_video = ? AND numero_seduta = ? AND data_seduta = ?', (id_video, numero_seduta, data_seduta)
+        return 'id_video = ?', (id_video,)
+
+    def is_uploaded(self, id_video: str, numero_seduta: str = None, data_seduta: str = None) -> bool:
+        where, params = self._video_filter(id_video, numero_seduta, data_seduta)
+        row = self.conn.execute(
+            f"SELECT 1 FROM anagrafica WHERE {where} AND youtube_id != '' LIMIT 1", params
+        ).fetchone()
+        return row is not None
+
+    def mark_uploaded(
+        self,
+        id_video: str,
+        youtube_id: str,
+        numero_seduta: str = None,
+        data_seduta: str = None,
+        duration_minutes: int = None,
+        flush: bool = True
+    ) -> bool:
+        try:
+            where, params = self._video_filter(id_video, numero_seduta, data_seduta)
+            assignments = "youtube_id = ?, last_check = ?, status = 'success', failure_reason = ''"
+            values = [youtube_id, datetime.now().isoformat()]
+            if duration_minutes is not None:
+                assignments += ', duration_minutes = ?'
+                values.append(str(duration_minutes))
+            with self._transaction() as conn:
+                conn.execute(f'UPDATE anagrafica SET {assignments} WHERE {where}', (*values, *params))
+            self._dirty = True
+            return True
+        except Exception as e:
+            print(f"Errore aggiornamento anagrafica: {e}")
+            return False
+
+    def mark_failed(
+        self,
+        id_video: str,
+        error: str,
+        numero_seduta: str = None,
+        data_seduta: str = None,
+        flush: bool = True
+    ) -> bool:
+        try:
+            where, params = self._video_filter(id_video, numero_seduta, data_seduta)
+            reason = (error or '').replace('\n', ' ').strip()
+            with self._transaction() as conn:
+                conn.execute(
+                    f"UPDATE anagrafica SET status = 'failed', failure_reason = ?, last_check = ? WHERE {where}",
+                    (reason, datetime.now().isoformat(), *params)
+                )
+            self._dirty = True
+            return True
+        except Exception as e:
+            print(f"Errore aggiornamento anagrafica (failed): {e}")
+            return False
+
+    def mark_no_transcript(self, youtube_id: str, flush: bool = True) -> bool:
+        try:
+            with self._transaction() as conn:
+                conn.execute(
+                    "UPDATE anagrafica SET no_transcript = 'true' WHERE youtube_id = ?",
+                    (youtube_id,)
+                )
+            self._dirty = True
+            return True
+        except Exception as e:
+            print(f"Errore aggiornamento anagrafica (no_transcript): {e}")
+            return False
+
+    def flush(self) -> bool:
+        # Ogni scrittura è già una transazione confermata
+        return True
+
+    # --- log upload e indice -------------------------------------------------
+
+    def log_upload(self, video_info: dict, youtube_id: str, status: str, error: str = '') -> bool:
+        try:
+            values = [
+                video_info.get('id_video', ''),
+                video_info.get('numero_seduta', ''),
+                video_info.get('data_seduta', ''),
+                video_info.get('data_video', ''),
+                video_info.get('ora_video', ''),
+                youtube_id,
+                datetime.now().isoformat(),
+                status,
+                error
+            ]
+            placeholders = ', '.join('?' for _ in LOG_FIELDS)
+            with self._transaction() as conn:
+                conn.execute(f'INSERT INTO upload_log VALUES ({placeholders})', [_csv_value(v) for v in values])
+            return True
+        except Exception as e:
+            print(f"Errore scrittura log: {e}")
+            return False
+
+    def is_logged_uploaded(self, id_video: str, numero_seduta: str = None, data_seduta: str = None) -> bool:
+        where, params = self._video_filter(id_video, numero_seduta, data_seduta)
+        row = self.conn.execute(
+            f"SELECT 1 FROM upload_log WHERE {where} AND status = 'success' LIMIT 1", params
+        ).fetchone()
+        return row is not None
+
+    def failed_uploads(self) -> list:
+        columns = ', '.join(f'"{f}"' for f in LOG_FIELDS)
+        return [
+            dict(zip(LOG_FIELDS, row))
+            for row in self.conn.execute(
+                f"SELECT {columns} FROM upload_log WHERE status = 'failed' ORDER BY rowid"
+            )
+        ]
+
+    def upload_stats(self) -> dict:
+        stats = {'total': 0, 'success': 0, 'failed': 0, 'pending': 0}
+        for row in self.conn.execute('SELECT LOWER(status) AS status, COUNT(*) AS n FROM upload_log GROUP BY 1'):
+            stats['total'] += row['n']
+            if row['status'] in stats:
+                stats[row['status']] += row['n']
+        return stats
+
+    def update_index(self, seduta_info: dict, videos: list) -> bool:
+        try:
+            with self._transaction() as conn:
+                next_pos = conn.execute('SELECT COALESCE(MAX(pos), -1) + 1 FROM sedute_index').fetchone()[0]
+                conn.execute(
+                    'INSERT INTO sedute_index VALUES (?, ?, ?, ?, ?) '
+                    'ON CONFLICT(numero_seduta) DO UPDATE SET '
+                    'data_seduta = excluded.data_seduta, url_pagina = excluded.url_pagina, '
+                    'video_count = excluded.video_count',
+                    (
+                        next_pos,
+                        seduta_info['numero_seduta'],
+                        _csv_value(seduta_info['data_seduta']),
+                        _csv_value(seduta_info['url_pagina']),
+                        str(len(videos))
+                    )
+                )
+            self._dirty = True
+            return True
+        except Exception as e:
+            print(f"Errore aggiornamento indice: {e}")
+            return False
+
+    # --- export --------------------------------------------------------------
+
+    def export_csv(self) -> bool:
+        """
+        Rigenera anagrafica_video.csv e index.csv dal database.
+
+        L'output è deterministico: stesso header, stesso ordine righe e stessa
+        serializzazione csv del backend CSV.
+        """
+        try:
+            if self.anagrafica_path:
+                _write_csv_atomic(Path(self.anagrafica_path), self._anagrafica_fields(), self.rows())
+
+            if self.index_path:
+                rows = [
+                    dict(zip(INDEX_FIELDS, row))
+                    for row in self.conn.execute(
+                        'SELECT numero_seduta, data_seduta, url_pagina, video_count '
+                        'FROM sedute_index ORDER BY pos'
+                    )
+                ]
+                # Stesso ordinamento di logger.update_index (stabile, data decrescente)
+                rows.sort(key=lambda x: x['data_seduta'] or '', reverse=True)
+                _write_csv_atomic(Path(self.index_path), INDEX_FIELDS, rows)
+
+            self._dirty = False
+            return True
+
+        except Exception as e:
+            print(f"✗ Errore export CSV: {e}")
+            return False
+
+    def close(self) -> None:
+        if self._dirty and self.export_on_close:
+            self.export_csv()
+        self.conn.close()
+
+
+BACKENDS = {
+    'csv': CsvBackend,
+    'sqlite': SqliteBackend,
+}
+
+
+def get_backend_name(config: dict) -> str:
+    """Nome backend da env ARS_STORAGE_BACKEND o config storage.backend (default csv)."""
+    return os.environ.get('ARS_STORAGE_BACKEND') or config.get('storage', {}).get('backend', 'csv')
+
+
+def get_backend(config: dict):
+    """
+    Istanzia il backend di storage configurato.
+
+    Raises:
+        ValueError: Se il backend non è supportato
+    """
+    name = get_backend_name(config)
+    if name not in BACKENDS:
+        raise ValueError(f"Backend storage non supportato: {name} (valori: {', '.join(BACKENDS)})")
+    return BACKENDS[name](config)
@@ -0,0 +1,222 @@
+"""Upload in streaming: HLS rimuxato da ffmpeg verso l'upload YouTube, senza file su disco."""
+
+import hashlib
+import subprocess
+import threading
+from typing import Optional
+
+from googleapiclient.http import MediaUpload
+
+
+DEFAULT_CHUNK_MB = 8
+DEFAULT_BUFFER_CHUNKS = 4
+DEFAULT_SOURCE_RETRIES = 3
+DEFAULT_MAX_RESTART_MB = 256  # Oltre questa quantità già inviata un ffmpeg fallito non viene riavviato
+CHUNK_ALIGN = 256 * 1024  # I chunk di un upload resumable devono essere multipli di 256 KB
+READ_SIZE = 256 * 1024
+
+
+class StreamSourceError(Exception):
+    """Il flusso in ingresso (ffmpeg) è fallito e non può essere ripreso."""
+
+
+class RingBufferUpload(MediaUpload):
+    """
+    MediaUpload resumable alimentato da un produttore, con buffer limitato.
+
+    Il buffer tiene i byte dall'ultimo offset confermato dal server in poi,
+    al massimo buffer_chunks × chunksize: se l'upload rallenta il produttore
+    si blocca (e con lui ffmpeg, tramite la pipe). Se un chunk fallisce,
+    googleapiclient chiede al server l'offset ricevuto e lo rilegge da qui:
+    i byte non confermati non vengono scartati finché non arriva la conferma.
+
+    La dimensione totale è ignota fino alla fine del flusso (Content-Range
+    "bytes a-b/*"); size() attende di avere un chunk intero più un byte, o la
+    fine del flusso, così l'ultimo chunk porta sempre la dimensione totale.
+    """
+
+    def __init__(
+        self,
+        chunksize: int = DEFAULT_CHUNK_MB * 1024 * 1024,
+        buffer_chunks: int = DEFAULT_BUFFER_CHUNKS,
+        mimetype: str = 'video/mp4'
+    ):
+        super().__init__()
+        self._chunksize = max(CHUNK_ALIGN, chunksize // CHUNK_ALIGN * CHUNK_ALIGN)
+        # Almeno il chunk in invio (non ancora confermato) + uno intero + un byte,
+        # quello che size() attende: con esattamente due chunk produttore e upload si bloccherebbero
+        self._capacity = self._chunksize * max(2, buffer_chunks) + 1
+        self._mimetype = mimetype
+        self._buffer = bytearray()
+        self._base = 0          # Offset del primo byte nel buffer
+        self._next_begin = 0    # Offset atteso per il prossimo getbytes
+        self._eof = False
+        self._error: Optional[BaseException] = None
+        self._cond = threading.Condition()
+        self.peak_buffered = 0
+
+    # --- lato produttore ---------------------------------------------------
+
+    def write(self, data: bytes) -> None:
+        """Accoda dati (blocca finché nel buffer c'è spazio)."""
+        with self._cond:
+            while len(self._buffer) >= self._capacity and self._error is None:
+                self._cond.wait()
+            if self._error is not None:
+                raise self._error
+            self._buffer += data
+            self.peak_buffered = max(self.peak_buffered, len(self._buffer))
+            self._cond.notify_all()
+
+    def finish(self) -> None:
+        """Fine del flusso."""
+        with self._cond:
+            self._eof = True
+            self._cond.notify_all()
+
+    def fail(self, error: BaseException) -> None:
+        """Interrompe il flusso: produttore e upload ricevono l'errore."""
+        with self._cond:
+            if self._error is None:
+                self._error = error
+            self._cond.notify_all()
+
+    @property
+    def failed(self) -> bool:
+        return self._error is not None
+
+    # --- interfaccia MediaUpload ------------------------------------------
+
+    def chunksize(self) -> int:
+        return self._chunksize
+
+    def mimetype(self) -> str:
+        return self._mimetype
+
+    def resumable(self) -> bool:
+        return True
+
+    def has_stream(self) -> bool:
+        return False
+
+    def size(self) -> Optional[int]:
+        with self._cond:
+            self._cond.wait_for(
+                lambda: self._eof or self._error is not None
+                or self._base + len(self._buffer) > self._next_begin + self._chunksize
+            )
+            if self._error is not None:
+                raise self._error
+            return self._base + len(self._buffer) if self._eof else None
+
+    def getbytes(self, begin: int, length: int) -> bytes:
+        with self._cond:
+            if begin < self._base:
+                raise StreamSourceError(f"Offset {begin} già scartato dal buffer (inizio {self._base})")
+            # Tutto ciò che precede begin è confermato dal server: si libera
+            del self._buffer[:begin - self._base]
+            self._base = begin
+            self._cond.notify_all()
+
+            self._cond.wait_for(lambda: self._eof or self._error is not None or len(self._buffer) >= length)
+            if self._error is not None:
+                raise self._error
+            data = bytes(self._buffer[:length])
+            self._next_begin = begin + len(data)
+            return data
+
+
+class FfmpegSource:
+    """
+    Rimuxa uno stream HLS in MP4 frammentato (ffmpeg -c copy) verso un RingBufferUpload.
+
+    Se ffmpeg fallisce a metà, viene riavviato fino a `retries` volte: i byte
+    già prodotti vengono riletti e scartati dopo aver verificato (SHA-1) che
+    coincidano con quelli già inviati, poi il flusso riprende dal punto in
+    cui si era interrotto. L'output è reso deterministico con -bitexact.
+
+    Un MP4 frammentato non si può ricominciare da un segmento HLS intermedio
+    (ffmpeg riscrive moov e timestamp), quindi il riavvio riscarica sempre
+    tutto il prefisso: oltre max_restart_mb già inviati il flusso fallisce
+    subito invece di riscaricare e riconfrontare l'intero video.
+    """
+
+    def __init__(
+        self,
+        input_url: str,
+        retries: int = DEFAULT_SOURCE_RETRIES,
+        max_restart_mb: float = DEFAULT_MAX_RESTART_MB
+    ):
+        self.input_url = input_url
+        self.retries = retries
+        self.max_restart = int(max_restart_mb * 1024 * 1024)
+        self.produced = 0
+        self._hash = hashlib.sha1()
+
+    def command(self) -> list:
+        return [
+            'ffmpeg', '-nostdin', '-loglevel', 'error',
+            '-i', self.input_url,
+            '-map', '0:v?', '-map', '0:a?',
+            '-c', 'copy', '-bsf:a', 'aac_adtstoasc',
+            '-fflags', '+bitexact', '-map_metadata', '-1',
+            '-f', 'mp4', '-movflags', 'frag_keyframe+empty_moov+default_base_moof',
+            'pipe:1'
+        ]
+
+    def _skip_produced(self, stdout) -> None:
+        """Rilegge i byte già inviati e verifica che l'output sia identico."""
+        expected = self._hash.hexdigest()
+        check = hashlib.sha1()
+        remaining = self.produced
+        while remaining:
+            data = stdout.read(min(READ_SIZE, remaining))
+            if not data:
+                raise StreamSourceError("Output ffmpeg più corto dopo il riavvio")
+            check.update(data)
+            remaining -= len(data)
+        if check.hexdigest() != expected:
+            raise StreamSourceError("Output ffmpeg diverso dopo il riavvio: impossibile riprendere")
+
+    def run(self, sink: RingBufferUpload) -> None:
+        """Produce il flusso nel sink (da eseguire in un thread)."""
+        try:
+            for attempt in range(self.retries + 1):
+                try:
+                    process = subprocess.Popen(self.command(), stdout=subprocess.PIPE)
+                except FileNotFoundError:
+                    raise StreamSourceError("ffmpeg non trovato")
+                try:
+                    if self.produced:
+                        print(f"  ↻ Riavvio ffmpeg, ripresa da {self.produced / 1024 / 1024:.1f} MB")
+                        self._skip_produced(process.stdout)
+                    while True:
+                        data = process.stdout.read(READ_SIZE)
+                        if not data:
+                            break
+                        sink.write(data)
+                        self._hash.update(data)
+                        self.produced += len(data)
+                except BaseException:
+                    process.kill()
+                    process.wait()
+                    raise
+                returncode = process.wait()
+
+                if returncode == 0:
+                    sink.finish()
+                    return
+                print(f"  ⚠ ffmpeg terminato con codice {returncode} (tentativo {attempt + 1})")
+                if self.produced > self.max_restart:
+                    raise StreamSourceError(
+                        f"ffmpeg fallito dopo {self.produced / 1024 / 1024:.0f} MB inviati: "
+                        f"riavvio oltre {self.max_restart / 1024 / 1024:.0f} MB non consentito"
+                    )
+            raise StreamSourceError(f"ffmpeg fallito dopo {self.retries + 1} tentativi")
+        except BaseException as e:
+            sink.fail(e if isinstance(e, StreamSourceError) else StreamSourceError(str(e)))
+
+    def start(self, sink: RingBufferUpload) -> threading.Thread:
+        thread = threading.Thread(target=self.run, args=(sink,), daemon=True)
+        thread.start()
+        return thread
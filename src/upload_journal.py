@@ -0,0 +1,381 @@
+"""Journal append-only del log upload con snapshot e compattazione."""
+
+import atexit
+import csv
+import hashlib
+import io
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+from .utils import atomic_write
+
+
+LOG_FIELDS = [
+    'id_video',
+    'numero_seduta',
+    'data_seduta',
+    'data_video',
+    'ora_video',
+    'video_id_youtube',
+    'upload_timestamp',
+    'status',
+    'error_message'
+]
+
+SNAPSHOT_VERSION = 2
+SNAPSHOT_EVERY = 20  # Scrive lo snapshot ogni N append (oltre che alla chiusura)
+FINGERPRINT_BYTES = 64
+
+
+def _empty_stats() -> dict:
+    return {'total': 0, 'success': 0, 'failed': 0, 'pending': 0}
+
+
+def _row_key(row: dict) -> tuple:
+    return (row.get('id_video', ''), row.get('numero_seduta', ''), row.get('data_seduta', ''))
+
+
+def _records(data: bytes, base: int):
+    """
+    Record CSV completi in data, con l'offset in byte (nel log) di ciascuno.
+
+    Una riga finale senza newline (scrittura interrotta) non viene restituita.
+
+    Yields:
+        Tuple (offset, campi)
+    """
+    end = data.rfind(b'\n') + 1
+    starts = []
+    position = base
+
+    def lines():
+        nonlocal position
+        for raw in io.BytesIO(data[:end]):
+            starts.append(position)
+            position += len(raw)
+            yield raw.decode('utf-8', errors='replace')
+
+    reader = csv.reader(lines())
+    while True:
+        first_line = len(starts)
+        try:
+            fields = next(reader)
+        except StopIteration:
+            return
+        yield starts[first_line], fields
+
+
+class UploadJournal:
+    """
+    Log upload CSV gestito come journal append-only.
+
+    Tiene un unico handle in append per tutta l'esecuzione e in memoria i
+    contatori per status e un indice compatto per video: per ogni chiave
+    (id_video, numero_seduta, data_seduta) l'offset nel log dell'ultima
+    entry success e dell'ultima entry failed. Le righe fallite si rileggono
+    dal log solo quando servono. Lo stato viene salvato in uno snapshot
+    accanto al log (`upload_log.csv.snapshot.json`) con l'offset in byte già
+    elaborato: al run successivo si rilegge solo la coda del file dopo
+    quell'offset. Lo snapshot cresce con il numero di video, non con le
+    entry del log.
+    """
+
+    def __init__(self, log_path: str):
+        self.path = Path(log_path)
+        self.snapshot_path = self.path.with_name(self.path.name + '.snapshot.json')
+        self._handle = None
+        self._writer = None
+        self._appends_since_snapshot = 0
+        self._reset()
+        self._load()
+
+    def _reset(self) -> None:
+        self.stats = _empty_stats()
+        # chiave -> [offset ultima entry success, offset ultima entry failed] (-1 se assente)
+        self._index: dict = {}
+        self._success_ids: set = set()
+        self._header = list(LOG_FIELDS)
+        self._offset = 0
+
+    # --- caricamento ---------------------------------------------------------
+
+    def _fingerprint(self, offset: int) -> str:
+        """Hash degli ultimi byte prima di offset (rileva file riscritti)."""
+        start = max(0, offset - FINGERPRINT_BYTES)
+        with open(self.path, 'rb') as f:
+            f.seek(start)
+            return hashlib.sha1(f.read(offset - start)).hexdigest()
+
+    def _load_snapshot(self, size: int) -> bool:
+        try:
+            data = json.loads(self.snapshot_path.read_text(encoding='utf-8'))
+        except (FileNotFoundError, ValueError):
+            return False
+
+        offset = data.get('offset', 0)
+        if data.get('version') != SNAPSHOT_VERSION or not 0 < offset <= size:
+            return False
+        if data.get('fingerprint') != self._fingerprint(offset):
+            return False
+
+        self.stats = {**_empty_stats(), **data.get('stats', {})}
+        self._header = data.get('header', list(LOG_FIELDS))
+        for id_video, numero_seduta, data_seduta, success_at, failed_at in data.get('index', []):
+            self._index[(id_video, numero_seduta, data_seduta)] = [success_at, failed_at]
+            if success_at >= 0:
+                self._success_ids.add(id_video)
+        self._offset = offset
+        return True
+
+    def _load(self) -> None:
+        if not self.path.exists():
+            return
+        size = self.path.stat().st_size
+        if not self._load_snapshot(size):
+            self._reset()
+        self._replay_tail()
+
+    def _replay_tail(self) -> None:
+        """Applica i record completi scritti dopo l'offset già elaborato."""
+        with open(self.path, 'rb') as f:
+            f.seek(self._offset)
+            tail = f.read()
+
+        for offset, fields in _records(tail, self._offset):
+            if offset == 0:
+                self._header = fields if 'status' in fields else list(LOG_FIELDS)
+            elif len(fields) == len(self._header):
+                self._apply(dict(zip(self._header, fields)), offset)
+            # Altrimenti riga malformata (es. scrittura interrotta poi chiusa): ignorata
+        self._offset += tail.rfind(b'\n') + 1
+
+    def _sync(self) -> None:
+        """Rilegge eventuali righe aggiunte da altri processi."""
+        try:
+            size = self.path.stat().st_size
+        except FileNotFoundError:
+            return
+        if size < self._offset:
+            # File troncato o compattato altrove: ricarica da zero
+            self._reset()
+            self._load()
+        elif size > self._offset:
+            self._replay_tail()
+
+    def _apply(self, row: dict, offset: int) -> None:
+        self.stats['total'] += 1
+        status = (row.get('status') or '').lower()
+        if status in self.stats:
+            self.stats[status] += 1
+        if row.get('status') not in ('success', 'failed'):
+            return
+        key = _row_key(row)
+        entry = self._index.setdefault(key, [-1, -1])
+        if row['status'] == 'success':
+            entry[0] = offset
+            self._success_ids.add(key[0])
+        else:
+            entry[1] = offset
+
+    def _read_row(self, f, offset: int) -> Optional[dict]:
+        """Entry del log che inizia all'offset dato (f aperto in binario)."""
+        f.seek(offset)
+        reader = csv.reader(line.decode('utf-8', errors='replace') for line in f)
+        fields = next(reader, None)
+        return dict(zip(self._header, fields)) if fields else None
+
+    # --- scrittura -----------------------------------------------------------
+
+    def _open_handle(self) -> None:
+        if self._handle is not None:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        new_file = not self.path.exists() or self.path.stat().st_size == 0
+        self._handle = open(self.path, 'a', newline='', encoding='utf-8')
+        self._writer = csv.writer(self._handle)
+        if new_file:
+            self._writer.writerow(LOG_FIELDS)
+            self._handle.flush()
+            print(f"Log file creato: {self.path}")
+            self._offset = os.fstat(self._handle.fileno()).st_size
+
+    def _seal_torn_line(self) -> None:
+        """Chiude con un newline una riga interrotta in fondo al file, così la prossima entry parte pulita."""
+        size = os.fstat(self._handle.fileno()).st_size
+        if size > self._offset:
+            self._handle.write('\n')
+            self._handle.flush()
+            self._replay_tail()
+
+    def append(
+        self,
+        video_info: dict,
+        youtube_id: str,
+        status: str,
+        error: str = '',
+        timestamp: str = ''
+    ) -> None:
+        """Aggiunge una entry al log e aggiorna lo stato in memoria."""
+        self._sync()
+        self._open_handle()
+        self._seal_torn_line()
+
+        row = {
+            'id_video': video_info.get('id_video', ''),
+            'numero_seduta': video_info.get('numero_seduta', ''),
+            'data_seduta': video_info.get('data_seduta', ''),
+            'data_video': video_info.get('data_video', ''),
+            'ora_video': video_info.get('ora_video', ''),
+            'video_id_youtube': youtube_id,
+            'upload_timestamp': timestamp or datetime.now().isoformat(),
+            'status': status,
+            'error_message': error
+        }
+        offset = os.fstat(self._handle.fileno()).st_size
+        self._writer.writerow([row[field] for field in LOG_FIELDS])
+        self._handle.flush()
+
+        self._apply({k: str(v) if v is not None else '' for k, v in row.items()}, offset)
+        self._offset = os.fstat(self._handle.fileno()).st_size
+
+        self._appends_since_snapshot += 1
+        if self._appends_since_snapshot >= SNAPSHOT_EVERY:
+            self.save_snapshot()
+
+    def save_snapshot(self) -> bool:
+        """Salva lo snapshot (offset, contatori e indice per video) in modo atomico."""
+        if self._offset == 0:
+            return False
+        try:
+            data = {
+                'version': SNAPSHOT_VERSION,
+                'offset': self._offset,
+                'fingerprint': self._fingerprint(self._offset),
+                'header': self._header,
+                'stats': self.stats,
+                'index': sorted([*key, *entry] for key, entry in self._index.items())
+            }
+            with atomic_write(self.snapshot_path, 'w', encoding='utf-8') as f:
+                f.write(json.dumps(data, ensure_ascii=False))
+            self._appends_since_snapshot = 0
+            return True
+        except Exception as e:
+            print(f"⚠ Impossibile salvare snapshot log ({self.snapshot_path}): {e}")
+            return False
+
+    def close(self) -> None:
+        """Salva lo snapshot e chiude l'handle in append."""
+        if self._handle is not None:
+            self._handle.close()
+            self._handle = None
+            self._writer = None
+        self.save_snapshot()
+
+    # --- interrogazioni ------------------------------------------------------
+
+    def is_uploaded(
+        self,
+        id_video: str,
+        numero_seduta: Optional[str] = None,
+        data_seduta: Optional[str] = None
+    ) -> bool:
+        """True se esiste una entry success per il video."""
+        self._sync()
+        if numero_seduta and data_seduta:
+            entry = self._index.get((id_video, numero_seduta, data_seduta))
+            return entry is not None and entry[0] >= 0
+        return id_video in self._success_ids
+
+    def failed_uploads(self) -> list:
+        """
+        Ultima entry failed di ogni video, in ordine di log.
+
+        Le righe vengono rilette dal log agli offset dell'indice.
+        """
+        self._sync()
+        offsets = sorted(entry[1] for entry in self._index.values() if entry[1] >= 0)
+        if not offsets:
+            return []
+        with open(self.path, 'rb') as f:
+            return [row for row in (self._read_row(f, offset) for offset in offsets) if row]
+
+    def get_stats(self) -> dict:
+        """Contatori per status."""
+        self._sync()
+        return dict(self.stats)
+
+    # --- compattazione -------------------------------------------------------
+
+    def compact(self) -> tuple[int, int]:
+        """
+        Riscrive il log tenendo una sola entry per video.
+
+        Per ogni chiave (id_video, numero_seduta, data_seduta) resta l'ultima
+        entry success se presente, altrimenti l'ultima entry registrata.
+
+        Returns:
+            Tuple (righe prima, righe dopo)
+        """
+        if self._handle is not None:
+            self._handle.close()
+            self._handle = None
+            self._writer = None
+
+        if not self.path.exists():
+            return 0, 0
+
+        with open(self.path, 'rb') as f:
+            data = f.read()
+        header = list(LOG_FIELDS)
+        rows = []
+        for offset, fields in _records(data, 0):
+            if offset == 0:
+                header = fields
+            elif len(fields) == len(header):
+                rows.append(dict(zip(header, fields)))
+
+        kept = {}
+        for position, row in enumerate(rows):
+            key = _row_key(row)
+            current = kept.get(key)
+            if current and current[1].get('status') == 'success' and row.get('status') != 'success':
+                continue
+            kept[key] = (position, row)
+
+        compacted = [row for _, row in sorted(kept.values(), key=lambda item: item[0])]
+
+        with atomic_write(self.path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(LOG_FIELDS)
+            for row in compacted:
+                writer.writerow([row.get(field, '') for field in LOG_FIELDS])
+
+        self._reset()
+        self._replay_tail()
+        self.save_snapshot()
+        return len(rows), len(compacted)
+
+
+_JOURNALS: dict = {}
+
+
+def get_journal(log_path: str) -> UploadJournal:
+    """Journal condiviso per path (uno per processo)."""
+    key = str(Path(log_path).resolve())
+    journal = _JOURNALS.get(key)
+    if journal is None:
+        journal = UploadJournal(log_path)
+        _JOURNALS[key] = journal
+    return journal
+
+
+def close_journals() -> None:
+    """Chiude tutti i journal aperti salvando gli snapshot."""
+    for journal in _JOURNALS.values():
+        journal.close()
+
+
+atexit.register(close_journals)
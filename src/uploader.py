@@ -2,16 +2,17 @@
 
 import json
 import os
+import time
 from pathlib import Path
-from typing import Optional
+from typing import Callable, Optional
 
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
-from google.auth.transport.requests import Request
-from googleapiclient.discovery import build
+import httplib2
 from googleapiclient.http import MediaFileUpload
 from googleapiclient.errors import HttpError
 
+from . import quota, streaming, youtube_api, youtube_auth
+from .utils import atomic_write
+
 
 SCOPES = [
     'https://www.googleapis.com/auth/youtube.upload',
@@ -22,6 +23,9 @@ SCOPES = [
 REPO_ROOT = Path(__file__).resolve().parents[1]
 DEFAULT_PLAYLIST_STATE_PATH = REPO_ROOT / "data/playlists.json"
 
+DEFAULT_UPLOAD_CHUNK_MB = 16
+UPLOAD_STATE_SUFFIX = '.upload.json'
+
 
 def _load_playlist_state(path: Path) -> dict:
     """
@@ -67,7 +71,8 @@ def authenticate(secrets_file: str, token_file: str):
     Autenticazione OAuth2 YouTube.
 
     Al primo avvio apre browser per autenticazione interattiva.
-    Successivamente usa refresh token salvato.
+    Successivamente usa il token salvato (rinnovato solo se scaduto); il
+    client è condiviso da tutte le chiamate del processo (src/youtube_auth.py).
 
     Args:
         secrets_file: Path al file credenziali OAuth2 da Google Cloud Console
@@ -80,78 +85,16 @@ def authenticate(secrets_file: str, token_file: str):
         FileNotFoundError: Se secrets_file non esiste
         Exception: Se autenticazione fallisce
     """
-    creds = None
+    return youtube_auth.get_client(secrets_file, token_file, SCOPES)
 
-    # Verifica che secrets file esista
-    if not Path(secrets_file).exists():
-        raise FileNotFoundError(
-            f"File credenziali non trovato: {secrets_file}\n"
-            "Scaricalo da Google Cloud Console e salvalo come config/youtube_secrets.json"
-        )
 
-    # Carica token esistente se presente
-    if Path(token_file).exists():
-        try:
-            creds = Credentials.from_authorized_user_file(token_file, SCOPES)
-            print("Token OAuth2 caricato")
-        except Exception as e:
-            print(f"Errore caricamento token: {e}")
-            creds = None
-
-    # Se token non valido o scaduto, refresha o crea nuovo
-    if not creds or not creds.valid:
-        if creds and creds.expired and creds.refresh_token:
-            try:
-                print("Refresh token OAuth2...")
-                creds.refresh(Request())
-                print("Token refreshato")
-            except Exception as e:
-                print(f"Errore refresh token: {e}")
-                creds = None
-
-        # Se ancora non valido, avvia flow interattivo
-        if not creds:
-            print("Avvio autenticazione OAuth2 interattiva...")
-            print("Si aprirà il browser per autorizzare l'applicazione.")
-
-            flow = InstalledAppFlow.from_client_secrets_file(secrets_file, SCOPES)
-            creds = flow.run_local_server(port=0)
-            print("Autenticazione completata")
-
-        # Salva token per prossime esecuzioni
-        Path(token_file).parent.mkdir(parents=True, exist_ok=True)
-        with open(token_file, 'w') as f:
-            f.write(creds.to_json())
-        print(f"Token salvato: {token_file}")
-
-    # Crea client YouTube API
-    youtube = build('youtube', 'v3', credentials=creds)
-    return youtube
-
-
-def upload_video(youtube, file_path: str, metadata: dict, playlist_id: Optional[str] = None) -> Optional[str]:
+def _insert_body(metadata: dict) -> tuple[dict, list]:
     """
-    Upload video su YouTube e aggiunta a playlist (opzionale).
-
-    Args:
-        youtube: YouTube API client
-        file_path: Path al file video
-        metadata: Dict con metadati video
-        playlist_id: ID playlist YouTube (opzionale)
+    Body e parti della richiesta videos.insert dai metadati.
 
     Returns:
-        ID video YouTube o None se fallito
-
-    Raises:
-        FileNotFoundError: Se file non esiste
-        HttpError: Se upload fallisce
+        Tuple (body, parts)
     """
-    if not Path(file_path).exists():
-        raise FileNotFoundError(f"File video non trovato: {file_path}")
-
-    print(f"  Upload video su YouTube...")
-
-    # Costruisci body richiesta
     body = {
         'snippet': {
             'title': metadata['title'],
@@ -173,50 +116,348 @@ def upload_video(youtube, file_path: str, metadata: dict, playlist_id: Optional[
             'recordingDate': metadata['recordingDate']
         }
 
-    # Prepara file per upload
-    media = MediaFileUpload(
-        file_path,
-        chunksize=-1,  # Upload in un solo chunk
-        resumable=True,
-        mimetype='video/*'
-    )
+    parts = ['snippet', 'status']
+    if 'recordingDetails' in body:
+        parts.append('recordingDetails')
+    return body, parts
+
+
+def _upload_state_path(file_path: str) -> Path:
+    """Sidecar con la sessione di upload resumable di un file video."""
+    return Path(f"{file_path}{UPLOAD_STATE_SUFFIX}")
+
 
+def _file_signature(file_path: str) -> dict:
+    stat = Path(file_path).stat()
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+def load_upload_session(file_path: str) -> Optional[dict]:
+    """
+    Sessione di upload salvata per file_path, se ancora valida.
+
+    Una sessione vale solo per lo stesso file (dimensione e mtime invariati):
+    se il file è stato riscaricato i byte già inviati non coincidono più.
+
+    Returns:
+        Dict con resumable_uri, offset, size, mtime_ns o None
+    """
+    state_path = _upload_state_path(file_path)
     try:
-        # Crea richiesta upload
-        parts = ['snippet', 'status']
-        if 'recordingDetails' in body:
-            parts.append('recordingDetails')
+        state = json.loads(state_path.read_text(encoding='utf-8'))
+        if state.get('resumable_uri') and {
+            'size': state.get('size'), 'mtime_ns': state.get('mtime_ns')
+        } == _file_signature(file_path):
+            return state
+    except (FileNotFoundError, ValueError, OSError):
+        pass
+    return None
+
+
+def _save_upload_session(file_path: str, resumable_uri: str, offset: int) -> None:
+    """Scrive il sidecar della sessione (atomico)."""
+    state_path = _upload_state_path(file_path)
+    state = {'resumable_uri': resumable_uri, 'offset': offset, **_file_signature(file_path)}
+    with atomic_write(state_path, 'w', encoding='utf-8') as f:
+        f.write(json.dumps(state, sort_keys=True))
+
+
+def clear_upload_session(file_path: str) -> None:
+    """Elimina il sidecar della sessione di upload (se presente)."""
+    _upload_state_path(file_path).unlink(missing_ok=True)
+
+
+def _resume_session(request, resumable_uri: str, total_size: int) -> Optional[dict]:
+    """
+    Riaggancia una richiesta di upload a una sessione resumable esistente.
+
+    Chiede al server i byte ricevuti con una PUT vuota e Content-Range
+    "bytes */<size>": 308 con header Range "bytes=0-N" (o senza Range se non
+    è arrivato nulla) = upload da completare, 200/201 = upload già concluso.
+    La richiesta riparte dall'offset confermato impostando resumable_uri e
+    resumable_progress.
+
+    Args:
+        request: HttpRequest di videos.insert con media resumable
+        resumable_uri: URI della sessione salvata
+        total_size: Dimensione del file
+
+    Returns:
+        Risposta dell'API se l'upload era già concluso, altrimenti None
+
+    Raises:
+        HttpError: Sessione scaduta (404/410) o altro errore del server
+    """
+    resp, content = request.http.request(
+        resumable_uri,
+        'PUT',
+        headers={'Content-Range': f'bytes */{total_size}', 'content-length': '0'}
+    )
+    if resp.status in (200, 201):
+        return json.loads(content)
+    if resp.status != 308:
+        raise HttpError(resp, content, uri=resumable_uri)
+
+    offset = int(resp['range'].rsplit('-', 1)[1]) + 1 if 'range' in resp else 0
+    request.resumable_uri = resumable_uri
+    request.resumable_progress = offset
+    return None
+
+
+def _chunk_bytes(chunk_mb: float) -> int:
+    """Dimensione chunk in byte, multipla di 256 KB come richiesto dall'API."""
+    chunk = int(chunk_mb * 1024 * 1024)
+    return max(streaming.CHUNK_ALIGN, chunk // streaming.CHUNK_ALIGN * streaming.CHUNK_ALIGN)
+
+
+def _execute_resumable(
+    request,
+    total_size: Optional[int] = None,
+    on_progress: Optional[Callable[[], None]] = None,
+    max_chunk_failures: int = 5
+) -> dict:
+    """
+    Esegue una richiesta di upload resumable un chunk alla volta.
+
+    Su errore 5xx, 429 o di rete googleapiclient chiede al server l'offset
+    ricevuto e riprende da lì; dopo max_chunk_failures errori consecutivi
+    l'eccezione viene propagata. Per ogni chunk stampa byte e throughput.
+
+    Args:
+        request: HttpRequest con media resumable
+        total_size: Byte totali (per la percentuale), None se ignoti
+        on_progress: Chiamata dopo ogni chunk (anche fallito): resumable_uri
+            e resumable_progress della richiesta sono aggiornati
+        max_chunk_failures: Errori consecutivi tollerati sullo stesso chunk
+
+    Returns:
+        Risposta dell'API a upload completato
+
+    Raises:
+        HttpError: Errore 4xx o troppi errori consecutivi
+    """
+    response = None
+    failures = 0
+    chunk_number = 0
+    while response is None:
+        offset = request.resumable_progress
+        started = time.monotonic()
+        try:
+            # Nessun retry interno: con MediaFileUpload il chunk è uno stream già
+            # consumato e verrebbe reinviato vuoto; qui si riparte dall'offset
+            status, response = request.next_chunk(num_retries=0)
+            failures = 0
+        except HttpError as e:
+            if e.resp.status < 500 and e.resp.status != 429:
+                raise
+            failures += 1
+            if failures > max_chunk_failures:
+                raise
+            print(f"  ⚠ Chunk fallito (HTTP {e.resp.status}), ripresa dall'ultimo offset confermato...")
+            time.sleep(2 ** failures)
+            continue
+        except (OSError, httplib2.HttpLib2Error) as e:
+            failures += 1
+            if failures > max_chunk_failures:
+                raise
+            print(f"  ⚠ Chunk fallito ({e}), ripresa dall'ultimo offset confermato...")
+            time.sleep(2 ** failures)
+            continue
+        finally:
+            if on_progress is not None and request.resumable_uri:
+                on_progress()
+
+        elapsed = time.monotonic() - started
+        # A upload completato il server non restituisce l'offset: sono stati inviati tutti i byte
+        committed = request.resumable.size() if response is not None else request.resumable_progress
+        sent_mb = max(0, committed - offset) / 1024 / 1024
+        if sent_mb:
+            chunk_number += 1
+            progress = f" ({committed * 100 // total_size}%)" if total_size else ""
+            print(
+                f"  Chunk {chunk_number}: {sent_mb:.1f} MB in {elapsed:.1f}s "
+                f"({sent_mb / max(elapsed, 1e-6):.1f} MB/s), "
+                f"totale {committed / 1024 / 1024:.0f} MB{progress}"
+            )
+    return response
+
+
+def upload_video(
+    youtube,
+    file_path: str,
+    metadata: dict,
+    playlist_id: Optional[str] = None,
+    chunk_mb: float = DEFAULT_UPLOAD_CHUNK_MB,
+    max_chunk_failures: int = 5
+) -> Optional[str]:
+    """
+    Upload video su YouTube e aggiunta a playlist (opzionale).
+
+    L'upload è resumable a chunk di chunk_mb MB: dopo ogni chunk l'URI della
+    sessione e l'offset confermato vengono salvati in <file>.upload.json.
+    Un nuovo tentativo (o una nuova esecuzione) sullo stesso file riprende
+    la sessione chiedendo al server l'offset ricevuto, senza ricaricare i
+    byte già inviati; se la sessione è scaduta ne apre una nuova.
 
+    Args:
+        youtube: YouTube API client
+        file_path: Path al file video
+        metadata: Dict con metadati video
+        playlist_id: ID playlist YouTube (opzionale)
+        chunk_mb: Dimensione chunk di upload (MB, arrotondata a multipli di 256 KB)
+        max_chunk_failures: Errori consecutivi tollerati sullo stesso chunk
+
+    Returns:
+        ID video YouTube o None se fallito
+
+    Raises:
+        FileNotFoundError: Se file non esiste
+        HttpError: Se upload fallisce
+    """
+    if not Path(file_path).exists():
+        raise FileNotFoundError(f"File video non trovato: {file_path}")
+
+    body, parts = _insert_body(metadata)
+    total_size = Path(file_path).stat().st_size
+    session = load_upload_session(file_path)
+
+    while True:
+        media = MediaFileUpload(
+            file_path,
+            chunksize=_chunk_bytes(chunk_mb),
+            resumable=True,
+            mimetype='video/*'
+        )
         request = youtube.videos().insert(
             part=','.join(parts),
             body=body,
             media_body=media
         )
 
-        # Esegui upload
-        print(f"  Upload in corso...")
-        response = request.execute()
+        if not session:
+            print(f"  Upload video su YouTube (chunk {_chunk_bytes(chunk_mb) / 1024 / 1024:g} MB)...")
+            # La quota di videos.insert si paga all'apertura della sessione
+            quota.record('videos.insert')
 
-        video_id = response.get('id')
-        if video_id:
-            print(f"  ✓ Video caricato: https://youtube.com/watch?v={video_id}")
+        try:
+            if session:
+                # Sessione salvata: si riparte dall'offset che il server conferma di avere
+                response = _resume_session(request, session['resumable_uri'], total_size)
+                if response is not None:
+                    print(f"  ↻ Upload già completato nella sessione salvata")
+                    break
+                print(f"  ↻ Ripresa upload da {request.resumable_progress / 1024 / 1024:.0f} MB")
+            response = _execute_resumable(
+                request,
+                total_size,
+                on_progress=lambda: _save_upload_session(
+                    file_path, request.resumable_uri, request.resumable_progress
+                ),
+                max_chunk_failures=max_chunk_failures
+            )
+            break
+        except HttpError as e:
+            if session and e.resp.status in (404, 410):
+                # Sessione scaduta o non più valida: si ricomincia da capo
+                print(f"  ⚠ Sessione di upload scaduta (HTTP {e.resp.status}), nuovo upload")
+                clear_upload_session(file_path)
+                session = None
+                continue
+            print(f"  ✗ Errore HTTP upload: {e}")
+            quota.note_error(e)
+            raise
+        except Exception as e:
+            print(f"  ✗ Errore upload: {e}")
+            raise
 
-            # Aggiungi a playlist se specificato
-            if playlist_id:
-                add_video_to_playlist(youtube, video_id, playlist_id)
+    clear_upload_session(file_path)
 
-            return video_id
-        else:
-            print(f"  ✗ Upload fallito: nessun ID restituito")
-            return None
+    video_id = response.get('id')
+    if video_id:
+        print(f"  ✓ Video caricato: https://youtube.com/watch?v={video_id}")
 
-    except HttpError as e:
-        print(f"  ✗ Errore HTTP upload: {e}")
-        raise
-    except Exception as e:
-        print(f"  ✗ Errore upload: {e}")
+        # Aggiungi a playlist se specificato
+        if playlist_id:
+            add_video_to_playlist(youtube, video_id, playlist_id)
+
+        return video_id
+
+    print(f"  ✗ Upload fallito: nessun ID restituito")
+    return None
+
+
+def upload_video_stream(
+    youtube,
+    stream_url: str,
+    metadata: dict,
+    playlist_id: Optional[str] = None,
+    chunk_mb: int = streaming.DEFAULT_CHUNK_MB,
+    buffer_chunks: int = streaming.DEFAULT_BUFFER_CHUNKS,
+    max_chunk_failures: int = 5,
+    max_restart_mb: float = streaming.DEFAULT_MAX_RESTART_MB
+) -> Optional[str]:
+    """
+    Upload su YouTube direttamente da uno stream HLS, senza file su disco.
+
+    ffmpeg rimuxa lo stream (senza ricodifica) in MP4 frammentato; i byte
+    passano da un buffer di buffer_chunks × chunk_mb MB a una sessione di
+    upload resumable, un chunk per richiesta. Un chunk fallito viene
+    ripreso dall'offset confermato dal server; un ffmpeg fallito viene
+    riavviato e riprende dallo stesso byte finché sono stati inviati al più
+    max_restart_mb (vedi streaming.FfmpegSource), altrimenti l'upload fallisce.
+
+    Args:
+        youtube: YouTube API client
+        stream_url: URL playlist HLS (m3u8)
+        metadata: Dict con metadati video
+        playlist_id: ID playlist YouTube (opzionale)
+        chunk_mb: Dimensione chunk di upload (MB, multipli di 256 KB)
+        buffer_chunks: Chunk massimi in memoria
+        max_chunk_failures: Errori consecutivi tollerati sullo stesso chunk
+        max_restart_mb: MB già inviati oltre i quali ffmpeg non viene riavviato
+
+    Returns:
+        ID video YouTube o None se fallito
+
+    Raises:
+        streaming.StreamSourceError: Se lo stream in ingresso non è recuperabile
+        HttpError: Se upload fallisce
+    """
+    print(f"  Upload in streaming su YouTube (chunk {chunk_mb} MB, buffer {buffer_chunks} chunk)...")
+
+    body, parts = _insert_body(metadata)
+    media = streaming.RingBufferUpload(chunk_mb * 1024 * 1024, buffer_chunks)
+    source = streaming.FfmpegSource(stream_url, max_restart_mb=max_restart_mb)
+    source.start(media)
+
+    try:
+        request = youtube.videos().insert(
+            part=','.join(parts),
+            body=body,
+            media_body=media
+        )
+        quota.record('videos.insert')
+
+        response = _execute_resumable(request, max_chunk_failures=max_chunk_failures)
+    except BaseException as e:
+        # Sblocca e ferma ffmpeg
+        media.fail(e)
+        if isinstance(e, HttpError):
+            quota.note_error(e)
         raise
 
+    print(f"  Picco buffer: {media.peak_buffered / 1024 / 1024:.1f} MB, totale {source.produced / 1024 / 1024:.1f} MB")
+
+    video_id = response.get('id')
+    if video_id:
+        print(f"  ✓ Video caricato: https://youtube.com/watch?v={video_id}")
+        if playlist_id:
+            add_video_to_playlist(youtube, video_id, playlist_id)
+        return video_id
+
+    print(f"  ✗ Upload fallito: nessun ID restituito")
+    return None
+
 
 def get_channel_info(youtube) -> Optional[dict]:
     """
@@ -233,6 +474,7 @@ def get_channel_info(youtube) -> Optional[dict]:
             part='snippet,contentDetails,statistics',
             mine=True
         )
+        quota.record('channels.list')
         response = request.execute()
 
         if response.get('items'):
@@ -285,6 +527,7 @@ def create_playlist(youtube, year: str, title: str = None, description: str = No
                 }
             }
         )
+        quota.record('playlists.insert')
         response = request.execute()
 
         playlist_id = response.get('id')
@@ -318,24 +561,15 @@ def add_video_to_playlist(youtube, video_id: str, playlist_id: str) -> bool:
         True se successo, False altrimenti
     """
     try:
-        request = youtube.playlistItems().insert(
-            part='snippet',
-            body={
-                'snippet': {
-                    'playlistId': playlist_id,
-                    'resourceId': {
-                        'kind': 'youtube#video',
-                        'videoId': video_id
-                    }
-                }
-            }
-        )
+        request = youtube_api.playlist_item_request(youtube, video_id, playlist_id)
+        quota.record('playlistItems.insert')
         response = request.execute()
         print(f"  ✓ Video aggiunto a playlist: {playlist_id}")
         return True
 
     except HttpError as e:
         print(f"  ✗ Errore aggiunta a playlist: {e}")
+        quota.note_error(e)
         return False
     except Exception as e:
         print(f"  ✗ Errore aggiunta a playlist: {e}")
@@ -438,24 +672,29 @@ def get_playlist_id_for_year(
 
 def check_quota_usage(youtube) -> Optional[dict]:
     """
-    Verifica quota API YouTube utilizzata (approssimata).
+    Quota API YouTube del giorno corrente dal registro locale (src/quota.py).
 
-    NOTA: La quota esatta non è disponibile via API.
-    Questa funzione fornisce solo una stima basata su upload recenti.
+    NOTA: La quota esatta non è disponibile via API: il registro conta le
+    chiamate fatte da questo progetto (upload, descrizioni, sottotitoli).
 
     Args:
         youtube: YouTube API client
 
     Returns:
-        Dict con stima quota o None
+        Dict con limite, unità usate/residue e costi per upload
     """
-    # YouTube API non espone quota usage direttamente
-    # Questa è solo una stima
+    ledger = quota.get_ledger()
+    upload_cost = quota.COSTS['videos.insert']
+    playlist_cost = quota.COSTS['playlistItems.insert']
+    remaining = ledger.remaining()
     return {
-        'daily_limit': 10000,
-        'upload_cost': 1600,
-        'playlist_cost': 50,
-        'total_cost_per_video': 1650,
-        'max_daily_uploads': 6,
-        'note': 'Quota esatta disponibile solo su Google Cloud Console'
+        'daily_limit': ledger.daily_limit,
+        'used': ledger.used(),
+        'remaining': remaining,
+        'upload_allowance': ledger.allowance(quota.JOB_UPLOAD),
+        'upload_cost': upload_cost,
+        'playlist_cost': playlist_cost,
+        'total_cost_per_video': upload_cost + playlist_cost,
+        'max_daily_uploads': ledger.daily_limit // (upload_cost + playlist_cost),
+        'note': f'Giorno di quota {quota.quota_day()} (ora del Pacifico), registro {ledger.path}'
     }
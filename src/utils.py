@@ -1,7 +1,11 @@
 """Utility functions per il progetto ARS YouTube uploader."""
 
+from contextlib import contextmanager
 from datetime import datetime
+from pathlib import Path
+import os
 import re
+import tempfile
 
 
 def format_date_italian(date_str: str) -> str:
@@ -141,3 +145,42 @@ def parse_time_from_text(text: str) -> str | None:
         minute = match.group(2)
         return f"{hour}:{minute}"
     return None
+
+
+@contextmanager
+def atomic_write(path, mode: str = 'w', **kwargs):
+    """
+    Scrive un file via file temporaneo + os.replace.
+
+    Il temporaneo ha un nome univoco (mkstemp) nella stessa directory del
+    file: processi che scrivono lo stesso file in contemporanea non
+    condividono mai il file parziale, e os.replace pubblica sempre un file
+    completo. In caso di errore il temporaneo viene rimosso e il file
+    originale resta invariato.
+
+    Args:
+        path: Path del file da scrivere
+        mode: Modalità di apertura ('w' o 'wb')
+        **kwargs: Argomenti per open (es. newline, encoding)
+
+    Yields:
+        File aperto sul temporaneo
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        permissions = path.stat().st_mode & 0o777
+    except FileNotFoundError:
+        permissions = 0o644
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f'.{path.name}.', suffix='.tmp')
+    try:
+        os.fchmod(fd, permissions)
+        with os.fdopen(fd, mode, **kwargs) as f:
+            yield f
+        os.replace(tmp_name, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except FileNotFoundError:
+            pass
+        raise
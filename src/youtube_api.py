@@ -0,0 +1,203 @@
+"""Chiamate YouTube Data API raggruppate: videos.list a 50 id e BatchHttpRequest."""
+
+from collections import Counter
+from typing import Iterable, Optional
+
+import httplib2
+from googleapiclient.errors import HttpError
+
+from . import quota
+
+
+MAX_IDS_PER_LIST = 50  # Limite di id per videos.list
+DEFAULT_BATCH_SIZE = 50  # Sottorichieste per BatchHttpRequest
+RETRY_STATUS = (409, 429, 500, 502, 503, 504)
+
+
+def _chunks(items: list, size: int) -> Iterable[list]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def list_videos(
+    youtube,
+    video_ids: Iterable[str],
+    part: str = 'snippet',
+    batch_size: int = MAX_IDS_PER_LIST
+) -> dict:
+    """
+    Risorse video per id, con una chiamata videos.list ogni 50 id.
+
+    Ogni chiamata costa 1 unità di quota indipendentemente dal numero di id.
+    Gli id assenti dalla risposta (video rimossi o privati) non compaiono
+    nel risultato.
+
+    Args:
+        youtube: YouTube API client
+        video_ids: ID video YouTube (duplicati ignorati)
+        part: Parti richieste (es. 'snippet,status,recordingDetails')
+        batch_size: Id per chiamata (massimo 50)
+
+    Returns:
+        Dict {video_id: risorsa video}
+
+    Raises:
+        HttpError: Se una chiamata fallisce (quotaExceeded viene registrato)
+    """
+    ids = list(dict.fromkeys(video_ids))
+    items = {}
+    for chunk in _chunks(ids, min(batch_size, MAX_IDS_PER_LIST)):
+        try:
+            response = youtube.videos().list(
+                part=part,
+                id=','.join(chunk),
+                maxResults=len(chunk)
+            ).execute()
+        except HttpError as e:
+            quota.note_error(e)
+            raise
+        finally:
+            quota.record('videos.list')
+        for item in response.get('items', []):
+            items[item['id']] = item
+    return items
+
+
+def execute_batch(
+    youtube,
+    requests: list,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    retry_failed: bool = True
+) -> tuple[dict, dict]:
+    """
+    Esegue richieste API in BatchHttpRequest e separa esiti ed errori per richiesta.
+
+    Il batch riduce i round trip HTTP (una richiesta ogni batch_size), non
+    la quota: ogni sottorichiesta costa come se fosse inviata da sola.
+    YouTube esegue le sottorichieste in parallelo: vanno raggruppate solo
+    letture o scritture su risorse diverse (es. videos.update di video
+    distinti), mai inserimenti nella stessa playlist. Le sottorichieste
+    fallite con errori temporanei (409, 429, 5xx) vengono ritentate una
+    volta, da sole. Con quotaExceeded le richieste non ancora inviate
+    vengono segnate con lo stesso errore senza inviarle.
+
+    Args:
+        youtube: YouTube API client
+        requests: Lista di tuple (chiave, metodo, HttpRequest); metodo è il
+            tipo di chiamata per il registro quota (es. 'videos.update')
+        batch_size: Sottorichieste per batch
+        retry_failed: Ritenta singolarmente gli errori temporanei
+
+    Returns:
+        Tuple (risposte, errori): dict chiave -> risposta e dict chiave -> eccezione
+    """
+    responses: dict = {}
+    errors: dict = {}
+    retry: list = []
+    exhausted: Optional[Exception] = None
+
+    for chunk in _chunks(list(requests), batch_size):
+        if exhausted is not None:
+            for key, _, _ in chunk:
+                errors[key] = exhausted
+            continue
+
+        # request_id = posizione nel chunk: le chiavi del chiamante possono non essere stringhe
+        by_id = {str(index): (key, method, request) for index, (key, method, request) in enumerate(chunk)}
+
+        def callback(request_id: str, response, exception) -> None:
+            key, method, request = by_id[request_id]
+            if exception is None:
+                responses[key] = response
+            elif retry_failed and isinstance(exception, HttpError) and \
+                    exception.resp.status in RETRY_STATUS and not quota.is_quota_exceeded(exception):
+                retry.append((key, method, request))
+            else:
+                errors[key] = exception
+
+        batch = youtube.new_batch_http_request(callback=callback)
+        for request_id, (_, _, request) in by_id.items():
+            batch.add(request, request_id=request_id)
+        try:
+            batch.execute()
+        except (HttpError, httplib2.HttpLib2Error, OSError) as e:
+            # Errore dell'intero batch: nessuna sottorichiesta ha avuto esito
+            for key, _, _ in by_id.values():
+                if key not in responses:
+                    errors.setdefault(key, e)
+        finally:
+            for method, calls in Counter(method for _, method, _ in by_id.values()).items():
+                quota.record(method, calls)
+
+        for key, _, _ in by_id.values():
+            if key in errors and quota.note_error(errors[key]):
+                exhausted = errors[key]
+                break
+
+    for key, method, request in retry:
+        if exhausted is not None:
+            errors[key] = exhausted
+            continue
+        try:
+            responses[key] = request.execute()
+        except HttpError as e:
+            errors[key] = e
+            if quota.note_error(e):
+                exhausted = e
+        finally:
+            quota.record(method)
+
+    return responses, errors
+
+
+def playlist_item_request(youtube, video_id: str, playlist_id: str):
+    """Richiesta playlistItems.insert (non eseguita) per aggiungere un video a una playlist."""
+    return youtube.playlistItems().insert(
+        part='snippet',
+        body={
+            'snippet': {
+                'playlistId': playlist_id,
+                'resourceId': {
+                    'kind': 'youtube#video',
+                    'videoId': video_id
+                }
+            }
+        }
+    )
+
+
+def add_videos_to_playlist(youtube, video_ids: Iterable[str], playlist_id: str) -> tuple[list, dict]:
+    """
+    Aggiunge più video a una playlist, uno alla volta nell'ordine dato.
+
+    Gli inserimenti nella stessa playlist non vanno in batch: YouTube
+    eseguirebbe le sottorichieste in parallelo, con ordine della playlist
+    casuale e conflitti (409) tra inserimenti concorrenti. Con
+    quotaExceeded i video rimanenti vengono segnati con lo stesso errore
+    senza inviarli.
+
+    Args:
+        youtube: YouTube API client
+        video_ids: ID video YouTube (duplicati ignorati)
+        playlist_id: ID playlist YouTube
+
+    Returns:
+        Tuple (id aggiunti nell'ordine dato, dict id -> errore per i falliti)
+    """
+    added = []
+    errors: dict = {}
+    exhausted: Optional[Exception] = None
+    for video_id in dict.fromkeys(video_ids):
+        if exhausted is not None:
+            errors[video_id] = exhausted
+            continue
+        try:
+            playlist_item_request(youtube, video_id, playlist_id).execute()
+            added.append(video_id)
+        except (HttpError, httplib2.HttpLib2Error, OSError) as e:
+            errors[video_id] = e
+            if quota.note_error(e):
+                exhausted = e
+        finally:
+            quota.record('playlistItems.insert')
+    return added, errors
@@ -0,0 +1,175 @@
+"""Credenziali OAuth2 e client YouTube API condivisi nel processo."""
+
+import json
+import threading
+from pathlib import Path
+from typing import Optional
+
+import google_auth_httplib2
+import httplib2
+from google.auth.transport.requests import Request
+from google.oauth2.credentials import Credentials
+from google_auth_oauthlib.flow import InstalledAppFlow
+from googleapiclient.discovery import build
+
+from .utils import atomic_write
+
+
+DEFAULT_HTTP_TIMEOUT = 60  # Secondi per richiesta
+
+# Client già costruiti: (token_file, scopes) -> (credenziali, client, access token salvato)
+_clients: dict = {}
+_lock = threading.Lock()
+
+
+def _client_info(secrets_file: Path) -> dict:
+    """client_id e client_secret dal file credenziali OAuth2 (tipo installed o web)."""
+    secrets = json.loads(secrets_file.read_text(encoding='utf-8'))
+    info = secrets.get('installed') or secrets.get('web') or {}
+    return {key: info[key] for key in ('client_id', 'client_secret', 'token_uri') if info.get(key)}
+
+
+def _save_token(creds: Credentials, token_file: Path) -> None:
+    """Salva il token (access token con scadenza + refresh token) in modo atomico, mantenendo i permessi del file."""
+    with atomic_write(token_file, 'w', encoding='utf-8') as f:
+        f.write(creds.to_json())
+
+
+def load_credentials(
+    secrets_file: str,
+    token_file: str,
+    scopes: Optional[list] = None,
+    interactive: bool = True
+) -> Credentials:
+    """
+    Credenziali OAuth2 dal token salvato, rinnovate solo se scadute.
+
+    Il token salvato contiene l'access token con la sua scadenza (expiry):
+    finché è valido non serve nessuna chiamata di rete. Alla scadenza viene
+    rinnovato con il refresh token e risalvato, così anche il processo
+    successivo lo riusa. I token senza client_id/client_secret (salvati a
+    mano) vengono completati dal file credenziali.
+
+    Args:
+        secrets_file: Path al file credenziali OAuth2 da Google Cloud Console
+        token_file: Path del token salvato
+        scopes: Scope richiesti (default: quelli salvati nel token)
+        interactive: Se manca un token valido apre il flow OAuth2 nel browser
+
+    Returns:
+        Credenziali valide
+
+    Raises:
+        FileNotFoundError: Se secrets_file non esiste
+        RuntimeError: Se il token manca o non è rinnovabile e interactive è False
+    """
+    secrets_path = Path(secrets_file)
+    token_path = Path(token_file)
+    if not secrets_path.exists():
+        raise FileNotFoundError(
+            f"File credenziali non trovato: {secrets_file}\n"
+            "Scaricalo da Google Cloud Console e salvalo come config/youtube_secrets.json"
+        )
+
+    creds = None
+    if token_path.exists():
+        try:
+            info = {**_client_info(secrets_path), **json.loads(token_path.read_text(encoding='utf-8'))}
+            if not info.get('expiry'):
+                # Access token di durata ignota: sarebbe considerato valido per sempre
+                info.pop('token', None)
+            creds = Credentials.from_authorized_user_info(info, scopes)
+        except (ValueError, KeyError) as e:
+            print(f"Errore caricamento token: {e}")
+
+    if creds and creds.valid:
+        return creds
+
+    if creds and creds.refresh_token:
+        try:
+            print("Refresh token OAuth2...")
+            creds.refresh(Request())
+            _save_token(creds, token_path)
+            return creds
+        except Exception as e:
+            print(f"Errore refresh token: {e}")
+
+    if not interactive:
+        raise RuntimeError(f"Token OAuth2 mancante o non rinnovabile: {token_file}")
+
+    print("Avvio autenticazione OAuth2 interattiva...")
+    print("Si aprirà il browser per autorizzare l'applicazione.")
+    flow = InstalledAppFlow.from_client_secrets_file(secrets_file, scopes)
+    creds = flow.run_local_server(port=0)
+    print("Autenticazione completata")
+    _save_token(creds, token_path)
+    print(f"Token salvato: {token_file}")
+    return creds
+
+
+def get_client(
+    secrets_file: str,
+    token_file: str,
+    scopes: Optional[list] = None,
+    interactive: bool = True
+):
+    """
+    Client YouTube Data API v3, costruito una volta per processo.
+
+    Il documento di discovery è quello incluso in google-api-python-client
+    (static_discovery): build() non lo scarica dalla rete. Le chiamate
+    successive riusano lo stesso client; le credenziali si rinnovano da sole
+    alla scadenza (google-auth) e il token rinnovato viene risalvato qui.
+
+    Args:
+        secrets_file: Path al file credenziali OAuth2
+        token_file: Path del token salvato
+        scopes: Scope richiesti (default: quelli salvati nel token)
+        interactive: Consente il flow OAuth2 nel browser
+
+    Returns:
+        YouTube API client
+    """
+    key = (str(Path(token_file).resolve()), tuple(scopes or ()))
+    with _lock:
+        cached = _clients.get(key)
+        if cached is not None:
+            creds, youtube, saved_token = cached
+            if creds.token != saved_token:
+                _save_token(creds, Path(token_file))
+                _clients[key] = (creds, youtube, creds.token)
+            return youtube
+
+        creds = load_credentials(secrets_file, token_file, scopes, interactive)
+        youtube = build('youtube', 'v3', credentials=creds, static_discovery=True, cache_discovery=False)
+        _clients[key] = (creds, youtube, creds.token)
+        return youtube
+
+
+def authorized_http(
+    secrets_file: str,
+    token_file: str,
+    scopes: Optional[list] = None,
+    interactive: bool = True,
+    timeout: int = DEFAULT_HTTP_TIMEOUT
+):
+    """
+    Nuovo Http autorizzato con le credenziali del client condiviso.
+
+    httplib2 non è thread-safe: ogni thread che usa il client condiviso
+    passa il proprio Http a request.execute(http=...).
+
+    Returns:
+        google_auth_httplib2.AuthorizedHttp
+    """
+    get_client(secrets_file, token_file, scopes, interactive)
+    key = (str(Path(token_file).resolve()), tuple(scopes or ()))
+    with _lock:
+        creds = _clients[key][0]
+    return google_auth_httplib2.AuthorizedHttp(creds, http=httplib2.Http(timeout=timeout))
+
+
+def reset() -> None:
+    """Dimentica i client costruiti (es. dopo una nuova autenticazione)."""
+    with _lock:
+        _clients.clear()